@@ -184,16 +184,13 @@ class AdvectiveProcess:
         # droplet volume flux (bubbleRate) taken from Kerman 1986, dependent on
         # windspeed (1*10^-9 cm/s at windspeeds of 6 m/s, and (9*10^-4 cm/s at windspeeds greater than 12 m/s)
 
-        if windspeed_s < 6:  # m/s
-            bubbleRate = 0
-        elif windspeed_s > 12:  # m/s
-            # rate from Wu et al. 1984
-            # convert from cm/s to m/day
-            bubbleRate = (9 * 10 ** -4) * 86400 / 100.0
-        else:
-            # rate from blanchard 1963
-            # convert from cm/s to m/day
-            bubbleRate = (1 * 10 ** -9) * 86400 / 100.0
+        # np.where keeps the branches valid for a whole windspeed series as well as for one day
+        # below 6 m/s no bubbles are formed
+        # above 12 m/s rate from Wu et al. 1984, otherwise rate from blanchard 1963
+        # convert from cm/s to m/day
+        bubbleRate = np.where(windspeed_s < 6, 0,  # m/s
+                              np.where(windspeed_s > 12, (9 * 10 ** -4) * 86400 / 100.0,  # m/s
+                                       (1 * 10 ** -9) * 86400 / 100.0))
 
         return bubbleRate
 
@@ -205,9 +202,7 @@ class AdvectiveProcess:
         # Reference:  # http://www.nrcs.usda.gov/Internet/FSE_DOCUMENTS/stelprdb1082989.pdf
         # conversion factor from mm/d to inches/d
         # 1 mm = 0.039 inch
-        Qthreshold = 0
-        if (precip_mm * 0.0393701) > (0.2 * CN):
-            Qthreshold = (((precip_mm * 0.0393701) - 0.2 * CN) ** 2) / (((precip_mm * 0.0393701) + 0.8 * CN))
+        Qthreshold = self.runoff_depth(precip_mm, CN)
 
         # 1 in/hr = 1 cfs/acre
         # ft3/s-acre * M3/ft3 * s/d * acre/m2 * m2 * unitless = m3/day
@@ -216,6 +211,16 @@ class AdvectiveProcess:
         return D_runoff_val
 
 
+    def runoff_depth(self, precip_mm, CN):
+        # NRCS curve number runoff, 0 until precipitation exceeds the initial abstraction 0.2*CN
+        # written with np.where so that precip_mm can be one day or the whole climate series
+        precip_in = np.multiply(precip_mm, 0.0393701)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            Qthreshold = np.where(precip_in > (0.2 * CN),
+                                  ((precip_in - 0.2 * CN) ** 2) / (precip_in + 0.8 * CN), 0)
+        return Qthreshold
+
+
     ''' Soil Erosion '''
 
     def D_erosion(self, precip_mm, slope, Kfact, cropManageFactor, supportFactor, soilA, soilP, Z_soilSolid):
@@ -280,8 +285,7 @@ class AdvectiveProcess:
         # if there was precipitation recently, then the minimum threshold is
         # increased to 30 m/s windspeed, cause not much wind erosion when soil is saturated
 
-        if precip_mm > 10:
-            TSV = TSVmin  # % m/s
+        TSV = np.where(precip_mm > 10, TSVmin, TSV)  # % m/s
         # Uz=wind; % m/s
         # k=0.41; % von Karmen constant, unitless
 
@@ -291,11 +295,10 @@ class AdvectiveProcess:
         # g=9.81; acceleration due to gravity in m/s2
         # calculate horizontal Qtot and vertical Fa fluxes
 
-        Fa = 0
-        if ustar > TSV:
-            # unitless * (kg/m3)/(m/s2) * (m/s * ((m/s)^2 - (m/s)^2)) * 1/m = kg/m2-s
-            # kg/m-s * m-1 = kg/m2 s
-            Fa = (A * (airP / 9.81) * (ustar * ((ustar ** 2) - (TSV ** 2)))) * Kconstant
+        # no erosion while ustar is below the threshold
+        # unitless * (kg/m3)/(m/s2) * (m/s * ((m/s)^2 - (m/s)^2)) * 1/m = kg/m2-s
+        # kg/m-s * m-1 = kg/m2 s
+        Fa = np.where(ustar > TSV, (A * (airP / 9.81) * (ustar * ((ustar ** 2) - (TSV ** 2)))) * Kconstant, 0)
 
         # convert to kg/m2-day
         # if wind constantly throughout the day Fa*86400
@@ -313,28 +316,20 @@ class AdvectiveProcess:
     # https://swat.tamu.edu/media/99192/swat2009-theory.pdf (percolation calculation)
     def D_infiltra(self, precip_mm, CN, evap_mm, FC, soilWC, soilV, soilA, Z_water):
         # FC = field capacity(m^3/m^3): https://stormwater.pca.state.mn.us/index.php?title=Soil_water_storage_properties
-        runoff_mm = 0
-        if (precip_mm * 0.0393701) > (0.2 * CN):
-            runoff_mm = (((precip_mm * 0.0393701) - 0.2 * CN) ** 2) / (((precip_mm * 0.0393701) + 0.8 * CN))
+        runoff_mm = self.runoff_depth(precip_mm, CN)
 
         # unit: mm/day
         infil_mm = precip_mm - runoff_mm - evap_mm
 
-        if infil_mm <= 0:
-            k_infil, D_infiltra_val = 0, 0
-        else:
-            # unit: unitless * m3 + mm/day * m/1000mm * m2 = m3
-            soil_water = soilWC * soilV + infil_mm * 0.001 * soilA
-
-            # unit: unitless * m3 = m3
-            if soil_water >= FC * soilV:
-                # unit: m3/day
-                k_infil = soil_water - FC * soilV
-            else:
-                k_infil = 0
-
-            # unit: m3/day * unitless = m3/day
-            D_infiltra_val = k_infil * Z_water
+        # unit: unitless * m3 + mm/day * m/1000mm * m2 = m3
+        soil_water = soilWC * soilV + infil_mm * 0.001 * soilA
+
+        # no infiltration without net water input or below field capacity
+        # unit: unitless * m3 = m3/day
+        k_infil = np.where((infil_mm > 0) & (soil_water >= FC * soilV), soil_water - FC * soilV, 0)
+
+        # unit: m3/day * unitless = m3/day
+        D_infiltra_val = k_infil * Z_water
 
         return D_infiltra_val, k_infil
 
@@ -121,29 +121,23 @@ def waterAdv(flow,wV,partC,partP):
 def vertFlow(precip_mm, CN, evap_mm, FC, soilWC, soilV, soilA):
     # % Mass transfer of soil water to deep soil transfer
     # FC = field capacity(m^3/m^3): https://stormwater.pca.state.mn.us/index.php?title=Soil_water_storage_properties
-    runoff_mm = 0
-
-    if (precip_mm * 0.0393701) > (0.2 * CN):
-        runoff_mm = (((precip_mm * 0.0393701) - 0.2 * CN) ** 2) / (((precip_mm * 0.0393701) + 0.8 * CN))
+    # % np.where keeps the branches valid for a whole climate series as well as for one day
+    precip_in = np.multiply(precip_mm, 0.0393701)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        runoff_mm = np.where(precip_in > (0.2 * CN), ((precip_in - 0.2 * CN) ** 2) / (precip_in + 0.8 * CN), 0)
 
     # unit: mm/day
     infil_mm = precip_mm - runoff_mm - evap_mm
 
-    if infil_mm <= 0:
-        k_infil, Qvert = 0, 0
-    else:
-        # unit: unitless * m3 + mm/day * m/1000mm * m2 = m3
-        soil_water = soilWC * soilV + infil_mm * 0.001 * soilA
-
-        # unit: unitless * m3 = m3
-        if soil_water >= FC * soilV:
-            # unit: m3/day
-            k_infil = soil_water - FC * soilV
-        else:
-            k_infil = 0
-
-        # unit: m3/day / m3 = 1/day
-        Qvert = k_infil / soilV
+    # unit: unitless * m3 + mm/day * m/1000mm * m2 = m3
+    soil_water = soilWC * soilV + infil_mm * 0.001 * soilA
+
+    # no infiltration without net water input or below field capacity
+    # unit: unitless * m3 = m3/day
+    k_infil = np.where((infil_mm > 0) & (soil_water >= FC * soilV), soil_water - FC * soilV, 0)
+
+    # unit: m3/day / m3 = 1/day
+    Qvert = k_infil / soilV
     return k_infil, Qvert
 
 def horiFlow(k_infil, soilV):
@@ -177,6 +171,25 @@ def soilwaterPartition(MassS,MassSW,elution,direction):
     return [Mpart1, Mpart2]
 
 
+def soilwaterPartitionJac(MassS,MassSW,elution,direction):
+    # %   Partial derivatives of soilwaterPartition with respect to MassS and MassSW
+    # %   The transfer is piecewise linear in the two masses, so the same branches
+    # %   are followed and the slope of the active branch is returned
+    # %   [[dMpart1/dMassS, dMpart1/dMassSW], [dMpart2/dMassS, dMpart2/dMassSW]]
+    dMpart1=[0, 0]
+    dMpart2=[0, 0]
+    if (MassS+MassSW) != 0:
+        if direction==2:
+            if np.true_divide((MassSW),(MassS+MassSW))>(1-elution) and (MassSW)>(((MassS+MassSW)*elution)-MassS):
+                dMpart2=[elution-1, elution]
+            else:
+                dMpart2=[0, 1]
+        elif np.true_divide((MassSW),(MassS+MassSW)) < (1-elution):
+            dMpart1=[1-elution, -elution]
+
+    return [dMpart1, dMpart2]
+
+
 def sedDeposition(ssP,wP,dynVisc,radiusParticles,depth):
     # %  Stokes law to calculate sedimentation of suspended sediment
     # % g=9.8; % gravitational acceleration in m/s2
@@ -213,9 +226,10 @@ def runoff(precipI,CN,area, soilV):
     # % calculations need to be done in inches,
     # % precip=precip*(1/25.4)*(1/24)
     # % conversion factor from mm/d to inches
-    Q=0
-    if (precipI*(1/25.4))>(0.2*CN):
-        Q=(((precipI*(1/25.4))-0.2*CN)**2)/(((precipI*(1/25.4))+0.8*CN))
+    # % written with np.where so precipI can be one day or the whole climate series
+    precipIn=np.multiply(precipI,(1/25.4))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        Q=np.where(precipIn>(0.2*CN),((precipIn-0.2*CN)**2)/((precipIn+0.8*CN)),0)
 
     # %http://www.nrcs.usda.gov/Internet/FSE_DOCUMENTS/stelprdb1082989.pdf
     # % 1 in/hr = 1 cfs/acre
@@ -228,7 +242,7 @@ def erosion(precipI,Kfact,lenslope,cropManageFactor,supportFactor,area,soilP):
     # % Rainfall erosivity factor
     # % http://www.sciencedirect.com.proxy.library.ucsb.edu:2048/science/article/pii/S004896971500011X
 
-    er=0.29*(1-0.72*math.exp(-0.05*precipI)) # % precip in mm/d
+    er=0.29*(1-0.72*np.exp(-0.05*np.asarray(precipI))) # % precip in mm/d
     # % this implicitly contains day because we don't use 30 minute storm
     # % intensity, we use 1 day storm total
     EI=er*precipI*(precipI)*np.true_divide(1,24) # % (MJ mm ha-1 hr-1 d-1)
@@ -312,8 +326,7 @@ def windErosion(wind,precipI,roughness,Kconstant,airP,soilA,A,TSV,TSVmin,z_wind,
     # % increased to 30 m/s windspeed, cause not much wind erosion when soil
     # % is saturated
 
-    if precipI>10:
-        TSV=TSVmin #% m/s
+    TSV=np.where(np.asarray(precipI)>10,TSVmin,TSV) #% m/s
 
     # % Uz=wind; % m/s
     # % k=0.41; % von Karmen constant, unitless
@@ -323,12 +336,10 @@ def windErosion(wind,precipI,roughness,Kconstant,airP,soilA,A,TSV,TSVmin,z_wind,
 
     # % g=9.81; % acceleration due to gravity in m/s2
     # % calculate horizontal Qtot and vertical Fa fluxes
-    Fa=0
-    if ustar>TSV:
-        # % A * (airP/9.81)*(ustar*((ustar^2)-(TSV^2)))) if Qtot
-        Fa=(A*(airP/9.81)*(ustar*((ustar**2)-(TSV**2))))*Kconstant
-        # % K is the conversion constant between horizontal and vertical fluxes in 1/m
-        # % kg/m-s * m-1 = kg/m2 s
+    # % A * (airP/9.81)*(ustar*((ustar^2)-(TSV^2)))) if Qtot, no erosion while ustar is below the threshold
+    # % K is the conversion constant between horizontal and vertical fluxes in 1/m
+    # % kg/m-s * m-1 = kg/m2 s
+    Fa=np.where(ustar>TSV,(A*(airP/9.81)*(ustar*((ustar**2)-(TSV**2))))*Kconstant,0)
 
     # % conversion to proper units
     # % if wind constantly throughout the day Fa*86400
@@ -401,21 +412,60 @@ def odeDissolution(a, b, MassENM, MassDiss, k, V):
     return [Mdisw, lossENM]
 
 
+def odeDissolutionJac(a, b, MassENM, MassDiss, k, V):
+    # % Partial derivatives of odeDissolution with respect to MassENM and MassDiss
+    # % the same branches are followed as in odeDissolution, inside a branch the
+    # % dissolved mass is either k*MassENM, 0, or capped by the equilibrium percentage
+    # % [[dMdisw/dMassENM, dMdisw/dMassDiss], [dlossENM/dMassENM, dlossENM/dMassDiss]]
+    eqPerc = 99.9999
+    # % derivative of eqPerc with respect to the total mass (MassENM + MassDiss)
+    dEqPerc = 0
+    if np.true_divide((MassENM + MassDiss), V) > 10 ** 2:
+        eqPerc = a * math.exp(b * (np.true_divide(MassENM + MassDiss, V)))
+        dEqPerc = eqPerc * np.true_divide(b, V)
+        if eqPerc >= 100:
+            eqPerc = 99.9999
+            dEqPerc = 0
+        elif eqPerc < 0.0000001:
+            eqPerc = 0
+            dEqPerc = 0
+
+    Mdisw = k * MassENM
+    dMdisw = [k, 0]
+    if k == 0 or MassENM == 0:
+        Mdisw = 0
+        dMdisw = [0, 0]
+    elif (np.true_divide(MassDiss, (MassENM + MassDiss)) * 100) >= eqPerc:
+        Mdisw = 0
+        dMdisw = [0, 0]
+    elif ((Mdisw + MassDiss) / (MassENM + MassDiss)) * 100 >= eqPerc:
+        Mdisw = np.true_divide((eqPerc - 0.0000001), 100) * (MassENM + MassDiss)
+        dCap = np.true_divide((eqPerc - 0.0000001) + (MassENM + MassDiss) * dEqPerc, 100)
+        dMdisw = [dCap, dCap]
+        if Mdisw < 0:
+            Mdisw = 0
+            dMdisw = [0, 0]
+
+    if Mdisw > MassDiss:
+        dLossENM = [dMdisw[0], dMdisw[1] - 1]
+    else:
+        dLossENM = [0, 0]
+
+    return [dMdisw, dLossENM]
+
+
 def bubbleFormation(windspeed):
     # %   Droplet volume flux (bubbleRate) taken from Kerman 1986, dependent on
     # %   windspeed (1*10^-9 cm/s at windspeeds of 6 m/s, and (9*10^-4 cm/s at windspeeds
     # %   greater than 12 m/s)
 
-    if windspeed < 6:  # % m/s
-        bubbleRate = 0
-    elif windspeed > 12:  # % m/s
-        # bubbleRate=(9*10**-4)*86400/100 #% convert from cm/s to m/day,
-        bubbleRate = (9 * 10 ** -4) * np.true_divide(86400, 100)
-    # %rate from Wu et al. 1984
-    else:
-        # bubbleRate=(1*10**-9)*86400/100 #% convert to m/day,
-        bubbleRate = (1 * 10 ** -9) * np.true_divide(86400, 100)
-    # %rate from blanchard 1963
+    # % no bubbles below 6 m/s
+    # % above 12 m/s rate from Wu et al. 1984, otherwise rate from blanchard 1963
+    # % bubbleRate=(9*10**-4)*86400/100 or (1*10**-9)*86400/100 #% convert from cm/s to m/day
+    # % np.where keeps the branches valid for a whole windspeed series as well as for one day
+    bubbleRate = np.where(np.asarray(windspeed) < 6, 0,  # % m/s
+                          np.where(np.asarray(windspeed) > 12, (9 * 10 ** -4) * np.true_divide(86400, 100),  # % m/s
+                                   (1 * 10 ** -9) * np.true_divide(86400, 100)))
 
     return bubbleRate
 
@@ -0,0 +1,137 @@
+import os
+import sys
+import argparse
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from result_export import check_output_format, write_tables
+from monte_carlo import concentration_unit, read_config
+
+
+# source-receptor attribution of the organic, ionizable and metal models: how much of the concentration of a
+# receptor (a bulk compartment on a date) comes from each release column of the release file on every prior day
+# usage, from the ChemFate_py3 folder like run_ChemFate.py:
+#     python attribution.py attribution.yaml
+# the configuration (YAML or JSON) holds the inputs of a run as for monte_carlo (chem_type, chem_file, region_file,
+# release_file, start_date, end_date, file_name, output_file_path) and the receptors, e.g.
+#     compartments: [agricultural_soil, fw]
+#     dates: ['2005 6 30', '2005 12 31']
+# every compartment on every date is a receptor, by default all bulk compartments on the end date
+# the receptors are solved backward with the adjoint of the daily propagators (model_solver.source_receptor), all
+# in a single pass, in place of a forward run per release column and day; the propagators are shared with the
+# 'propagator' runs of the chemical and region through the input_cache
+# results: table 'sr_sensitivity' with a sheet per receptor (source days x release columns, g/L of the receptor per
+# kg/day released), table 'sr_contribution' with the same sheets for the releases of the run (g/L), and table
+# 'sr_summary' with the concentration of every receptor split into its background (initial state, background
+# concentrations and inflows) and the total contribution of each release column
+
+# columns of the bulk sheets of the concentration table, in the order of the model states
+compartment_names = ['air', 'fw', 'fw_sed', 'sw', 'sw_sed', 'undeveloped_soil', 'deep_undeveloped_soil',
+                     'urban_soil', 'deep_urban_soil', 'agricultural_soil', 'deep_agricultural_soil', 'biosolids_soil',
+                     'deep_biosolids_soil']
+
+# options of SourceReceptor and their defaults
+config_options = OrderedDict([('file_name', 'source_receptor'), ('output_file_path', None), ('compartments', None),
+                              ('dates', None), ('output_format', 'xlsx')])
+
+
+class SourceReceptor:
+
+    def __init__(self, start_date, end_date, chem_type, chem_file, region_file, release_file, output_file_path,
+                 file_name, compartments=None, dates=None, output_format='xlsx'):
+        # compartments are names of compartment_names (default all of them), dates are in the '%Y %m %d' format of
+        # start_date (default the end date)
+        if chem_type == 'Nanomaterial':
+            raise ValueError('the source-receptor attribution covers the NonionizableOrganic, IonizableOrganic and '
+                             'Metal models')
+        check_output_format(output_format)
+        self.start_date = start_date
+        self.end_date = end_date
+        self.chem_type = chem_type
+        self.chem_file = chem_file
+        self.region_file = region_file
+        self.release_file = release_file
+        self.output_file_path = output_file_path
+        self.file_name = file_name
+        self.compartments = list(compartments or compartment_names)
+        self.dates = [str(date) for date in (dates or [end_date])]
+        self.output_format = output_format
+        for compartment in self.compartments:
+            if compartment not in compartment_names:
+                raise ValueError("compartments need to be among %s" % ', '.join(compartment_names))
+
+    def receptors(self):
+        # (compartment index, day index) of every receptor and its sheet name
+        start_day = datetime.strptime(self.start_date, "%Y %m %d")
+        time = (datetime.strptime(self.end_date, "%Y %m %d") - start_day).days + 1
+        receptors = []
+        sheets = []
+        for date in self.dates:
+            receptor_day = datetime.strptime(date, "%Y %m %d")
+            day = (receptor_day - start_day).days
+            if day < 0 or day >= time:
+                raise ValueError('receptor date %s is not between %s and %s' % (date, self.start_date, self.end_date))
+            for compartment in self.compartments:
+                receptors.append((compartment_names.index(compartment), day))
+                sheets.append('%s %s' % (compartment, receptor_day.strftime('%Y%m%d')))
+        return receptors, sheets
+
+    def run(self):
+        # solve the receptors backward and write the attribution tables, returns the tables
+        import pandas as pd
+        from load_data import LoadData
+        from model_solver import source_receptor, release_columns
+        receptors, sheets = self.receptors()
+        chemParams, presence, env, climate, bgConc, release, release_scenario = \
+            LoadData(self.chem_type, self.chem_file, self.region_file, self.release_file, self.start_date,
+                     self.end_date).run_loadData()
+        # the release dates are not used by the solvers
+        release = dict((key, value) for key, value in release.items() if key != 'dates')
+        time = (datetime.strptime(self.end_date, "%Y %m %d") - datetime.strptime(self.start_date, "%Y %m %d")).days + 1
+        sensitivity, contribution, background = source_receptor(self.chem_type, time, presence, env, climate,
+                                                                 chemParams, bgConc, release, receptors)
+
+        # kg/m^3 = g/L
+        start_day = datetime.strptime(self.start_date, "%Y %m %d")
+        date_array = [(start_day + timedelta(days=i)).strftime('%Y %m %d') for i in range(time)]
+        sensitivity_sheets = OrderedDict()
+        contribution_sheets = OrderedDict()
+        for r, ((compartment, day), sheet) in enumerate(zip(receptors, sheets)):
+            sensitivity_sheets[sheet] = pd.DataFrame(sensitivity[r, :day + 1], index=date_array[:day + 1],
+                                                     columns=release_columns)
+            contribution_sheets[sheet] = pd.DataFrame(contribution[r, :day + 1], index=date_array[:day + 1],
+                                                      columns=release_columns)
+        totals = contribution.sum(axis=1)
+        summary = pd.DataFrame(totals, index=pd.Index(sheets, name='receptor'), columns=release_columns)
+        summary.insert(0, 'background', background)
+        summary.insert(0, 'concentration', background + totals.sum(axis=1))
+        summary.insert(0, 'date', [date_array[day] for compartment, day in receptors])
+        summary.insert(0, 'compartment', [compartment_names[compartment] for compartment, day in receptors])
+
+        tables = OrderedDict([('sr_summary', OrderedDict([('receptors', summary)])),
+                              ('sr_sensitivity', sensitivity_sheets), ('sr_contribution', contribution_sheets)])
+        units = {'sr_summary': concentration_unit, 'sr_sensitivity': concentration_unit + ' per kg/day',
+                 'sr_contribution': concentration_unit}
+        if not os.path.exists(self.output_file_path):
+            os.makedirs(self.output_file_path)
+        write_tables(tables, units, self.output_file_path, self.file_name, self.output_format)
+        return tables
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ChemFate source-receptor attribution of the concentrations to the '
+                                                 'releases of every day')
+    parser.add_argument('config', help='YAML or JSON file with the inputs and receptors')
+    args = parser.parse_args()
+
+    arguments = read_config(args.config, config_options)
+    # the configuration has no parameter distributions
+    arguments.pop('chem_distributions')
+    arguments.pop('env_distributions')
+    arguments['output_file_path'] = os.path.join(arguments['output_file_path'], '')
+    SourceReceptor(**arguments).run()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
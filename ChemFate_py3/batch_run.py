@@ -0,0 +1,281 @@
+import os
+import sys
+import csv
+import time
+import argparse
+import traceback
+import contextlib
+from collections import OrderedDict
+
+
+# runs of a campaign (chemicals x regions x release scenarios x periods) listed in a manifest, executed in a pool
+# of worker processes
+# usage, from the ChemFate_py3 folder like run_ChemFate.py:
+#     python batch_run.py campaign.csv [--workers 4] [--summary campaign_summary.csv]
+# the manifest is a CSV file with a header row, or a YAML file with a list of runs (or a mapping with 'defaults'
+# and 'runs', the defaults apply to every run); every run needs the columns of manifest_fields and may set the
+# Model_SetUp options of run_options, empty cells take the defaults; relative file paths are taken from the folder
+# of the manifest
+# the inputs are parsed once before the runs: every region and period first, then every distinct set of input
+# files, into the input_cache that the workers read them from; the runs with solver_mode 'propagator' then get the
+# daily propagators of every chemical, region and period computed once, so a campaign of release scenarios only
+# applies them to its releases
+# every run writes its tables to output_file_path (default ./Output/<file_name>/) and the solver output to
+# <file_name>.log there; a failed run is reported in the summary and does not stop the campaign
+
+CUR_PATH = os.path.dirname(os.path.abspath(__file__))
+
+manifest_fields = ['chem_type', 'chem_file', 'region_file', 'release_file', 'start_date', 'end_date']
+
+# options of a run and their defaults, batch runs draw no figures unless the manifest asks for them
+run_options = OrderedDict([('file_name', None), ('output_file_path', None), ('run_option', 1), ('bgPercOption2', 10),
+                           ('solver_mode', 'vode'), ('solver_preset', 'default'), ('process_output', 'snapshot'),
+                           ('output_format', 'xlsx'), ('stream_days', None), ('stream_format', 'csv'),
+                           ('plots', 'none'), ('plot_workers', 1)])
+
+# options passed on to Model_SetUp by name
+setup_options = ['solver_mode', 'solver_preset', 'process_output', 'output_format', 'stream_days', 'stream_format',
+                 'plots', 'plot_workers']
+
+# types of the options read from text
+option_types = {'run_option': int, 'bgPercOption2': float, 'stream_days': int, 'plot_workers': int}
+
+path_fields = ['chem_file', 'region_file', 'release_file', 'output_file_path']
+
+summary_fields = ['run', 'file_name', 'chem_type', 'chem_file', 'region_file', 'release_file', 'start_date',
+                  'end_date', 'status', 'seconds', 'error']
+
+
+def read_manifest(manifest_file):
+    # runs of the manifest as dictionaries of manifest_fields and run_options
+    if manifest_file.lower().endswith(('.yaml', '.yml')):
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError('YAML manifests need the PyYAML package, or use a CSV manifest')
+        with open(manifest_file) as f:
+            contents = yaml.safe_load(f)
+        defaults = {}
+        if isinstance(contents, dict):
+            defaults = contents.get('defaults') or {}
+            contents = contents.get('runs') or []
+        rows = [dict(defaults, **row) for row in contents]
+    else:
+        with open(manifest_file, newline='') as f:
+            rows = [row for row in csv.DictReader(f, skipinitialspace=True)]
+
+    base = os.path.dirname(os.path.abspath(manifest_file))
+    runs = []
+    for k, row in enumerate(rows):
+        run = OrderedDict()
+        for field in manifest_fields + list(run_options):
+            value = row.get(field)
+            if isinstance(value, str):
+                value = value.strip()
+            if value is None or value == '':
+                if field in manifest_fields:
+                    raise ValueError('run %d of %s has no %s' % (k + 1, manifest_file, field))
+                value = run_options[field]
+            elif field in option_types:
+                value = option_types[field](value)
+            else:
+                value = str(value)
+            if field in path_fields and value is not None:
+                value = os.path.join(base, value)
+            run[field] = value
+        if run['file_name'] is None:
+            run['file_name'] = 'run_%d' % (k + 1)
+        if run['output_file_path'] is None:
+            run['output_file_path'] = os.path.join(CUR_PATH, 'Output', run['file_name'])
+        runs.append(run)
+    return runs
+
+
+def region_task(run):
+    # what the region inputs of a run depend on
+    return (run['chem_type'] == 'Nanomaterial', run['region_file'], run['start_date'], run['end_date'])
+
+
+def input_task(run):
+    # what the parsed inputs of a run depend on
+    return (run['chem_type'], run['chem_file'], run['region_file'], run['release_file'], run['start_date'],
+            run['end_date'])
+
+
+def prepare_region(task):
+    # parse presence, environment and climate of a region and period into the input_cache
+    nano, region_file, start_date, end_date = task
+    try:
+        if nano:
+            from load_data_nano import load_region
+            load_region(region_file, start_date, end_date)
+        else:
+            from load_data import LoadData
+            LoadData(None, None, region_file, None, start_date, end_date).region_inputs()
+    except Exception:
+        # the runs of the region parse it again and report the error
+        return traceback.format_exc()
+    return None
+
+
+def prepare_inputs(task):
+    # parse the inputs of a run into the input_cache
+    chem_type, chem_file, region_file, release_file, start_date, end_date = task
+    try:
+        if chem_type == 'Nanomaterial':
+            from load_data_nano import load_data
+            load_data(region_file, release_file, chem_file, start_date, end_date)
+        else:
+            from load_data import LoadData
+            LoadData(chem_type, chem_file, region_file, release_file, start_date, end_date).run_loadData()
+    except Exception:
+        return traceback.format_exc()
+    return None
+
+
+def propagator_task(run):
+    # what the daily propagators of a 'propagator' run depend on, None for the other runs
+    if run['solver_mode'] != 'propagator' or run['chem_type'] == 'Nanomaterial':
+        return None
+    return (run['chem_type'], run['chem_file'], run['region_file'], run['start_date'], run['end_date'],
+            run['process_output'])
+
+
+def prepare_propagators(run):
+    # compute the daily propagators of the chemical, region and period of a run into the input_cache, by solving
+    # its first day
+    try:
+        from load_data import LoadData
+        from model_setup import Model_SetUp
+        chemParams, presence, env, climate, bgConc, release, release_scenario = \
+            LoadData(run['chem_type'], run['chem_file'], run['region_file'], run['release_file'], run['start_date'],
+                     run['end_date']).run_loadData()
+        model = Model_SetUp(run['start_date'], run['end_date'], 1, 0, run['chem_type'], run['chem_file'],
+                            run['region_file'], run['release_file'], '', '', solver_mode='propagator',
+                            process_output=run['process_output'], plots='none')
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            next(model.result_blocks(model.simulation_days(), presence, env, climate, chemParams, bgConc, release,
+                                     block_days=1))
+    except Exception:
+        return traceback.format_exc()
+    return None
+
+
+def execute_run(run):
+    # one run of the campaign, its solver output goes to the log file of the run
+    # returns the summary record, an exception of the run is reported there instead of raised
+    from model_setup import Model_SetUp
+    record = OrderedDict((field, run.get(field, '')) for field in summary_fields)
+    started = time.time()
+    try:
+        if not os.path.exists(run['output_file_path']):
+            os.makedirs(run['output_file_path'])
+        log_file = os.path.join(run['output_file_path'], run['file_name'] + '.log')
+        with open(log_file, 'w') as log, contextlib.redirect_stdout(log):
+            try:
+                model = Model_SetUp(run['start_date'], run['end_date'], run['run_option'], run['bgPercOption2'],
+                                    run['chem_type'], run['chem_file'], run['region_file'], run['release_file'],
+                                    os.path.join(run['output_file_path'], ''), run['file_name'],
+                                    **dict((name, run[name]) for name in setup_options))
+                model.run_model()
+            except Exception:
+                traceback.print_exc(file=log)
+                raise
+        record['status'] = 'done'
+        record['error'] = ''
+    except Exception as e:
+        record['status'] = 'failed'
+        record['error'] = '%s: %s' % (type(e).__name__, e)
+    record['seconds'] = round(time.time() - started, 3)
+    return record
+
+
+def pool_map(function, tasks, workers):
+    # function over tasks in a pool of workers, results in the order of the tasks
+    # a worker that dies (e.g. killed for its memory) breaks the pool, the tasks lost with it are tried again one
+    # by one in a process of their own, and a task that kills that process too gives None
+    if workers <= 1:
+        return [function(task) for task in tasks]
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from concurrent.futures.process import BrokenProcessPool
+    results = [None] * len(tasks)
+    lost = []
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+        futures = dict((executor.submit(function, task), k) for k, task in enumerate(tasks))
+        for future in as_completed(futures):
+            try:
+                results[futures[future]] = future.result()
+            except BrokenProcessPool:
+                lost.append(futures[future])
+    for k in sorted(lost):
+        try:
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                results[k] = executor.submit(function, tasks[k]).result()
+        except BrokenProcessPool:
+            results[k] = None
+    return results
+
+
+def run_campaign(runs, workers=None, prepare=True):
+    # execute the runs in a pool of workers, returns their summary records in the order of the runs
+    # workers None uses one worker per CPU
+    if workers is None:
+        workers = os.cpu_count() or 1
+    for k, run in enumerate(runs):
+        run['run'] = k + 1
+
+    if prepare:
+        # every region and period, then every set of input files, is parsed once into the input_cache
+        for task_of, prepare_task in [(region_task, prepare_region), (input_task, prepare_inputs)]:
+            tasks = list(OrderedDict.fromkeys(task_of(run) for run in runs))
+            pool_map(prepare_task, tasks, workers)
+        # the first run of every chemical, region and period stands for the others
+        groups = OrderedDict()
+        for run in runs:
+            task = propagator_task(run)
+            if task is not None and task not in groups:
+                groups[task] = run
+        pool_map(prepare_propagators, list(groups.values()), workers)
+
+    records = pool_map(execute_run, runs, workers)
+    for run, record in zip(runs, records):
+        if record is None:
+            record = OrderedDict((field, run.get(field, '')) for field in summary_fields)
+            record['status'] = 'failed'
+            record['error'] = 'the worker process of the run terminated abruptly'
+            records[run['run'] - 1] = record
+    return records
+
+
+def write_summary(records, summary_file):
+    with open(summary_file, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=summary_fields)
+        writer.writeheader()
+        for record in records:
+            writer.writerow(record)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ChemFate runs of a campaign manifest in a pool of processes')
+    parser.add_argument('manifest', help='CSV or YAML file with one run per row')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes, one per CPU by default')
+    parser.add_argument('--summary', default=None,
+                        help='CSV file of the status of every run, <manifest>_summary.csv by default')
+    parser.add_argument('--no-prepare', action='store_true',
+                        help='do not parse the shared inputs before the runs')
+    args = parser.parse_args()
+
+    runs = read_manifest(args.manifest)
+    records = run_campaign(runs, args.workers, prepare=not args.no_prepare)
+    summary_file = args.summary or os.path.splitext(args.manifest)[0] + '_summary.csv'
+    write_summary(records, summary_file)
+
+    failed = [record for record in records if record['status'] != 'done']
+    print('%d of %d runs done, summary in %s' % (len(records) - len(failed), len(records), summary_file))
+    for record in failed:
+        print('run %s (%s) failed: %s' % (record['run'], record['file_name'], record['error']))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
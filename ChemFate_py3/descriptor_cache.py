@@ -0,0 +1,109 @@
+import os
+import json
+import sqlite3
+
+from input_cache import cache_dir
+
+
+# molecular descriptors of the organic base sorption model (Kd_organic_base), computed once per canonical SMILES
+# only McGowan's volume is calculated by mordred, NAi comes from the RDKit amine fragment counts
+# results are kept in memory for the process and in a SQLite table next to the input cache, so later runs and
+# screenings of chemical libraries read them back instead of recomputing
+# RDKit and mordred are imported by the first calculation, runs served from the cache never load them
+
+cache_file = os.path.join(cache_dir, 'descriptors.sqlite')
+
+# bump when the descriptors or their calculation change, older rows are then recomputed
+descriptor_version = 1
+
+_descriptors = {}
+_calculator = None
+
+
+def canonical_smiles(smiles):
+    from rdkit import Chem
+    mol = Chem.MolFromSmiles(smiles)
+    if mol is None:
+        raise ValueError('invalid SMILES %r' % smiles)
+    return Chem.MolToSmiles(mol), mol
+
+
+def compute_descriptors(mol):
+    # McGowan's Volume and number of hydrogens bound by the charged nitrogen
+    from rdkit.Chem import Fragments
+    global _calculator
+    if _calculator is None:
+        from mordred import Calculator
+        from mordred.McGowanVolume import McGowanVolume
+        _calculator = Calculator(McGowanVolume())
+    NH0 = Fragments.fr_NH0(mol)  # number of Tertiary amines
+    NH1 = Fragments.fr_NH1(mol)  # number of Secondary amines
+    NH2 = Fragments.fr_NH2(mol)  # number of Primary amines
+
+    NAi = 0
+    if NH2 != 0:
+        NAi = 3
+    elif NH1 != 0:
+        NAi = 2
+    elif NH0 != 0:
+        NAi = 1
+    return {'NAi': NAi, 'VMcGowan': float(_calculator(mol)[0])}
+
+
+def read_descriptors(smiles):
+    # stored descriptors of a SMILES, None when missing or when the cache cannot be read
+    if not os.path.exists(cache_file):
+        return None
+    try:
+        connection = sqlite3.connect(cache_file)
+        try:
+            row = connection.execute('SELECT data FROM descriptors WHERE smiles = ? AND version = ?',
+                                     (smiles, descriptor_version)).fetchone()
+        finally:
+            connection.close()
+    except sqlite3.Error:
+        return None
+    if row is None:
+        return None
+    return json.loads(row[0])
+
+
+def write_descriptors(smiles_list, values):
+    # store values under every SMILES of smiles_list (the canonical SMILES and the one given by the caller)
+    # the cache is only an accelerator, a read-only or locked database does not stop the run
+    try:
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+        connection = sqlite3.connect(cache_file, timeout=30)
+        try:
+            with connection:
+                connection.execute('CREATE TABLE IF NOT EXISTS descriptors '
+                                   '(smiles TEXT PRIMARY KEY, version INTEGER, data TEXT)')
+                connection.executemany('INSERT OR REPLACE INTO descriptors VALUES (?, ?, ?)',
+                                       [(smiles, descriptor_version, json.dumps(values)) for smiles in smiles_list])
+        finally:
+            connection.close()
+    except (OSError, sqlite3.Error):
+        return False
+    return True
+
+
+def get_descriptors(smiles, use_cache=True):
+    # {'NAi': ..., 'VMcGowan': ...} of a chemical, a new dictionary on every call
+    # use_cache=False recomputes the descriptors and leaves the SQLite cache untouched
+    if not use_cache:
+        return compute_descriptors(canonical_smiles(smiles)[1])
+    # a SMILES already seen as given is read without parsing it, other spellings go through the canonical SMILES
+    if smiles not in _descriptors:
+        values = read_descriptors(smiles)
+        if values is None:
+            key, mol = canonical_smiles(smiles)
+            values = _descriptors.get(key)
+            if values is None:
+                values = read_descriptors(key)
+            if values is None:
+                values = compute_descriptors(mol)
+            write_descriptors(sorted(set([key, smiles])), values)
+            _descriptors[key] = values
+        _descriptors[smiles] = values
+    return dict(_descriptors[smiles])
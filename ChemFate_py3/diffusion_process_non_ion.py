@@ -1,4 +1,15 @@
 from __future__ import division
+import numpy as np
+
+
+def series_transfer(*parts):
+    # D-value of transfer parts in series, 1/(1/D1 + 1/D2 + ...), 0 when a part is 0 (a compartment that is not
+    # present); written with np.where so that the parts can be one day or the whole climate series
+    parts = [np.asarray(part, dtype=float) for part in parts]
+    present = np.all([part != 0 for part in np.broadcast_arrays(*parts)], axis=0)
+    with np.errstate(divide='ignore'):
+        resistance = sum(1 / part for part in parts)
+        return np.where(present, 1 / resistance, 0)[()]
 
 class Diffusion:
 
@@ -11,10 +22,7 @@ class Diffusion:
         # unit: m/day * m^2 * mol/m^3-Pa = mol/Pa-day
         air_part = airMTC * cross_sectional_area * zAirSub
         water_part = waterMTC * cross_sectional_area * zWaterSub
-        try:
-            air_water_diffusion = 1 / (1/air_part + 1/water_part)
-        except:
-            air_water_diffusion = 0
+        air_water_diffusion = series_transfer(air_part, water_part)
         return air_water_diffusion
 
 
@@ -24,10 +32,7 @@ class Diffusion:
         soilAirBound_part = airSoilMTC * cross_sectional_area * zAirSub
         soilAir_part = cross_sectional_area * soilAirMTC * zAirSub
         soilWater_part = cross_sectional_area * soilWaterMTC * zWaterSub
-        try:
-            air_soil_diffusion = 1/(1/soilAirBound_part + 1/(soilAir_part + soilWater_part))
-        except:
-            air_soil_diffusion = 0
+        air_soil_diffusion = series_transfer(soilAirBound_part, soilAir_part + soilWater_part)
         return air_soil_diffusion
 
 
@@ -36,10 +41,7 @@ class Diffusion:
         waterSedmMTC = 0.01 * 24.0 # Mackay P178, m/h
         water_part = waterSedmMTC * cross_sectional_area * zWaterSub
         sediment_part = sedmtWaterMTC * cross_sectional_area * zWaterSub
-        try:
-            sediment_water_diffusion = 1/(1/water_part + 1/sediment_part)
-        except:
-            sediment_water_diffusion = 0
+        sediment_water_diffusion = series_transfer(water_part, sediment_part)
         return sediment_water_diffusion
 
 
@@ -0,0 +1,53 @@
+from __future__ import division
+import numpy as np
+
+
+# every model computes its processes once as named fluxes (mol/day or kg/day) in a flux kernel; the change of
+# each compartment is the sum of the fluxes entering it minus the fluxes leaving it, so the derivative is a fixed
+# incidence matrix times the flux vector and the process tables read the same fluxes
+
+
+def incidence_matrix(balance):
+    # balance[k] is the pair (entering flux names, leaving flux names) of compartment k
+    # returns the flux names in column order and the incidence matrix S with S[k, p] = +1 when flux p enters
+    # compartment k and -1 when it leaves it
+    flux_names = []
+    for entering, leaving in balance:
+        for name in entering + leaving:
+            if name not in flux_names:
+                flux_names.append(name)
+    column = dict((name, p) for p, name in enumerate(flux_names))
+    S = np.zeros((len(balance), len(flux_names)))
+    for k, (entering, leaving) in enumerate(balance):
+        for name in entering:
+            S[k, column[name]] += 1
+        for name in leaving:
+            S[k, column[name]] -= 1
+    return flux_names, S
+
+
+def flux_derivative(S, flux_names, fluxes, capacity):
+    # S times the flux vector, divided by the capacity of each compartment (V*Z for fugacity and aquivalence,
+    # 1 for masses); compartments without capacity do not change
+    # the fluxes can be scalars or arrays of any common broadcast shape, e.g. the daily series and identity probe
+    # used by linear_solver.assemble_horizon
+    values = [fluxes[name] for name in flux_names]
+    try:
+        # all fluxes of the same shape, e.g. the scalars of one state evaluated by the ode solver
+        flux_vector = np.array(values, dtype=float)
+    except ValueError:
+        flux_vector = np.array(np.broadcast_arrays(*values), dtype=float)
+    if flux_vector.ndim == 1:
+        rates = S.dot(flux_vector)
+    else:
+        rates = np.tensordot(S, flux_vector, axes=1)
+    if rates.ndim == 1 and np.ndim(capacity) == 1:
+        capacity = np.asarray(capacity, dtype=float)
+        return np.divide(rates, capacity, out=np.zeros_like(rates), where=capacity != 0)
+    dYdt = []
+    for k in range(len(S)):
+        if np.all(capacity[k] != 0):
+            dYdt.append(rates[k] / capacity[k])
+        else:
+            dYdt.append(0)
+    return dYdt
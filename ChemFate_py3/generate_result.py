@@ -1,13 +1,8 @@
-import matplotlib
-matplotlib.use('Agg')
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.colors as mcolors
-import seaborn as sns
 import os
 from collections import OrderedDict
-from openpyxl import load_workbook
+from result_export import write_tables, check_output_format, check_plot_policy
 
 color_air_water = ['palegreen', 'lightgreen', 'forestgreen', 'limegreen', 'aquamarine']
 color_air = ['lightblue', 'dodgerblue']
@@ -16,150 +11,215 @@ color_water = ['palegreen', 'lightgreen', 'forestgreen', 'limegreen',
 color_soil = ['bisque', 'turquoise', 'tan', 'darkgoldenrod', 'bisque', 'turquoise', 'tan', 'darkgoldenrod',
               'bisque', 'turquoise', 'tan', 'darkgoldenrod', 'bisque', 'turquoise', 'tan', 'darkgoldenrod']
 
-class GenerateResult:
+def plotting_modules():
+    # matplotlib (with the non-interactive Agg backend), seaborn and matplotlib.colors, imported by the first plot
+    # so that runs and workers that only write tables never load them
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import matplotlib.colors as mcolors
+    import seaborn as sns
+    return plt, sns, mcolors
 
-    def __init__(self):
-        pass
 
-    def store_output(self, chem_type, chem_name, region_name, release_scenario, release,
-                     date_array, process_array, V_bulk_list, funC_df_list, funM_df_list, output_file_path, file_name):
-        header = ['air', 'fw', 'fw_sed', 'sw', 'sw_sed', 'undeveloped_soil', 'deep_undeveloped_soil', 'urban_soil',
-                           'deep_urban_soil', 'agricultural_soil', 'deep_agricultural_soil', 'biosolids_soil', 'deep_biosolids_soil'] # 13
+def process_unit(process_output):
+    # unit of the process table, rates at the end of each day or masses moved during each day
+    return 'kg' if process_output == 'integrated' else 'kg/day'
 
-        header_non_nano_sub = ['air', 'aerosol', 'fw', 'fw_sus_sed', 'fw_sed_water', 'fw_sed_solid', 'sw', 'sw_sus_sed',
-                               'sw_sed_water', 'sw_sed_solid', 'undeveloped_soil_air', 'undeveloped_soil_water',
-                               'undeveloped_soil_solid', 'deep_undeveloped_soil', 'urban_soil_air', 'urban_soil_water',
-                               'urban_soil_solid', 'deep_urban_soil', 'agricultural_soil_air', 'agricultural_soil_water',
-                               'agricultural_soil_solid', 'deep_agricultural_soil', 'biosolids_soil_air',
-                               'biosolids_soil_water', 'biosolids_soil_solid', 'deep_biosolids_soil'] # 26
 
-        # if funC_df_list only contains 2 items, it is NonionizableOrganic
-        writer_C = pd.ExcelWriter(os.path.join(output_file_path, 'chem_conc_'+file_name+'.xlsx'))
-        writer_M = pd.ExcelWriter(os.path.join(output_file_path, 'chem_mass_' + file_name + '.xlsx'))
+def render_figure(figure):
+    # draw one figure, given as (GenerateResult method, arguments), and return its file
+    # a module level function so that worker processes can run it
+    name, args = figure
+    getattr(GenerateResult(), name)(*args)
+    return args[-1]
 
-        df_1_C = pd.DataFrame(funC_df_list[0], columns=header, index=date_array)
-        df_1_M = pd.DataFrame(funM_df_list[0], columns=header, index=date_array)
-        if chem_type != 'Nanomaterial':
-            df_1_sub_C = pd.DataFrame(funC_df_list[1], columns=header_non_nano_sub, index=date_array)
-            df_1_M = pd.DataFrame(funM_df_list[0], columns=header, index=date_array)
-            df_1_sub_M = pd.DataFrame(funM_df_list[1], columns=header_non_nano_sub, index=date_array)
 
-        self.generate_release_bulk(release, chem_name, region_name, release_scenario, os.path.join(output_file_path, 'release_bulk_'+file_name+'.png'))
+def render_figures(figures, plot_workers=None):
+    # every figure is independent and writes its own file, so they are drawn in a pool of worker processes
+    # plot_workers None starts one worker per CPU (at most one per figure), 1 draws them one by one in this process
+    if not figures:
+        return []
+    if plot_workers is None:
+        plot_workers = min(len(figures), os.cpu_count() or 1)
+    if plot_workers <= 1:
+        return [render_figure(figure) for figure in figures]
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=plot_workers) as executor:
+        return list(executor.map(render_figure, figures))
+
+
+class GenerateResult:
+
+    def __init__(self):
+        pass
+
+    def store_output(self, chem_type, chem_name, region_name, release_scenario, release,
+                     date_array, process_array, V_bulk_list, funC_df_list, funM_df_list, output_file_path, file_name,
+                     output_format='xlsx', process_output='snapshot', plots='all', plot_workers=None):
+        # output_format selects the file format of the tables, see result_export.output_formats
+        # process_output is the process table of the solver, process rates (kg/day) or daily masses (kg)
+        # plots selects the figures, see plot_policies, plot_workers the processes drawing them, see render_figures
+        check_output_format(output_format)
+        check_plot_policy(plots)
+        sheets_C, sheets_M = self.result_sheets(chem_type, date_array, funC_df_list, funM_df_list)
+
+        # figures as (summary, method, arguments), drawn after the tables are written, see render_figures
+        # the summary figures are the releases, the heatmap of the bulk compartments and the bulk concentrations
+        # of the whole chemical (all species together)
+        figures = []
+        figures.append((True, 'generate_release_bulk', (release, chem_name, region_name, release_scenario, os.path.join(output_file_path, 'release_bulk_'+file_name+'.png'))))
 
         if chem_type == 'NonionizableOrganic' or chem_type == 'IonizableOrganic':
             txt = 'neutral'
-            df_1_C.to_excel(writer_C, txt)
-            df_1_sub_C.to_excel(writer_C, txt+'_sub')
-            df_1_M.to_excel(writer_M, txt)
-            df_1_sub_M.to_excel(writer_M, txt + '_sub')
-            self.generate_plot_bulk(df_1_C, txt, chem_name, region_name, release_scenario, os.path.join(output_file_path, txt+'_bulk_'+file_name+'.png'))
-            self.generate_mass_bulk(df_1_C, txt, V_bulk_list, chem_name, region_name, release_scenario, os.path.join(output_file_path, txt+'_bulk_mass_'+file_name+'.png'))
-            self.generate_plot_sub(df_1_sub_C, txt, chem_name, chem_type, region_name, release_scenario, os.path.join(output_file_path, txt+'_sub_'+file_name+'.png'))
+            df_1_C = sheets_C[txt]
+            df_1_sub_C = sheets_C[txt+'_sub']
+            figures.append((chem_type == 'NonionizableOrganic', 'generate_plot_bulk', (df_1_C, txt, chem_name, region_name, release_scenario, os.path.join(output_file_path, txt+'_bulk_'+file_name+'.png'))))
+            figures.append((False, 'generate_mass_bulk', (df_1_C, txt, V_bulk_list, chem_name, region_name, release_scenario, os.path.join(output_file_path, txt+'_bulk_mass_'+file_name+'.png'))))
+            figures.append((False, 'generate_plot_sub', (df_1_sub_C, txt, chem_name, chem_type, region_name, release_scenario, os.path.join(output_file_path, txt+'_sub_'+file_name+'.png'))))
 
         else:
             # for metal and nanomaterial, no subcompartment
             txt = 'particulate'
-            df_1_C.to_excel(writer_C, txt)
-            df_1_M.to_excel(writer_M, txt)
-            self.generate_plot_bulk(df_1_C, txt, chem_name, region_name, release_scenario, os.path.join(output_file_path, txt+'_bulk_'+file_name+'.png'))
-            self.generate_mass_bulk(df_1_C, txt, V_bulk_list, chem_name, region_name, release_scenario,
-                                    os.path.join(output_file_path, txt+'_bulk_mass_'+file_name+'.png'))
+            df_1_C = sheets_C[txt]
+            figures.append((False, 'generate_plot_bulk', (df_1_C, txt, chem_name, region_name, release_scenario, os.path.join(output_file_path, txt+'_bulk_'+file_name+'.png'))))
+            figures.append((False, 'generate_mass_bulk', (df_1_C, txt, V_bulk_list, chem_name, region_name, release_scenario,
+                                                          os.path.join(output_file_path, txt+'_bulk_mass_'+file_name+'.png'))))
 
         if chem_type == 'IonizableOrganic':
-            df_2_C = pd.DataFrame(funC_df_list[2], columns=header, index=date_array)
-            df_2_sub_C = pd.DataFrame(funC_df_list[3], columns=header_non_nano_sub, index=date_array)
-            df_2_M = pd.DataFrame(funM_df_list[2], columns=header, index=date_array)
-            df_2_sub_M = pd.DataFrame(funM_df_list[3], columns=header_non_nano_sub, index=date_array)
-            df_2_C.to_excel(writer_C, 'ionic')
-            df_2_sub_C.to_excel(writer_C, 'ionic_sub')
-            df_2_M.to_excel(writer_M, 'ionic')
-            df_2_sub_M.to_excel(writer_M, 'ionic_sub')
+            df_2_C = sheets_C['ionic']
+            df_2_sub_C = sheets_C['ionic_sub']
             df_sum_bulk = df_1_C.add(df_2_C)
             df_sum_sub = df_1_sub_C.add(df_2_sub_C)
             txt = 'ionic'
             txt_sub = 'ionic_sub'
-            self.generate_plot_bulk(df_2_C, txt, chem_name, region_name, release_scenario, os.path.join(output_file_path, txt+'_bulk_'+file_name+'.png'))
-            self.generate_mass_bulk(df_2_C, txt, V_bulk_list, chem_name, region_name, release_scenario,
-                                    os.path.join(output_file_path, txt+'_bulk_mass_'+file_name+'.png'))
-            self.generate_plot_sub(df_2_sub_C, txt, chem_name, chem_type, region_name, release_scenario, os.path.join(output_file_path, txt_sub+'_'+file_name+'.png'))
-            self.generate_plot_bulk(df_sum_bulk, '', chem_name, region_name, release_scenario, os.path.join(output_file_path, 'sum_bulk_'+file_name+'.png'))
-            self.generate_mass_bulk(df_sum_bulk, '', V_bulk_list, chem_name, region_name, release_scenario,
-                                    os.path.join(output_file_path, 'sum_bulk_mass_'+file_name+'.png'))
-
-            self.generate_plot_sub(df_sum_sub, '', chem_name, chem_type, region_name, release_scenario, os.path.join(output_file_path, 'sum_sub_'+file_name+'.png'))
+            figures.append((False, 'generate_plot_bulk', (df_2_C, txt, chem_name, region_name, release_scenario, os.path.join(output_file_path, txt+'_bulk_'+file_name+'.png'))))
+            figures.append((False, 'generate_mass_bulk', (df_2_C, txt, V_bulk_list, chem_name, region_name, release_scenario,
+                                                          os.path.join(output_file_path, txt+'_bulk_mass_'+file_name+'.png'))))
+            figures.append((False, 'generate_plot_sub', (df_2_sub_C, txt, chem_name, chem_type, region_name, release_scenario, os.path.join(output_file_path, txt_sub+'_'+file_name+'.png'))))
+            figures.append((True, 'generate_plot_bulk', (df_sum_bulk, '', chem_name, region_name, release_scenario, os.path.join(output_file_path, 'sum_bulk_'+file_name+'.png'))))
+            figures.append((False, 'generate_mass_bulk', (df_sum_bulk, '', V_bulk_list, chem_name, region_name, release_scenario,
+                                                          os.path.join(output_file_path, 'sum_bulk_mass_'+file_name+'.png'))))
+
+            figures.append((False, 'generate_plot_sub', (df_sum_sub, '', chem_name, chem_type, region_name, release_scenario, os.path.join(output_file_path, 'sum_sub_'+file_name+'.png'))))
         elif chem_type == 'Metal' or chem_type == 'Nanomaterial':
             if chem_type == 'Metal':
-                index1, index2 = 2, 4
                 txt1, txt2 = 'colloidal', 'dissolved'
             else:
-                index1, index2 = 1, 2
                 txt1, txt2 = 'free nano', 'dissolved'
 
-            df_2_C = pd.DataFrame(funC_df_list[index1], columns=header, index=date_array)
-            df_2_M = pd.DataFrame(funM_df_list[index1], columns=header, index=date_array)
-            df_3_C = pd.DataFrame(funC_df_list[index2], columns=header, index=date_array)
-            df_3_M = pd.DataFrame(funM_df_list[index2], columns=header, index=date_array)
-            df_2_C.to_excel(writer_C, txt1)
-            df_3_C.to_excel(writer_C, txt2)
-            df_2_M.to_excel(writer_M, txt1)
-            df_3_M.to_excel(writer_M, txt2)
+            df_2_C = sheets_C[txt1]
+            df_3_C = sheets_C[txt2]
             df_sum1 = df_1_C.add(df_2_C)
             df_sum = df_sum1.add(df_3_C)
 
-            self.generate_plot_bulk(df_2_C, txt1, chem_name, region_name, release_scenario, os.path.join(output_file_path, txt1+'_bulk_'+file_name+'.png'))
-            self.generate_plot_bulk(df_3_C, txt2, chem_name, region_name, release_scenario, os.path.join(output_file_path, txt2+'_bulk_'+file_name+'.png'))
-            self.generate_plot_bulk(df_sum, '', chem_name, region_name, release_scenario, os.path.join(output_file_path, 'sum_bulk_'+file_name+'.png'))
+            figures.append((False, 'generate_plot_bulk', (df_2_C, txt1, chem_name, region_name, release_scenario, os.path.join(output_file_path, txt1+'_bulk_'+file_name+'.png'))))
+            figures.append((False, 'generate_plot_bulk', (df_3_C, txt2, chem_name, region_name, release_scenario, os.path.join(output_file_path, txt2+'_bulk_'+file_name+'.png'))))
+            figures.append((True, 'generate_plot_bulk', (df_sum, '', chem_name, region_name, release_scenario, os.path.join(output_file_path, 'sum_bulk_'+file_name+'.png'))))
 
-            self.generate_mass_bulk(df_2_C, txt1, V_bulk_list, chem_name, region_name, release_scenario,
-                                    os.path.join(output_file_path, txt1+'_bulk_mass_'+file_name+'.png'))
-            self.generate_mass_bulk(df_3_C, txt2, V_bulk_list, chem_name, region_name, release_scenario,
-                                    os.path.join(output_file_path, txt2+'_bulk_mass_'+file_name+'.png'))
-            self.generate_mass_bulk(df_sum, '', V_bulk_list, chem_name, region_name, release_scenario,
-                                    os.path.join(output_file_path, 'sum_bulk_mass_'+file_name+'.png'))
+            figures.append((False, 'generate_mass_bulk', (df_2_C, txt1, V_bulk_list, chem_name, region_name, release_scenario,
+                                                          os.path.join(output_file_path, txt1+'_bulk_mass_'+file_name+'.png'))))
+            figures.append((False, 'generate_mass_bulk', (df_3_C, txt2, V_bulk_list, chem_name, region_name, release_scenario,
+                                                          os.path.join(output_file_path, txt2+'_bulk_mass_'+file_name+'.png'))))
+            figures.append((False, 'generate_mass_bulk', (df_sum, '', V_bulk_list, chem_name, region_name, release_scenario,
+                                                          os.path.join(output_file_path, 'sum_bulk_mass_'+file_name+'.png'))))
 
         if chem_type == 'NonionizableOrganic':
             txt = 'organoFate'
-            self.generate_heatmap_bulk(chem_type, [df_1_C], chem_name, region_name, release_scenario, V_bulk_list, os.path.join(output_file_path, txt+'_heatmap_'+file_name+'.png'))
+            figures.append((True, 'generate_heatmap_bulk', (chem_type, [df_1_C], chem_name, region_name, release_scenario, V_bulk_list, os.path.join(output_file_path, txt+'_heatmap_'+file_name+'.png'))))
         elif chem_type == 'IonizableOrganic':
-            self.generate_heatmap_bulk(chem_type, [df_1_C, df_2_C], chem_name, region_name, release_scenario, V_bulk_list, os.path.join(output_file_path, 'ionOFate_heatmap_'+file_name+'.png'))
+            figures.append((True, 'generate_heatmap_bulk', (chem_type, [df_1_C, df_2_C], chem_name, region_name, release_scenario, V_bulk_list, os.path.join(output_file_path, 'ionOFate_heatmap_'+file_name+'.png'))))
         else:
             if chem_type == 'Metal':
                 txt = 'metal'
             else:
                 txt = 'nano'
-            self.generate_heatmap_bulk(chem_type, [df_1_C, df_2_C, df_3_C], chem_name, region_name, release_scenario, V_bulk_list, os.path.join(output_file_path, txt+'_heatmap_'+file_name+'.png'))
-
-        writer_C.save()
-        writer_M.save()
-        print ('Saved the results to excel file.')
-
-        # output process data
-        self.store_process_output(chem_type, date_array, process_array, output_file_path, file_name)
+            figures.append((True, 'generate_heatmap_bulk', (chem_type, [df_1_C, df_2_C, df_3_C], chem_name, region_name, release_scenario, V_bulk_list, os.path.join(output_file_path, txt+'_heatmap_'+file_name+'.png'))))
+
+        # concentration, mass and process tables with their units, each file written once
+        # concentrations are kg/m^3, i.e. g/L
+        tables = OrderedDict([('chem_conc', sheets_C), ('chem_mass', sheets_M),
+                              ('process', OrderedDict([('process', self.process_table(chem_type, date_array,
+                                                                                       process_array))]))])
+        units = {'chem_conc': 'g/L', 'chem_mass': 'kg', 'process': process_unit(process_output)}
+        write_tables(tables, units, output_file_path, file_name, output_format)
+        print ('Saved the results to %s files.' % output_format)
+
+        render_figures([(name, args) for summary, name, args in figures if plots == 'all' or (summary and plots == 'summary')],
+                       plot_workers)
+
+
+    def stream_output(self, chem_type, chem_name, region_name, release_scenario, release, blocks, output_file_path,
+                      file_name, output_format='xlsx', process_output='snapshot', stream_format='csv', plots='all'):
+        # tables of a run advanced block by block, blocks yields (date_array, process_array, funC_df_list,
+        # funM_df_list) of each block of days as passed to store_output
+        # every block is appended to the stream store (see result_stream) and dropped, the mean, minimum, maximum
+        # and final value of each column are written as summary tables in output_format at the end
+        # the time series figures need the whole simulation in memory and are not drawn, the release figure is
+        # unless plots is 'none'
+        from result_stream import ResultStream
+        check_output_format(output_format)
+        check_plot_policy(plots)
+        stream = ResultStream(output_file_path, file_name,
+                              {'chem_conc': 'g/L', 'chem_mass': 'kg', 'process': process_unit(process_output)},
+                              stream_format)
+        try:
+            for date_array, process_array, funC_df_list, funM_df_list in blocks:
+                sheets_C, sheets_M = self.result_sheets(chem_type, date_array, funC_df_list, funM_df_list)
+                for sheet, df in sheets_C.items():
+                    stream.append('chem_conc', sheet, df)
+                for sheet, df in sheets_M.items():
+                    stream.append('chem_mass', sheet, df)
+                stream.append('process', 'process', self.process_table(chem_type, date_array, process_array))
+        finally:
+            stream.close()
+        stream.write_summaries(output_format)
+        if plots != 'none':
+            self.generate_release_bulk(release, chem_name, region_name, release_scenario,
+                                       os.path.join(output_file_path, 'release_bulk_'+file_name+'.png'))
+        print ('Saved the results to %s files and the summaries to %s files.' % (stream_format, output_format))
+        return stream.summary_tables()
+
+
+    def result_sheets(self, chem_type, date_array, funC_df_list, funM_df_list):
+        # sheets of the concentration and mass tables as DataFrames (dates x compartments), in workbook order
+        header = ['air', 'fw', 'fw_sed', 'sw', 'sw_sed', 'undeveloped_soil', 'deep_undeveloped_soil', 'urban_soil',
+                           'deep_urban_soil', 'agricultural_soil', 'deep_agricultural_soil', 'biosolids_soil', 'deep_biosolids_soil'] # 13
 
-        # insert unit into A1 cell in conc, mass and process file
-        conc_file = os.path.join(output_file_path, 'chem_conc_' + file_name + '.xlsx')
-        mass_file = os.path.join(output_file_path, 'chem_mass_' + file_name + '.xlsx')
-        process_file = os.path.join(output_file_path, 'process_' + file_name + '.xlsx')
+        header_non_nano_sub = ['air', 'aerosol', 'fw', 'fw_sus_sed', 'fw_sed_water', 'fw_sed_solid', 'sw', 'sw_sus_sed',
+                               'sw_sed_water', 'sw_sed_solid', 'undeveloped_soil_air', 'undeveloped_soil_water',
+                               'undeveloped_soil_solid', 'deep_undeveloped_soil', 'urban_soil_air', 'urban_soil_water',
+                               'urban_soil_solid', 'deep_urban_soil', 'agricultural_soil_air', 'agricultural_soil_water',
+                               'agricultural_soil_solid', 'deep_agricultural_soil', 'biosolids_soil_air',
+                               'biosolids_soil_water', 'biosolids_soil_solid', 'deep_biosolids_soil'] # 26
 
-        conc_book = load_workbook(conc_file)
-        conc_sheetnames = conc_book.sheetnames
-        mass_book = load_workbook(mass_file)
-        for sheetname in conc_sheetnames:
-            conc_sheet = conc_book.get_sheet_by_name(sheetname)
-            mass_sheet = mass_book.get_sheet_by_name(sheetname)
-            conc_sheet['A1'] = 'g/L'
-            mass_sheet['A1'] = 'kg'
+        sheets_C = OrderedDict()
+        sheets_M = OrderedDict()
+        # if funC_df_list only contains 2 items, it is NonionizableOrganic
+        if chem_type == 'NonionizableOrganic' or chem_type == 'IonizableOrganic':
+            names = ['neutral', 'neutral_sub', 'ionic', 'ionic_sub']
+        elif chem_type == 'Metal':
+            # for metal and nanomaterial, no subcompartment
+            names = ['particulate', None, 'colloidal', None, 'dissolved', None]
+        else:
+            names = ['particulate', 'free nano', 'dissolved']
+        for name, funC, funM in zip(names, funC_df_list, funM_df_list):
+            if name is None:
+                continue
+            columns = header_non_nano_sub if name.endswith('_sub') else header
+            sheets_C[name] = pd.DataFrame(funC, columns=columns, index=date_array)
+            sheets_M[name] = pd.DataFrame(funM, columns=columns, index=date_array)
+        return sheets_C, sheets_M
 
-        process_book = load_workbook(process_file)
-        process_sheet = process_book.get_sheet_by_name('process')
-        process_sheet['A1'] = 'kg/day'
 
-        conc_book.save(os.path.join(output_file_path, 'chem_conc_' + file_name + '.xlsx'))
-        mass_book.save(os.path.join(output_file_path, 'chem_mass_' + file_name + '.xlsx'))
-        process_book.save(os.path.join(output_file_path, 'process_' + file_name + '.xlsx'))
+    def store_process_output(self, chem_type, date_array, process_array, output_file_path, file_name,
+                             output_format='xlsx', process_output='snapshot'):
+        tables = {'process': OrderedDict([('process', self.process_table(chem_type, date_array, process_array))])}
+        write_tables(tables, {'process': process_unit(process_output)}, output_file_path, file_name, output_format)
 
 
-    def store_process_output(self, chem_type, date_array, process_array, output_file_path, file_name):
+    def process_table(self, chem_type, date_array, process_array):
+        # process rates (or daily masses) as a DataFrame, one column per process of the chemical class
         if chem_type == 'IonizableOrganic':
             header_list = ['adv_air_in', 'adv_air_out', 'adv_fw_in', 'adv_fw_out', 'adv_fwSed_in', 'adv_fwSed_out',
                            'adv_sw_in', 'adv_sw_out', 'adv_swSed_out', 'dep_dry_air', 'dep_dry_air_fw', 'dep_dry_air_sw',
@@ -224,13 +284,11 @@ class GenerateResult:
                            'infiltra_soil4', 'leach_soil1', 'leach_soil2', 'leach_soil3', 'leach_soil4',
                            'burial_fwSed', 'burial_swSed', 'resusp_fwSed', 'resusp_swSed', 'aero_resusp_sSS']
 
-        writer = pd.ExcelWriter(os.path.join(output_file_path, 'process_' + file_name + '.xlsx'))
-        df = pd.DataFrame(process_array, columns = header_list, index = date_array)
-        df.to_excel(writer, 'process')
-        writer.save()
+        return pd.DataFrame(process_array, columns = header_list, index = date_array)
 
 
     def generate_plot_bulk(self, df, txt, chem_name, region_name, release_scenario, output_figure_path):
+        plt, sns, mcolors = plotting_modules()
         df = df.reset_index(drop=True)
         sns.set(style='white')
         sim_days = df.shape[0]
@@ -278,6 +336,7 @@ class GenerateResult:
 
 
     def generate_plot_sub(self, df, txt, chem_name, chem_type, region_name, release_scenario, output_figure_path):
+        plt, sns, mcolors = plotting_modules()
         df = df.reset_index(drop=True)
         sns.set(style='white')
         sim_days = df.shape[0]
@@ -402,6 +461,7 @@ class GenerateResult:
 
     def generate_heatmap_bulk(self, chem_type, df, chem_name, region_name, release_scenario,
                               V_bulk_list, output_figure_path):
+        plt, sns, mcolors = plotting_modules()
         data = OrderedDict()
         data['conc'] = OrderedDict()
         data['massFr'] = OrderedDict()
@@ -510,6 +570,7 @@ class GenerateResult:
 
 
     def generate_release_bulk(self, release, chem_name, region_name, release_scenario, output_figure_path):
+        plt, sns, mcolors = plotting_modules()
         air = release['air']
         fw = release['fw']
         fSS = release['fSS']
@@ -593,6 +654,7 @@ class GenerateResult:
 
 
     def generate_mass_bulk(self, df, txt, V_bulk_list, chem_name, region_name, release_scenario, output_figure_path):
+        plt, sns, mcolors = plotting_modules()
         df = df.reset_index(drop=True)
         sns.set(style='white')
         sim_days = df.shape[0]
@@ -0,0 +1,71 @@
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+
+# import time of the model in fresh interpreters, for the worker processes that start a run each
+# every scenario imports what a run of one chemical class loads (model_setup, its input loader, its ode and process
+# modules and the table writer), 'plots' adds the plotting libraries loaded by the first figure
+# usage: python import_benchmark.py [--repeat 7] [--json]
+
+CUR_PATH = os.path.dirname(os.path.abspath(__file__))
+
+scenarios = [
+    ('model_setup', 'import model_setup'),
+    ('NonionizableOrganic', 'import model_setup, load_data, ode_non_ion, ode_non_ion_process, generate_result'),
+    ('IonizableOrganic', 'import model_setup, load_data, Y_ion, ode_ion, ode_ion_process, generate_result'),
+    ('Metal', 'import model_setup, load_data, Y_ion, ode_metal, ode_metal_process, generate_result'),
+    ('Nanomaterial', 'import model_setup, load_data_nano, eqDissolution, ode_nano, ode_nano_process, generate_result'),
+    ('plots', 'import generate_result; generate_result.plotting_modules()'),
+]
+
+# third-party packages reported as loaded or not by each scenario
+heavy_modules = ['pandas', 'scipy.integrate', 'scipy.linalg', 'matplotlib', 'seaborn', 'openpyxl', 'rdkit', 'mordred']
+
+probe = '''
+import sys, time, json
+t0 = time.perf_counter()
+%s
+t1 = time.perf_counter()
+print(json.dumps({'seconds': t1 - t0, 'loaded': [m for m in %r if m in sys.modules]}))
+'''
+
+
+def time_import(statement, repeat):
+    # seconds spent in the import statement in each of repeat fresh interpreters, and the heavy modules it loaded
+    seconds = []
+    loaded = []
+    for _ in range(repeat):
+        output = subprocess.check_output([sys.executable, '-W', 'ignore', '-c', probe % (statement, heavy_modules)],
+                                         cwd=CUR_PATH)
+        result = json.loads(output.decode('utf-8').strip().splitlines()[-1])
+        seconds.append(result['seconds'])
+        loaded = result['loaded']
+    return sorted(seconds), loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description='import time of the ChemFate modules in fresh interpreters')
+    parser.add_argument('--repeat', type=int, default=7, help='interpreters started per scenario')
+    parser.add_argument('--json', action='store_true', help='print the results as JSON')
+    args = parser.parse_args()
+
+    results = []
+    for name, statement in scenarios:
+        seconds, loaded = time_import(statement, args.repeat)
+        results.append({'scenario': name, 'min_ms': seconds[0] * 1000, 'median_ms': seconds[len(seconds) // 2] * 1000,
+                        'loaded': loaded})
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print('%-20s %10s %10s  %s' % ('scenario', 'min ms', 'median ms', 'heavy modules loaded'))
+    for result in results:
+        print('%-20s %10.1f %10.1f  %s' % (result['scenario'], result['min_ms'], result['median_ms'],
+                                           ', '.join(result['loaded']) or '-'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+from __future__ import division
+import os
+import json
+import hashlib
+import tempfile
+from collections import OrderedDict
+from datetime import datetime
+import numpy as np
+
+
+# parsed model inputs (presence, env, climate, bgConc, release, chemParams, ...) cached by the content of the
+# input workbooks, so repeated runs on the same Region.xlsx, ChemRelease.xlsx and ChemParam files skip the
+# XLSX parsing
+# every cache entry is a single .npz file of plain numeric and string arrays (read with allow_pickle=False) with
+# a JSON manifest of the dictionaries and of the Python type of each entry, so the loaded structures are the same
+# as the ones built from the workbooks
+# the file name is the SHA-256 of the input files, of the loader arguments (chemical class, dates, ...) and of the
+# source of the loader_modules; the entries computed by the models (the daily propagators of model_solver, the
+# outputs of sensitivity) also take the source of the model_modules into their key, so a changed workbook or an
+# edit of the loaders or models gives a new entry and stale entries are never read
+# nothing is evicted: the folder can be emptied with clear_cache() (or by deleting its .npz files) at any time,
+# the entries are computed again when they are needed
+
+cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Input', 'cache')
+
+# bump when the layout of the cache files changes, older entries are then ignored
+cache_version = 1
+
+# modules of this folder whose source is part of the cache keys
+loader_modules = ['input_cache', 'load_data', 'load_data_nano', 'advective_processes_nano', 'ionizable_db',
+                  'workbook_registry']
+model_modules = ['linear_solver', 'model_solver', 'ode_non_ion', 'ode_ion', 'ode_metal', 'ode_non_ion_process',
+                 'ode_ion_process', 'ode_metal_process', 'Y_ion', 'Z_non_ion', 'partition_coef_ion',
+                 'species_fraction_ion', 'degradation_process', 'advective_processes', 'diffusion_process_ion',
+                 'diffusion_process_non_ion', 'flux_balance']
+
+# source digests of this process, by module list
+source_digests = {}
+
+
+def source_digest(modules):
+    # SHA-256 of the source files of modules, read once per process
+    modules = tuple(modules)
+    if modules not in source_digests:
+        digest = hashlib.sha256()
+        folder = os.path.dirname(os.path.abspath(__file__))
+        for module in modules:
+            with open(os.path.join(folder, module + '.py'), 'rb') as f:
+                digest.update(f.read())
+            digest.update(b'\0')
+        source_digests[modules] = digest.hexdigest()
+    return source_digests[modules]
+
+
+def clear_cache():
+    # remove every entry of the cache, returns the number of removed entries
+    if not os.path.exists(cache_dir):
+        return 0
+    removed = 0
+    for file_name in os.listdir(cache_dir):
+        if file_name.endswith('.npz'):
+            os.remove(os.path.join(cache_dir, file_name))
+            removed += 1
+    return removed
+
+
+def input_key(file_list, *params):
+    # SHA-256 of the content of the input files and of the loader arguments
+    digest = hashlib.sha256(('ChemFate inputs v%d' % cache_version).encode('utf-8'))
+    digest.update(source_digest(loader_modules).encode('utf-8'))
+    for file_name in file_list:
+        with open(file_name, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        digest.update(b'\0')
+    digest.update(json.dumps([str(p) for p in params]).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def inputs_digest(*items):
+    # SHA-256 of parsed inputs (dictionaries of numbers, strings, lists and arrays), for results that are derived
+    # from the parsed inputs rather than from the workbooks, e.g. the daily propagators of model_solver
+    digest = hashlib.sha256()
+    for item in items:
+        for name in sorted(item, key=str):
+            value = item[name]
+            if isinstance(value, zip):
+                # the date columns of LoadData can be read only once and are left out
+                continue
+            digest.update(repr(name).encode('utf-8'))
+            if isinstance(value, np.ndarray):
+                digest.update(str(value.dtype).encode('utf-8'))
+                digest.update(np.ascontiguousarray(value).tobytes())
+            else:
+                digest.update(repr(value).encode('utf-8'))
+            digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def encode_value(value):
+    # kind and array of one entry, kinds are restored by decode_value
+    if value is None:
+        return 'none', np.zeros(0)
+    if isinstance(value, (bool, np.bool_)):
+        return 'bool', np.array(value)
+    if isinstance(value, np.floating):
+        return 'float64', np.array(value, dtype=float)
+    if isinstance(value, float):
+        return 'float', np.array(value)
+    if isinstance(value, (int, np.integer)):
+        return 'int', np.array(value, dtype=np.int64)
+    if isinstance(value, str):
+        return 'str', np.array(value)
+    if isinstance(value, zip):
+        # date columns of LoadData, zip of (year, month, day)
+        return 'zip', np.array(list(value), dtype=np.int64).reshape(-1, 3)
+    if isinstance(value, list) and value and all(isinstance(x, datetime) for x in value):
+        return 'datetimes', np.array(value, dtype='datetime64[us]')
+    if isinstance(value, list) and all(isinstance(x, (int, float)) and not isinstance(x, bool) for x in value):
+        return 'list', np.array(value, dtype=float)
+    if isinstance(value, np.ndarray) and value.dtype.kind in 'biuf':
+        return 'array', value
+    raise TypeError('%s values are not cached' % type(value).__name__)
+
+
+def decode_value(kind, array):
+    if kind == 'none':
+        return None
+    if kind == 'bool':
+        return bool(array)
+    if kind == 'float64':
+        return np.float64(array)
+    if kind == 'float':
+        return float(array)
+    if kind == 'int':
+        return int(array)
+    if kind == 'str':
+        return str(array)
+    if kind == 'zip':
+        return zip(*[column.tolist() for column in array.T])
+    if kind == 'datetimes':
+        return array.tolist()
+    if kind == 'list':
+        return array.tolist()
+    return array
+
+
+def save_inputs(key, items):
+    # store the loader results items (a tuple of dictionaries and single values) under key
+    # the file is written to a temporary name and renamed, so parallel runs never read a partial entry
+    # inputs with values that cannot be stored without pickle are not cached, returns False in that case
+    manifest = []
+    arrays = {}
+    try:
+        for item in items:
+            if isinstance(item, dict):
+                entries = []
+                for name, value in item.items():
+                    if not isinstance(name, str):
+                        raise TypeError('%s keys are not cached' % type(name).__name__)
+                    kind, array = encode_value(value)
+                    arrays['v%d' % len(arrays)] = array
+                    if kind == 'zip':
+                        # encoding consumed the zip, the caller gets an equal one back
+                        item[name] = decode_value(kind, array)
+                    entries.append([name, kind])
+                manifest.append({'container': type(item).__name__, 'entries': entries})
+            else:
+                kind, array = encode_value(item)
+                arrays['v%d' % len(arrays)] = array
+                manifest.append({'container': 'value', 'kind': kind})
+    except TypeError:
+        return False
+
+    tmp_name = None
+    try:
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+        fd, tmp_name = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, manifest=np.array(json.dumps(manifest)), **arrays)
+        os.replace(tmp_name, os.path.join(cache_dir, key + '.npz'))
+    except OSError:
+        # the cache is only an accelerator, a read-only or full disk does not stop the run
+        if tmp_name is not None and os.path.exists(tmp_name):
+            os.remove(tmp_name)
+        return False
+    return True
+
+
+def load_inputs(key):
+    # loader results stored under key, None when there is no (readable) entry
+    file_name = os.path.join(cache_dir, key + '.npz')
+    if not os.path.exists(file_name):
+        return None
+    try:
+        with np.load(file_name, allow_pickle=False) as data:
+            manifest = json.loads(str(data['manifest']))
+            items = []
+            k = 0
+            for record in manifest:
+                if record['container'] == 'value':
+                    items.append(decode_value(record['kind'], data['v%d' % k]))
+                    k += 1
+                    continue
+                item = OrderedDict() if record['container'] == 'OrderedDict' else {}
+                for name, kind in record['entries']:
+                    item[name] = decode_value(kind, data['v%d' % k])
+                    k += 1
+                items.append(item)
+    except (OSError, ValueError, KeyError):
+        return None
+    return tuple(items)
+
+
+def cached_inputs(loader, file_list, *params):
+    # loader() parses the input workbooks in file_list, params are its other arguments that change the result
+    # the result is read from the cache when the same files and arguments were loaded before
+    key = input_key(file_list, *params)
+    items = load_inputs(key)
+    if items is None:
+        items = loader()
+        save_inputs(key, items)
+    return items
@@ -0,0 +1,108 @@
+import os
+import re
+import numpy as np
+
+
+# lookup tables of the ionizable chemical database, parsed once per process and kept in memory
+# Koc_organicAcid is indexed by exact SMILES and by normalized CAS number (a cell may list several CAS numbers
+# separated by ';'), infiltrationRate is a soil type x slope class array
+# the tables are rebuilt only when the workbook changes on disk
+
+db_file = './IonizableChem_DB.xlsx'
+
+# upper bounds (%) of the slope classes 0-4%, 5-8%, 8-12%, 12-16% and over 16% of the infiltrationRate sheet
+slope_bins = np.array([4, 8, 12, 16])
+slope_columns = ['0-4%', '5-8%', '8-12%', '12-16%', 'over 16%']
+
+_tables = {}
+
+
+def normalize_cas(cas):
+    # CAS number without blanks and leading zeros, e.g. ' 0088-06-2' -> '88-06-2'
+    # returns None for an empty or placeholder entry
+    cas = re.sub(r'\s', '', str(cas))
+    if cas.upper() in ('', 'NAN', '--', 'NONE'):
+        return None
+    parts = cas.split('-')
+    if len(parts) == 3 and all(part.isdigit() for part in parts):
+        parts[0] = parts[0].lstrip('0') or '0'
+    return '-'.join(parts)
+
+
+def split_cas(cas):
+    # normalized CAS numbers of a cell or an input that lists several of them
+    cas_list = []
+    for entry in str(cas).split(';'):
+        normalized = normalize_cas(entry)
+        if normalized is not None:
+            cas_list.append(normalized)
+    return cas_list
+
+
+def build_tables(file_name):
+    # pandas is only needed to parse the workbook
+    import pandas as pd
+    sheets = pd.read_excel(file_name, sheet_name=['Koc_organicAcid', 'infiltrationRate'])
+
+    # the first row of a SMILES or a CAS number wins, as in a scan of the sheet from the top
+    koc = sheets['Koc_organicAcid']
+    koc_by_smiles = {}
+    koc_by_cas = {}
+    for smiles, cas, koc_i in zip(koc['SMILES'], koc['CAS'], koc['Koc_i'].values):
+        if isinstance(smiles, str) and smiles.upper() != 'NAN':
+            koc_by_smiles.setdefault(smiles, koc_i)
+        for cas_number in split_cas(cas):
+            koc_by_cas.setdefault(cas_number, koc_i)
+
+    # the soil types are the first column, the rows below the table (blank row, source notes) are dropped
+    infil = sheets['infiltrationRate'].set_index(sheets['infiltrationRate'].columns[0])
+    infil = infil.dropna(subset=slope_columns, how='all')
+    soil_index = dict((soil_type, k) for k, soil_type in enumerate(infil.index))
+    infil_rate = infil[slope_columns].values
+
+    return {'koc_by_smiles': koc_by_smiles, 'koc_by_cas': koc_by_cas, 'soil_index': soil_index,
+            'infil_rate': infil_rate}
+
+
+def get_tables(file_name=db_file):
+    # tables of file_name, parsed on the first call and again only after the file is modified
+    key = os.path.abspath(file_name)
+    stamp = os.path.getmtime(file_name)
+    if key not in _tables or _tables[key][0] != stamp:
+        _tables[key] = (stamp, build_tables(file_name))
+    return _tables[key][1]
+
+
+def koc_by_smiles(smiles, file_name=db_file):
+    return get_tables(file_name)['koc_by_smiles'].get(smiles)
+
+
+def koc_by_cas(cas, file_name=db_file):
+    # every CAS number of the input is tried in turn
+    table = get_tables(file_name)['koc_by_cas']
+    for cas_number in split_cas(cas):
+        if cas_number in table:
+            return table[cas_number]
+    return None
+
+
+def koc_acid(smiles, cas, file_name=db_file):
+    # Koc of the ionic species of an organic acid (L/kg), matched by SMILES first and then by CAS number
+    # None when the acid is not in the database
+    Koc_acid = None
+    if smiles is not None:
+        Koc_acid = koc_by_smiles(smiles, file_name)
+    if Koc_acid is None and cas is not None:
+        Koc_acid = koc_by_cas(cas, file_name)
+    return Koc_acid
+
+
+def slope_class(slope):
+    # column of the infiltrationRate table for a slope in %, works on arrays of slopes too
+    return np.searchsorted(slope_bins, slope, side='left')
+
+
+def infiltration_rate(soil_type, slope, file_name=db_file):
+    # infiltration rate (m/day) of a soil texture at a slope (%), raises KeyError for an unknown soil type
+    tables = get_tables(file_name)
+    return tables['infil_rate'][tables['soil_index'][soil_type], slope_class(slope)]
@@ -0,0 +1,164 @@
+from __future__ import division
+import numpy as np
+
+
+# organoFate (fugacity) and the aquivalence models for ionizable organics and metals are affine in
+# the state within one day: every flux is D*f (or D*Q) and the only terms independent of the state are
+# the releases and the advective inflows computed from bgConc. The coefficients are frozen to climate[...][i]
+# for the whole day, so each daily step is dy/dt = A_i*y + b_i and can be solved exactly.
+
+
+def zero_forcing(forcing):
+    # copy of the release or bgConc dictionary with every numeric entry set to 0
+    # daily release series are lists, background concentrations are scalars
+    zeroed = {}
+    for key, value in forcing.items():
+        if isinstance(value, (list, tuple, np.ndarray)):
+            zeroed[key] = np.zeros(len(value))
+        elif isinstance(value, (int, float, np.number)):
+            zeroed[key] = 0.0
+        else:
+            zeroed[key] = value
+    return zeroed
+
+
+def assemble_system(rhs, n, f_params, f_params_homogeneous):
+    # build the daily system matrix A (n x n) and the forcing vector b (n) from an affine ode function
+    # f_params are the arguments passed to the solver, f_params_homogeneous are the same arguments with
+    # release and bgConc replaced by zero_forcing() copies
+    # b = rhs(0) with the full forcing, column j of A = rhs(e_j) without forcing, so no cancellation occurs
+    # the ode functions only scale and add state entries, so all n unit vectors are probed in a single call
+    # by passing the identity matrix as the state: f[k] is then row k of the identity and every returned
+    # derivative is a row of A (compartments that are not present return a scalar 0)
+    b = np.asarray(rhs(0, np.zeros(n), *f_params), dtype=float)
+    dYdt = rhs(0, np.eye(n), *f_params_homogeneous)
+    A = np.array([np.broadcast_to(row, (n,)) for row in dYdt], dtype=float)
+    return A, b
+
+
+def horizon_forcing(forcing):
+    # copy of the climate, release or bgConc dictionary with the daily series as numpy arrays, so that
+    # forcing[key][i] also works for an array of day indices i
+    converted = {}
+    for key, value in forcing.items():
+        converted[key] = value
+        if isinstance(value, (list, tuple)):
+            try:
+                series = np.asarray(value, dtype=float)
+            except (TypeError, ValueError):
+                continue
+            if series.ndim == 1:
+                converted[key] = series
+    return converted
+
+
+def assemble_horizon(rhs, n, days, f_params, f_params_homogeneous, first_day=0):
+    # daily systems of the whole simulation in one broadcasted pass: A (days x n x n) and b (days x n)
+    # f_params are the arguments of the ode function after the day index i, with the climate and release
+    # series converted by horizon_forcing(), f_params_homogeneous as in assemble_system
+    # i is passed as a column of day indices, so every climate dependent coefficient (Z-values, MTCs, D-values)
+    # is a (days x 1) array and each derivative evaluated on the identity state is a (days x n) block of A
+    # first_day assembles a block of days starting later in the simulation, for runs advanced block by block
+    i = np.arange(first_day, first_day + days).reshape(days, 1)
+    b = assemble_forcing(rhs, n, days, f_params, first_day)
+    A_rows = rhs(0, np.eye(n), i, *f_params_homogeneous)
+    A = np.stack([np.broadcast_to(row, (days, n)) for row in A_rows], axis=1).astype(float)
+    return A, b
+
+
+def assemble_forcing(rhs, n, days, f_params, first_day=0):
+    # forcing vectors b (days x n) of the daily systems, the state independent part of assemble_horizon
+    i = np.arange(first_day, first_day + days).reshape(days, 1)
+    b_rows = rhs(0, np.zeros(n), i, *f_params)
+    return np.hstack([np.broadcast_to(row, (days, 1)) for row in b_rows]).astype(float)
+
+
+def daily_propagators(A_days, B_days):
+    # transition matrix Phi = expm(A) and input matrix Gamma = int_0^1 expm(A*s) ds * B of every day, so that
+    # y(1) = Phi*y(0) + Gamma*u for a forcing b = B*u held over the day (B_days is days x n x m)
+    # both come from one exponential of [[A, B], [0, 0]] per day as in exact_step, evaluated for all days at once
+    from scipy.linalg import expm
+    days, n, m = B_days.shape
+    M = np.zeros((days, n + m, n + m))
+    M[:, :n, :n] = A_days
+    M[:, :n, n:] = B_days
+    E = expm(M)
+    return E[:, :n, :n], E[:, :n, n:]
+
+
+def propagate(Phi, Gamma, y0, u):
+    # states at the end of every day from the daily propagators, y(d + 1) = Phi[d]*y(d) + Gamma[d]*u[d]
+    # Phi is days x p x n with p >= n, rows beyond n are states that restart from 0 every day (the quadrature states
+    # of process_output 'integrated') and only the first n are carried to the next day
+    # y0 (..., n) and u (..., days, m) can have a leading dimension of release scenarios, advanced together
+    forcing = np.einsum('dpm,...dm->...dp', Gamma, u)
+    states = np.zeros(forcing.shape)
+    y = np.asarray(y0, dtype=float)
+    n = y.shape[-1]
+    for d in range(len(Phi)):
+        states[..., d, :] = np.einsum('pn,...n->...p', Phi[d], y) + forcing[..., d, :]
+        y = states[..., d, :n]
+    return states
+
+
+def adjoint_sensitivity(Phi, Gamma, weights, days):
+    # derivatives of the receptors weights[r] . y(days[r] + 1), the weighted states at the end of day days[r], with
+    # respect to the inputs u of every day and to the initial state y0, from one backward pass over the daily
+    # propagators of propagate: lambda(d) = Phi[d]^T * lambda(d + 1), and Gamma[d]^T * lambda(d + 1) for the inputs
+    # weights is receptors x n, the receptors of the same pass can end on different days
+    # returns receptors x (max(days) + 1) x m, zero after the day of each receptor, and receptors x n for y0
+    weights = np.asarray(weights, dtype=float)
+    days = np.asarray(days)
+    n = weights.shape[-1]
+    sensitivity = np.zeros((len(weights), days.max() + 1, Gamma.shape[-1]))
+    adjoint = np.zeros(weights.shape)
+    for d in range(days.max(), -1, -1):
+        ending = days == d
+        adjoint[ending] = weights[ending]
+        sensitivity[:, d, :] = adjoint.dot(Gamma[d, :n])
+        adjoint = adjoint.dot(Phi[d, :n])
+    return sensitivity, adjoint
+
+
+def linear_rhs(t, y, A, b):
+    # right-hand side of the assembled daily system, used in place of the full ode function by vode
+    return A.dot(y) + b
+
+
+def linear_jac(t, y, A, b):
+    # the Jacobian of the affine system is the assembled matrix itself, constant over the day
+    return A
+
+
+def quadrature_system(A, b):
+    # daily system augmented with the integral of the state, d/dt [y, Y] = [A*y + b, y]
+    # works on one day (n x n, n) and on the assembled horizon (days x n x n, days x n)
+    # the fluxes are affine in the state, so the process rates evaluated at Y(1) are the mass moved during the day
+    n = b.shape[-1]
+    A_q = np.zeros(A.shape[:-2] + (2 * n, 2 * n))
+    A_q[..., :n, :n] = A
+    A_q[..., n:, :n] = np.eye(n)
+    b_q = np.concatenate([b, np.zeros(b.shape)], axis=-1)
+    return A_q, b_q
+
+
+def steady_state(A, b):
+    # Level III steady state, the solution of A*y = -b
+    # compartments without any process (all-zero rows of A, e.g. compartments that are not present) stay at 0
+    active = np.any(A != 0, axis=1)
+    y = np.zeros(len(b))
+    y[active] = np.linalg.solve(A[np.ix_(active, active)], -b[active])
+    return y
+
+
+def exact_step(A, b, y0, dt=1.0):
+    # y(dt) = expm(A*dt)*y0 + int_0^dt expm(A*s) ds * b
+    # both terms come from one exponential of the augmented matrix [[A, b], [0, 0]]
+    # scipy.linalg is imported by the first exponential, the integrating modes never load it
+    from scipy.linalg import expm
+    n = len(y0)
+    M = np.zeros((n + 1, n + 1))
+    M[:n, :n] = A
+    M[:n, n] = b
+    E = expm(M * dt)
+    return E[:n, :n].dot(y0) + E[:n, n]
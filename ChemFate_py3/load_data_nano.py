@@ -1,10 +1,11 @@
 #!/usr/bin/env python
-import xlrd
 import collections
 from collections import OrderedDict
 from datetime import datetime
 import numpy as np
 from advective_processes_nano import lsFactor
+from input_cache import cached_inputs
+from workbook_registry import WorkbookRegistry
 
 #################################################################
 #
@@ -17,14 +18,29 @@ from advective_processes_nano import lsFactor
 #################################################################
 
 
-def load_bgConc(filename, sheetname, presence):
-    chem_workbook = xlrd.open_workbook(filename)
-    bgValues_worksheet = chem_workbook.sheet_by_name(sheetname)
-    bgValues_code = bgValues_worksheet.col_values(1, start_rowx=2, end_rowx=None)
-    bgValues_value = bgValues_worksheet.col_values(2, start_rowx=2, end_rowx=None)
+# the loaders read their sheet through a WorkbookRegistry, load_data passes one registry to all of them so
+# Region.xlsx and ChemRelease.xlsx are opened once per run, a loader called on its own opens the file itself
+def input_sheet(filename, sheetname, registry=None):
+    if registry is None:
+        registry = WorkbookRegistry()
+    return registry.sheet(filename, sheetname)
+
+
+def sheet_dates(worksheet, start_row, end_row):
+    # datetime of each day from the month, day and year columns
+    month = worksheet.column(0, start_row, end_row).astype(int)
+    day = worksheet.column(1, start_row, end_row).astype(int)
+    year = worksheet.column(2, start_row, end_row).astype(int)
+    return [datetime(y, m, d) for y, m, d in zip(year.tolist(), month.tolist(), day.tolist())]
+
+
+def load_bgConc(filename, sheetname, presence, registry=None):
+    bgValues_worksheet = input_sheet(filename, sheetname, registry)
+    bgValues_code = bgValues_worksheet.column(1, start_rowx=2).tolist()
+    bgValues_value = bgValues_worksheet.column(2, start_rowx=2)
     # convert to units of ug/m3
     ## always converts units so need to make sure that inputs are always kg
-    bgValues_value2 = [x * 10 ** 9 for x in bgValues_value]
+    bgValues_value2 = (bgValues_value * 10 ** 9).tolist()
 
     bgValues = OrderedDict(zip(bgValues_code, bgValues_value2))
 
@@ -99,58 +115,34 @@ def load_bgConc(filename, sheetname, presence):
     return bgConc
 
 
-def load_climate(filename, sheetname, start_row, end_row):
-    env_workbook = xlrd.open_workbook(filename)
-    climate_worksheet = env_workbook.sheet_by_name(sheetname)
+def load_climate(filename, sheetname, start_row, end_row, registry=None):
+    climate_worksheet = input_sheet(filename, sheetname, registry)
 
     # Climate Parameter Loading
-    climate_month = climate_worksheet.col_values(0, start_rowx=start_row, end_rowx=end_row)
-    climate_day = climate_worksheet.col_values(1, start_rowx=start_row, end_rowx=end_row)
-    climate_year = climate_worksheet.col_values(2, start_rowx=start_row, end_rowx=end_row)
-    climate_precip = climate_worksheet.col_values(3, start_rowx=start_row, end_rowx=end_row)
-    climate_windspeed = climate_worksheet.col_values(4, start_rowx=start_row, end_rowx=end_row)
-    climate_flow = climate_worksheet.col_values(5, start_rowx=start_row, end_rowx=end_row)
-    climate_temp = climate_worksheet.col_values(6, start_rowx=start_row, end_rowx=end_row)
-    climate_evap = climate_worksheet.col_values(7, start_rowx=start_row, end_rowx=end_row)
-
-    names = climate_worksheet.row_values(0, start_colx=3, end_colx=None)
-    headers = []
-
-    headers.append('dates')
-    for val in names:
-        headers.append(val)
+    climate_precip = climate_worksheet.column(3, start_rowx=start_row, end_rowx=end_row)
+    climate_windspeed = climate_worksheet.column(4, start_rowx=start_row, end_rowx=end_row)
+    climate_flow = climate_worksheet.column(5, start_rowx=start_row, end_rowx=end_row)
+    climate_temp = climate_worksheet.column(6, start_rowx=start_row, end_rowx=end_row)
+    climate_evap = climate_worksheet.column(7, start_rowx=start_row, end_rowx=end_row)
 
     # Create Datetime Objects
-    new_datetime = []
-    new_month = [int(i) for i in climate_month]
-    new_day = [int(i) for i in climate_day]
-    new_year = [int(i) for i in climate_year]
-    dt = zip(new_year, new_month, new_day)
-    for val in dt:
-        mystring = ' '.join(map(str, val))
-        dt = datetime.strptime(mystring, "%Y %m %d")
-        new_datetime.append(dt)
-    climate_loading = zip(new_datetime, climate_precip, climate_windspeed, climate_flow, climate_temp)
+    new_datetime = sheet_dates(climate_worksheet, start_row, end_row)
 
     # climate = {}
     climate = OrderedDict()
     climate['dates'] = new_datetime
-    climate['precip'] = climate_precip
-    climate['windspeed'] = climate_windspeed
-    climate['flow'] = climate_flow
-    climate['temp'] = climate_temp
-    climate['evap'] = climate_evap
+    climate['precip'] = climate_precip.tolist()
+    climate['windspeed'] = climate_windspeed.tolist()
+    climate['flow'] = climate_flow.tolist()
+    climate['temp'] = climate_temp.tolist()
+    climate['evap'] = climate_evap.tolist()
 
     return climate
 
 
-def load_ENM(filename, sheetname, presence):
-    chem_workbook = xlrd.open_workbook(filename)
-    ENM_worksheet = chem_workbook.sheet_by_name(sheetname)
-
-    ENM_code = ENM_worksheet.col_values(1, start_rowx=2, end_rowx=None)
-    ENM_value = ENM_worksheet.col_values(2, start_rowx=2, end_rowx=None)
-    ENM_loading = zip(ENM_code, ENM_value)
+def load_ENM(filename, sheetname, presence, registry=None):
+    ENM_worksheet = input_sheet(filename, sheetname, registry)
+    ENM_loading = ENM_worksheet.table(1, 2, start_rowx=2)
 
     # ENM = {}
     ENM = OrderedDict()
@@ -191,13 +183,9 @@ def load_ENM(filename, sheetname, presence):
     return ENM
 
 
-def load_env(filename, sheetname, presence):
-    env_workbook = xlrd.open_workbook(filename)
-    env_worksheet = env_workbook.sheet_by_name(sheetname)
-
-    env_code = env_worksheet.col_values(1, start_rowx=1, end_rowx=None)
-    env_value = env_worksheet.col_values(2, start_rowx=1, end_rowx=None)
-    env_loading = zip(env_code, env_value)
+def load_env(filename, sheetname, presence, registry=None):
+    env_worksheet = input_sheet(filename, sheetname, registry)
+    env_loading = env_worksheet.table(1, 2, start_rowx=1)
 
     env = OrderedDict()
     for name, value in env_loading:
@@ -541,20 +529,15 @@ def load_env(filename, sheetname, presence):
     return env
 
 
-def load_presence(filename, sheetname):
-    env_workbook = xlrd.open_workbook(filename)
-    presence_worksheet = env_workbook.sheet_by_name(sheetname)
-    presence_code = presence_worksheet.col_values(1, start_rowx=1, end_rowx=None)
-    presence_value = presence_worksheet.col_values(2, start_rowx=1, end_rowx=None)
-    presence_loading = zip(presence_code, presence_value)
+def load_presence(filename, sheetname, registry=None):
+    presence_worksheet = input_sheet(filename, sheetname, registry)
+    presence_loading = presence_worksheet.table(1, 2, start_rowx=1)
 
     # presence = {}
     presence = OrderedDict()
     for name, value in presence_loading:
         presence[name] = value
 
-    str_list = list(filter(None, presence_value))
-
     # if the user ever wants to make unique changes to the presence/absence data
     # beyond simply the bulk compartments.  They would do it here for individual runs.
     # For example, the user might want freshwater without suspended sediment. By changing
@@ -623,83 +606,57 @@ def load_presence(filename, sheetname):
     return presence
 
 
-def load_release(filename, sheetname, start_row, end_row, presence):
-    chem_workbook = xlrd.open_workbook(filename)
-    release_ws = chem_workbook.sheet_by_name(sheetname)
+def load_release(filename, sheetname, start_row, end_row, presence, registry=None):
+    release_ws = input_sheet(filename, sheetname, registry)
 
-    release_scenario = release_ws.cell_value(rowx=0, colx=1)
+    release_scenario = release_ws.cell(0, 1)
 
     start_row = start_row + 1
     end_row = end_row + 1
 
-    release_month = release_ws.col_values(0, start_rowx=start_row, end_rowx=end_row)
-    release_day = release_ws.col_values(1, start_rowx=start_row, end_rowx=end_row)
-    release_year = release_ws.col_values(2, start_rowx=start_row, end_rowx=end_row)
-    release_air = release_ws.col_values(3, start_rowx=start_row, end_rowx=end_row)
-    release_fw = release_ws.col_values(4, start_rowx=start_row, end_rowx=end_row)
-    release_fSS = release_ws.col_values(5, start_rowx=start_row, end_rowx=end_row)
-    release_fwSed = release_ws.col_values(6, start_rowx=start_row, end_rowx=end_row)
-    release_sw = release_ws.col_values(7, start_rowx=start_row, end_rowx=end_row)
-    release_sSS = release_ws.col_values(8, start_rowx=start_row, end_rowx=end_row)
-    release_swSed = release_ws.col_values(9, start_rowx=start_row, end_rowx=end_row)
-    release_soil1 = release_ws.col_values(10, start_rowx=start_row, end_rowx=end_row)
-    release_dsoil1 = release_ws.col_values(11, start_rowx=start_row, end_rowx=end_row)
-    release_soil2 = release_ws.col_values(12, start_rowx=start_row, end_rowx=end_row)
-    release_dsoil2 = release_ws.col_values(13, start_rowx=start_row, end_rowx=end_row)
-    release_soil3 = release_ws.col_values(14, start_rowx=start_row, end_rowx=end_row)
-    release_dsoil3 = release_ws.col_values(15, start_rowx=start_row, end_rowx=end_row)
-    release_soil4 = release_ws.col_values(16, start_rowx=start_row, end_rowx=end_row)
-    release_dsoil4 = release_ws.col_values(17, start_rowx=start_row, end_rowx=end_row)
+    # release columns air, fw, fSS, fwSed, sw, sSS, swSed, soil1, dsoil1, ..., soil4, dsoil4 (kg/day) in one
+    # (days x 15) array, converted to ng/day
+    release_names = ['air', 'fw', 'fSS', 'fwSed', 'sw', 'sSS', 'swSed', 'soil1', 'dsoil1', 'soil2', 'dsoil2',
+                     'soil3', 'dsoil3', 'soil4', 'dsoil4']
+    release_values = release_ws.columns_block(3, 3 + len(release_names), start_rowx=start_row, end_rowx=end_row) * 10 ** 9
 
     # Create Datetime Objects
-    new_datetime = []
-    new_month = [int(i) for i in release_month]
-    new_day = [int(i) for i in release_day]
-    new_year = [int(i) for i in release_year]
-    dt = zip(new_year, new_month, new_day)
-    for val in dt:
-        mystring = ' '.join(map(str, val))
-        dt = datetime.strptime(mystring, "%Y %m %d")
-        new_datetime.append(dt)
+    new_datetime = sheet_dates(release_ws, start_row, end_row)
 
     # release = {}
     release = OrderedDict()
     release['dates'] = new_datetime
-    release['air'] = [x * 10 ** 9 for x in release_air]
-    release['fw'] = [x * 10 ** 9 for x in release_fw]
-    release['fSS'] = [x * 10 ** 9 for x in release_fSS]
-    release['fwSed'] = [x * 10 ** 9 for x in release_fwSed]
-    release['sw'] = [x * 10 ** 9 for x in release_sw]
-    release['sSS'] = [x * 10 ** 9 for x in release_sSS]
-    release['swSed'] = [x * 10 ** 9 for x in release_swSed]
-    release['soil1'] = [x * 10 ** 9 for x in release_soil1]
-    release['dsoil1'] = [x * 10 ** 9 for x in release_dsoil1]
-    release['soil2'] = [x * 10 ** 9 for x in release_soil2]
-    release['dsoil2'] = [x * 10 ** 9 for x in release_dsoil2]
-    release['soil3'] = [x * 10 ** 9 for x in release_soil3]
-    release['dsoil3'] = [x * 10 ** 9 for x in release_dsoil3]
-    release['soil4'] = [x * 10 ** 9 for x in release_soil4]
-    release['dsoil4'] = [x * 10 ** 9 for x in release_dsoil4]
+    for k, name in enumerate(release_names):
+        release[name] = release_values[:, k].tolist()
 
     if presence['air'] == 0:
-        release['Air'] = [x * 0 for x in release_air]
+        release['Air'] = (release_values[:, 0] * 0).tolist()
     if presence['fw'] == 0:
-        release['fw'] = [x * 0 for x in release_fw]
+        release['fw'] = (release_values[:, 1] * 0).tolist()
     if presence['sw'] == 0:
-        release['sw'] = [x * 0 for x in release_sw]
+        release['sw'] = (release_values[:, 4] * 0).tolist()
     if presence['soil1'] == 0:
-        release['Soil1'] = [x * 0 for x in release_soil1]
+        release['Soil1'] = (release_values[:, 7] * 0).tolist()
     if presence['soil2'] == 0:
-        release['Soil2'] = [x * 0 for x in release_soil2]
+        release['Soil2'] = (release_values[:, 9] * 0).tolist()
     if presence['soil3'] == 0:
-        release['Soil3'] = [x * 0 for x in release_soil3]
+        release['Soil3'] = (release_values[:, 11] * 0).tolist()
     if presence['soil4'] == 0:
-        release['Soil4'] = [x * 0 for x in release_soil4]
+        release['Soil4'] = (release_values[:, 13] * 0).tolist()
 
     return release, release_scenario
 
 
-def load_data(env_filename, enmConc_filename, enm_filename, start_date, end_date):
+def load_data(env_filename, enmConc_filename, enm_filename, start_date, end_date, use_cache=True):
+    # use_cache reads the parsed inputs from the input_cache when the same files and period were loaded before
+    if not use_cache:
+        return parse_data(env_filename, enmConc_filename, enm_filename, start_date, end_date, use_cache=False)
+    return cached_inputs(lambda: parse_data(env_filename, enmConc_filename, enm_filename, start_date, end_date),
+                         [env_filename, enmConc_filename, enm_filename], 'load_data_nano', start_date, end_date)
+
+
+def simulation_rows(start_date, end_date):
+    # first and last (excluded) row of the period in the Climate and Release sheets, and the number of days
     # original start date will change if user does custom datasets...
     original_start_date = datetime.strptime('2005 1 1', "%Y %m %d")
     start_day = datetime.strptime(start_date, "%Y %m %d")
@@ -707,12 +664,35 @@ def load_data(env_filename, enmConc_filename, enm_filename, start_date, end_date
     end_day = datetime.strptime(end_date, "%Y %m %d")
     time = (end_day - start_day).days + 1
     end_row = start_row + time
+    return start_row, end_row, time
+
+
+def load_region(env_filename, start_date, end_date, registry=None, use_cache=True):
+    # presence, environment and climate depend on the region workbook and the period only, they are cached on
+    # their own so that runs of other ENMs or release scenarios in the same region parse them once
+    if not use_cache:
+        return parse_region(env_filename, start_date, end_date, registry)
+    return cached_inputs(lambda: parse_region(env_filename, start_date, end_date, registry), [env_filename],
+                         'load_data_nano region', start_date, end_date)
+
+
+def parse_region(env_filename, start_date, end_date, registry=None):
+    start_row, end_row, time = simulation_rows(start_date, end_date)
+    presence = load_presence(env_filename, 'Presence', registry)
+    env = load_env(env_filename, 'Environment', presence, registry)
+    climate = load_climate(env_filename, 'Climate', start_row, end_row, registry)
+    return presence, env, climate
+
+
+def parse_data(env_filename, enmConc_filename, enm_filename, start_date, end_date, use_cache=True):
+    start_row, end_row, time = simulation_rows(start_date, end_date)
 
-    presence = load_presence(env_filename, 'Presence')
-    env = load_env(env_filename, 'Environment', presence)
-    climate = load_climate(env_filename, 'Climate', start_row, end_row)
-    bgConc = load_bgConc(enmConc_filename, 'bgConc', presence)
-    ENM = load_ENM(enm_filename, 'Sheet1', presence)
-    release, release_scenario = load_release(enmConc_filename, 'Release', start_row, end_row, presence)
+    # every workbook is opened once and shared by the loaders
+    registry = WorkbookRegistry()
+    presence, env, climate = load_region(env_filename, start_date, end_date, registry, use_cache)
+    bgConc = load_bgConc(enmConc_filename, 'bgConc', presence, registry)
+    ENM = load_ENM(enm_filename, 'Sheet1', presence, registry)
+    release, release_scenario = load_release(enmConc_filename, 'Release', start_row, end_row, presence, registry)
+    registry.release_resources()
 
     return time, presence, env, climate, bgConc, ENM, release, release_scenario
\ No newline at end of file
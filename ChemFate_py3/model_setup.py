@@ -1,23 +1,47 @@
 from __future__ import division
 from datetime import datetime
-import pandas as pd
 from collections import OrderedDict
-from load_data import LoadData
-from load_data_nano import load_data
-from model_solver import org_solver, ion_solver, nano_solver
-from generate_result import GenerateResult
+from model_solver import org_blocks, ion_blocks, nano_blocks
+from result_export import check_output_format, check_plot_policy
+from result_stream import check_stream_format
+
+# the input loader of the chemical class, pandas and the result writer (with its plotting libraries) are imported
+# when they are first needed, so importing model_setup stays cheap for worker processes
 
 
 class Model_SetUp:
 
     def __init__(self, start_date, end_date, run_option, bgPercOption2,
-                 chem_type, chem_file, region_file, release_file, output_file_path, file_name):
+                 chem_type, chem_file, region_file, release_file, output_file_path, file_name, solver_mode='vode',
+                 solver_preset='default', process_output='snapshot', output_format='xlsx', stream_days=None,
+                 stream_format='csv', plots='all', plot_workers=None):
         # start date and end date need to be in the format of "%Y %m %d", eg:'2005 2 3'
         # option contains two options
         # option 1 - set background concentration to 0 or front end replace the concentration sheet data directly
         # option 2 - set background concentration to 0 first, and then run the model;
         # and then calculate the average concentrations and set it to the background concentration
         # and then run the model again
+        # solver_mode selects how each simulated day is integrated
+        # 'vode' - BDF integration of the ode (default)
+        # 'lsoda' - lsoda integration, switching between stiff and non-stiff methods
+        # 'radau', 'bdf' - the implicit Radau and BDF methods of scipy solve_ivp
+        # 'exact' - matrix exponential of the assembled daily system (organoFate, ionOFate and metalFate)
+        # 'continuous' - one vode integration over the whole simulation, switching the daily coefficients at day boundaries
+        # 'steady' - Level III steady state of the mean of the daily systems, the output tables have a single row
+        # dated on the start date (organoFate, ionOFate and metalFate)
+        # 'propagator' - the daily matrices of 'exact' for the chemical and region are kept in the input_cache, runs
+        # of other release scenarios only apply them to their releases (organoFate, ionOFate and metalFate)
+        # solver_preset selects the integrator tolerances of the chemical class: 'fast', 'default' or 'accurate'
+        # process_output selects the process table: 'snapshot' - process rates at the end of each day (kg/day),
+        # 'integrated' - mass moved by each process during the day (kg), integrated with the states
+        # output_format selects the files of the result tables: 'xlsx' (workbooks), 'parquet', 'feather', 'hdf5' or
+        # 'netcdf' (columnar files, need pyarrow, PyTables or xarray), see result_export
+        # stream_days runs the simulation in blocks of that many days and appends each block to a stream_format
+        # store ('csv', 'hdf5' or 'parquet', see result_stream) instead of keeping all days in memory; only the
+        # summary tables are written in output_format and only the release figure is drawn
+        # None (default) keeps the whole simulation in memory and writes the full tables and figures
+        # plots selects the figures: 'none', 'summary' (releases, heatmap and bulk concentrations of the whole
+        # chemical) or 'all' (default), drawn by plot_workers processes (None - one per CPU, 1 - in this process)
 
         self.start_date = start_date
         self.end_date = end_date
@@ -29,6 +53,18 @@ class Model_SetUp:
         self.release_file = release_file
         self.output_file_path = output_file_path
         self.file_name = file_name
+        self.solver_mode = solver_mode
+        self.solver_preset = solver_preset
+        self.process_output = process_output
+        check_output_format(output_format)
+        self.output_format = output_format
+        if stream_days is not None:
+            check_stream_format(stream_format)
+        self.stream_days = stream_days
+        self.stream_format = stream_format
+        check_plot_policy(plots)
+        self.plots = plots
+        self.plot_workers = plot_workers
 
     def simulation_days(self):
         start_day = datetime.strptime(self.start_date, "%Y %m %d")
@@ -38,6 +74,7 @@ class Model_SetUp:
 
 
     def bgConc_new_cal(self, input_file_list, HL_air, HL_fWater, HL_fSedS):
+        import pandas as pd
         # TODO: do we also need to consider the ion's bgconc?
         sim_days = self.simulation_days()
         rows_to_skip = int(sim_days * (1 - self.bgPercOption2))
@@ -156,6 +193,7 @@ class Model_SetUp:
         return bgConc_new
 
     def bgConc_new_cal_nano(self, input_file, time):
+        import pandas as pd
         rows_to_skip = int(time * (1 - self.bgPercOption2))
         bgConc_new = OrderedDict()
         conc_data = pd.read_csv(input_file, skiprows = range(1, rows_to_skip+1), skipinitialspace=True)
@@ -194,19 +232,53 @@ class Model_SetUp:
         return bgConc_new
 
 
+    def result_blocks(self, time, presence, env, climate, chemParams, bgConc, release, block_days=None):
+        # results of the solver of the chemical class block by block (see model_solver.day_blocks), every block is
+        # (date_array, process_array, funC_df_list, funM_df_list) with the tables in the order of GenerateResult
+        if self.chem_type == 'NonionizableOrganic':
+            blocks = org_blocks(self.start_date, time, presence, env, climate, chemParams, bgConc, release,
+                                solver_mode=self.solver_mode, solver_preset=self.solver_preset,
+                                process_output=self.process_output, block_days=block_days)
+        elif self.chem_type == 'IonizableOrganic' or self.chem_type == 'Metal':
+            blocks = ion_blocks(self.chem_type, self.start_date, time, presence, env, climate, chemParams, bgConc,
+                                release, solver_mode=self.solver_mode, solver_preset=self.solver_preset,
+                                process_output=self.process_output, block_days=block_days)
+        elif self.chem_type == 'Nanomaterial':
+            blocks = nano_blocks(self.start_date, time, presence, env, climate, chemParams, bgConc, release,
+                                 solver_mode=self.solver_mode, solver_preset=self.solver_preset,
+                                 process_output=self.process_output, block_days=block_days)
+
+        for block in blocks:
+            date_array, process_array = block[:2]
+            if self.chem_type == 'NonionizableOrganic':
+                funC_kg_1, funC_kg_1_sub, funM_kg_1, funM_kg_1_sub = block[2:]
+                funC_df_list = [funC_kg_1, funC_kg_1_sub]
+                funM_df_list = [funM_kg_1, funM_kg_1_sub]
+            elif self.chem_type == 'IonizableOrganic' or self.chem_type == 'Metal':
+                funC_kg_1, funC_kg_2, funC_kg_3, funC_kg_1_sub, funC_kg_2_sub, funC_kg_3_sub, \
+                funM_kg_1, funM_kg_2, funM_kg_3, funM_kg_1_sub, funM_kg_2_sub, funM_kg_3_sub = block[2:]
+                funC_df_list = [funC_kg_1, funC_kg_1_sub, funC_kg_2, funC_kg_2_sub, funC_kg_3, funC_kg_3_sub]
+                funM_df_list = [funM_kg_1, funM_kg_1_sub, funM_kg_2, funM_kg_2_sub, funM_kg_3, funM_kg_3_sub]
+            else:
+                funC_kg_1, funC_kg_2, funC_kg_3, funM_kg_1, funM_kg_2, funM_kg_3 = block[6:]
+                funC_df_list = [funC_kg_1, funC_kg_2, funC_kg_3]
+                funM_df_list = [funM_kg_1, funM_kg_2, funM_kg_3]
+            yield date_array, process_array, funC_df_list, funM_df_list
+
+
     def run_model(self):
         if self.chem_type != 'Nanomaterial':
             # load data
+            from load_data import LoadData
             data = LoadData(self.chem_type, self.chem_file, self.region_file, self.release_file, self.start_date,
                             self.end_date)
             chemParams, presence, env, climate, bgConc, release, release_scenario = data.run_loadData()
             V_bulk_list = [env['airV'], env['fwV'], env['sedFWV'], env['swV'], env['sedSWV'], env['soilV1'],
                            env['soilV2'], env['soilV3'], env['soilV4']]
-            sim_days = self.simulation_days()
-            funC_df_list = []
-            funM_df_list = []
+            time = self.simulation_days()
         else:
             # load data
+            from load_data_nano import load_data
             time, presence, env, climate, bgConc, chemParams, release, release_scenario = load_data(self.region_file, self.release_file,
                                                                            self.chem_file, self.start_date,
                                                                            self.end_date)
@@ -214,32 +286,27 @@ class Model_SetUp:
             V_bulk_list = [env['airV'], env['freshwV'], env['sedFWV'], env['seawV'], env['sedSWV'], env['soilV1'],
                            env['soilV2'], env['soilV3'], env['soilV4']]
 
-        if self.run_option == 1:
-            if self.chem_type == 'NonionizableOrganic':
-                date_array, process_array, funC_kg_1, funC_kg_1_sub, funM_kg_1, funM_kg_1_sub = \
-                    org_solver(self.start_date, sim_days, presence, env, climate, chemParams, bgConc, release)
-                funC_df_list = [funC_kg_1, funC_kg_1_sub]
-                funM_df_list = [funM_kg_1, funM_kg_1_sub]
+        # generate results and plots
+        from generate_result import GenerateResult
+        result = GenerateResult()
 
-            elif self.chem_type == 'IonizableOrganic' or self.chem_type=='Metal':
-                date_array, process_array, funC_kg_1, funC_kg_2, funC_kg_3, funC_kg_1_sub, funC_kg_2_sub, funC_kg_3_sub, \
-                funM_kg_1, funM_kg_2, funM_kg_3, funM_kg_1_sub, funM_kg_2_sub, funM_kg_3_sub = \
-                    ion_solver(self.chem_type, self.start_date, sim_days, presence, env, climate, chemParams, bgConc, release)
-                funC_df_list = [funC_kg_1, funC_kg_1_sub, funC_kg_2, funC_kg_2_sub, funC_kg_3, funC_kg_3_sub]
-                funM_df_list = [funM_kg_1, funM_kg_1_sub, funM_kg_2, funM_kg_2_sub, funM_kg_3, funM_kg_3_sub]
+        if self.run_option == 1:
+            # run option 1 is for a single run
+            if self.stream_days is not None:
+                # blocks of stream_days days, each appended to the stream store as soon as it is solved
+                result.stream_output(self.chem_type, chemParams['name'], env['name'], release_scenario, release,
+                                     self.result_blocks(time, presence, env, climate, chemParams, bgConc, release,
+                                                        block_days=self.stream_days),
+                                     self.output_file_path, self.file_name, output_format=self.output_format,
+                                     process_output=self.process_output, stream_format=self.stream_format,
+                                     plots=self.plots)
+                return
 
-            elif self.chem_type == 'Nanomaterial':
-                # run option 1 is for a single run
-                date_array, process_array, funC_kg, funC_kg_sub, funM_kg, funM_kg_sub, \
-                funC_kg_1, funC_kg_2, funC_kg_3, funM_kg_1, funM_kg_2, funM_kg_3 = \
-                    nano_solver(self.start_date, time, presence, env, climate, chemParams, bgConc, release)
-                funC_df_list = [funC_kg_1, funC_kg_2, funC_kg_3]
-                funM_df_list = [funM_kg_1, funM_kg_2, funM_kg_3]
+            # the whole simulation as a single block
+            date_array, process_array, funC_df_list, funM_df_list = \
+                next(self.result_blocks(time, presence, env, climate, chemParams, bgConc, release))
 
-        # generate results and plots
-        result = GenerateResult()
         result.store_output(self.chem_type, chemParams['name'], env['name'], release_scenario, release,
                             date_array, process_array, V_bulk_list, funC_df_list, funM_df_list,
-                            self.output_file_path, self.file_name)
-
-
+                            self.output_file_path, self.file_name, output_format=self.output_format,
+                            process_output=self.process_output, plots=self.plots, plot_workers=self.plot_workers)
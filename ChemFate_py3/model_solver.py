@@ -1,49 +1,376 @@
 import numpy as np
 from datetime import datetime, timedelta
 import math
-from scipy.integrate import ode
 import json
 
-from Y_ion import Y_Value
 from Z_non_ion import zValue
-from eqDissolution import eqDissolution
 
-from ode_non_ion import org_ode
-from ode_ion import ion_ode
-from ode_metal import metal_ode
-from ode_nano import ode_nano
-
-from ode_ion_process import ion_process
-from ode_metal_process import metal_process
-from ode_non_ion_process import org_process
-from ode_nano_process import nano_process
+# the ode and process modules of a chemical class (and Y_ion, which needs the partition coefficient models of the
+# ionizable chemicals) are imported by its solver, so a run only loads the model it simulates
+from linear_solver import zero_forcing, horizon_forcing, assemble_horizon, assemble_forcing, \
+    linear_rhs, linear_jac, exact_step, steady_state, quadrature_system, daily_propagators, propagate, \
+    adjoint_sensitivity
+
+
+# solver_mode selects the integrator of the daily steps
+# 'vode' and 'lsoda' are the scipy.integrate.ode integrators, 'radau' and 'bdf' the implicit methods of solve_ivp,
+# 'exact' advances the assembled daily system with a matrix exponential (falls back to 'vode' for nanoFate),
+# 'continuous' integrates all days in a single vode pass,
+# 'steady' solves the Level III steady state of the mean of the daily systems (not available for nanoFate),
+# 'propagator' advances the daily transition and release-response matrices of the chemical and region, kept in the
+# input_cache, so runs of other release scenarios only multiply them with their releases (see release_propagators;
+# falls back to 'vode' for nanoFate)
+solver_modes = ('vode', 'lsoda', 'radau', 'bdf', 'exact', 'continuous', 'steady', 'propagator')
+
+# release columns of load_release (mol/day), inputs of the release-response matrices of 'propagator' mode
+release_columns = ['air', 'fw', 'fSS', 'fwSed', 'sw', 'sSS', 'swSed', 'soil1', 'dsoil1', 'soil2', 'dsoil2', 'soil3',
+                   'dsoil3', 'soil4', 'dsoil4']
+
+# bulk compartments of the states of the organic, ionizable and metal models, and the bgConc entries of their
+# initial conditions
+ion_compartments = ['air', 'fw', 'fwSed', 'sw', 'swSed', 'soil1', 'deepS1', 'soil2', 'deepS2', 'soil3', 'deepS3',
+                    'soil4', 'deepS4']
+bgConc_names = ['air', 'fw', 'fSedS', 'sw', 'sSedS', 'soilS1', 'dsoil1', 'soilS2', 'dsoil2', 'soilS3', 'dsoil3',
+                'soilS4', 'dsoil4']
+
+# process_output selects what the process table holds
+# 'snapshot' the process rates at the state of the end of each day (kg/day),
+# 'integrated' the mass moved by each process during the day (kg), integrated together with the states
+process_outputs = ('snapshot', 'integrated')
+
+# integrator tolerances of each chemical class, solver_preset picks one of them
+# 'default' is the original setting of each model, 'fast' loosens the relative tolerance for screening runs,
+# 'accurate' tightens both tolerances for reference runs; atol follows the size of the state variables
+# (fugacity in Pa, aquivalence in mol/m3, nanomaterial mass in kg*10^9)
+# nsteps is only used by vode and lsoda, the 'exact' mode does not need any tolerance
+solver_presets = {
+    'NonionizableOrganic': {'fast': {'nsteps': 5000, 'rtol': 1e-4, 'atol': 1e-14},
+                            'default': {'nsteps': 5000, 'rtol': 1e-6, 'atol': 1e-14},
+                            'accurate': {'nsteps': 20000, 'rtol': 1e-9, 'atol': 1e-18}},
+    'IonizableOrganic': {'fast': {'nsteps': 5000, 'rtol': 1e-4, 'atol': 1e-12},
+                         'default': {'nsteps': 5000, 'rtol': 1e-6, 'atol': 1e-14},
+                         'accurate': {'nsteps': 20000, 'rtol': 1e-9, 'atol': 1e-16}},
+    'Metal': {'fast': {'nsteps': 1000, 'rtol': 1e-6, 'atol': 1e-10},
+              'default': {'nsteps': 1000, 'rtol': 1e-9, 'atol': 1e-10},
+              'accurate': {'nsteps': 5000, 'rtol': 1e-11, 'atol': 1e-14}},
+    'Nanomaterial': {'fast': {'nsteps': 5000, 'rtol': 1e-4, 'atol': 1e-10},
+                     'default': {'nsteps': 5000, 'rtol': 1e-6, 'atol': 1e-14},
+                     'accurate': {'nsteps': 20000, 'rtol': 1e-8, 'atol': 1e-16}}
+}
+
+
+def solver_tolerance(chem_type, solver_mode, solver_preset, process_output='snapshot'):
+    # check the solver options of a run and return the tolerances of the preset
+    if solver_mode not in solver_modes:
+        raise ValueError("solver_mode needs to be one of %s" % ', '.join(solver_modes))
+    if process_output not in process_outputs:
+        raise ValueError("process_output needs to be one of %s" % ', '.join(process_outputs))
+    if solver_preset not in solver_presets[chem_type]:
+        raise ValueError("solver_preset needs to be one of %s" % ', '.join(sorted(solver_presets[chem_type])))
+    return dict(solver_presets[chem_type][solver_preset])
+
+
+def integrate_day(fun, jac, y0, f_params, solver_mode, tolerance):
+    # advance y0 over one day, fun(t, y, *f_params) is the ode and jac(t, y, *f_params) its Jacobian
+    # scipy.integrate is imported by the integrating modes only, 'exact' and 'steady' runs never load it
+    from scipy.integrate import ode, solve_ivp
+    if solver_mode in ('radau', 'bdf'):
+        method = {'radau': 'Radau', 'bdf': 'BDF'}[solver_mode]
+        soln = solve_ivp(fun, (0, 1), y0, method=method, jac=jac, args=f_params,
+                         rtol=tolerance['rtol'], atol=tolerance['atol'])
+        return soln.y[:, -1]
+    if solver_mode == 'lsoda':
+        r = ode(fun, jac).set_integrator('lsoda', with_jacobian=True, **tolerance)
+    else:
+        r = ode(fun, jac).set_integrator('vode', method='bdf', order=5, with_jacobian=True, **tolerance)
+    r.set_initial_value(y0, 0)
+    r.set_f_params(*f_params)
+    r.set_jac_params(*f_params)
+    return r.integrate(1)
+
+
+def continuous_solution(day_rhs, day_jac, y0, time, breakpoints, **integrator_options):
+    # one vode integrator for the whole simulation instead of a new one for every day
+    # day_rhs(t, y, i) and day_jac(t, y, i) evaluate the ode and its Jacobian with the coefficients of day i
+    # breakpoints[i] is True when the coefficients of day i differ from the previous day, only there the
+    # integrator is re-initialized; across a stretch of days with the same coefficients the integration continues
+    # with its order and step history, and the coefficients stay pinned to the stretch so that the internal steps
+    # of vode beyond the requested day never cross a change in forcing
+    # returns the state at the end of every day, shape (time, n)
+    from scipy.integrate import ode
+    r = ode(day_rhs, day_jac).set_integrator('vode', method='bdf', with_jacobian=True, **integrator_options)
+    f_days = np.zeros((time, len(y0)))
+    y = y0
+    for i in range(time):
+        if i == 0 or breakpoints[i]:
+            r.set_initial_value(y, i)
+            r.set_f_params(i)
+            r.set_jac_params(i)
+        y = f_days[i] = r.integrate(i + 1)
+    return f_days
+
+
+def system_breakpoints(A_days, b_days):
+    # days on which the assembled daily system differs from the previous day
+    return [i == 0 or not (np.array_equal(A_days[i], A_days[i - 1]) and np.array_equal(b_days[i], b_days[i - 1]))
+            for i in range(len(A_days))]
+
+
+def linear_solution(A_days, b_days, y0, time, solver_mode, tolerance, process_output):
+    # advance the assembled daily systems of organoFate, ionOFate and metalFate over the simulation
+    # returns the state at the end of every day and the state the process tables are evaluated at: the same end
+    # of day state for process_output 'snapshot', the integral of the state over the day for 'integrated'
+    n = len(y0)
+    integrated = process_output == 'integrated' and solver_mode != 'steady'
+    if integrated:
+        # the quadrature states restart from 0 every day, except in 'continuous' mode where they accumulate
+        # over the simulation and the daily integrals are their differences
+        A_days, b_days = quadrature_system(A_days, b_days)
+        y0 = np.concatenate([y0, np.zeros(n)])
+
+    if solver_mode == 'continuous':
+        f_days = continuous_solution(lambda t, y, i: linear_rhs(t, y, A_days[i], b_days[i]),
+                                     lambda t, y, i: A_days[i], y0, time, system_breakpoints(A_days, b_days),
+                                     order=5, **tolerance)
+
+    y_days = np.zeros((time, len(y0)))
+    y = y0
+    for i in range(time):
+        print (i)
+        A, b = A_days[i], b_days[i]
+        if solver_mode == 'exact':
+            y = exact_step(A, b, y)
+        elif solver_mode == 'steady':
+            y = steady_state(A, b)
+        elif solver_mode == 'continuous':
+            y = f_days[i]
+        else:
+            y = integrate_day(linear_rhs, linear_jac, y, (A, b), solver_mode, tolerance)
+        y_days[i] = y
+        if integrated and solver_mode != 'continuous':
+            y = np.concatenate([y[:n], np.zeros(n)])
+
+    if not integrated:
+        return y_days, y_days
+    if solver_mode == 'continuous':
+        return y_days[:, :n], np.diff(y_days[:, n:], axis=0, prepend=np.zeros((1, n)))
+    return y_days[:, :n], y_days[:, n:]
+
+
+def release_propagators(chem_type, rhs, n, time, ode_params, release_days, bgConc, process_output, digest_items,
+                        file_list=()):
+    # daily transition matrices Phi and input matrices Gamma of the whole simulation of an affine model, and the
+    # names of their inputs, see linear_solver.daily_propagators; the inputs are the release_columns
+    # ('release <column>'), the bgConc entries ('bgConc <name>') and a constant, inputs without any effect are left out
+    # ode_params(release, bgConc) gives the arguments of rhs after the day index for a release and bgConc
+    # the matrices only depend on the chemical, region and climate (digest_items, and the files of file_list the
+    # model reads) and on the model code (input_cache.model_modules), they are kept in the input_cache so that runs
+    # of other release scenarios and background concentrations skip the assembly and the matrix exponentials
+    # for process_output 'integrated' Phi and Gamma have n more rows, the integral of the state over the day
+    from input_cache import cached_inputs, inputs_digest, source_digest, model_modules
+    bg_names = sorted(name for name, value in bgConc.items() if isinstance(value, (int, float, np.number)))
+    candidates = ['release ' + name for name in release_columns] + ['bgConc ' + name for name in bg_names] + \
+                 ['constant']
+
+    def assemble():
+        release_zero = zero_forcing(release_days)
+        bgConc_zero = zero_forcing(bgConc)
+        # the constant column is the forcing without releases and background concentrations
+        A_days, constant = assemble_horizon(rhs, n, time, ode_params(release_zero, bgConc_zero),
+                                            ode_params(release_zero, bgConc_zero))
+        columns = []
+        for candidate in candidates[:-1]:
+            source, name = candidate.split(' ', 1)
+            if source == 'release':
+                release_unit = dict(release_zero)
+                release_unit[name] = np.ones(time)
+                f_params = ode_params(release_unit, bgConc_zero)
+            else:
+                bgConc_unit = dict(bgConc_zero)
+                bgConc_unit[name] = 1.0
+                f_params = ode_params(release_zero, bgConc_unit)
+            columns.append(assemble_forcing(rhs, n, time, f_params))
+        columns.append(constant)
+        used = [k for k, column in enumerate(columns) if np.any(column)]
+        B_days = np.stack([columns[k] for k in used], axis=2)
+        if process_output == 'integrated':
+            A_days, zero = quadrature_system(A_days, np.zeros((time, n)))
+            B_days = np.concatenate([B_days, np.zeros(B_days.shape)], axis=1)
+        Phi, Gamma = daily_propagators(A_days, B_days)
+        # the integrals restart from 0 every day, only the columns of the state are kept
+        return Phi[:, :, :n], Gamma, json.dumps([candidates[k] for k in used])
+
+    Phi, Gamma, input_names = cached_inputs(assemble, list(file_list), 'propagators', chem_type, time,
+                                            process_output, candidates, inputs_digest(*digest_items),
+                                            source_digest(model_modules))
+    return Phi, Gamma, json.loads(input_names)
+
+
+def propagator_solution(propagators, y0, release_days, bgConc, first, last):
+    # state at the end of every day of a block, and the state the process rates are evaluated at, from the
+    # propagators of release_propagators and the releases and background concentrations of the run
+    Phi, Gamma, input_names = propagators
+    days = last - first
+    u = np.zeros((days, len(input_names)))
+    for k, input_name in enumerate(input_names):
+        if input_name == 'constant':
+            u[:, k] = 1.0
+            continue
+        source, name = input_name.split(' ', 1)
+        if source == 'release':
+            u[:, k] = release_days[name][first:last]
+        else:
+            u[:, k] = bgConc[name]
+    states = propagate(Phi[first:last], Gamma[first:last], y0, u)
+    n = len(y0)
+    if states.shape[1] > n:
+        return states[:, :n], states[:, n:]
+    return states, states
+
+
+def org_initial_state(bgConc, Z_bulk):
+    # fugacity values in each compartment in Pa from the background concentrations
+    y0 = np.zeros(len(Z_bulk))
+    for i in range(len(Z_bulk)):
+        try:
+            # mol/m3 / mol/(Pa-m^3) = Pa
+            y0[i] = bgConc[bgConc_names[i]]/Z_bulk[i]  # fugacity values from concentration and Z
+        except:
+            y0[i] = 0
+    return y0
 
 
-def org_solver(start_date, time, presence, env, climate, chemParams, bgConc, release):
-    V_bulk = [env['areaV'], env['fwV'], env['sedFWV'], env['swV'], env['sedSWV'], env['soilV1'], env['deepSV1'], env['soilV2'],
-              env['deepSV2'], env['soilV3'], env['deepSV3'], env['soilV4'], env['deepSV4']]
-
-    V_sub = [env['airV'], env['aerV'], env['fWaterV'], env['fSSV'], env['fSedWV'], env['fSedSV'],
-             env['sWaterV'], env['sSSV'], env['sSedWV'], env['sSedSV'], env['soilAV1'], env['soilWV1'],
-             env['soilSV1'], env['deepSV1'], env['soilAV2'], env['soilWV2'], env['soilSV2'], env['deepSV2'],
-             env['soilAV3'], env['soilWV2'], env['soilSV3'], env['deepSV3'],
-             env['soilAV4'], env['soilWV2'], env['soilSV3'], env['deepSV4']]
+def ion_initial_state(bgConc, Z_i_dict):
+    # aquivalence values in each compartment from the background concentrations
+    y0 = np.zeros(len(ion_compartments))
+    for i in range(len(bgConc_names)):
+        compart = ion_compartments[i]
+        # mol/m3 / unitless = mol/m3
+        y0[i] = bgConc[bgConc_names[i]] / Z_i_dict[compart]
+    return y0
 
-    # print ["%E" % e for e in V_bulk]
 
-    # initialize the list to store fugacity values in each compartment in Pa
-    funF = np.zeros((time, len(V_bulk)))
-    # initialize the list to store the concentration value in each compartment in kg/m^3
-    funC_bulk_kg = np.zeros((time, len(V_bulk)))
-    funC_bulk_mol = np.zeros((time, len(V_bulk)))
-    funC_sub_kg = np.zeros((time, len(V_sub)))
-    funC_sub_mol = np.zeros((time, len(V_sub)))
+def org_propagators(time, presence, env, climate_days, chemParams, release_days, bgConc, process_output='snapshot'):
+    # release_propagators of organoFate
+    from ode_non_ion import org_ode
+    return release_propagators('NonionizableOrganic', org_ode, len(bgConc_names), time,
+                               lambda release_x, bgConc_x: (presence, env, climate_days, chemParams, release_x,
+                                                            bgConc_x),
+                               release_days, bgConc, process_output, (presence, env, chemParams, climate_days))
 
-    # initialize the list to store the mass value in kg
-    funM_bulk_kg = np.zeros((time, len(V_bulk)))
-    funM_sub_kg = np.zeros((time, len(V_sub)))
 
-    zV = zValue(climate['temp_K'][0], chemParams['Kaw_n'], chemParams['Kp_n'], env['aerP'], chemParams['Koc_n'])
+def ion_propagators(chem_type, time, presence, env, chemParams, climate_days, release_days, bgConc, Y_values,
+                    process_output='snapshot'):
+    # release_propagators of ionOFate and metalFate, Y_values are the Z_ij, Z_ij_sub, Y_ij, X_ij and Z_i
+    # dictionaries of Y_ion.Y_Value
+    Z_ij_dict, Z_ij_dict_sub, Y_ij_dict, X_ij_dict, Z_i_dict = Y_values
+    if chem_type == 'IonizableOrganic':
+        from ode_ion import ion_ode as rhs
+        ode_params = lambda release_x, bgConc_x: (presence, env, chemParams, climate_days, release_x, bgConc_x,
+                                                  Z_ij_dict, Z_ij_dict_sub, Y_ij_dict, X_ij_dict, Z_i_dict)
+    else:
+        from ode_metal import metal_ode as rhs
+        ode_params = lambda release_x, bgConc_x: (presence, env, chemParams, climate_days, release_x, bgConc_x,
+                                                  Z_ij_dict, Y_ij_dict, Z_i_dict)
+    return release_propagators(chem_type, rhs, len(ion_compartments), time, ode_params, release_days, bgConc,
+                               process_output, (presence, env, chemParams, climate_days),
+                               ['./IonizableChem_helper.json'])
+
+
+def source_receptor(chem_type, time, presence, env, climate, chemParams, bgConc, release, receptors):
+    # adjoint source-receptor attribution of the organic, ionizable and metal models: the derivative of the bulk
+    # concentration of every receptor with respect to each release column on every prior day, from one backward
+    # pass over the daily propagators of 'propagator' mode (see linear_solver.adjoint_sensitivity) in place of a
+    # forward run per release column and day
+    # receptors is a list of (bulk compartment index, day index), the concentration of a receptor is the total over
+    # the species (kg/m^3) at the end of its day
+    # returns sensitivity, receptors x time x release_columns in kg/m^3 per kg/day released (zero after the day of
+    # each receptor), contribution of the releases of the run in kg/m^3 with the same shape, and the background,
+    # the part of each receptor from the initial state, the background concentrations and the inflows (kg/m^3)
+    climate_days = horizon_forcing(climate)
+    release_days = horizon_forcing(release)
+    if chem_type == 'NonionizableOrganic':
+        propagators = org_propagators(time, presence, env, climate_days, chemParams, release_days, bgConc)
+        Z_bulk, Z_sub = org_z_values(climate_days['temp_K'][0], env, chemParams)
+        y0 = org_initial_state(bgConc, Z_bulk)
+        # concentration of a unit fugacity, following the temperature of the receptor day
+        Z_bulk, Z_sub = org_z_values(np.asarray(climate_days['temp_K'][:time], dtype=float), env, chemParams)
+        unit_conc = np.column_stack([np.broadcast_to(z, (time,)) for z in Z_bulk]) * chemParams['molar_mass']
+    else:
+        from Y_ion import Y_Value
+        Y_val = Y_Value(chem_type, chemParams, env)
+        Z_ij_dict, Z_ij_dict_sub = Y_val.Z_ij()
+        Y_ij_dict = Y_val.Y_ij()
+        Z_i_dict = Y_val.Z_i()
+        propagators = ion_propagators(chem_type, time, presence, env, chemParams, climate_days, release_days, bgConc,
+                                      (Z_ij_dict, Z_ij_dict_sub, Y_ij_dict, Y_val.X_ij(), Z_i_dict))
+        y0 = ion_initial_state(bgConc, Z_i_dict)
+        # concentration of a unit aquivalence, the sum of Y*Z over the species
+        species = 2 if chem_type == 'IonizableOrganic' else 3
+        unit_conc = np.array([sum(Y_ij_dict[compart][k] * Z_ij_dict[compart][k] for k in range(species))
+                              for compart in ion_compartments]) * chemParams['molar_mass']
+        unit_conc = np.broadcast_to(unit_conc, (time, len(ion_compartments)))
+
+    Phi, Gamma, input_names = propagators
+    compartments = np.array([compartment for compartment, day in receptors])
+    days = np.array([day for compartment, day in receptors])
+    weights = np.zeros((len(receptors), len(y0)))
+    weights[np.arange(len(receptors)), compartments] = unit_conc[days, compartments]
+    derivative, initial = adjoint_sensitivity(Phi, Gamma, weights, days)
+
+    sensitivity = np.zeros((len(receptors), time, len(release_columns)))
+    contribution = np.zeros(sensitivity.shape)
+    background = initial.dot(y0)
+    last = days.max() + 1
+    for k, input_name in enumerate(input_names):
+        if input_name == 'constant':
+            background += derivative[:, :, k].sum(axis=1)
+            continue
+        source, name = input_name.split(' ', 1)
+        if source == 'bgConc':
+            background += derivative[:, :, k].sum(axis=1) * bgConc[name]
+            continue
+        j = release_columns.index(name)
+        # the release columns are read in kg/day and solved in mol/day
+        sensitivity[:, :last, j] = derivative[:, :, k] / chemParams['molar_mass']
+        contribution[:, :last, j] = derivative[:, :, k] * release_days[name][:last]
+    return sensitivity, contribution, background
+
+
+def steady_mean(values, solver_mode):
+    # mean over the days of the daily systems of a 'steady' result (days x columns), its single reported row
+    if solver_mode == 'steady':
+        return values.mean(axis=0, keepdims=True)
+    return values
+
+
+def day_blocks(time, block_days=None):
+    # (first, last) day of the blocks a simulation is advanced and reported in, the state carries over between
+    # blocks; block_days None is a single block of the whole simulation
+    # results do not depend on the block length, except for 'continuous' mode that restarts its integrator at
+    # the start of every block
+    if block_days is None or block_days >= time:
+        return [(0, time)]
+    if block_days < 1:
+        raise ValueError('block_days needs to be at least 1')
+    return [(first, min(first + block_days, time)) for first in range(0, time, block_days)]
+
+
+def collect_blocks(blocks):
+    # results of the whole simulation from the blocks of a solver, date lists are joined and arrays stacked
+    blocks = list(blocks)
+    if len(blocks) == 1:
+        return blocks[0]
+    collected = [sum([block[0] for block in blocks], [])]
+    for k in range(1, len(blocks[0])):
+        collected.append(np.concatenate([block[k] for block in blocks]))
+    return tuple(collected)
+
+
+def org_z_values(temp_K, env, chemParams):
+    # bulk and subcompartment Z-values of organoFate in mol/(Pa-m^3)
+    # temp_K is the temperature of one day or a daily series, the Z-values follow its shape
+    zV = zValue(temp_K, chemParams['Kaw_n'], chemParams['Kp_n'], env['aerP'], chemParams['Koc_n'])
     zAirSub = zV.zAirSub()
     zAerSub = zV.zAerSub(zAirSub)
     zWaterSub = zV.zWaterSub(zAirSub)
@@ -71,125 +398,137 @@ def org_solver(start_date, time, presence, env, climate, chemParams, bgConc, rel
 
     Z_bulk = [zAirBulk, zFWBulk, zFWSedimentBulk, zSWBulk, zSWSedimentBulk, zSoil1Bulk, zS1DeepSSub,
               zSoil2Bulk, zS2DeepSSub, zSoil3Bulk, zS3DeepSSub, zSoil4Bulk, zS4DeepSSub]
+    Z_sub = [zAirSub, zAerSub, zWaterSub, zFWSusSedSub, zWaterSub, zFSedSSub, zWaterSub, zSWSusSedSub,
+             zWaterSub, zSSedSSub, zAirSub, zWaterSub, zS1SolidSub, zS1DeepSSub, zAirSub, zWaterSub, zS2SolidSub, zS2DeepSSub,
+             zAirSub, zWaterSub, zS3SolidSub, zS3DeepSSub, zAirSub, zWaterSub, zS4SolidSub, zS4DeepSSub]
+    return Z_bulk, Z_sub
+
+
+def org_blocks(start_date, time, presence, env, climate, chemParams, bgConc, release, solver_mode='vode',
+               solver_preset='default', process_output='snapshot', block_days=None):
+    # organoFate results block by block, see day_blocks; every block is
+    # (date_array, process_array, funC_bulk_kg, funC_sub_kg, funM_bulk_kg, funM_sub_kg) of its days
+    # solver_mode and solver_preset select the integrator and its tolerances, see solver_modes and solver_presets
+    # 'exact' assembles the daily D-value system and advances it with a matrix exponential
+    # process_output selects end of day process rates or the mass moved during each day, see process_outputs
+    from ode_non_ion import org_ode
+    from ode_non_ion_process import org_process
+
+    tolerance = solver_tolerance('NonionizableOrganic', solver_mode, solver_preset, process_output)
+    # 'steady' reports a single Level III result on the start date, the steady state of the mean of the daily
+    # systems of the steady_days of the simulation; the daily systems are assembled before they are averaged, as
+    # runoff, infiltration, leaching and erosion are thresholds of the daily precipitation that its mean falls below
+    steady_days = time
+    if solver_mode == 'steady':
+        time = 1
 
-    # initial conditions for solver step 1
-    bgConcNames = ['air', 'fw', 'fSedS', 'sw', 'sSedS', 'soilS1', 'dsoil1', 'soilS2', 'dsoil2',
-                   'soilS3', 'dsoil3', 'soilS4', 'dsoil4']
+    V_bulk = [env['areaV'], env['fwV'], env['sedFWV'], env['swV'], env['sedSWV'], env['soilV1'], env['deepSV1'], env['soilV2'],
+              env['deepSV2'], env['soilV3'], env['deepSV3'], env['soilV4'], env['deepSV4']]
 
-    for i in range(len(V_bulk)):
-        # mol/m3
-        funC_bulk_mol[0, i] = bgConc[bgConcNames[i]]
+    V_sub = [env['airV'], env['aerV'], env['fWaterV'], env['fSSV'], env['fSedWV'], env['fSedSV'],
+             env['sWaterV'], env['sSSV'], env['sSedWV'], env['sSedSV'], env['soilAV1'], env['soilWV1'],
+             env['soilSV1'], env['deepSV1'], env['soilAV2'], env['soilWV2'], env['soilSV2'], env['deepSV2'],
+             env['soilAV3'], env['soilWV2'], env['soilSV3'], env['deepSV3'],
+             env['soilAV4'], env['soilWV2'], env['soilSV3'], env['deepSV4']]
 
-    for i in range(len(V_bulk)):
-        try:
-            # mol/m3 / mol/(Pa-m^3) = Pa
-            funF[0, i] = funC_bulk_mol[0,i]/Z_bulk[i]  # fugacity values from concentration and Z
-        except:
-            funF[0, i] = 0
+    # print ["%E" % e for e in V_bulk]
+
+    # bulk compartment of each subcompartment
+    sub_index = [0, 0, 1, 1, 2, 2, 3, 3, 4, 4, 5, 5, 5, 6, 7, 7, 7, 8, 9, 9, 9, 10, 11, 11, 11, 12]
+
+    # fugacity values in each compartment in Pa at the start of the simulation
+    Z_bulk, Z_sub = org_z_values(climate['temp_K'][0], env, chemParams)
+    y0 = org_initial_state(bgConc, Z_bulk)
 
-    # initialize the first solution of fugacity
-    f = [funF[0]]
-    date_array = []
-    process_array = np.zeros((time, 85))
     start_day = datetime.strptime(start_date, "%Y %m %d")
 
-    for i in range(time):
-        print (i)
-        r = ode(org_ode).set_integrator('vode', method='bdf', order=5, with_jacobian=True,
-                                        nsteps= 5000, rtol=1e-6, atol=1e-14)
-        r.set_initial_value(f[-1], 0)
-        r.set_f_params(i, presence,env,climate,chemParams,release, bgConc)
-        soln = r.integrate(1)
-        f.append(soln)
-
-        funF[i] = f[-1]
-        date = (start_day + timedelta(days = i)).strftime('%Y %m %d')
-        date_array.append(date)
-
-        process_org = org_process(funF[i], i, env, climate, chemParams, bgConc)
-        for j in range(0, len(process_org)):
-            process_array[i, j] = process_org[j]
-
-        zV = zValue(climate['temp_K'][i], chemParams['Kaw_n'], chemParams['Kp_n'], env['aerP'], chemParams['Koc_n'])
-        zAirSub = zV.zAirSub()
-        zAerSub = zV.zAerSub(zAirSub)
-        zWaterSub = zV.zWaterSub(zAirSub)
-        zFWSusSedSub = zV.zWaterSusSedSub(zWaterSub, chemParams['Kssfw_unitless'])
-        zSWSusSedSub = zV.zWaterSusSedSub(zWaterSub, chemParams['Ksssw_unitless'])
-        zFSedSSub = zV.zWaterSedSolidSub(zWaterSub, chemParams['Kbsfw_unitless'])
-        zSSedSSub = zV.zWaterSedSolidSub(zWaterSub, chemParams['Kbssw_unitless'])
-        zS1SolidSub = zV.zSoilSolidSub(zWaterSub, chemParams['Kd1_unitless'])
-        zS2SolidSub = zV.zSoilSolidSub(zWaterSub, chemParams['Kd2_unitless'])
-        zS3SolidSub = zV.zSoilSolidSub(zWaterSub, chemParams['Kd3_unitless'])
-        zS4SolidSub = zV.zSoilSolidSub(zWaterSub, chemParams['Kd4_unitless'])
-        zS1DeepSSub = zV.zDeepS(zWaterSub, chemParams['Kd1_d_unitless'])
-        zS2DeepSSub = zV.zDeepS(zWaterSub, chemParams['Kd2_d_unitless'])
-        zS3DeepSSub = zV.zDeepS(zWaterSub, chemParams['Kd3_d_unitless'])
-        zS4DeepSSub = zV.zDeepS(zWaterSub, chemParams['Kd4_d_unitless'])
-        zAirBulk = zV.zAirBulk(env['aerVf'], zAirSub, zAerSub)
-        zFWBulk = zV.zWaterBulk(env['fSSVf'], zFWSusSedSub, zWaterSub)
-        zSWBulk = zV.zWaterBulk(env['sSSVf'], zSWSusSedSub, zWaterSub)
-        zFWSedimentBulk = zV.zSedimentBulk(env['fsedpercSolid'], zWaterSub, zFSedSSub)
-        zSWSedimentBulk = zV.zSedimentBulk(env['ssedpercSolid'], zWaterSub, zSSedSSub)
-        zSoil1Bulk = zV.zSoilBulk(env['soilAC1'], env['soilWC1'], zAirSub, zWaterSub, zS1SolidSub)
-        zSoil2Bulk = zV.zSoilBulk(env['soilAC2'], env['soilWC2'], zAirSub, zWaterSub, zS2SolidSub)
-        zSoil3Bulk = zV.zSoilBulk(env['soilAC3'], env['soilWC3'], zAirSub, zWaterSub, zS3SolidSub)
-        zSoil4Bulk = zV.zSoilBulk(env['soilAC4'], env['soilWC4'], zAirSub, zWaterSub, zS4SolidSub)
-
-        Z_bulk = [zAirBulk, zFWBulk, zFWSedimentBulk, zSWBulk, zSWSedimentBulk, zSoil1Bulk, zS1DeepSSub,
-                  zSoil2Bulk, zS2DeepSSub, zSoil3Bulk, zS3DeepSSub, zSoil4Bulk, zS4DeepSSub]
-        Z_sub = [zAirSub, zAerSub, zWaterSub, zFWSusSedSub, zWaterSub, zFSedSSub, zWaterSub, zSWSusSedSub,
-                 zWaterSub, zSSedSSub, zAirSub, zWaterSub, zS1SolidSub, zS1DeepSSub, zAirSub, zWaterSub, zS2SolidSub, zS2DeepSSub,
-                 zAirSub, zWaterSub, zS3SolidSub, zS3DeepSSub, zAirSub, zWaterSub, zS4SolidSub, zS4DeepSSub]
+    climate_days = horizon_forcing(climate)
+    release_days = horizon_forcing(release)
+    release_zero = zero_forcing(release_days)
+    bgConc_zero = zero_forcing(bgConc)
+
+    if solver_mode == 'propagator':
+        propagators = org_propagators(time, presence, env, climate_days, chemParams, release_days, bgConc,
+                                      process_output)
+
+    for first, last in day_blocks(time, block_days):
+        days = last - first
+        date_array = [(start_day + timedelta(days = i)).strftime('%Y %m %d') for i in range(first, last)]
+        # days of the daily systems of the block, all days of the simulation for 'steady'
+        system_days = np.arange(steady_days) if solver_mode == 'steady' else np.arange(first, last)
+
+        if solver_mode == 'propagator':
+            funF, process_F = propagator_solution(propagators, y0, release_days, bgConc, first, last)
+        else:
+            # org_ode is affine within the day, the assembled system reproduces it exactly and A is its Jacobian
+            # the daily systems of the block are assembled in one pass over the climate series
+            A_days, b_days = assemble_horizon(org_ode, len(V_bulk), len(system_days),
+                                              (presence, env, climate_days, chemParams, release_days, bgConc),
+                                              (presence, env, climate_days, chemParams, release_zero, bgConc_zero),
+                                              first_day=system_days[0])
+            if solver_mode == 'steady':
+                A_days, b_days = A_days.mean(axis=0, keepdims=True), b_days.mean(axis=0, keepdims=True)
+
+            # fugacity at the end of every day, and the fugacity the process rates are evaluated at
+            funF, process_F = linear_solution(A_days, b_days, y0, days, solver_mode, tolerance, process_output)
+        y0 = funF[-1]
+
+        # process rates (or daily transferred masses) of all days at once, from the same fluxes as org_ode
+        process_org = org_process(process_F.T, system_days, presence, env, climate_days, chemParams,
+                                  release_days, bgConc)
+        process_array = steady_mean(np.column_stack([np.broadcast_to(p, (len(system_days),)) for p in process_org]),
+                                    solver_mode)
+
+        # concentrations and masses of all days at once, the Z-values follow the daily temperature
+        Z_bulk, Z_sub = org_z_values(np.asarray(climate_days['temp_K'][system_days], dtype=float), env, chemParams)
+        Z_bulk = steady_mean(np.column_stack([np.broadcast_to(z, (len(system_days),)) for z in Z_bulk]), solver_mode)
+        Z_sub = steady_mean(np.column_stack([np.broadcast_to(z, (len(system_days),)) for z in Z_sub]), solver_mode)
 
         # multiply fugacity*Zvalue to get the concentration in each compartment
-        for j in range(len(V_bulk)):
-            # unit: Pa * mol/m^3-Pa * kg/mol = kg/m^3
-            funC_bulk_kg[i, j] = f[-1][j] * Z_bulk[j] * chemParams['molar_mass']
-            funC_bulk_mol[i, j] = f[-1][j] * Z_bulk[j]
-            funM_bulk_kg[i, j] = funC_bulk_kg[i, j] * V_bulk[j]
-
-
-        # calculate for the subcompartments concentration and mass
-        funC_sub_mol[i, 0] = funF[i][0] * Z_sub[0]  # air
-        funC_sub_mol[i, 1] = funF[i][0] * Z_sub[1]  # aerosol
-        funC_sub_mol[i, 2] = funF[i][1] * Z_sub[2]  # fw
-        funC_sub_mol[i, 3] = funF[i][1] * Z_sub[3]  # fw sus sed
-        funC_sub_mol[i, 4] = funF[i][2] * Z_sub[4]  # fw sediment water
-        funC_sub_mol[i, 5] = funF[i][2] * Z_sub[5]  # fw sediment sediment
-        funC_sub_mol[i, 6] = funF[i][3] * Z_sub[6]  # sw
-        funC_sub_mol[i, 7] = funF[i][3] * Z_sub[7]  # sw sus sed
-        funC_sub_mol[i, 8] = funF[i][4] * Z_sub[8]  # sw sediment water
-        funC_sub_mol[i, 9] = funF[i][4] * Z_sub[9]  # sw sediment sediment
-        funC_sub_mol[i, 10] = funF[i][5] * Z_sub[10]  # soil 1 air
-        funC_sub_mol[i, 11] = funF[i][5] * Z_sub[11]  # soil 1 water
-        funC_sub_mol[i, 12] = funF[i][5] * Z_sub[12]  # soil 1 solid
-        funC_sub_mol[i, 13] = funF[i][6] * Z_sub[13]  # soil 1 deep
-        funC_sub_mol[i, 14] = funF[i][7] * Z_sub[14]  # soil 2 air
-        funC_sub_mol[i, 15] = funF[i][7] * Z_sub[15]  # soil 2 water
-        funC_sub_mol[i, 16] = funF[i][7] * Z_sub[16]  # soil 2 solid
-        funC_sub_mol[i, 17] = funF[i][8] * Z_sub[17]  # soil 2 deep
-        funC_sub_mol[i, 18] = funF[i][9] * Z_sub[18]  # soil 3 air
-        funC_sub_mol[i, 19] = funF[i][9] * Z_sub[19]  # soil 3 water
-        funC_sub_mol[i, 20] = funF[i][9] * Z_sub[20]  # soil 3 solid
-        funC_sub_mol[i, 21] = funF[i][10] * Z_sub[21]  # soil 3 deep
-        funC_sub_mol[i, 22] = funF[i][11] * Z_sub[22]  # soil 4 air
-        funC_sub_mol[i, 23] = funF[i][11] * Z_sub[23]  # soil 4 water
-        funC_sub_mol[i, 24] = funF[i][11] * Z_sub[24]  # soil 4 solid
-        funC_sub_mol[i, 25] = funF[i][12] * Z_sub[25]  # soil 4 deep
-
-        for j in range(len(V_sub)):
-            # unit: mol/m3 * kg/mol = kg/m^3
-            funC_sub_kg[i, j] = funC_sub_mol[i, j] * chemParams['molar_mass']
-            funM_sub_kg[i, j] = funC_sub_kg[i, j] * V_sub[j]
-
-        output_array = [funC_bulk_kg, funC_sub_kg, funM_bulk_kg, funM_sub_kg]
-        output_array = remove_floating_values(output_array)
+        # unit: Pa * mol/m^3-Pa * kg/mol = kg/m^3
+        funC_bulk_kg = funF * Z_bulk * chemParams['molar_mass']
+        funM_bulk_kg = funC_bulk_kg * V_bulk
+
+        # subcompartments take the fugacity of their bulk compartment
+        funC_sub_kg = funF[:, sub_index] * Z_sub * chemParams['molar_mass']
+        funM_sub_kg = funC_sub_kg * V_sub
+
+        output_array = remove_floating_values([funC_bulk_kg, funC_sub_kg, funM_bulk_kg, funM_sub_kg])
 
-    return date_array, process_array, output_array[0], output_array[1], output_array[2], output_array[3]
+        yield (date_array, process_array) + tuple(output_array)
 
 
-def ion_solver(chem_type, start_date, time, presence, env, climate, chemParams, bgConc, release):
+def org_solver(start_date, time, presence, env, climate, chemParams, bgConc, release, solver_mode='vode',
+               solver_preset='default', process_output='snapshot'):
+    # organoFate results of the whole simulation:
+    # date_array, process_array, funC_bulk_kg, funC_sub_kg, funM_bulk_kg, funM_sub_kg
+    return collect_blocks(org_blocks(start_date, time, presence, env, climate, chemParams, bgConc, release,
+                                     solver_mode, solver_preset, process_output))
+
+
+def ion_blocks(chem_type, start_date, time, presence, env, climate, chemParams, bgConc, release, solver_mode='vode',
+               solver_preset='default', process_output='snapshot', block_days=None):
+    # ionOFate and metalFate results block by block, see day_blocks; every block is
+    # (date_array, process_array, funC_kg_1, funC_kg_2, funC_kg_3, funC_kg_1_sub, funC_kg_2_sub, funC_kg_3_sub,
+    #  funM_kg_1, funM_kg_2, funM_kg_3, funM_kg_1_sub, funM_kg_2_sub, funM_kg_3_sub) of its days
+    # solver_mode and solver_preset select the integrator and its tolerances, see solver_modes and solver_presets
+    # 'exact' assembles the daily aquivalence system and advances it with a matrix exponential
+    # process_output selects end of day process rates or the mass moved during each day, see process_outputs
+    from Y_ion import Y_Value
+    if chem_type == 'IonizableOrganic':
+        from ode_ion import ion_ode
+        from ode_ion_process import ion_process
+    else:
+        from ode_metal import metal_ode
+        from ode_metal_process import metal_process
+
+    tolerance = solver_tolerance(chem_type, solver_mode, solver_preset, process_output)
+    # 'steady' reports a single Level III result on the start date, the steady state of the mean of the daily
+    # systems of the steady_days of the simulation; the daily systems are assembled before they are averaged, as
+    # runoff, infiltration, leaching and erosion are thresholds of the daily precipitation that its mean falls below
+    steady_days = time
+    if solver_mode == 'steady':
+        time = 1
 
     with open('./IonizableChem_helper.json') as f:
         data = json.load(f)
@@ -200,8 +539,7 @@ def ion_solver(chem_type, start_date, time, presence, env, climate, chemParams,
                        'soilA1', 'soilW1', 'soilS1', 'deepS1', 'soilA2', 'soilW2', 'soilS2', 'deepS2',
                        'soilA3', 'soilW3', 'soilS3', 'deepS3', 'soilA4', 'soilW4', 'soilS4', 'deepS4']
 
-    compart_list = ['air', 'fw', 'fwSed', 'sw', 'swSed', 'soil1', 'deepS1', 'soil2', 'deepS2',
-                    'soil3', 'deepS3', 'soil4', 'deepS4']
+    compart_list = ion_compartments
 
     Y_val = Y_Value(chem_type, chemParams, env)
 
@@ -210,53 +548,11 @@ def ion_solver(chem_type, start_date, time, presence, env, climate, chemParams,
     X_ij_dict = Y_val.X_ij()
     Z_i_dict = Y_val.Z_i()
 
-    # initial conditions for solver step 1
-    bgConcNames = ['air', 'fw', 'fSedS', 'sw', 'sSedS', 'soilS1', 'dsoil1', 'soilS2', 'dsoil2',
-                   'soilS3', 'dsoil3', 'soilS4', 'dsoil4']
-
-    # initialize the list to store aquivalence values in each compartment
-    funF = np.zeros((time, len(compart_list)))
-    # initialize the list to store the concentration value in each compartment in kg/m^3
-    # for ionizable organic, 1 - neutral, 2 - ionic
-    # for metal, 1 - particle, 2 - colloidal, 3 - dissolved
-    funC_mol_1 = np.zeros((time, len(compart_list)))
-    funC_mol_2 = np.zeros((time, len(compart_list)))
-    funC_mol_3 = np.zeros((time, len(compart_list)))
-    funC_mol_1_sub = np.zeros((time, len(subcompart_list)))
-    funC_mol_2_sub = np.zeros((time, len(subcompart_list)))
-    funC_mol_3_sub = np.zeros((time, len(subcompart_list)))
-    funC_kg_1 = np.zeros((time, len(compart_list)))
-    funC_kg_2 = np.zeros((time, len(compart_list)))
-    funC_kg_3 = np.zeros((time, len(compart_list)))
-    funM_kg_1 = np.zeros((time, len(compart_list)))
-    funM_kg_2 = np.zeros((time, len(compart_list)))
-    funM_kg_3 = np.zeros((time, len(compart_list)))
-
-    funC_kg_1_sub = np.zeros((time, len(subcompart_list)))
-    funC_kg_2_sub = np.zeros((time, len(subcompart_list)))
-    funC_kg_3_sub = np.zeros((time, len(subcompart_list)))
-    funM_kg_1_sub = np.zeros((time, len(subcompart_list)))
-    funM_kg_2_sub = np.zeros((time, len(subcompart_list)))
-    funM_kg_3_sub = np.zeros((time, len(subcompart_list)))
-
-
-    for i in range(len(bgConcNames)):
-        compart = compart_list[i]
-        # mol/m3 / unitless = mol/m3
-        funF[0, i] = bgConc[bgConcNames[i]] / Z_i_dict[compart]
-
-    # initialize the first solution of aquivalency
-    f = [funF[0]]
-    date_array = []
-
-    if chem_type == 'IonizableOrganic':
-        process_array = np.zeros((time, 86))
-    else:
-        process_array = np.zeros((time, 54))
+    # aquivalence values in each compartment at the start of the simulation
+    y0 = ion_initial_state(bgConc, Z_i_dict)
 
     start_day = datetime.strptime(start_date, "%Y %m %d")
 
-
     V_bulk = [env['areaV'], env['fwV'], env['sedFWV'], env['swV'], env['sedSWV'], env['soilV1'], env['deepSV1'],
               env['soilV2'], env['deepSV2'], env['soilV3'], env['deepSV3'], env['soilV4'], env['deepSV4']]
 
@@ -266,94 +562,117 @@ def ion_solver(chem_type, start_date, time, presence, env, climate, chemParams,
              env['soilAV3'], env['soilWV2'], env['soilSV3'], env['deepSV3'],
              env['soilAV4'], env['soilWV2'], env['soilSV3'], env['deepSV4']]
 
-    for i in range(time):
-        print (i)
-        if chem_type == 'IonizableOrganic':
-            r = ode(ion_ode).set_integrator('vode', method='bdf', order=5, with_jacobian=True,
-                                            nsteps=5000, rtol=1e-6, atol=1e-14)
-            r.set_initial_value(f[-1], 0)
-            r.set_f_params(i, presence, env, chemParams, climate, release, bgConc,
-                           Z_ij_dict, Z_ij_dict_sub, Y_ij_dict, X_ij_dict, Z_i_dict)
-            soln = r.integrate(1)
-            f.append(soln)
-            funF[i] = f[-1]
-
-            process_ion = ion_process(funF[i], i, env, chemParams, climate, bgConc, Z_ij_dict, Z_ij_dict_sub, Y_ij_dict, X_ij_dict)
-            for j in range(0, len(process_ion)):
-                process_array[i,j] = process_ion[j]
-
+    climate_days = horizon_forcing(climate)
+    release_days = horizon_forcing(release)
+    release_zero = zero_forcing(release_days)
+    bgConc_zero = zero_forcing(bgConc)
+    species = 2 if chem_type == 'IonizableOrganic' else 3
+
+    if solver_mode == 'propagator':
+        propagators = ion_propagators(chem_type, time, presence, env, chemParams, climate_days, release_days, bgConc,
+                                      (Z_ij_dict, Z_ij_dict_sub, Y_ij_dict, X_ij_dict, Z_i_dict), process_output)
+
+    for first, last in day_blocks(time, block_days):
+        days = last - first
+        date_array = [(start_day + timedelta(days=i)).strftime('%Y %m %d') for i in range(first, last)]
+        # days of the daily systems of the block, all days of the simulation for 'steady'
+        system_days = np.arange(steady_days) if solver_mode == 'steady' else np.arange(first, last)
+
+        if solver_mode == 'propagator':
+            funF, process_F = propagator_solution(propagators, y0, release_days, bgConc, first, last)
+        # daily systems of the block, assembled in one pass over the climate series
+        elif chem_type == 'IonizableOrganic':
+            A_days, b_days = assemble_horizon(ion_ode, len(compart_list), len(system_days),
+                                              (presence, env, chemParams, climate_days, release_days, bgConc,
+                                               Z_ij_dict, Z_ij_dict_sub, Y_ij_dict, X_ij_dict, Z_i_dict),
+                                              (presence, env, chemParams, climate_days, release_zero, bgConc_zero,
+                                               Z_ij_dict, Z_ij_dict_sub, Y_ij_dict, X_ij_dict, Z_i_dict),
+                                              first_day=system_days[0])
         elif chem_type == 'Metal':
-            r = ode(metal_ode).set_integrator('vode', method='bdf', order=5, with_jacobian=True,
-                                            nsteps=1000, rtol=1e-9, atol=1e-10)
-            r.set_initial_value(f[-1], 0)
-            r.set_f_params(i, presence, env, chemParams, climate, release, bgConc,
-                           Z_ij_dict, Y_ij_dict, Z_i_dict)
-            soln = r.integrate(1)
-            f.append(soln)
-            funF[i] = f[-1]
-
-            process_metal = metal_process(funF[i], i, env, chemParams, climate, bgConc, Z_ij_dict, Y_ij_dict)
-            for j in range(0, len(process_metal)):
-                process_array[i, j] = process_metal[j]
-
-
-        date = (start_day + timedelta(days=i)).strftime('%Y %m %d')
-        date_array.append(date)
+            A_days, b_days = assemble_horizon(metal_ode, len(compart_list), len(system_days),
+                                              (presence, env, chemParams, climate_days, release_days, bgConc,
+                                               Z_ij_dict, Y_ij_dict, Z_i_dict),
+                                              (presence, env, chemParams, climate_days, release_zero, bgConc_zero,
+                                               Z_ij_dict, Y_ij_dict, Z_i_dict),
+                                              first_day=system_days[0])
+
+        # aquivalence at the end of every day, and the aquivalence the process rates are evaluated at
+        if solver_mode == 'steady':
+            A_days, b_days = A_days.mean(axis=0, keepdims=True), b_days.mean(axis=0, keepdims=True)
+        if solver_mode != 'propagator':
+            funF, process_F = linear_solution(A_days, b_days, y0, days, solver_mode, tolerance, process_output)
+        y0 = funF[-1]
+
+        # process rates (or daily transferred masses) of all days at once, from the same fluxes as ion_ode and metal_ode
+        if chem_type == 'IonizableOrganic':
+            process_days = ion_process(process_F.T, system_days, presence, env, chemParams, climate_days,
+                                       release_days, bgConc, Z_ij_dict, Z_ij_dict_sub, Y_ij_dict, X_ij_dict, Z_i_dict)
+        else:
+            process_days = metal_process(process_F.T, system_days, presence, env, chemParams, climate_days,
+                                         release_days, bgConc, Z_ij_dict, Y_ij_dict, Z_i_dict)
+        process_array = steady_mean(np.column_stack([np.broadcast_to(p, (len(system_days),)) for p in process_days]),
+                                    solver_mode)
+
+        # concentration (kg/m^3) and mass (kg) of each species for all days at once
+        # for ionizable organic, 1 - neutral, 2 - ionic
+        # for metal, 1 - particle, 2 - colloidal, 3 - dissolved
+        funC_kg = [np.zeros((days, len(compart_list))) for k in range(3)]
+        funM_kg = [np.zeros((days, len(compart_list))) for k in range(3)]
+        funC_kg_sub = [np.zeros((days, len(subcompart_list))) for k in range(3)]
+        funM_kg_sub = [np.zeros((days, len(subcompart_list))) for k in range(3)]
 
         # multiply aquavalency*Zvalue to get the concentration in each compartment
         # Cij = Qij*Zij = Qit*Yij*Zij
-
-        for j in range(len(compart_list)):
-            compart = compart_list[j]
-            if chem_type == 'IonizableOrganic':
-                funC_mol_1[i, j] = funF[i][j] * Y_ij_dict[compart][0] * Z_ij_dict[compart][0]
-                funC_mol_2[i, j] = funF[i][j] * Y_ij_dict[compart][1] * Z_ij_dict[compart][1]
-                funC_kg_1[i, j] = funC_mol_1[i, j] * chemParams['molar_mass']
-                funC_kg_2[i, j] = funC_mol_2[i, j] * chemParams['molar_mass']
-                funM_kg_1[i, j] = funC_kg_1[i, j] * V_bulk[j]
-                funM_kg_2[i, j] = funC_kg_2[i, j] * V_bulk[j]
-            elif chem_type == 'Metal':
-                # for particulate, need to adjust the conc. to particle volumes
-                funC_mol_1[i, j] = funF[i][j] * Y_ij_dict[compart][0] * Z_ij_dict[compart][0]
-                funC_mol_2[i, j] = funF[i][j] * Y_ij_dict[compart][1] * Z_ij_dict[compart][1]
-                funC_mol_3[i, j] = funF[i][j] * Y_ij_dict[compart][2] * Z_ij_dict[compart][2]
-
-                # mol/m3 * kg/mol = kg/m3
-                funC_kg_1[i, j] = funC_mol_1[i, j] * chemParams['molar_mass']
-                funC_kg_2[i, j] = funC_mol_2[i, j] * chemParams['molar_mass']
-                funC_kg_3[i, j] = funC_mol_3[i, j] * chemParams['molar_mass']
-                funM_kg_1[i, j] = funC_kg_1[i, j] * V_bulk[j]
-                funM_kg_2[i, j] = funC_kg_2[i, j] * V_bulk[j]
-                funM_kg_3[i, j] = funC_kg_3[i, j] * V_bulk[j]
-
-        # calculate for the subcompartments concentration
-        for j in range(len(subcompart_list)):
-            subcompart = subcompart_list[j]
-            if chem_type == 'IonizableOrganic':
-                funC_mol_1_sub[i, j] = funF[i][subcompart_map[subcompart][0]] * Y_ij_dict[subcompart_map[subcompart][1]][0] * Z_ij_dict_sub[subcompart][0]
-                funC_mol_2_sub[i, j] = funF[i][subcompart_map[subcompart][0]] * Y_ij_dict[subcompart_map[subcompart][1]][1] * Z_ij_dict_sub[subcompart][1]
-                funC_kg_1_sub[i, j] = funC_mol_1_sub[i, j] * chemParams['molar_mass']
-                funC_kg_2_sub[i, j] = funC_mol_2_sub[i, j] * chemParams['molar_mass']
-                funM_kg_1_sub[i, j] = funC_kg_1_sub[i, j] * V_sub[j]
-                funM_kg_2_sub[i, j] = funC_kg_2_sub[i, j] * V_sub[j]
-
-        output_array = [funC_kg_1, funC_kg_2, funC_kg_3, funC_kg_1_sub, funC_kg_2_sub, funC_kg_3_sub,
-                        funM_kg_1, funM_kg_2, funM_kg_3, funM_kg_1_sub, funM_kg_2_sub, funM_kg_3_sub]
-        # output_array = remove_floating_values(output_array)
-
-
-    return date_array, process_array, output_array[0], output_array[1], output_array[2], output_array[3], \
-           output_array[4], output_array[5], output_array[6], output_array[7], output_array[8], output_array[9], \
-           output_array[10], output_array[11]
-
-
-def nano_solver(start_date, time, presence, env, climate, ENM, bgConc, release):
+        for k in range(species):
+            Y_k = np.array([Y_ij_dict[compart][k] for compart in compart_list])
+            Z_k = np.array([Z_ij_dict[compart][k] for compart in compart_list])
+            # mol/m3 * kg/mol = kg/m3
+            funC_kg[k] = funF * Y_k * Z_k * chemParams['molar_mass']
+            funM_kg[k] = funC_kg[k] * V_bulk
+
+        # calculate for the subcompartments concentration, each subcompartment takes the aquivalence and
+        # the Y-values of its bulk compartment
+        if chem_type == 'IonizableOrganic':
+            sub_index = [subcompart_map[subcompart][0] for subcompart in subcompart_list]
+            for k in range(species):
+                Y_k = np.array([Y_ij_dict[subcompart_map[subcompart][1]][k] for subcompart in subcompart_list])
+                Z_k = np.array([Z_ij_dict_sub[subcompart][k] for subcompart in subcompart_list])
+                funC_kg_sub[k] = funF[:, sub_index] * Y_k * Z_k * chemParams['molar_mass']
+                funM_kg_sub[k] = funC_kg_sub[k] * V_sub
+
+        yield (date_array, process_array) + tuple(funC_kg + funC_kg_sub + funM_kg + funM_kg_sub)
+
+
+def ion_solver(chem_type, start_date, time, presence, env, climate, chemParams, bgConc, release, solver_mode='vode',
+               solver_preset='default', process_output='snapshot'):
+    # ionOFate and metalFate results of the whole simulation:
+    # date_array, process_array, funC_kg_1, funC_kg_2, funC_kg_3, funC_kg_1_sub, funC_kg_2_sub, funC_kg_3_sub,
+    # funM_kg_1, funM_kg_2, funM_kg_3, funM_kg_1_sub, funM_kg_2_sub, funM_kg_3_sub
+    return collect_blocks(ion_blocks(chem_type, start_date, time, presence, env, climate, chemParams, bgConc, release,
+                                     solver_mode, solver_preset, process_output))
+
+
+def nano_blocks(start_date, time, presence, env, climate, ENM, bgConc, release, solver_mode='vode',
+                solver_preset='default', process_output='snapshot', block_days=None):
+    # %   nanoFate results block by block, see day_blocks; every block is
+    # %   (date_array, process_array, bulk_C, funC, bulk_M, funM, funC_kg_1, funC_kg_2, funC_kg_3,
+    # %    funM_kg_1, funM_kg_2, funM_kg_3) of its days
     # %   Nano solver function solves the giant differential equation over time
     # %   in a for loop where the coefficients are dependent on the previous solution from the
     # %   previous time step
     # %   Inputs include simulation time, presence of compartments, the
     # %   environment, the climate, the ENM, the background starting
     # %   concentrations, and the releases
+    # %   solver_mode and solver_preset select the integrator and its tolerances
+    # %   'exact' and 'propagator' need a linear system, so nanoFate uses the daily vode integration for them
+    # %   process_output 'integrated' integrates the process rates together with the masses, see process_outputs
+    from eqDissolution import eqDissolution
+    from ode_nano import ode_nano, ode_nano_jac, nano_coefficients, nano_coefficients_day
+    from ode_nano_process import nano_process, ode_nano_quadrature, ode_nano_quadrature_jac
+
+    tolerance = solver_tolerance('Nanomaterial', solver_mode, solver_preset, process_output)
+    if solver_mode == 'steady':
+        raise ValueError("solver_mode 'steady' needs a linear model and is not available for nanoFate")
 
     # %% Volume vector
     # %  Needed for calculations
@@ -370,17 +689,8 @@ def nano_solver(start_date, time, presence, env, climate, ENM, bgConc, release):
 
     # %% Set initial conditions/background concentration for the model to solve
     bgConcNames = list(bgConc.keys())
-    funC = np.zeros((time, len(V)))
-    funM = np.zeros((time, len(V)))
-
-    # nanoFate keep tracks of three ENM states: 1) free nanoparticles in water; 2) ENM particles with solids; 3) ENM dissolved
-    funC_kg_1 = np.zeros((time, 13)) # aer, fwSS, fwSed, swSS, swSed, soil1, deepS1, soil2, deepS2, soil3, deepS3, soil4, deepS4
-    funC_kg_2 = np.zeros((time, 13)) # air, fw, sw, soil1w, soil2w, soil3w, soil4w
-    funC_kg_3 = np.zeros((time, 13)) # fwDis, fwSedDis, swDis, swSedDis, soil1wDis, soil2wDis, soil3wDis, soil4wDis
-
-    funM_kg_1 = np.zeros((time, 13))
-    funM_kg_2 = np.zeros((time, 13))
-    funM_kg_3 = np.zeros((time, 13))
+    funC0 = np.zeros(len(V))
+    funM0 = np.zeros(len(V))
 
     funC_2_array = [0, 1, 3, 5, 7, 9, 11]
     funC_3_array = [1, 2, 3, 4, 5, 7, 9, 11]
@@ -389,18 +699,17 @@ def nano_solver(start_date, time, presence, env, climate, ENM, bgConc, release):
     freeNano_array = [0, 2, 5, 9, 11, 13, 15]
     dissolved_array = [16, 17, 18, 19, 20, 21, 22, 23]
 
-    date_array = []
     start_day = datetime.strptime(start_date, "%Y %m %d")
-    process_array = np.zeros((time, 73))
+    n_process = 73
 
-    # % initial conditions for solver step 1 found in first row
+    # % initial conditions for solver step 1
     for i in range(len(V)):
-        funC[0, i] = bgConc[bgConcNames[i]]
+        funC0[i] = bgConc[bgConcNames[i]]
 
     for i in range(len(V)):
-        funM[0, i] = funC[0, i] * V[i]  # % mass values from concentration and volume
-        if math.isnan(funM[0, i]):
-            funM[0, i] = 0
+        funM0[i] = funC0[i] * V[i]  # % mass values from concentration and volume
+        if math.isnan(funM0[i]):
+            funM0[i] = 0
 
     # %% Dissolution equilibrium across range of concentrations and pHs
     # % calculates the maximum possible dissolution in the system given the ENM
@@ -409,122 +718,131 @@ def nano_solver(start_date, time, presence, env, climate, ENM, bgConc, release):
     DIS = eqDissolution(ENM['ENM'], env['freshwpH'], env['seawpH'], env['soilWpH1'], env['soilWpH2'], env['soilWpH3'],
                         env['soilWpH4'], presence)
 
-    f = [funM[0]]
+    # state the next day starts from, only the last one is kept
+    f = funM0
+
+    # with process_output 'integrated' the state also holds the mass moved by each process of the table (kg),
+    # restarted from 0 every day except in 'continuous' mode where the daily masses are differences of the totals
+    # atol of those states is scaled from ng to kg
+    if process_output == 'integrated':
+        fun, jac = ode_nano_quadrature, ode_nano_quadrature_jac
+        f = np.concatenate([funM0, np.zeros(n_process)])
+        tolerance['atol'] = np.concatenate([np.full(len(V), tolerance['atol']),
+                                            np.full(n_process, tolerance['atol'] / (10 ** 9))])
+    else:
+        fun, jac = ode_nano, ode_nano_jac
+
+    climate_days = horizon_forcing(climate)
+    release_days = horizon_forcing(release)
+
+    for first, last in day_blocks(time, block_days):
+        days = last - first
+        funM = np.zeros((days, len(V)))
+        process_array = np.zeros((days, n_process))
+        date_array = []
+
+        # rate constants and inflows of every day of the block, computed in one pass over the climate series
+        coef_days = nano_coefficients(np.arange(first, last), V, presence, env, climate_days, ENM, release_days,
+                                      bgConc)
+
+        # rate constants and inflows are fixed for the day and shared by all ode_nano calls
+        coef_list = [nano_coefficients_day(coef_days, k) for k in range(days)]
+
+        if solver_mode == 'continuous':
+            f_days = continuous_solution(
+                lambda t, y, k: fun(t, y, first + k, V, presence, env, climate, ENM, release, bgConc, DIS, time,
+                                    coef_list[k]),
+                lambda t, y, k: jac(t, y, first + k, V, presence, env, climate, ENM, release, bgConc, DIS, time,
+                                    coef_list[k]),
+                f, days, [k == 0 or coef_list[k] != coef_list[k - 1] for k in range(days)], **tolerance)
+
+        # matched tolerance to matlab, can't go lower and still get a match and run matlab
+        for k in range(days):
+            i = first + k
+            print (i)
+            if solver_mode == 'continuous':
+                soln = f_days[k]
+            else:
+                # -9 and -10 are a statistical match to matlab
+                soln = integrate_day(fun, jac, f,
+                                     (i, V, presence, env, climate, ENM, release, bgConc, DIS, time, coef_list[k]),
+                                     solver_mode, tolerance)
+
+            # % output is mass values
+            funM[k] = soln[:len(V)]  # % mass values for time=i
+            date = (start_day + timedelta(days=i)).strftime('%Y %m %d')
+            date_array.append(date)
+
+            if process_output == 'integrated':
+                if solver_mode == 'continuous':
+                    process_array[k] = soln[len(V):] - f[len(V):]
+                    f = soln
+                else:
+                    process_array[k] = soln[len(V):]
+                    f = np.concatenate([funM[k], np.zeros(n_process)])
+            else:
+                f = soln
+                process_array[k] = nano_process(funM[k], i, V, presence, env, climate, ENM, release, bgConc, DIS,
+                                                time, coef_list[k])
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            funC = np.nan_to_num(np.true_divide(funM, V))  # % concentration values
+
+        # nanoFate keep tracks of three ENM states: 1) free nanoparticles in water; 2) ENM particles with solids; 3) ENM dissolved
+        # the 13 output columns are gathered from the state columns
+        funC_kg_1 = funC[:, particle_array] # aer, fwSS, fwSed, swSS, swSed, soil1, deepS1, soil2, deepS2, soil3, deepS3, soil4, deepS4
+        funC_kg_2 = np.zeros((days, 13)) # air, fw, sw, soil1w, soil2w, soil3w, soil4w
+        funC_kg_3 = np.zeros((days, 13)) # fwDis, fwSedDis, swDis, swSedDis, soil1wDis, soil2wDis, soil3wDis, soil4wDis
+        funC_kg_2[:, funC_2_array] = funC[:, freeNano_array]
+        funC_kg_3[:, funC_3_array] = funC[:, dissolved_array]
+
+        funM_kg_1 = funM[:, particle_array]
+        funM_kg_2 = np.zeros((days, 13))
+        funM_kg_3 = np.zeros((days, 13))
+        funM_kg_2[:, funC_2_array] = funM[:, freeNano_array]
+        funM_kg_3[:, funC_3_array] = funM[:, dissolved_array]
+
+        bulk_M, bulk_C = bulkCalculator(days, V, funM, presence)
+
+        # convert units back to kg/m3
+        bulk_M = bulk_M / (10 ** 9)
+        bulk_C = bulk_C / (10 ** 9)
+        funC = funC / (10 ** 9)
+        funM = funM / (10 ** 9)
+        funC_kg_1 = funC_kg_1 / (10 ** 9)
+        funC_kg_2 = funC_kg_2 / (10 ** 9)
+        funC_kg_3 = funC_kg_3 / (10 ** 9)
+        funM_kg_1 = funM_kg_1 / (10 ** 9)
+        funM_kg_2 = funM_kg_2 / (10 ** 9)
+        funM_kg_3 = funM_kg_3 / (10 ** 9)
+
+        output_array = [bulk_C, funC, bulk_M, funM, funC_kg_1, funC_kg_2, funC_kg_3, funM_kg_1, funM_kg_2, funM_kg_3]
+        output_array = remove_floating_values(output_array)
 
-    # matched tolerance to matlab, can't go lower and still get a match and run matlab
-    for i in range(time):
-        print (i)
-        # -9 and -10 are a statistical match to matlab
-        r = ode(ode_nano).set_integrator('vode', method='bdf', with_jacobian=True,
-                                         nsteps=5000, rtol=1e-6, atol=1e-14)
-        r.set_initial_value(f[-1], 0)
-        r.set_f_params(i, V, presence, env, climate, ENM, release, bgConc, DIS, time)
-        soln = r.integrate(1)
-        f.append(soln)
-
-        # % output is mass values
-        funM[i] = f[-1]  # % mass values for time=i
-        date = (start_day + timedelta(days=i)).strftime('%Y %m %d')
-        date_array.append(date)
-
-        process_nano = nano_process(funM[i],i,V,presence,env,climate,ENM,DIS)
-
-        for j in range(0, len(process_nano)):
-            process_array[i, j] = process_nano[j]
-
-        for j in range(len(V)):
-            with np.errstate(divide='ignore', invalid='ignore'):
-                c = np.true_divide(f[-1][j], V[j])  # % concentration values for time=i
-                funC[i, j] = np.nan_to_num(c)
-
-        for j in range(0, 13):
-            funC_kg_1[i, j] = funC[i, particle_array[j]]
-            funM_kg_1[i, j] = funM[i, particle_array[j]]
-            if j in funC_2_array:
-                index = funC_2_array.index(j)
-                funC_kg_2[i, j] = funC[i, freeNano_array[index]]
-                funM_kg_2[i, j] = funM[i, freeNano_array[index]]
-            if j in funC_3_array:
-                index = funC_3_array.index(j)
-                funC_kg_3[i, j] = funC[i, dissolved_array[index]]
-                funM_kg_3[i, j] = funM[i, dissolved_array[index]]
-
-    bulk_M, bulk_C = bulkCalculator(time, V, funM, presence)
-
-    # convert units back to kg/m3
-    bulk_M = bulk_M / (10 ** 9)
-    bulk_C = bulk_C / (10 ** 9)
-    funC = funC / (10 ** 9)
-    funM = funM / (10 ** 9)
-    funC_kg_1 = funC_kg_1 / (10 ** 9)
-    funC_kg_2 = funC_kg_2 / (10 ** 9)
-    funC_kg_3 = funC_kg_3 / (10 ** 9)
-    funM_kg_1 = funM_kg_1 / (10 ** 9)
-    funM_kg_2 = funM_kg_2 / (10 ** 9)
-    funM_kg_3 = funM_kg_3 / (10 ** 9)
-
-    output_array = [bulk_C, funC, bulk_M, funM, funC_kg_1, funC_kg_2, funC_kg_3, funM_kg_1, funM_kg_2, funM_kg_3]
-    output_array = remove_floating_values(output_array)
-
-    return date_array, process_array, output_array[0], output_array[1], output_array[2], output_array[3], \
-           output_array[4], output_array[5], output_array[6], output_array[7], output_array[8], output_array[9]
+        yield (date_array, process_array) + tuple(output_array)
+
+
+def nano_solver(start_date, time, presence, env, climate, ENM, bgConc, release, solver_mode='vode',
+                solver_preset='default', process_output='snapshot'):
+    # %   nanoFate results of the whole simulation:
+    # %   date_array, process_array, bulk_C, funC, bulk_M, funM, funC_kg_1, funC_kg_2, funC_kg_3,
+    # %   funM_kg_1, funM_kg_2, funM_kg_3
+    return collect_blocks(nano_blocks(start_date, time, presence, env, climate, ENM, bgConc, release, solver_mode,
+                                      solver_preset, process_output))
 
 
 def bulkCalculator(time, V, funM, presence):
+    # BULK CONCENTRATIONS DO NOT INCLUDE DISSOLVED
+    # bulk air, freshwater column, freshwater sediment, marine column, marine sediment, undeveloped soil,
+    # urban soil, agricultural soil and biosolids agricultural soil, with the state columns summed in each
+    bulk_columns = [('air', [0, 1]), ('fw', [2, 3]), ('fw', [4]), ('sw', [5, 6]), ('sw', [7]), ('soil1', [8, 9]),
+                    ('soil2', [10, 11]), ('soil3', [12, 13]), ('soil4', [14, 15])]
     bulk_C = np.zeros((time, 9))
     bulk_M = np.zeros((time, 9))
-    for i in range(time):
-        # BULK CONCENTRATIONS DO NOT INCLUDE DISSOLVED
-        # bulk air
-        if presence['air'] == 1:
-            bulk_M[i, 0] = funM[i, 0] + funM[i, 1]
-            bulk_C[i, 0] = (funM[i, 0] + funM[i, 1]) / (V[0] + V[1])
-        else:
-            bulk_C[i, 0] = 0
-        # bulk freshwater column
-        if presence['fw'] == 1:
-            bulk_M[i, 1] = funM[i, 2] + funM[i, 3]
-            bulk_C[i, 1] = (funM[i, 2] + funM[i, 3]) / (V[2] + V[3])
-            # bulk freshwater sediment
-            bulk_M[i, 2] = funM[i, 4]
-            bulk_C[i, 2] = (funM[i, 4] / V[4])
-        else:
-            bulk_C[i, 1] = 0
-            bulk_C[i, 2] = 0
-        # bulk marine column
-        if presence['sw'] == 1:
-            bulk_M[i, 3] = funM[i, 5] + funM[i, 6]
-            bulk_C[i, 3] = (funM[i, 5] + funM[i, 6]) / (V[5] + V[6])
-            # bulk marine sediment
-            bulk_M[i, 4] = funM[i, 7]
-            bulk_C[i, 4] = (funM[i, 7] / V[7])
-        else:
-            bulk_C[i, 3] = 0
-            bulk_C[i, 4] = 0
-        # bulk undeveloped soil
-        if presence['soil1'] == 1:
-            bulk_M[i, 5] = funM[i, 8] + funM[i, 9]
-            bulk_C[i, 5] = (funM[i, 8] + funM[i, 9]) / (V[8] + V[9])
-        else:
-            bulk_C[i, 5] = 0
-        # bulk urban soil
-        if presence['soil2'] == 1:
-            bulk_M[i, 6] = funM[i, 10] + funM[i, 11]
-            bulk_C[i, 6] = (funM[i, 10] + funM[i, 11]) / (V[10] + V[11])
-        else:
-            bulk_C[i, 6] = 0
-        # bulk agricultural soil
-        if presence['soil3'] == 1:
-            bulk_M[i, 7] = funM[i, 12] + funM[i, 13]
-            bulk_C[i, 7] = (funM[i, 12] + funM[i, 13]) / (V[12] + V[13])
-        else:
-            bulk_C[i, 7] = 0
-        # bulk biosolids agricultural soil
-        if presence['soil4'] == 1:
-            bulk_M[i, 8] = funM[i, 14] + funM[i, 15]
-            bulk_C[i, 8] = (funM[i, 14] + funM[i, 15]) / (V[14] + V[15])
-        else:
-            bulk_C[i, 8] = 0
+    for k, (compart, columns) in enumerate(bulk_columns):
+        if presence[compart] == 1:
+            bulk_M[:, k] = funM[:, columns].sum(axis=1)
+            bulk_C[:, k] = bulk_M[:, k] / sum(V[j] for j in columns)
 
     return bulk_M, bulk_C
 
@@ -0,0 +1,479 @@
+import os
+import sys
+import json
+import argparse
+import contextlib
+from collections import OrderedDict, deque
+from itertools import islice
+import numpy as np
+
+from result_export import check_output_format, write_tables
+
+
+# Monte Carlo runs of the organic, ionizable and metal models, the chemical properties (half-lives, Koc_n, Kaw_n,
+# pKa, Kd_*_i, ...) and environmental parameters (organic carbon, pH, volumes, ...) listed with a distribution are
+# sampled, and the daily concentrations of every realization are reduced to percentile bands on the fly
+# usage, from the ChemFate_py3 folder like run_ChemFate.py:
+#     python monte_carlo.py uncertainty.yaml [--workers 4]
+# the configuration (YAML or JSON) holds the inputs of a run as in batch_run (chem_type, chem_file, region_file,
+# release_file, start_date, end_date, file_name, output_file_path), the options of MonteCarlo and the distributions
+# of the chemical properties under 'chem' and of the environmental parameters under 'env', e.g.
+#     chem:
+#       Koc_n: {dist: lognormal, gsd: 3}
+#       HL_fWater_n: {dist: triangular, low: 300, high: 2000}
+#     env:
+#       soilOC1: {dist: uniform, low: 0.01, high: 0.05}
+# the parameters take the entries of the input workbooks, as entered (e.g. CN1-CN4 as curve numbers); the partition
+# coefficients and degradation rates derived from them are computed again for every realization
+# the inputs are parsed once (through the input_cache) and the climate and release series converted once, every
+# worker process receives them when it starts and solves its realizations from them
+# results: table 'mc_conc' with a sheet per species and statistic ('neutral mean', 'neutral p95', ...) and table
+# 'mc_samples' with the sampled parameters of every realization, in one of the result_export output formats
+
+# distributions and their parameters, the value of the input workbook is the default of the optional ones
+# 'normal' - mean (default the input value), sd or cv (sd = cv * |mean|)
+# 'lognormal' - median (default the input value), gsd (geometric standard deviation) or sigma (of the log)
+# 'uniform' - low, high
+# 'loguniform' - low and high, or factor for [value / factor, value * factor]
+# 'triangular' - low, mode (default the input value), high
+distributions = ('normal', 'lognormal', 'uniform', 'loguniform', 'triangular')
+
+# probabilities the unbounded distributions are cut at on the unit hypercube of the sensitivity designs
+unit_bounds = (0.001, 0.999)
+
+# releases and background concentrations are converted to mol with the molar mass when they are loaded
+fixed_parameters = ['MW', 'name', 'smiles', 'cas', 'type', 'chem_formula']
+
+default_quantiles = (0.05, 0.5, 0.95)
+
+concentration_unit = 'g/L'
+
+config_fields = ['chem_type', 'chem_file', 'region_file', 'release_file', 'start_date', 'end_date']
+
+# options of MonteCarlo and their defaults
+config_options = OrderedDict([('file_name', 'monte_carlo'), ('output_file_path', None), ('realizations', 100),
+                              ('seed', None), ('quantiles', list(default_quantiles)), ('solver_mode', 'exact'),
+                              ('solver_preset', 'default'), ('output_format', 'xlsx'), ('workers', None)])
+
+path_fields = ['chem_file', 'region_file', 'release_file', 'output_file_path']
+
+CUR_PATH = os.path.dirname(os.path.abspath(__file__))
+
+
+def check_run_options(chem_type, solver_mode, output_format):
+    from model_solver import solver_modes
+    if chem_type == 'Nanomaterial':
+        raise ValueError('the parameter studies cover the NonionizableOrganic, IonizableOrganic and Metal models')
+    if solver_mode not in solver_modes:
+        raise ValueError("solver_mode needs to be one of %s" % ', '.join(solver_modes))
+    if solver_mode == 'propagator':
+        # the propagators are kept in the input_cache under the chemical and environmental parameters, every run
+        # of sampled parameters would add a file of its own
+        raise ValueError("solver_mode 'propagator' is for release scenarios, the parameter studies use 'exact'")
+    check_output_format(output_format)
+
+
+def spec_value(spec, key, base, parameter):
+    # a parameter of a distribution, the input value when spec does not give it
+    if key in spec:
+        return float(spec[key])
+    if not isinstance(base, (int, float)) or isinstance(base, bool):
+        raise ValueError("the distribution of %s needs '%s', its input value is %r" % (parameter, key, base))
+    return float(base)
+
+
+def distribution_parameters(parameter, spec, base):
+    # distribution of a parameter and its arguments: (mean, sd) for 'normal', (log of the median, sigma) for
+    # 'lognormal', (low, high) for 'uniform', (log low, log high) for 'loguniform', (low, mode, high) for 'triangular'
+    # base is the value of the parameter in the input workbook
+    dist = spec.get('dist')
+    if dist not in distributions:
+        raise ValueError("the distribution of %s needs 'dist', one of %s" % (parameter, ', '.join(distributions)))
+    if dist == 'normal':
+        mean = spec_value(spec, 'mean', base, parameter)
+        sd = float(spec['sd']) if 'sd' in spec else spec_value(spec, 'cv', None, parameter) * abs(mean)
+        return dist, (mean, sd)
+    if dist == 'lognormal':
+        median = spec_value(spec, 'median', base, parameter)
+        sigma = np.log(float(spec['gsd'])) if 'gsd' in spec else spec_value(spec, 'sigma', None, parameter)
+        return dist, (np.log(median), sigma)
+    if dist == 'uniform':
+        return dist, (spec_value(spec, 'low', None, parameter), spec_value(spec, 'high', None, parameter))
+    if dist == 'loguniform':
+        if 'factor' in spec:
+            value = spec_value(spec, 'value', base, parameter)
+            low, high = value / float(spec['factor']), value * float(spec['factor'])
+        else:
+            low, high = spec_value(spec, 'low', None, parameter), spec_value(spec, 'high', None, parameter)
+        return dist, (np.log(low), np.log(high))
+    low, mode, high = [spec_value(spec, key, value, parameter) for key, value in
+                       [('low', None), ('mode', base), ('high', None)]]
+    if not low <= mode <= high:
+        raise ValueError('the mode of %s (%g) needs to be between low and high' % (parameter, mode))
+    return dist, (low, mode, high)
+
+
+def parameter_draws(parameter, spec, base, size, rng):
+    # size values of one parameter from its distribution spec, base is its value in the input workbook
+    dist, args = distribution_parameters(parameter, spec, base)
+    if dist == 'normal':
+        return rng.normal(args[0], args[1], size)
+    if dist == 'lognormal':
+        return rng.lognormal(args[0], args[1], size)
+    if dist == 'uniform':
+        return rng.uniform(args[0], args[1], size)
+    if dist == 'loguniform':
+        return np.exp(rng.uniform(args[0], args[1], size))
+    return rng.triangular(args[0], args[1], args[2], size)
+
+
+def parameter_values(parameter, spec, base, u):
+    # values of one parameter at the probabilities u of its distribution (the inverse of its cumulative
+    # distribution), for designs on the unit hypercube; the normal and lognormal tails are cut at unit_bounds
+    dist, args = distribution_parameters(parameter, spec, base)
+    u = np.asarray(u, dtype=float)
+    if dist in ('normal', 'lognormal'):
+        from scipy.special import ndtri
+        z = args[0] + args[1] * ndtri(np.clip(u, unit_bounds[0], unit_bounds[1]))
+        return z if dist == 'normal' else np.exp(z)
+    if dist in ('uniform', 'loguniform'):
+        x = args[0] + (args[1] - args[0]) * u
+        return x if dist == 'uniform' else np.exp(x)
+    low, mode, high = args
+    if high == low:
+        return np.full(u.shape, low)
+    c = (mode - low) / (high - low)
+    return np.where(u < c, low + np.sqrt(u * (high - low) * (mode - low)),
+                    high - np.sqrt((1.0 - u) * (high - low) * (high - mode)))
+
+
+def parameter_list(chem_distributions, env_distributions, raw_chem, raw_env):
+    # (group, name, spec, input value) of every parameter with a distribution, group is 'chem' or 'env'
+    parameters = []
+    for group, specs, raw in [('chem', chem_distributions, raw_chem), ('env', env_distributions, raw_env)]:
+        for name, spec in (specs or {}).items():
+            if name not in raw:
+                raise ValueError('%s is not an entry of the %s inputs' % (name, group))
+            if group == 'chem' and name in fixed_parameters:
+                raise ValueError('%s can not be sampled' % name)
+            parameters.append((group, name, spec, raw[name]))
+    if not parameters:
+        raise ValueError('no parameter has a distribution')
+    names = [name for group, name, spec, base in parameters]
+    if len(set(names)) < len(names):
+        raise ValueError('a parameter is listed under both chem and env')
+    return parameters
+
+
+def sample_parameters(chem_distributions, env_distributions, raw_chem, raw_env, realizations, seed=None):
+    # parameters as a list of (group, name), and their values as an array of realizations x parameters, drawn in
+    # the order of the distributions from a generator seeded with seed
+    rng = np.random.default_rng(seed)
+    parameters = parameter_list(chem_distributions, env_distributions, raw_chem, raw_env)
+    columns = [parameter_draws(name, spec, base, realizations, rng) for group, name, spec, base in parameters]
+    return [(group, name) for group, name, spec, base in parameters], np.column_stack(columns)
+
+
+class P2Quantile:
+    # P-square estimate (Jain and Chlamtac, 1985) of the p quantile of every cell of the arrays added so far
+    # five markers per cell, so the memory does not grow with the number of realizations; the first five arrays
+    # are kept and give the exact quantile until the markers are set up
+
+    def __init__(self, p):
+        self.p = p
+        self.count = 0
+        self.shape = None
+        self.first = []
+        self.heights = None
+        self.positions = None
+        self.desired = np.array([1.0, 1.0 + 2.0 * p, 1.0 + 4.0 * p, 3.0 + 2.0 * p, 5.0])
+        self.increments = np.array([0.0, p / 2.0, p, (1.0 + p) / 2.0, 1.0])
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        self.shape = values.shape
+        x = values.ravel()
+        self.count += 1
+        if self.count <= 5:
+            self.first.append(x.copy())
+            if self.count == 5:
+                self.heights = np.sort(np.stack(self.first, axis=1), axis=1)
+                self.positions = np.tile(np.arange(1.0, 6.0), (len(x), 1))
+                self.first = []
+            return
+
+        q = self.heights
+        n = self.positions
+        # cell of the new value between the markers, the end markers follow the extremes
+        q[:, 0] = np.minimum(q[:, 0], x)
+        q[:, 4] = np.maximum(q[:, 4], x)
+        k = (x[:, None] >= q[:, 1:4]).sum(axis=1)
+        n += np.arange(5) > k[:, None]
+        self.desired += self.increments
+
+        # move the middle markers that are off their desired position by a step, with the piecewise parabolic
+        # prediction of their height, or the linear one where the parabolic one leaves the neighbouring markers
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[:, i]
+            up = (d >= 1.0) & (n[:, i + 1] - n[:, i] > 1.0)
+            down = (d <= -1.0) & (n[:, i - 1] - n[:, i] < -1.0)
+            move = up | down
+            if not move.any():
+                continue
+            s = np.where(up, 1.0, -1.0)
+            parabolic = q[:, i] + s / (n[:, i + 1] - n[:, i - 1]) * (
+                (n[:, i] - n[:, i - 1] + s) * (q[:, i + 1] - q[:, i]) / (n[:, i + 1] - n[:, i]) +
+                (n[:, i + 1] - n[:, i] - s) * (q[:, i] - q[:, i - 1]) / (n[:, i] - n[:, i - 1]))
+            q_next = np.where(up, q[:, i + 1], q[:, i - 1])
+            n_next = np.where(up, n[:, i + 1], n[:, i - 1])
+            linear = q[:, i] + s * (q_next - q[:, i]) / (n_next - n[:, i])
+            height = np.where((q[:, i - 1] < parabolic) & (parabolic < q[:, i + 1]), parabolic, linear)
+            q[:, i] = np.where(move, height, q[:, i])
+            n[:, i] += np.where(move, s, 0.0)
+
+    def value(self):
+        if self.count == 0:
+            return None
+        if self.count < 5:
+            return np.percentile(np.stack(self.first), 100.0 * self.p, axis=0).reshape(self.shape)
+        return self.heights[:, 2].reshape(self.shape)
+
+
+def quantile_label(p):
+    return 'p%g' % (100.0 * p)
+
+
+class ConcentrationBands:
+    # mean, minimum, maximum and quantiles of every cell (day x compartment) of the concentration sheets over the
+    # realizations added so far
+
+    def __init__(self, quantiles=default_quantiles):
+        self.quantiles = list(quantiles)
+        for p in self.quantiles:
+            if not 0.0 < p < 1.0:
+                raise ValueError('quantiles need to be between 0 and 1')
+        self.realizations = 0
+        self.frames = OrderedDict()
+        self.total = OrderedDict()
+        self.minimum = OrderedDict()
+        self.maximum = OrderedDict()
+        self.estimators = OrderedDict()
+
+    def update(self, sheets):
+        # sheets maps each sheet name to its DataFrame of dates x compartments
+        self.realizations += 1
+        for sheet, df in sheets.items():
+            values = np.asarray(df.values, dtype=float)
+            if sheet not in self.frames:
+                self.frames[sheet] = df
+                self.total[sheet] = np.zeros(values.shape)
+                self.minimum[sheet] = np.full(values.shape, np.inf)
+                self.maximum[sheet] = np.full(values.shape, -np.inf)
+                self.estimators[sheet] = [P2Quantile(p) for p in self.quantiles]
+            self.total[sheet] += values
+            np.minimum(self.minimum[sheet], values, out=self.minimum[sheet])
+            np.maximum(self.maximum[sheet], values, out=self.maximum[sheet])
+            for estimator in self.estimators[sheet]:
+                estimator.update(values)
+
+    def tables(self):
+        # the bands as sheets '<sheet> <statistic>' of DataFrames with the dates and compartments of the results
+        import pandas as pd
+        sheets = OrderedDict()
+        for sheet, df in self.frames.items():
+            statistics = [('mean', self.total[sheet] / max(self.realizations, 1)), ('min', self.minimum[sheet]),
+                          ('max', self.maximum[sheet])]
+            statistics += [(quantile_label(estimator.p), estimator.value()) for estimator in self.estimators[sheet]]
+            for statistic, values in statistics:
+                sheets['%s %s' % (sheet, statistic)] = pd.DataFrame(values, index=df.index, columns=df.columns)
+        return sheets
+
+
+def model_inputs(start_date, end_date, chem_type, chem_file, region_file, release_file, solver_mode='exact',
+                 solver_preset='default'):
+    # inputs shared by all realizations: the parsed workbooks, the raw entries the sampled parameters replace,
+    # and the climate and release series converted once to the arrays the solvers work on
+    from load_data import LoadData
+    from linear_solver import horizon_forcing
+    from model_setup import Model_SetUp
+    data = LoadData(chem_type, chem_file, region_file, release_file, start_date, end_date)
+    chemParams, presence, env, climate, bgConc, release, release_scenario = data.run_loadData()
+    raw_chem, raw_env = data.raw_inputs()
+    # the release dates are not used by the solvers
+    release = dict((key, value) for key, value in release.items() if key != 'dates')
+    model = Model_SetUp(start_date, end_date, 1, 0, chem_type, chem_file, region_file, release_file, '', '',
+                        solver_mode=solver_mode, solver_preset=solver_preset, plots='none')
+    return {'chem_type': chem_type, 'model': model, 'time': model.simulation_days(), 'presence': presence,
+            'climate': horizon_forcing(climate), 'bgConc': bgConc, 'release': horizon_forcing(release),
+            'raw_chem': raw_chem, 'raw_env': raw_env}
+
+
+# inputs shared by the realizations of a worker process, set by init_worker
+shared_inputs = {}
+
+
+def init_worker(inputs):
+    shared_inputs.clear()
+    shared_inputs.update(inputs)
+
+
+def realization(draws):
+    # concentration sheets of one realization, draws is a list of ((group, name), value) of the sampled parameters
+    from load_data import derive_env_params, derive_chemParams
+    from generate_result import GenerateResult
+    inputs = shared_inputs
+    raw_chem = dict(inputs['raw_chem'])
+    raw_env = OrderedDict(inputs['raw_env'])
+    for (group, name), value in draws:
+        if group == 'chem':
+            raw_chem[name] = value
+        else:
+            raw_env[name] = value
+    env = derive_env_params(raw_env)
+    chemParams = derive_chemParams(inputs['chem_type'], raw_chem, env)
+
+    # the daily progress of the solver is not shown for every realization
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        date_array, process_array, funC_df_list, funM_df_list = \
+            next(inputs['model'].result_blocks(inputs['time'], inputs['presence'], env, inputs['climate'],
+                                               chemParams, inputs['bgConc'], inputs['release']))
+    sheets_C, sheets_M = GenerateResult().result_sheets(inputs['chem_type'], date_array, funC_df_list, funM_df_list)
+    return sheets_C
+
+
+def pool_results(function, inputs, tasks, workers):
+    # function of every task in the order of tasks, evaluated in a pool of workers that each get the inputs once
+    # (in shared_inputs); at most two tasks per worker are pending, so the memory does not grow with their number
+    if workers <= 1:
+        init_worker(inputs)
+        for task in tasks:
+            yield function(task)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    tasks = iter(tasks)
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(inputs,)) as executor:
+        pending = deque(executor.submit(function, task) for task in islice(tasks, 2 * workers))
+        while pending:
+            result = pending.popleft().result()
+            for task in islice(tasks, 1):
+                pending.append(executor.submit(function, task))
+            yield result
+
+
+class MonteCarlo:
+
+    def __init__(self, start_date, end_date, chem_type, chem_file, region_file, release_file, output_file_path,
+                 file_name, chem_distributions=None, env_distributions=None, realizations=100, seed=None,
+                 quantiles=default_quantiles, solver_mode='exact', solver_preset='default', output_format='xlsx',
+                 workers=None):
+        # chem_distributions and env_distributions map parameter names to their distribution, see distributions
+        # seed makes the samples reproducible; the realizations are reduced in the order of the samples, so the
+        # bands do not depend on workers (None uses one worker per CPU)
+        # solver_mode 'exact' is the default, the models are linear within each day and do not need an integrator
+        check_run_options(chem_type, solver_mode, output_format)
+        if realizations < 1:
+            raise ValueError('realizations needs to be at least 1')
+        self.start_date = start_date
+        self.end_date = end_date
+        self.chem_type = chem_type
+        self.chem_file = chem_file
+        self.region_file = region_file
+        self.release_file = release_file
+        self.output_file_path = output_file_path
+        self.file_name = file_name
+        self.chem_distributions = chem_distributions or {}
+        self.env_distributions = env_distributions or {}
+        self.realizations = realizations
+        self.seed = seed
+        self.quantiles = list(quantiles)
+        self.solver_mode = solver_mode
+        self.solver_preset = solver_preset
+        self.output_format = output_format
+        self.workers = workers
+
+    def load_inputs(self):
+        return model_inputs(self.start_date, self.end_date, self.chem_type, self.chem_file, self.region_file,
+                            self.release_file, self.solver_mode, self.solver_preset)
+
+    def run(self):
+        # solve the realizations and write the bands and samples, returns the tables
+        import pandas as pd
+        inputs = self.load_inputs()
+        parameters, values = sample_parameters(self.chem_distributions, self.env_distributions, inputs['raw_chem'],
+                                               inputs['raw_env'], self.realizations, self.seed)
+        samples = [list(zip(parameters, row)) for row in values.tolist()]
+
+        workers = self.workers
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = max(1, min(workers, self.realizations))
+
+        bands = ConcentrationBands(self.quantiles)
+        for k, sheets in enumerate(pool_results(realization, inputs, samples, workers)):
+            bands.update(sheets)
+            print('realization %d of %d' % (k + 1, self.realizations))
+
+        samples_df = pd.DataFrame(values, index=pd.Index(np.arange(1, self.realizations + 1), name='realization'),
+                                  columns=[name for group, name in parameters])
+        tables = OrderedDict([('mc_conc', bands.tables()),
+                              ('mc_samples', OrderedDict([('samples', samples_df)]))])
+        if not os.path.exists(self.output_file_path):
+            os.makedirs(self.output_file_path)
+        write_tables(tables, {'mc_conc': concentration_unit, 'mc_samples': 'input units'}, self.output_file_path,
+                     self.file_name, self.output_format)
+        return tables
+
+
+def read_config(config_file, options=config_options):
+    # arguments of a YAML or JSON configuration, the config_fields and options (with their defaults) and the
+    # parameter distributions; relative file paths are taken from its folder
+    with open(config_file) as f:
+        if config_file.lower().endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError('YAML configurations need the PyYAML package, or use a JSON configuration')
+            config = yaml.safe_load(f)
+        else:
+            config = json.load(f)
+
+    base = os.path.dirname(os.path.abspath(config_file))
+    arguments = OrderedDict()
+    for field in config_fields + list(options):
+        value = config.get(field)
+        if value is None:
+            if field in config_fields:
+                raise ValueError('%s has no %s' % (config_file, field))
+            value = options[field]
+        elif field in config_fields:
+            value = str(value)
+        if field in path_fields and value is not None:
+            value = os.path.join(base, value)
+        arguments[field] = value
+    if arguments['output_file_path'] is None:
+        arguments['output_file_path'] = os.path.join(CUR_PATH, 'Output', arguments['file_name'])
+    arguments['chem_distributions'] = config.get('chem') or {}
+    arguments['env_distributions'] = config.get('env') or {}
+    return arguments
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ChemFate Monte Carlo runs with percentile bands of the '
+                                                 'concentrations')
+    parser.add_argument('config', help='YAML or JSON file with the inputs, options and parameter distributions')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes, one per CPU by default')
+    parser.add_argument('--realizations', type=int, default=None, help='overrides realizations of the config')
+    args = parser.parse_args()
+
+    arguments = read_config(args.config)
+    if args.workers is not None:
+        arguments['workers'] = args.workers
+    if args.realizations is not None:
+        arguments['realizations'] = args.realizations
+    arguments['output_file_path'] = os.path.join(arguments['output_file_path'], '')
+    MonteCarlo(**arguments).run()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
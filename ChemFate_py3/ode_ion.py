@@ -1,9 +1,13 @@
 from degradation_process import Degradation
 from advective_processes import AdvectiveProcess
 from diffusion_process_ion import Diffusion
+from flux_balance import incidence_matrix, flux_derivative
 
-def ion_ode(t, Q, i, presence, env, chemParams, climate, release, bgConc,
-            Z_ij, Z_ij_sub, Y_ij, X_ij, Z_i):
+
+def ion_fluxes(Q, i, presence, env, chemParams, climate, release, bgConc,
+               Z_ij, Z_ij_sub, Y_ij, X_ij, Z_i):
+    # processes of ionizable organics in all compartments as named fluxes, the flux kernel shared by ion_ode and
+    # ion_process
     # Q is the total aquivalence by each subcompartment, also Q_t, unit: mol/m3
     # Q_n = Q_t * Y_n, and Q_i = Q_t * Y_i,
     # D unit: m3/day, N unit: mol/day, Q unit: mol/m3
@@ -265,7 +269,6 @@ def ion_ode(t, Q, i, presence, env, chemParams, climate, release, bgConc,
     soilW1_infil_i = D_infil_1 * Q_soil1_i
 
 
-
     soilS1_erosion_n = adv.D_erosion(climate['precip_mm'][i], env['slope1'],
                                      env['Kfact1'], env['cropManageFactor1'],
                                      env['supportFactor1'], env['soilA1'],
@@ -497,16 +500,13 @@ def ion_ode(t, Q, i, presence, env, chemParams, climate, release, bgConc,
     deepS4_leach_i = adv.D_leach(k_infil_4, Z_water=1.0) * Q_deepS4_i
 
 
-
     ###################################################################################################################
-    # the code below will combine the processes together 1) entering the compartment, 2) loss from the
-    # compartment, and 3) transfer between compartments
-    # if one compartment doesn't exist, re-route scenarios are considered
+    # the code below re-routes the processes if one compartment doesn't exist and collects them as named fluxes;
+    # the balance lists the fluxes 1) entering the compartment, 2) lost from the compartment and 3) transferred
+    # between compartments, the aliases keep the value seen by the receiving compartment
     ###################################################################################################################
 
     # air - air Q[0]
-    air_enter = release['air'][i] + airIn_adv_n + airIn_adv_i # mol/day
-
     fw_diff_n_2_air, sw_diff_n_2_air, soil1_diff_n_2_air,soil2_diff_n_2_air, soil3_diff_n_2_air, soil4_diff_n_2_air, \
     sSS_resusp_n_2_air, sSS_resusp_i_2_air, soilS1_windErosion_n_2_air, soilS1_windErosion_i_2_air, \
     soilS2_windErosion_n_2_air, soilS2_windErosion_i_2_air, soilS3_windErosion_n_2_air, soilS3_windErosion_i_2_air, \
@@ -526,20 +526,8 @@ def ion_ode(t, Q, i, presence, env, chemParams, climate, release, bgConc,
         soilS2_windErosion_n_2_air, soilS2_windErosion_i_2_air, soilS3_windErosion_n_2_air, soilS3_windErosion_i_2_air, \
         soilS4_windErosion_n_2_air, soilS4_windErosion_i_2_air = [0] * 34
 
-    air_loss = - (air_deg_n + aer_deg_n + aer_deg_i + airOut_adv_n + aerOut_adv_n + aerOut_adv_i +
-                  aer_dep_dry_n + aer_dep_dry_i + air_rain_diss_n + aer_dep_wet_n + aer_dep_wet_i +
-                  air_diff_n_to_fw + air_diff_n_to_sw + air_diff_n_to_soil1 + air_diff_n_to_soil2 +
-                  air_diff_n_to_soil3 + air_diff_n_to_soil4)
-    air_transfer = fw_diff_n_2_air + sw_diff_n_2_air + soil1_diff_n_2_air + soil2_diff_n_2_air + \
-                   soil3_diff_n_2_air + soil4_diff_n_2_air + sSS_resusp_n_2_air + sSS_resusp_i_2_air + \
-                   soilS1_windErosion_n_2_air + soilS1_windErosion_i_2_air + soilS2_windErosion_n_2_air + \
-                   soilS2_windErosion_i_2_air + soilS3_windErosion_n_2_air + soilS3_windErosion_i_2_air + \
-                   soilS4_windErosion_n_2_air + soilS4_windErosion_i_2_air
-
 
     # freshwater - fw Q[1]
-    fw_enter = release['fw'][i] + release['fSS'][i] + fwIn_adv_n + fwIn_adv_i
-
     air_rain_diss_n_2_fw, aer_dep_wet_n_2_fSS, aer_dep_wet_i_2_fSS, \
     aer_dep_dry_n_2_fSS, aer_dep_dry_i_2_fSS, air_diff_n_2_fw, fSedW_diff_n_2_fw, \
     fSedW_diff_i_2_fw, fSedS_resusp_n_2_fw, fSedS_resusp_i_2_fw, soilW1_runoff_n_2_fw, soilW1_runoff_i_2_fw, \
@@ -568,23 +556,8 @@ def ion_ode(t, Q, i, presence, env, chemParams, climate, release, bgConc,
         soilW4_runoff_n_2_fw, soilW4_runoff_i_2_fw, soilS4_erosion_n_2_fw, soilS4_erosion_i_2_fw, deepS4_leach_n_2_fw, \
         deepS4_leach_i_2_fw = [0] * 47
 
-    fw_loss = -(fw_deg_n + fw_deg_i + fSS_deg_n + fSS_deg_i + fwOut_adv_n + fwOut_adv_i + fSSOut_adv_n + fSSOut_adv_i +
-                fSS_dep_n + fSS_dep_i + fw_diff_n_to_air + fw_diff_n_to_fSedW + fw_diff_i_to_fSedW)
-
-    fw_transfer = air_rain_diss_n_2_fw + aer_dep_wet_n_2_fSS + \
-                  aer_dep_wet_i_2_fSS + aer_dep_dry_n_2_fSS + aer_dep_dry_i_2_fSS + \
-                  air_diff_n_2_fw + fSedW_diff_n_2_fw + fSedW_diff_i_2_fw + fSedS_resusp_n_2_fw + fSedS_resusp_i_2_fw +\
-                  soilW1_runoff_n_2_fw + soilW1_runoff_i_2_fw + soilS1_erosion_n_2_fw + soilS1_erosion_i_2_fw + \
-                  deepS1_leach_n_2_fw + deepS1_leach_i_2_fw + soilW2_runoff_n_2_fw + soilW2_runoff_i_2_fw + \
-                  soilS2_erosion_n_2_fw + soilS2_erosion_i_2_fw + deepS2_leach_n_2_fw + deepS2_leach_i_2_fw + \
-                  soilW3_runoff_n_2_fw + soilW3_runoff_i_2_fw + soilS3_erosion_n_2_fw + soilS3_erosion_i_2_fw + \
-                  deepS3_leach_n_2_fw + deepS3_leach_i_2_fw + soilW4_runoff_n_2_fw + soilW4_runoff_i_2_fw + \
-                  soilS4_erosion_n_2_fw + soilS4_erosion_i_2_fw + deepS4_leach_n_2_fw + deepS4_leach_i_2_fw
-
 
     # freshwater sediment - fwSed Q[2]
-    fwSed_enter = release['fwSed'][i] + fSed_adv_inflow_n + fSed_adv_inflow_i
-
     fw_diff_n_2_fSedW, fw_diff_i_2_fSedW, fSS_dep_n_2_fwSed, fSS_dep_i_2_fwSed = \
         fw_diff_n_to_fSedW, fw_diff_i_to_fSedW, fSS_dep_n, fSS_dep_i
 
@@ -593,16 +566,8 @@ def ion_ode(t, Q, i, presence, env, chemParams, climate, release, bgConc,
         fSedS_resusp_i, fSedW_diff_n_to_fw, fSedW_diff_i_to_fw, fSed_adv_outflow_n, fSed_adv_outflow_i, \
         fw_diff_n_2_fSedW, fw_diff_i_2_fSedW, fSS_dep_n_2_fwSed, fSS_dep_i_2_fwSed = [0] * 16
 
-    fwSed_loss = -(fSedW_deg_n + fSedW_deg_i + fSedS_deg_n + fSedS_deg_i + fSedS_burial_n + fSedS_burial_i +
-                   fSedS_resusp_n + fSedS_resusp_i + fSedW_diff_n_to_fw + fSedW_diff_i_to_fw + fSed_adv_outflow_n
-                   + fSed_adv_outflow_i)
-
-    fwSed_transfer = fw_diff_n_2_fSedW + fw_diff_i_2_fSedW + fSS_dep_n_2_fwSed + fSS_dep_i_2_fwSed
-
 
     # seawater - sw Q[3]
-    sw_enter = release['sw'][i] + release['sSS'][i]
-
     swIn_adv_n_2_sw, swIn_adv_i_2_sw, sSSIn_adv_n_2_sw, sSSIn_adv_i_2_sw, aer_dep_dry_n_2_sSS, \
     aer_dep_dry_i_2_sSS, air_rain_diss_n_2_sw, aer_dep_wet_n_2_sSS, \
     aer_dep_wet_i_2_sSS, air_diff_n_2_sw, sSedW_diff_n_2_sw, sSedW_diff_i_2_sw, sSedS_resusp_n_2_sw, \
@@ -639,25 +604,8 @@ def ion_ode(t, Q, i, presence, env, chemParams, climate, release, bgConc,
             deepS3_leach_n_2_fw, deepS3_leach_i_2_fw, soilW4_runoff_n_2_fw, soilW4_runoff_i_2_fw, \
             soilS4_erosion_n_2_fw, soilS4_erosion_i_2_fw, deepS4_leach_n_2_fw, deepS4_leach_i_2_fw
 
-    sw_loss = -(sw_deg_n + sw_deg_i + sSS_deg_n + sSS_deg_i + swOut_adv_n + swOut_adv_i + sSSOut_adv_n +
-                sSSOut_adv_i + sSS_dep_n + sSS_dep_i + sw_diff_n_to_air + sw_diff_n_to_sSedW + sw_diff_i_to_sSedW
-                + sSS_resusp_n + sSS_resusp_i)
-
-    sw_transfer = swIn_adv_n_2_sw + swIn_adv_i_2_sw + sSSIn_adv_n_2_sw + sSSIn_adv_i_2_sw + \
-                  aer_dep_dry_n_2_sSS + aer_dep_dry_i_2_sSS + air_rain_diss_n_2_sw + \
-                  aer_dep_wet_n_2_sSS + aer_dep_wet_i_2_sSS + air_diff_n_2_sw + \
-                  sSedW_diff_n_2_sw + sSedW_diff_i_2_sw + sSedS_resusp_n_2_sw + sSedS_resusp_i_2_sw + \
-                  soilW1_runoff_n_2_sw + soilW1_runoff_i_2_sw + soilS1_erosion_n_2_sw + soilS1_erosion_i_2_sw + \
-                  deepS1_leach_n_2_sw + deepS1_leach_i_2_sw + soilW2_runoff_n_2_sw + soilW2_runoff_i_2_sw + \
-                  soilS2_erosion_n_2_sw + soilS2_erosion_i_2_sw + deepS2_leach_n_2_sw + deepS2_leach_i_2_sw + \
-                  soilW3_runoff_n_2_sw + soilW3_runoff_i_2_sw + soilS3_erosion_n_2_sw + soilS3_erosion_i_2_sw + \
-                  deepS3_leach_n_2_sw + deepS3_leach_i_2_sw + soilW4_runoff_n_2_sw + soilW4_runoff_i_2_sw + \
-                  soilS4_erosion_n_2_sw + soilS4_erosion_i_2_sw + deepS4_leach_n_2_sw + deepS4_leach_i_2_sw
-
 
     # seawater sediment - swSed Q[4]
-    swSed_enter = release['swSed'][i]
-
     sw_diff_n_2_sSedW, sw_diff_i_2_sSedW, sSS_dep_n_2_sSedW, sSS_dep_i_2_sSedW, fSed_adv_outflow_n_2_sSedW, \
     fSed_adv_outflow_i_2_sSedW = \
         sw_diff_n_to_sSedW, sw_diff_i_to_sSedW, sSS_dep_n, sSS_dep_i, fSed_adv_outflow_n, fSed_adv_outflow_i
@@ -668,17 +616,8 @@ def ion_ode(t, Q, i, presence, env, chemParams, climate, release, bgConc,
         sw_diff_n_2_sSedW, sw_diff_i_2_sSedW, sSS_dep_n_2_sSedW, sSS_dep_i_2_sSedW, fSed_adv_outflow_n_2_sSedW, \
         fSed_adv_outflow_i_2_sSedW = [0] * 18
 
-    swSed_loss = -(sSedW_deg_n + sSedW_deg_i + sSedS_deg_n + sSedS_deg_i + sSedS_burial_n + sSedS_burial_i +
-                   sSedS_resusp_n + sSedS_resusp_i + sSedW_diff_n_to_sw + sSedW_diff_i_to_sw +
-                   sSed_adv_outflow_n + sSed_adv_outflow_i)
-
-    swSed_transfer = sw_diff_n_2_sSedW + sw_diff_i_2_sSedW + sSS_dep_n_2_sSedW + sSS_dep_i_2_sSedW + \
-                     fSed_adv_outflow_n_2_sSedW + fSed_adv_outflow_i_2_sSedW
-
 
     # soil 1 - soil1 Q[5]
-    soil1_enter = release['soil1'][i]
-
     aer_dep_dry_n_2_soil1, aer_dep_dry_i_2_soil1, air_rain_diss_n_2_soil1, \
     aer_dep_wet_n_2_soil1, aer_dep_wet_i_2_soil1, \
     air_diff_n_2_soil1 = aer_dep_dry_n_to_soil1, aer_dep_dry_i_to_soil1, \
@@ -692,28 +631,13 @@ def ion_ode(t, Q, i, presence, env, chemParams, climate, release, bgConc,
         aer_dep_dry_i_2_soil1, air_rain_diss_n_2_soil1, \
         aer_dep_wet_n_2_soil1, aer_dep_wet_i_2_soil1, air_diff_n_2_soil1 = [0] * 20
 
-    soil1_loss = -(soilA1_deg_n + soilW1_deg_n + soilW1_deg_i + soilS1_deg_n + soilS1_deg_i + soilW1_runoff_n +
-                   soilW1_runoff_i + soilW1_infil_n + soilW1_infil_i + soilS1_erosion_n +
-                   soilS1_erosion_i + soil1_diff_n_to_air + soilS1_windErosion_n + soilS1_windErosion_i)
-
-    soil1_transfer = aer_dep_dry_n_2_soil1 + aer_dep_dry_i_2_soil1 + \
-                     air_rain_diss_n_2_soil1 + \
-                     aer_dep_wet_n_2_soil1 + aer_dep_wet_i_2_soil1 + air_diff_n_2_soil1
-
 
     # deep soil 1 - deepS1 Q[6]
-    deepS1_enter = release['dsoil1'][i]
-
     if presence['soil1'] == 0:
         deepS1_deg_n, deepS1_deg_i, deepS1_leach_n, deepS1_leach_i, soilW1_infil_n, soilW1_infil_i = [0] * 6
 
-    deepS1_loss = -(deepS1_deg_n + deepS1_deg_i + deepS1_leach_n + deepS1_leach_i)
-
-    deepS1_transfer = soilW1_infil_n + soilW1_infil_i
 
     # soil 2 - soil2 Q[7]
-    soil2_enter = release['soil2'][i]
-
     aer_dep_dry_n_2_soil2, aer_dep_dry_i_2_soil2, air_rain_diss_n_2_soil2, \
     aer_dep_wet_n_2_soil2, aer_dep_wet_i_2_soil2, \
     air_diff_n_2_soil2 = aer_dep_dry_n_to_soil2, aer_dep_dry_i_to_soil2, \
@@ -727,29 +651,13 @@ def ion_ode(t, Q, i, presence, env, chemParams, climate, release, bgConc,
         aer_dep_dry_i_2_soil2, air_rain_diss_n_2_soil2,\
         aer_dep_wet_n_2_soil2, aer_dep_wet_i_2_soil2, air_diff_n_2_soil2 = [0] * 20
 
-    soil2_loss = -(soilA2_deg_n + soilW2_deg_n + soilW2_deg_i + soilS2_deg_n + soilS2_deg_i + soilW2_runoff_n +
-                   soilW2_runoff_i + soilW2_infil_n + soilW2_infil_i + soilS2_erosion_n +
-                   soilS2_erosion_i + soil2_diff_n_to_air + soilS2_windErosion_n + soilS2_windErosion_i)
-
-    soil2_transfer = aer_dep_dry_n_2_soil2 + aer_dep_dry_i_2_soil2 + \
-                     air_rain_diss_n_2_soil2 + \
-                     aer_dep_wet_n_2_soil2 + aer_dep_wet_i_2_soil2 + air_diff_n_2_soil2
-
 
     # deep soil 2 - deepS2 Q[8]
-    deepS2_enter = release['dsoil2'][i]
-
     if presence['soil2'] == 0:
         deepS2_deg_n, deepS2_deg_i, deepS2_leach_n, deepS2_leach_i, soilW2_infil_n, soilW2_infil_i = [0] * 6
 
-    deepS2_loss = -(deepS2_deg_n + deepS2_deg_i + deepS2_leach_n + deepS2_leach_i)
-
-    deepS2_transfer = soilW2_infil_n + soilW2_infil_i
-
 
     # soil 3 - soil3 Q[9]
-    soil3_enter = release['soil3'][i]
-
     aer_dep_dry_n_2_soil3, aer_dep_dry_i_2_soil3, air_rain_diss_n_2_soil3, \
     aer_dep_wet_n_2_soil3, aer_dep_wet_i_2_soil3, \
     air_diff_n_2_soil3 = aer_dep_dry_n_to_soil3, aer_dep_dry_i_to_soil3, \
@@ -763,28 +671,13 @@ def ion_ode(t, Q, i, presence, env, chemParams, climate, release, bgConc,
         air_rain_diss_n_2_soil3, \
         aer_dep_wet_n_2_soil3, aer_dep_wet_i_2_soil3, air_diff_n_2_soil3 = [0] * 20
 
-    soil3_loss = -(soilA3_deg_n + soilW3_deg_n + soilW3_deg_i + soilS3_deg_n + soilS3_deg_i + soilW3_runoff_n +
-                   soilW3_runoff_i + soilW3_infil_n + soilW3_infil_i + soil3_diff_n_to_air +
-                   soilS3_erosion_n + soilS3_erosion_i + soilS3_windErosion_n + soilS3_windErosion_i)
-
-    soil3_transfer = aer_dep_dry_n_2_soil3 + aer_dep_dry_i_2_soil3 + \
-                     air_rain_diss_n_2_soil3 + \
-                     aer_dep_wet_n_2_soil3 + aer_dep_wet_i_2_soil3 + air_diff_n_2_soil3
-
 
     # deep soil 3 - deepS3 Q[10]
-    deepS3_enter = release['dsoil3'][i]
-
     if presence['soil3'] == 0:
         deepS3_deg_n, deepS3_deg_i, deepS3_leach_n, deepS3_leach_i, soilW3_infil_n, soilW3_infil_i = [0] * 6
 
-    deepS3_loss = -(deepS3_deg_n + deepS3_deg_i + deepS3_leach_n + deepS3_leach_i)
-
-    deepS3_transfer = soilW3_infil_n + soilW3_infil_i
 
     # soil 4 - soil4 Q[11]
-    soil4_enter = release['soil4'][i]
-
     aer_dep_dry_n_2_soil4, aer_dep_dry_i_2_soil4, air_rain_diss_n_2_soil4, \
     aer_dep_wet_n_2_soil4, aer_dep_wet_i_2_soil4, \
     air_diff_n_2_soil4 = aer_dep_dry_n_to_soil4, aer_dep_dry_i_to_soil4, \
@@ -798,91 +691,243 @@ def ion_ode(t, Q, i, presence, env, chemParams, climate, release, bgConc,
         aer_dep_dry_i_2_soil4, air_rain_diss_n_2_soil4, \
         aer_dep_wet_n_2_soil4, aer_dep_wet_i_2_soil4, air_diff_n_2_soil4 = [0] * 20
 
-    soil4_loss = -(soilA4_deg_n + soilW4_deg_n + soilW4_deg_i + soilS4_deg_n + soilS4_deg_i + soilW4_runoff_n +
-                   soilW4_runoff_i + soilW4_infil_n + soilW4_infil_i + soil4_diff_n_to_air +
-                   soilS4_erosion_n + soilS4_erosion_i + soilS4_windErosion_n + soilS4_windErosion_i)
-
-    soil4_transfer = aer_dep_dry_n_2_soil4 + aer_dep_dry_i_2_soil4 + \
-                     air_rain_diss_n_2_soil4 + \
-                     aer_dep_wet_n_2_soil4 + aer_dep_wet_i_2_soil4 + air_diff_n_2_soil4
-
 
     # deep soil 4 - deepS4 Q[12]
-    deepS4_enter = release['dsoil4'][i]
-
     if presence['soil4'] == 0:
         deepS4_deg_n, deepS4_deg_i, deepS4_leach_n, deepS4_leach_i, soilW4_infil_n, soilW4_infil_i = [0] * 6
 
-    deepS4_loss = -(deepS4_deg_n + deepS4_deg_i + deepS4_leach_n + deepS4_leach_i)
-
-    deepS4_transfer = soilW4_infil_n + soilW4_infil_i
-
-    # ODE equations
-    if (env['airV'] * Z_i['air']) != 0:
-        air = (air_enter + air_loss + air_transfer) / (env['airV'] * Z_i['air'])
-    else:
-        air = 0
-
-    if (env['fwV'] * Z_i['fw']) != 0:
-        fw = (fw_enter + fw_loss + fw_transfer) / (env['fwV'] * Z_i['fw'])
-    else:
-        fw = 0
-
-    if (env['sedFWV'] * Z_i['fwSed']) != 0:
-        fwSed = (fwSed_enter + fwSed_loss + fwSed_transfer) / (env['sedFWV'] * Z_i['fwSed'])
-    else:
-        fwSed = 0
-
-    if (env['swV'] * Z_i['sw']) != 0:
-        sw = (sw_enter + sw_loss + sw_transfer) / (env['swV'] * Z_i['sw'])
-    else:
-        sw = 0
-
-    if (env['sedSWV'] * Z_i['swSed']) != 0:
-        swSed = (swSed_enter + swSed_loss + swSed_transfer) / (env['sedSWV'] * Z_i['swSed'])
-    else:
-        swSed = 0
-
-    if (env['soilV1'] * Z_i['soil1']) != 0:
-        soil1 = (soil1_enter + soil1_loss + soil1_transfer) / (env['soilV1'] * Z_i['soil1'])
-    else:
-        soil1 = 0
-
-    if (env['deepSV1'] * Z_i['deepS1']) != 0:
-        deepS1 = (deepS1_enter + deepS1_loss + deepS1_transfer) / (env['deepSV1'] * Z_i['deepS1'])
-    else:
-        deepS1 = 0
-
-    if (env['soilV2'] * Z_i['soil2']) != 0:
-        soil2 = (soil2_enter + soil2_loss + soil2_transfer) / (env['soilV2'] * Z_i['soil2'])
-    else:
-        soil2 = 0
-
-    if (env['deepSV2'] * Z_i['deepS2']) != 0:
-        deepS2 = (deepS2_enter + deepS2_loss + deepS2_transfer) / (env['deepSV2'] * Z_i['deepS2'])
-    else:
-        deepS2 = 0
-
-    if (env['soilV3'] * Z_i['soil3']) != 0:
-        soil3 = (soil3_enter + soil3_loss + soil3_transfer) / (env['soilV3'] * Z_i['soil3'])
-    else:
-        soil3 = 0
-
-    if (env['deepSV3'] * Z_i['deepS3']) != 0:
-        deepS3 = (deepS3_enter + deepS3_loss + deepS3_transfer) / (env['deepSV3'] * Z_i['deepS3'])
-    else:
-        deepS3 = 0
-
-    if (env['soilV4'] * Z_i['soil4']) != 0:
-        soil4 = (soil4_enter + soil4_loss + soil4_transfer) / (env['soilV4'] * Z_i['soil4'])
-    else:
-        soil4 = 0
-
-    if (env['deepSV4'] * Z_i['deepS4']) != 0:
-        deepS4 = (deepS4_enter + deepS4_loss + deepS4_transfer) / (env['deepSV4'] * Z_i['deepS4'])
-    else:
-        deepS4 = 0
-
-    dYdt = [air, fw, fwSed, sw, swSed, soil1, deepS1, soil2, deepS2, soil3, deepS3, soil4, deepS4]
-
-    return dYdt
+    # unit: mol/day
+    fluxes = {
+        'release_air': release['air'][i], 'airIn_adv_n': airIn_adv_n, 'airIn_adv_i': airIn_adv_i,
+        'fw_diff_n_2_air': fw_diff_n_2_air, 'sw_diff_n_2_air': sw_diff_n_2_air,
+        'soil1_diff_n_2_air': soil1_diff_n_2_air, 'soil2_diff_n_2_air': soil2_diff_n_2_air,
+        'soil3_diff_n_2_air': soil3_diff_n_2_air, 'soil4_diff_n_2_air': soil4_diff_n_2_air,
+        'sSS_resusp_n_2_air': sSS_resusp_n_2_air, 'sSS_resusp_i_2_air': sSS_resusp_i_2_air,
+        'soilS1_windErosion_n_2_air': soilS1_windErosion_n_2_air,
+        'soilS1_windErosion_i_2_air': soilS1_windErosion_i_2_air,
+        'soilS2_windErosion_n_2_air': soilS2_windErosion_n_2_air,
+        'soilS2_windErosion_i_2_air': soilS2_windErosion_i_2_air,
+        'soilS3_windErosion_n_2_air': soilS3_windErosion_n_2_air,
+        'soilS3_windErosion_i_2_air': soilS3_windErosion_i_2_air,
+        'soilS4_windErosion_n_2_air': soilS4_windErosion_n_2_air,
+        'soilS4_windErosion_i_2_air': soilS4_windErosion_i_2_air, 'air_deg_n': air_deg_n, 'aer_deg_n': aer_deg_n,
+        'aer_deg_i': aer_deg_i, 'airOut_adv_n': airOut_adv_n, 'aerOut_adv_n': aerOut_adv_n,
+        'aerOut_adv_i': aerOut_adv_i, 'aer_dep_dry_n': aer_dep_dry_n, 'aer_dep_dry_i': aer_dep_dry_i,
+        'air_rain_diss_n': air_rain_diss_n, 'aer_dep_wet_n': aer_dep_wet_n, 'aer_dep_wet_i': aer_dep_wet_i,
+        'air_diff_n_to_fw': air_diff_n_to_fw, 'air_diff_n_to_sw': air_diff_n_to_sw,
+        'air_diff_n_to_soil1': air_diff_n_to_soil1, 'air_diff_n_to_soil2': air_diff_n_to_soil2,
+        'air_diff_n_to_soil3': air_diff_n_to_soil3, 'air_diff_n_to_soil4': air_diff_n_to_soil4,
+        'release_fw': release['fw'][i], 'release_fSS': release['fSS'][i], 'fwIn_adv_n': fwIn_adv_n,
+        'fwIn_adv_i': fwIn_adv_i, 'air_rain_diss_n_2_fw': air_rain_diss_n_2_fw,
+        'aer_dep_wet_n_2_fSS': aer_dep_wet_n_2_fSS, 'aer_dep_wet_i_2_fSS': aer_dep_wet_i_2_fSS,
+        'aer_dep_dry_n_2_fSS': aer_dep_dry_n_2_fSS, 'aer_dep_dry_i_2_fSS': aer_dep_dry_i_2_fSS,
+        'air_diff_n_2_fw': air_diff_n_2_fw, 'fSedW_diff_n_2_fw': fSedW_diff_n_2_fw,
+        'fSedW_diff_i_2_fw': fSedW_diff_i_2_fw, 'fSedS_resusp_n_2_fw': fSedS_resusp_n_2_fw,
+        'fSedS_resusp_i_2_fw': fSedS_resusp_i_2_fw, 'soilW1_runoff_n_2_fw': soilW1_runoff_n_2_fw,
+        'soilW1_runoff_i_2_fw': soilW1_runoff_i_2_fw, 'soilS1_erosion_n_2_fw': soilS1_erosion_n_2_fw,
+        'soilS1_erosion_i_2_fw': soilS1_erosion_i_2_fw, 'deepS1_leach_n_2_fw': deepS1_leach_n_2_fw,
+        'deepS1_leach_i_2_fw': deepS1_leach_i_2_fw, 'soilW2_runoff_n_2_fw': soilW2_runoff_n_2_fw,
+        'soilW2_runoff_i_2_fw': soilW2_runoff_i_2_fw, 'soilS2_erosion_n_2_fw': soilS2_erosion_n_2_fw,
+        'soilS2_erosion_i_2_fw': soilS2_erosion_i_2_fw, 'deepS2_leach_n_2_fw': deepS2_leach_n_2_fw,
+        'deepS2_leach_i_2_fw': deepS2_leach_i_2_fw, 'soilW3_runoff_n_2_fw': soilW3_runoff_n_2_fw,
+        'soilW3_runoff_i_2_fw': soilW3_runoff_i_2_fw, 'soilS3_erosion_n_2_fw': soilS3_erosion_n_2_fw,
+        'soilS3_erosion_i_2_fw': soilS3_erosion_i_2_fw, 'deepS3_leach_n_2_fw': deepS3_leach_n_2_fw,
+        'deepS3_leach_i_2_fw': deepS3_leach_i_2_fw, 'soilW4_runoff_n_2_fw': soilW4_runoff_n_2_fw,
+        'soilW4_runoff_i_2_fw': soilW4_runoff_i_2_fw, 'soilS4_erosion_n_2_fw': soilS4_erosion_n_2_fw,
+        'soilS4_erosion_i_2_fw': soilS4_erosion_i_2_fw, 'deepS4_leach_n_2_fw': deepS4_leach_n_2_fw,
+        'deepS4_leach_i_2_fw': deepS4_leach_i_2_fw, 'fw_deg_n': fw_deg_n, 'fw_deg_i': fw_deg_i, 'fSS_deg_n': fSS_deg_n,
+        'fSS_deg_i': fSS_deg_i, 'fwOut_adv_n': fwOut_adv_n, 'fwOut_adv_i': fwOut_adv_i, 'fSSOut_adv_n': fSSOut_adv_n,
+        'fSSOut_adv_i': fSSOut_adv_i, 'fSS_dep_n': fSS_dep_n, 'fSS_dep_i': fSS_dep_i,
+        'fw_diff_n_to_air': fw_diff_n_to_air, 'fw_diff_n_to_fSedW': fw_diff_n_to_fSedW,
+        'fw_diff_i_to_fSedW': fw_diff_i_to_fSedW, 'release_fwSed': release['fwSed'][i],
+        'fSed_adv_inflow_n': fSed_adv_inflow_n, 'fSed_adv_inflow_i': fSed_adv_inflow_i,
+        'fw_diff_n_2_fSedW': fw_diff_n_2_fSedW, 'fw_diff_i_2_fSedW': fw_diff_i_2_fSedW,
+        'fSS_dep_n_2_fwSed': fSS_dep_n_2_fwSed, 'fSS_dep_i_2_fwSed': fSS_dep_i_2_fwSed, 'fSedW_deg_n': fSedW_deg_n,
+        'fSedW_deg_i': fSedW_deg_i, 'fSedS_deg_n': fSedS_deg_n, 'fSedS_deg_i': fSedS_deg_i,
+        'fSedS_burial_n': fSedS_burial_n, 'fSedS_burial_i': fSedS_burial_i, 'fSedS_resusp_n': fSedS_resusp_n,
+        'fSedS_resusp_i': fSedS_resusp_i, 'fSedW_diff_n_to_fw': fSedW_diff_n_to_fw,
+        'fSedW_diff_i_to_fw': fSedW_diff_i_to_fw, 'fSed_adv_outflow_n': fSed_adv_outflow_n,
+        'fSed_adv_outflow_i': fSed_adv_outflow_i, 'release_sw': release['sw'][i], 'release_sSS': release['sSS'][i],
+        'swIn_adv_n_2_sw': swIn_adv_n_2_sw, 'swIn_adv_i_2_sw': swIn_adv_i_2_sw, 'sSSIn_adv_n_2_sw': sSSIn_adv_n_2_sw,
+        'sSSIn_adv_i_2_sw': sSSIn_adv_i_2_sw, 'aer_dep_dry_n_2_sSS': aer_dep_dry_n_2_sSS,
+        'aer_dep_dry_i_2_sSS': aer_dep_dry_i_2_sSS, 'air_rain_diss_n_2_sw': air_rain_diss_n_2_sw,
+        'aer_dep_wet_n_2_sSS': aer_dep_wet_n_2_sSS, 'aer_dep_wet_i_2_sSS': aer_dep_wet_i_2_sSS,
+        'air_diff_n_2_sw': air_diff_n_2_sw, 'sSedW_diff_n_2_sw': sSedW_diff_n_2_sw,
+        'sSedW_diff_i_2_sw': sSedW_diff_i_2_sw, 'sSedS_resusp_n_2_sw': sSedS_resusp_n_2_sw,
+        'sSedS_resusp_i_2_sw': sSedS_resusp_i_2_sw, 'soilW1_runoff_n_2_sw': soilW1_runoff_n_2_sw,
+        'soilW1_runoff_i_2_sw': soilW1_runoff_i_2_sw, 'soilS1_erosion_n_2_sw': soilS1_erosion_n_2_sw,
+        'soilS1_erosion_i_2_sw': soilS1_erosion_i_2_sw, 'deepS1_leach_n_2_sw': deepS1_leach_n_2_sw,
+        'deepS1_leach_i_2_sw': deepS1_leach_i_2_sw, 'soilW2_runoff_n_2_sw': soilW2_runoff_n_2_sw,
+        'soilW2_runoff_i_2_sw': soilW2_runoff_i_2_sw, 'soilS2_erosion_n_2_sw': soilS2_erosion_n_2_sw,
+        'soilS2_erosion_i_2_sw': soilS2_erosion_i_2_sw, 'deepS2_leach_n_2_sw': deepS2_leach_n_2_sw,
+        'deepS2_leach_i_2_sw': deepS2_leach_i_2_sw, 'soilW3_runoff_n_2_sw': soilW3_runoff_n_2_sw,
+        'soilW3_runoff_i_2_sw': soilW3_runoff_i_2_sw, 'soilS3_erosion_n_2_sw': soilS3_erosion_n_2_sw,
+        'soilS3_erosion_i_2_sw': soilS3_erosion_i_2_sw, 'deepS3_leach_n_2_sw': deepS3_leach_n_2_sw,
+        'deepS3_leach_i_2_sw': deepS3_leach_i_2_sw, 'soilW4_runoff_n_2_sw': soilW4_runoff_n_2_sw,
+        'soilW4_runoff_i_2_sw': soilW4_runoff_i_2_sw, 'soilS4_erosion_n_2_sw': soilS4_erosion_n_2_sw,
+        'soilS4_erosion_i_2_sw': soilS4_erosion_i_2_sw, 'deepS4_leach_n_2_sw': deepS4_leach_n_2_sw,
+        'deepS4_leach_i_2_sw': deepS4_leach_i_2_sw, 'sw_deg_n': sw_deg_n, 'sw_deg_i': sw_deg_i, 'sSS_deg_n': sSS_deg_n,
+        'sSS_deg_i': sSS_deg_i, 'swOut_adv_n': swOut_adv_n, 'swOut_adv_i': swOut_adv_i, 'sSSOut_adv_n': sSSOut_adv_n,
+        'sSSOut_adv_i': sSSOut_adv_i, 'sSS_dep_n': sSS_dep_n, 'sSS_dep_i': sSS_dep_i,
+        'sw_diff_n_to_air': sw_diff_n_to_air, 'sw_diff_n_to_sSedW': sw_diff_n_to_sSedW,
+        'sw_diff_i_to_sSedW': sw_diff_i_to_sSedW, 'sSS_resusp_n': sSS_resusp_n, 'sSS_resusp_i': sSS_resusp_i,
+        'release_swSed': release['swSed'][i], 'sw_diff_n_2_sSedW': sw_diff_n_2_sSedW,
+        'sw_diff_i_2_sSedW': sw_diff_i_2_sSedW, 'sSS_dep_n_2_sSedW': sSS_dep_n_2_sSedW,
+        'sSS_dep_i_2_sSedW': sSS_dep_i_2_sSedW, 'fSed_adv_outflow_n_2_sSedW': fSed_adv_outflow_n_2_sSedW,
+        'fSed_adv_outflow_i_2_sSedW': fSed_adv_outflow_i_2_sSedW, 'sSedW_deg_n': sSedW_deg_n,
+        'sSedW_deg_i': sSedW_deg_i, 'sSedS_deg_n': sSedS_deg_n, 'sSedS_deg_i': sSedS_deg_i,
+        'sSedS_burial_n': sSedS_burial_n, 'sSedS_burial_i': sSedS_burial_i, 'sSedS_resusp_n': sSedS_resusp_n,
+        'sSedS_resusp_i': sSedS_resusp_i, 'sSedW_diff_n_to_sw': sSedW_diff_n_to_sw,
+        'sSedW_diff_i_to_sw': sSedW_diff_i_to_sw, 'sSed_adv_outflow_n': sSed_adv_outflow_n,
+        'sSed_adv_outflow_i': sSed_adv_outflow_i, 'release_soil1': release['soil1'][i],
+        'aer_dep_dry_n_2_soil1': aer_dep_dry_n_2_soil1, 'aer_dep_dry_i_2_soil1': aer_dep_dry_i_2_soil1,
+        'air_rain_diss_n_2_soil1': air_rain_diss_n_2_soil1, 'aer_dep_wet_n_2_soil1': aer_dep_wet_n_2_soil1,
+        'aer_dep_wet_i_2_soil1': aer_dep_wet_i_2_soil1, 'air_diff_n_2_soil1': air_diff_n_2_soil1,
+        'soilA1_deg_n': soilA1_deg_n, 'soilW1_deg_n': soilW1_deg_n, 'soilW1_deg_i': soilW1_deg_i,
+        'soilS1_deg_n': soilS1_deg_n, 'soilS1_deg_i': soilS1_deg_i, 'soilW1_runoff_n': soilW1_runoff_n,
+        'soilW1_runoff_i': soilW1_runoff_i, 'soilW1_infil_n': soilW1_infil_n, 'soilW1_infil_i': soilW1_infil_i,
+        'soilS1_erosion_n': soilS1_erosion_n, 'soilS1_erosion_i': soilS1_erosion_i,
+        'soil1_diff_n_to_air': soil1_diff_n_to_air, 'soilS1_windErosion_n': soilS1_windErosion_n,
+        'soilS1_windErosion_i': soilS1_windErosion_i, 'release_dsoil1': release['dsoil1'][i],
+        'deepS1_deg_n': deepS1_deg_n, 'deepS1_deg_i': deepS1_deg_i, 'deepS1_leach_n': deepS1_leach_n,
+        'deepS1_leach_i': deepS1_leach_i, 'release_soil2': release['soil2'][i],
+        'aer_dep_dry_n_2_soil2': aer_dep_dry_n_2_soil2, 'aer_dep_dry_i_2_soil2': aer_dep_dry_i_2_soil2,
+        'air_rain_diss_n_2_soil2': air_rain_diss_n_2_soil2, 'aer_dep_wet_n_2_soil2': aer_dep_wet_n_2_soil2,
+        'aer_dep_wet_i_2_soil2': aer_dep_wet_i_2_soil2, 'air_diff_n_2_soil2': air_diff_n_2_soil2,
+        'soilA2_deg_n': soilA2_deg_n, 'soilW2_deg_n': soilW2_deg_n, 'soilW2_deg_i': soilW2_deg_i,
+        'soilS2_deg_n': soilS2_deg_n, 'soilS2_deg_i': soilS2_deg_i, 'soilW2_runoff_n': soilW2_runoff_n,
+        'soilW2_runoff_i': soilW2_runoff_i, 'soilW2_infil_n': soilW2_infil_n, 'soilW2_infil_i': soilW2_infil_i,
+        'soilS2_erosion_n': soilS2_erosion_n, 'soilS2_erosion_i': soilS2_erosion_i,
+        'soil2_diff_n_to_air': soil2_diff_n_to_air, 'soilS2_windErosion_n': soilS2_windErosion_n,
+        'soilS2_windErosion_i': soilS2_windErosion_i, 'release_dsoil2': release['dsoil2'][i],
+        'deepS2_deg_n': deepS2_deg_n, 'deepS2_deg_i': deepS2_deg_i, 'deepS2_leach_n': deepS2_leach_n,
+        'deepS2_leach_i': deepS2_leach_i, 'release_soil3': release['soil3'][i],
+        'aer_dep_dry_n_2_soil3': aer_dep_dry_n_2_soil3, 'aer_dep_dry_i_2_soil3': aer_dep_dry_i_2_soil3,
+        'air_rain_diss_n_2_soil3': air_rain_diss_n_2_soil3, 'aer_dep_wet_n_2_soil3': aer_dep_wet_n_2_soil3,
+        'aer_dep_wet_i_2_soil3': aer_dep_wet_i_2_soil3, 'air_diff_n_2_soil3': air_diff_n_2_soil3,
+        'soilA3_deg_n': soilA3_deg_n, 'soilW3_deg_n': soilW3_deg_n, 'soilW3_deg_i': soilW3_deg_i,
+        'soilS3_deg_n': soilS3_deg_n, 'soilS3_deg_i': soilS3_deg_i, 'soilW3_runoff_n': soilW3_runoff_n,
+        'soilW3_runoff_i': soilW3_runoff_i, 'soilW3_infil_n': soilW3_infil_n, 'soilW3_infil_i': soilW3_infil_i,
+        'soil3_diff_n_to_air': soil3_diff_n_to_air, 'soilS3_erosion_n': soilS3_erosion_n,
+        'soilS3_erosion_i': soilS3_erosion_i, 'soilS3_windErosion_n': soilS3_windErosion_n,
+        'soilS3_windErosion_i': soilS3_windErosion_i, 'release_dsoil3': release['dsoil3'][i],
+        'deepS3_deg_n': deepS3_deg_n, 'deepS3_deg_i': deepS3_deg_i, 'deepS3_leach_n': deepS3_leach_n,
+        'deepS3_leach_i': deepS3_leach_i, 'release_soil4': release['soil4'][i],
+        'aer_dep_dry_n_2_soil4': aer_dep_dry_n_2_soil4, 'aer_dep_dry_i_2_soil4': aer_dep_dry_i_2_soil4,
+        'air_rain_diss_n_2_soil4': air_rain_diss_n_2_soil4, 'aer_dep_wet_n_2_soil4': aer_dep_wet_n_2_soil4,
+        'aer_dep_wet_i_2_soil4': aer_dep_wet_i_2_soil4, 'air_diff_n_2_soil4': air_diff_n_2_soil4,
+        'soilA4_deg_n': soilA4_deg_n, 'soilW4_deg_n': soilW4_deg_n, 'soilW4_deg_i': soilW4_deg_i,
+        'soilS4_deg_n': soilS4_deg_n, 'soilS4_deg_i': soilS4_deg_i, 'soilW4_runoff_n': soilW4_runoff_n,
+        'soilW4_runoff_i': soilW4_runoff_i, 'soilW4_infil_n': soilW4_infil_n, 'soilW4_infil_i': soilW4_infil_i,
+        'soil4_diff_n_to_air': soil4_diff_n_to_air, 'soilS4_erosion_n': soilS4_erosion_n,
+        'soilS4_erosion_i': soilS4_erosion_i, 'soilS4_windErosion_n': soilS4_windErosion_n,
+        'soilS4_windErosion_i': soilS4_windErosion_i, 'release_dsoil4': release['dsoil4'][i],
+        'deepS4_deg_n': deepS4_deg_n, 'deepS4_deg_i': deepS4_deg_i, 'deepS4_leach_n': deepS4_leach_n,
+        'deepS4_leach_i': deepS4_leach_i,
+    }
+
+    capacity = [env['airV'] * Z_i['air'], env['fwV'] * Z_i['fw'], env['sedFWV'] * Z_i['fwSed'], env['swV'] * Z_i['sw'],
+                env['sedSWV'] * Z_i['swSed'], env['soilV1'] * Z_i['soil1'], env['deepSV1'] * Z_i['deepS1'],
+                env['soilV2'] * Z_i['soil2'], env['deepSV2'] * Z_i['deepS2'], env['soilV3'] * Z_i['soil3'],
+                env['deepSV3'] * Z_i['deepS3'], env['soilV4'] * Z_i['soil4'], env['deepSV4'] * Z_i['deepS4']]
+
+    return fluxes, capacity
+
+
+# (entering, leaving) fluxes of each compartment, in the order of dYdt
+ion_balance = [
+    # air
+    (['release_air', 'airIn_adv_n', 'airIn_adv_i', 'fw_diff_n_2_air', 'sw_diff_n_2_air', 'soil1_diff_n_2_air',
+      'soil2_diff_n_2_air', 'soil3_diff_n_2_air', 'soil4_diff_n_2_air', 'sSS_resusp_n_2_air', 'sSS_resusp_i_2_air',
+      'soilS1_windErosion_n_2_air', 'soilS1_windErosion_i_2_air', 'soilS2_windErosion_n_2_air',
+      'soilS2_windErosion_i_2_air', 'soilS3_windErosion_n_2_air', 'soilS3_windErosion_i_2_air',
+      'soilS4_windErosion_n_2_air', 'soilS4_windErosion_i_2_air'],
+     ['air_deg_n', 'aer_deg_n', 'aer_deg_i', 'airOut_adv_n', 'aerOut_adv_n', 'aerOut_adv_i', 'aer_dep_dry_n',
+      'aer_dep_dry_i', 'air_rain_diss_n', 'aer_dep_wet_n', 'aer_dep_wet_i', 'air_diff_n_to_fw', 'air_diff_n_to_sw',
+      'air_diff_n_to_soil1', 'air_diff_n_to_soil2', 'air_diff_n_to_soil3', 'air_diff_n_to_soil4']),
+    # fw
+    (['release_fw', 'release_fSS', 'fwIn_adv_n', 'fwIn_adv_i', 'air_rain_diss_n_2_fw', 'aer_dep_wet_n_2_fSS',
+      'aer_dep_wet_i_2_fSS', 'aer_dep_dry_n_2_fSS', 'aer_dep_dry_i_2_fSS', 'air_diff_n_2_fw', 'fSedW_diff_n_2_fw',
+      'fSedW_diff_i_2_fw', 'fSedS_resusp_n_2_fw', 'fSedS_resusp_i_2_fw', 'soilW1_runoff_n_2_fw',
+      'soilW1_runoff_i_2_fw', 'soilS1_erosion_n_2_fw', 'soilS1_erosion_i_2_fw', 'deepS1_leach_n_2_fw',
+      'deepS1_leach_i_2_fw', 'soilW2_runoff_n_2_fw', 'soilW2_runoff_i_2_fw', 'soilS2_erosion_n_2_fw',
+      'soilS2_erosion_i_2_fw', 'deepS2_leach_n_2_fw', 'deepS2_leach_i_2_fw', 'soilW3_runoff_n_2_fw',
+      'soilW3_runoff_i_2_fw', 'soilS3_erosion_n_2_fw', 'soilS3_erosion_i_2_fw', 'deepS3_leach_n_2_fw',
+      'deepS3_leach_i_2_fw', 'soilW4_runoff_n_2_fw', 'soilW4_runoff_i_2_fw', 'soilS4_erosion_n_2_fw',
+      'soilS4_erosion_i_2_fw', 'deepS4_leach_n_2_fw', 'deepS4_leach_i_2_fw'],
+     ['fw_deg_n', 'fw_deg_i', 'fSS_deg_n', 'fSS_deg_i', 'fwOut_adv_n', 'fwOut_adv_i', 'fSSOut_adv_n', 'fSSOut_adv_i',
+      'fSS_dep_n', 'fSS_dep_i', 'fw_diff_n_to_air', 'fw_diff_n_to_fSedW', 'fw_diff_i_to_fSedW']),
+    # fwSed
+    (['release_fwSed', 'fSed_adv_inflow_n', 'fSed_adv_inflow_i', 'fw_diff_n_2_fSedW', 'fw_diff_i_2_fSedW',
+      'fSS_dep_n_2_fwSed', 'fSS_dep_i_2_fwSed'],
+     ['fSedW_deg_n', 'fSedW_deg_i', 'fSedS_deg_n', 'fSedS_deg_i', 'fSedS_burial_n', 'fSedS_burial_i', 'fSedS_resusp_n',
+      'fSedS_resusp_i', 'fSedW_diff_n_to_fw', 'fSedW_diff_i_to_fw', 'fSed_adv_outflow_n', 'fSed_adv_outflow_i']),
+    # sw
+    (['release_sw', 'release_sSS', 'swIn_adv_n_2_sw', 'swIn_adv_i_2_sw', 'sSSIn_adv_n_2_sw', 'sSSIn_adv_i_2_sw',
+      'aer_dep_dry_n_2_sSS', 'aer_dep_dry_i_2_sSS', 'air_rain_diss_n_2_sw', 'aer_dep_wet_n_2_sSS',
+      'aer_dep_wet_i_2_sSS', 'air_diff_n_2_sw', 'sSedW_diff_n_2_sw', 'sSedW_diff_i_2_sw', 'sSedS_resusp_n_2_sw',
+      'sSedS_resusp_i_2_sw', 'soilW1_runoff_n_2_sw', 'soilW1_runoff_i_2_sw', 'soilS1_erosion_n_2_sw',
+      'soilS1_erosion_i_2_sw', 'deepS1_leach_n_2_sw', 'deepS1_leach_i_2_sw', 'soilW2_runoff_n_2_sw',
+      'soilW2_runoff_i_2_sw', 'soilS2_erosion_n_2_sw', 'soilS2_erosion_i_2_sw', 'deepS2_leach_n_2_sw',
+      'deepS2_leach_i_2_sw', 'soilW3_runoff_n_2_sw', 'soilW3_runoff_i_2_sw', 'soilS3_erosion_n_2_sw',
+      'soilS3_erosion_i_2_sw', 'deepS3_leach_n_2_sw', 'deepS3_leach_i_2_sw', 'soilW4_runoff_n_2_sw',
+      'soilW4_runoff_i_2_sw', 'soilS4_erosion_n_2_sw', 'soilS4_erosion_i_2_sw', 'deepS4_leach_n_2_sw',
+      'deepS4_leach_i_2_sw'],
+     ['sw_deg_n', 'sw_deg_i', 'sSS_deg_n', 'sSS_deg_i', 'swOut_adv_n', 'swOut_adv_i', 'sSSOut_adv_n', 'sSSOut_adv_i',
+      'sSS_dep_n', 'sSS_dep_i', 'sw_diff_n_to_air', 'sw_diff_n_to_sSedW', 'sw_diff_i_to_sSedW', 'sSS_resusp_n',
+      'sSS_resusp_i']),
+    # swSed
+    (['release_swSed', 'sw_diff_n_2_sSedW', 'sw_diff_i_2_sSedW', 'sSS_dep_n_2_sSedW', 'sSS_dep_i_2_sSedW',
+      'fSed_adv_outflow_n_2_sSedW', 'fSed_adv_outflow_i_2_sSedW'],
+     ['sSedW_deg_n', 'sSedW_deg_i', 'sSedS_deg_n', 'sSedS_deg_i', 'sSedS_burial_n', 'sSedS_burial_i', 'sSedS_resusp_n',
+      'sSedS_resusp_i', 'sSedW_diff_n_to_sw', 'sSedW_diff_i_to_sw', 'sSed_adv_outflow_n', 'sSed_adv_outflow_i']),
+    # soil1
+    (['release_soil1', 'aer_dep_dry_n_2_soil1', 'aer_dep_dry_i_2_soil1', 'air_rain_diss_n_2_soil1',
+      'aer_dep_wet_n_2_soil1', 'aer_dep_wet_i_2_soil1', 'air_diff_n_2_soil1'],
+     ['soilA1_deg_n', 'soilW1_deg_n', 'soilW1_deg_i', 'soilS1_deg_n', 'soilS1_deg_i', 'soilW1_runoff_n',
+      'soilW1_runoff_i', 'soilW1_infil_n', 'soilW1_infil_i', 'soilS1_erosion_n', 'soilS1_erosion_i',
+      'soil1_diff_n_to_air', 'soilS1_windErosion_n', 'soilS1_windErosion_i']),
+    # deepS1
+    (['release_dsoil1', 'soilW1_infil_n', 'soilW1_infil_i'],
+     ['deepS1_deg_n', 'deepS1_deg_i', 'deepS1_leach_n', 'deepS1_leach_i']),
+    # soil2
+    (['release_soil2', 'aer_dep_dry_n_2_soil2', 'aer_dep_dry_i_2_soil2', 'air_rain_diss_n_2_soil2',
+      'aer_dep_wet_n_2_soil2', 'aer_dep_wet_i_2_soil2', 'air_diff_n_2_soil2'],
+     ['soilA2_deg_n', 'soilW2_deg_n', 'soilW2_deg_i', 'soilS2_deg_n', 'soilS2_deg_i', 'soilW2_runoff_n',
+      'soilW2_runoff_i', 'soilW2_infil_n', 'soilW2_infil_i', 'soilS2_erosion_n', 'soilS2_erosion_i',
+      'soil2_diff_n_to_air', 'soilS2_windErosion_n', 'soilS2_windErosion_i']),
+    # deepS2
+    (['release_dsoil2', 'soilW2_infil_n', 'soilW2_infil_i'],
+     ['deepS2_deg_n', 'deepS2_deg_i', 'deepS2_leach_n', 'deepS2_leach_i']),
+    # soil3
+    (['release_soil3', 'aer_dep_dry_n_2_soil3', 'aer_dep_dry_i_2_soil3', 'air_rain_diss_n_2_soil3',
+      'aer_dep_wet_n_2_soil3', 'aer_dep_wet_i_2_soil3', 'air_diff_n_2_soil3'],
+     ['soilA3_deg_n', 'soilW3_deg_n', 'soilW3_deg_i', 'soilS3_deg_n', 'soilS3_deg_i', 'soilW3_runoff_n',
+      'soilW3_runoff_i', 'soilW3_infil_n', 'soilW3_infil_i', 'soil3_diff_n_to_air', 'soilS3_erosion_n',
+      'soilS3_erosion_i', 'soilS3_windErosion_n', 'soilS3_windErosion_i']),
+    # deepS3
+    (['release_dsoil3', 'soilW3_infil_n', 'soilW3_infil_i'],
+     ['deepS3_deg_n', 'deepS3_deg_i', 'deepS3_leach_n', 'deepS3_leach_i']),
+    # soil4
+    (['release_soil4', 'aer_dep_dry_n_2_soil4', 'aer_dep_dry_i_2_soil4', 'air_rain_diss_n_2_soil4',
+      'aer_dep_wet_n_2_soil4', 'aer_dep_wet_i_2_soil4', 'air_diff_n_2_soil4'],
+     ['soilA4_deg_n', 'soilW4_deg_n', 'soilW4_deg_i', 'soilS4_deg_n', 'soilS4_deg_i', 'soilW4_runoff_n',
+      'soilW4_runoff_i', 'soilW4_infil_n', 'soilW4_infil_i', 'soil4_diff_n_to_air', 'soilS4_erosion_n',
+      'soilS4_erosion_i', 'soilS4_windErosion_n', 'soilS4_windErosion_i']),
+    # deepS4
+    (['release_dsoil4', 'soilW4_infil_n', 'soilW4_infil_i'],
+     ['deepS4_deg_n', 'deepS4_deg_i', 'deepS4_leach_n', 'deepS4_leach_i']),
+]
+
+ion_flux_names, ion_incidence = incidence_matrix(ion_balance)
+
+
+def ion_ode(t, Q, i, presence, env, chemParams, climate, release, bgConc,
+            Z_ij, Z_ij_sub, Y_ij, X_ij, Z_i):
+    # changes in the total aquivalence of each compartment, the balance of the fluxes of ion_fluxes divided by V*Z
+    # unit: mol/day / (m3 * mol/m3) = 1/day * mol/m3
+    # np.all in flux_derivative keeps the check valid when the Z-values are daily series
+    # (linear_solver.assemble_horizon)
+    fluxes, capacity = ion_fluxes(Q, i, presence, env, chemParams, climate, release, bgConc,
+                                  Z_ij, Z_ij_sub, Y_ij, X_ij, Z_i)
+    return flux_derivative(ion_incidence, ion_flux_names, fluxes, capacity)
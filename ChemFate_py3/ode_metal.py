@@ -1,9 +1,12 @@
 from advective_processes import AdvectiveProcess
 from diffusion_process_ion import Diffusion
+from flux_balance import incidence_matrix, flux_derivative
 
 
-def metal_ode(t, Q, i, presence, env, chemParams, climate, release, bgConc,
-              Z_ij, Y_ij, Z_i):
+def metal_fluxes(Q, i, presence, env, chemParams, climate, release, bgConc,
+                 Z_ij, Y_ij, Z_i):
+    # processes of metals in all compartments as named fluxes, the flux kernel shared by metal_ode and
+    # metal_process
     # Q is the total aquivalence by each subcompartment, also Q_t, unit: mol/m3
     # Q_n = Q_t * Y_n, and Q_i = Q_t * Y_i,
     # D unit: m3/day, N unit: mol/day, Q unit: mol/m3
@@ -335,14 +338,12 @@ def metal_ode(t, Q, i, presence, env, chemParams, climate, release, bgConc,
 
 
     ###################################################################################################################
-    # the code below will combine the processes together 1) entering the compartment, 2) loss from the
-    # compartment, and 3) transfer between compartments
-    # if one compartment doesn't exist, re-route scenarios are considered
+    # the code below re-routes the processes if one compartment doesn't exist and collects them as named fluxes;
+    # the balance lists the fluxes 1) entering the compartment, 2) lost from the compartment and 3) transferred
+    # between compartments, the aliases keep the value seen by the receiving compartment
     ###################################################################################################################
 
     # air - air Q[0]
-    air_enter = release['air'][i] + airIn_adv_p + airIn_adv_i  # mol/day
-
     sSS_resusp_p_2_air, soilS1_windErosion_p_2_air, soilS2_windErosion_p_2_air, \
     soilS3_windErosion_p_2_air, soilS4_windErosion_p_2_air = \
         sSS_resusp_p, soilS1_windErosion_p, soilS2_windErosion_p, \
@@ -355,15 +356,8 @@ def metal_ode(t, Q, i, presence, env, chemParams, climate, release, bgConc,
         sSS_resusp_p_2_air, soilS1_windErosion_p_2_air, soilS2_windErosion_p_2_air, \
         soilS3_windErosion_p_2_air, soilS4_windErosion_p_2_air = [0] * 12
 
-    air_loss = - (aerOut_adv_p + aerOut_adv_c + aerOut_adv_i + aer_dep_dry_p + aer_dep_dry_i +
-                  aer_dep_wet_p + aer_dep_wet_i)
-    air_transfer = sSS_resusp_p_2_air + soilS1_windErosion_p_2_air + soilS2_windErosion_p_2_air + \
-                   soilS3_windErosion_p_2_air + soilS4_windErosion_p_2_air
-
 
     # freshwater - fw Q[1]
-    fw_enter = release['fw'][i] + release['fSS'][i] + fwIn_adv_p + fwIn_adv_c + fwIn_adv_i
-
     aer_dep_wet_p_2_fw, aer_dep_wet_i_2_fw, aer_dep_dry_p_2_fw, aer_dep_dry_i_2_fw, \
     fSedW_diff_c_2_fw, fSedW_diff_i_2_fw, fSedS_resusp_p_2_fw, \
     soilW1_runoff_c_2_fw, soilW1_runoff_i_2_fw, soilS1_erosion_p_2_fw, \
@@ -387,34 +381,16 @@ def metal_ode(t, Q, i, presence, env, chemParams, climate, release, bgConc,
         deepS3_leach_i_2_fw, soilW4_runoff_c_2_fw, soilW4_runoff_i_2_fw, soilS4_erosion_p_2_fw, deepS4_leach_c_2_fw, \
         deepS4_leach_i_2_fw = [0] * 33
 
-    fw_loss = -(fwOut_adv_c + fwOut_adv_i + fSSOut_adv_p + fSS_dep_p + fw_diff_c_to_fSedW + fw_diff_i_to_fSedW)
-
-    fw_transfer = aer_dep_wet_p_2_fw + aer_dep_wet_i_2_fw + aer_dep_dry_p_2_fw + aer_dep_dry_i_2_fw + \
-                  fSedW_diff_c_2_fw + fSedW_diff_i_2_fw + fSedS_resusp_p_2_fw + soilW1_runoff_c_2_fw + soilW1_runoff_i_2_fw + \
-                  soilS1_erosion_p_2_fw + deepS1_leach_c_2_fw + deepS1_leach_i_2_fw + soilW2_runoff_c_2_fw + \
-                  soilW2_runoff_i_2_fw + soilS2_erosion_p_2_fw + deepS2_leach_c_2_fw + deepS2_leach_i_2_fw + \
-                  soilW3_runoff_c_2_fw + soilW3_runoff_i_2_fw + soilS3_erosion_p_2_fw + deepS3_leach_c_2_fw + \
-                  deepS3_leach_i_2_fw + soilW4_runoff_c_2_fw + soilW4_runoff_i_2_fw + soilS4_erosion_p_2_fw + \
-                  deepS4_leach_c_2_fw + deepS4_leach_i_2_fw
 
     # freshwater sediment - fwSed Q[2]
-    fwSed_enter = release['fwSed'][i] + fSed_adv_inflow_p + fSed_adv_inflow_c + fSed_adv_inflow_i
-
     fw_diff_c_2_fSedW, fw_diff_i_2_fSedW, fSS_dep_p_2_fSed = fw_diff_c_to_fSedW, fw_diff_i_to_fSedW, fSS_dep_p
 
     if presence['fw'] == 0:
         fw_diff_c_2_fSedW, fw_diff_i_2_fSedW, fSS_dep_p_2_fSed, fSedS_burial_p, fSedS_resusp_p, \
         fSedW_diff_c_to_fw, fSedW_diff_i_to_fw, fSed_adv_outflow_p, fSed_adv_outflow_c, fSed_adv_outflow_i = [0] * 10
 
-    fwSed_loss = -(fSedS_burial_p + fSedS_resusp_p + fSedW_diff_c_to_fw + fSedW_diff_i_to_fw + fSed_adv_outflow_p +
-                   fSed_adv_outflow_c + fSed_adv_outflow_i)
-
-    fwSed_transfer = fw_diff_c_2_fSedW + fw_diff_i_2_fSedW + fSS_dep_p_2_fSed
-    
 
     # seawater - sw Q[3]
-    sw_enter = release['sw'][i] + release['sSS'][i]
-
     soilW1_runoff_c_2_sw, soilW1_runoff_i_2_sw, soilS1_erosion_p_2_sw, deepS1_leach_c_2_sw, \
     deepS1_leach_i_2_sw, soilW2_runoff_c_2_sw, soilW2_runoff_i_2_sw, soilS2_erosion_p_2_sw, \
     deepS2_leach_c_2_sw, deepS2_leach_i_2_sw, soilW3_runoff_c_2_sw, soilW3_runoff_i_2_sw, soilS3_erosion_p_2_sw, \
@@ -448,20 +424,8 @@ def metal_ode(t, Q, i, presence, env, chemParams, climate, release, bgConc,
         soilW3_runoff_i_2_sw, soilS3_erosion_p_2_sw, deepS3_leach_c_2_sw, deepS3_leach_i_2_sw, soilW4_runoff_c_2_sw, \
         soilW4_runoff_i_2_sw, soilS4_erosion_p_2_sw, deepS4_leach_c_2_sw, deepS4_leach_i_2_sw = [0] * 37
 
-    sw_loss = -(swOut_adv_c + swOut_adv_i + sSSOut_adv_p + sSS_dep_p + sw_diff_c_to_sSedW + sw_diff_i_to_sSedW
-                + sSS_resusp_p)
-
-    sw_transfer = swIn_adv_c_2_sw + swIn_adv_i_2_sw + sSSIn_adv_p_2_sw + aer_dep_dry_p_2_sw + aer_dep_dry_i_2_sw + aer_dep_wet_p_2_sw + \
-        aer_dep_wet_i_2_sw + sSedW_diff_c_2_sw + sSedW_diff_i_2_sw + sSedS_resusp_p_2_sw + soilW1_runoff_c_2_sw + \
-        soilW1_runoff_i_2_sw + soilS1_erosion_p_2_sw + deepS1_leach_c_2_sw + deepS1_leach_i_2_sw + soilW2_runoff_c_2_sw + \
-        soilW2_runoff_i_2_sw + soilS2_erosion_p_2_sw + deepS2_leach_c_2_sw + deepS2_leach_i_2_sw + soilW3_runoff_c_2_sw + \
-        soilW3_runoff_i_2_sw + soilS3_erosion_p_2_sw + deepS3_leach_c_2_sw + deepS3_leach_i_2_sw + soilW4_runoff_c_2_sw + \
-        soilW4_runoff_i_2_sw + soilS4_erosion_p_2_sw + deepS4_leach_c_2_sw + deepS4_leach_i_2_sw
-
 
     # seawater sediment - swSed Q[4]
-    swSed_enter = release['swSed'][i]
-
     sw_diff_c_2_sSedW, sw_diff_i_2_sSedW, sSS_dep_p_2_sSedW, fSed_adv_outflow_p_2_sSedW, fSed_adv_outflow_c_2_sSedW, \
     fSed_adv_outflow_i_2_sSedW = \
         sw_diff_c_to_sSedW, sw_diff_i_to_sSedW, sSS_dep_p, sSed_adv_outflow_p, sSed_adv_outflow_c, fSed_adv_outflow_i
@@ -471,16 +435,8 @@ def metal_ode(t, Q, i, presence, env, chemParams, climate, release, bgConc,
         sSed_adv_outflow_c, sSed_adv_outflow_i, sw_diff_c_2_sSedW, sw_diff_i_2_sSedW, sSS_dep_p_2_sSedW, \
         fSed_adv_outflow_p_2_sSedW, fSed_adv_outflow_c_2_sSedW, fSed_adv_outflow_i_2_sSedW = [0] * 13
 
-    swSed_loss = -(sSedS_burial_p + sSedS_resusp_p + sSedW_diff_c_to_sw + sSedW_diff_i_to_sw +
-                   sSed_adv_outflow_p + sSed_adv_outflow_c + sSed_adv_outflow_i)
     
-    swSed_transfer = sw_diff_c_2_sSedW + sw_diff_i_2_sSedW + sSS_dep_p_2_sSedW + fSed_adv_outflow_p_2_sSedW + \
-                     fSed_adv_outflow_c_2_sSedW + fSed_adv_outflow_i_2_sSedW
-
-
     # soil 1 - soil1 Q[5]
-    soil1_enter = release['soil1'][i]
-
     aer_dep_dry_p_2_soil1, aer_dep_dry_i_2_soil1, aer_dep_wet_p_2_soil1, aer_dep_wet_i_2_soil1 = \
        aer_dep_dry_p_to_soil1, aer_dep_dry_i_to_soil1, aer_dep_wet_p_to_soil1, aer_dep_wet_i_to_soil1
 
@@ -489,26 +445,13 @@ def metal_ode(t, Q, i, presence, env, chemParams, climate, release, bgConc,
         soilS1_windErosion_p, aer_dep_dry_p_2_soil1, aer_dep_dry_i_2_soil1, \
         aer_dep_wet_p_2_soil1, aer_dep_wet_i_2_soil1 = [0] * 10
 
-    soil1_loss = -(soilW1_runoff_c + soilW1_runoff_i + soilW1_infil_c + soilW1_infil_i + soilS1_erosion_p +
-                   soilS1_windErosion_p)
-
-    soil1_transfer = aer_dep_dry_p_2_soil1 + aer_dep_dry_i_2_soil1 + aer_dep_wet_p_2_soil1 + aer_dep_wet_i_2_soil1
-
 
     # deep soil 1 - deepS1 Q[6]
-    deepS1_enter = release['dsoil1'][i]
-
     if presence['soil1'] == 0:
         deepS1_leach_c, deepS1_leach_i, soilW1_infil_c, soilW1_infil_i = [0] * 4
 
-    deepS1_loss = -(deepS1_leach_c + deepS1_leach_i)
-
-    deepS1_transfer = soilW1_infil_c + soilW1_infil_i
-
 
     # soil 2 - soil2 Q[7]
-    soil2_enter = release['soil2'][i]
-
     aer_dep_dry_p_2_soil2, aer_dep_dry_i_2_soil2, aer_dep_wet_p_2_soil2, aer_dep_wet_i_2_soil2 = \
         aer_dep_dry_p_to_soil2, aer_dep_dry_i_to_soil2, aer_dep_wet_p_to_soil2, aer_dep_wet_i_to_soil2
 
@@ -517,25 +460,13 @@ def metal_ode(t, Q, i, presence, env, chemParams, climate, release, bgConc,
         soilS2_windErosion_p, aer_dep_dry_p_2_soil2, aer_dep_dry_i_2_soil2, aer_dep_wet_p_2_soil2, \
         aer_dep_wet_i_2_soil2 = [0] * 10
 
-    soil2_loss = -(soilW2_runoff_c + soilW2_runoff_i + soilW2_infil_c + soilW2_infil_i + soilS2_erosion_p +
-                   soilS2_windErosion_p)
-
-    soil2_transfer = aer_dep_dry_p_2_soil2 + aer_dep_dry_i_2_soil2 + aer_dep_wet_p_2_soil2 + aer_dep_wet_i_2_soil2
 
     # deep soil 2 - deepS2 Q[8]
-    deepS2_enter = release['dsoil2'][i]
-
     if presence['soil2'] == 0:
         deepS2_leach_c, deepS2_leach_i, soilW2_infil_c, soilW2_infil_i = [0] * 4
 
-    deepS2_loss = -(deepS2_leach_c + deepS2_leach_i)
-
-    deepS2_transfer = soilW2_infil_c + soilW2_infil_i
-
 
     # soil 3 - soil3 Q[9]
-    soil3_enter = release['soil3'][i]
-
     aer_dep_dry_p_2_soil3, aer_dep_dry_i_2_soil3, aer_dep_wet_p_2_soil3, aer_dep_wet_i_2_soil3 = \
         aer_dep_dry_p_to_soil3, aer_dep_dry_i_to_soil3, aer_dep_wet_p_to_soil3, aer_dep_wet_i_to_soil3
 
@@ -544,25 +475,13 @@ def metal_ode(t, Q, i, presence, env, chemParams, climate, release, bgConc,
         soilS3_windErosion_p, aer_dep_dry_p_2_soil3, aer_dep_dry_i_2_soil3, aer_dep_wet_p_2_soil3, \
         aer_dep_wet_i_2_soil3 = [0] * 10
 
-    soil3_loss = -(soilW3_runoff_c + soilW3_runoff_i + soilW3_infil_c + soilW3_infil_i + soilS3_erosion_p +
-                   soilS3_windErosion_p)
-    soil3_transfer = aer_dep_dry_p_2_soil3 + aer_dep_dry_i_2_soil3 + aer_dep_wet_p_2_soil3 + aer_dep_wet_i_2_soil3
-
 
     # deep soil 3 - deepS3 Q[10]
-    deepS3_enter = release['dsoil3'][i]
-
     if presence['soil3'] == 0:
         deepS3_leach_c, deepS3_leach_i, soilW3_infil_c, soilW3_infil_i = [0] * 4
 
-    deepS3_loss = -(deepS3_leach_c + deepS3_leach_i)
-
-    deepS3_transfer = soilW3_infil_c + soilW3_infil_i
-
 
     # soil 4 - soil4 Q[11]
-    soil4_enter = release['soil4'][i]
-
     aer_dep_dry_p_2_soil4, aer_dep_dry_i_2_soil4, aer_dep_wet_p_2_soil4, aer_dep_wet_i_2_soil4 = \
         aer_dep_dry_p_to_soil4, aer_dep_dry_i_to_soil4, aer_dep_wet_p_to_soil4, aer_dep_wet_i_to_soil4
 
@@ -571,89 +490,182 @@ def metal_ode(t, Q, i, presence, env, chemParams, climate, release, bgConc,
         soilS4_windErosion_p, aer_dep_dry_p_2_soil4, aer_dep_dry_i_2_soil4, aer_dep_wet_p_2_soil4, \
         aer_dep_wet_i_2_soil4 = [0] * 10
 
-    soil4_loss = -(soilW4_runoff_c + soilW4_runoff_i + soilW4_infil_c + soilW4_infil_i + soilS4_erosion_p +
-                   soilS4_windErosion_p)
-    soil4_transfer = aer_dep_dry_p_2_soil4 + aer_dep_dry_i_2_soil4 + aer_dep_wet_p_2_soil4 + aer_dep_wet_i_2_soil4
-
 
     # deep soil 4 - deepS4 Q[12]
-    deepS4_enter = release['dsoil4'][i]
-
     if presence['soil4'] == 0:
         deepS4_leach_c, deepS4_leach_i, soilW4_infil_c, soilW4_infil_i = [0] * 4
 
-    deepS4_loss = -(deepS4_leach_c + deepS4_leach_i)
-
-    deepS4_transfer = soilW4_infil_c + soilW4_infil_i
-
-
-    # ODE equations
-
-    if (env['airV'] * Z_i['air']) != 0:
-        air = (air_enter + air_loss + air_transfer) / (env['airV'] * Z_i['air'])
-    else:
-        air = 0
-
-    if (env['fwV'] * Z_i['fw']) != 0:
-        fw = (fw_enter + fw_loss + fw_transfer) / (env['fwV'] * Z_i['fw'])
-    else:
-        fw = 0
+    # unit: mol/day
+    fluxes = {
+        'release_air': release['air'][i], 'airIn_adv_p': airIn_adv_p, 'airIn_adv_i': airIn_adv_i,
+        'sSS_resusp_p_2_air': sSS_resusp_p_2_air, 'soilS1_windErosion_p_2_air': soilS1_windErosion_p_2_air,
+        'soilS2_windErosion_p_2_air': soilS2_windErosion_p_2_air,
+        'soilS3_windErosion_p_2_air': soilS3_windErosion_p_2_air,
+        'soilS4_windErosion_p_2_air': soilS4_windErosion_p_2_air, 'aerOut_adv_p': aerOut_adv_p,
+        'aerOut_adv_c': aerOut_adv_c, 'aerOut_adv_i': aerOut_adv_i, 'aer_dep_dry_p': aer_dep_dry_p,
+        'aer_dep_dry_i': aer_dep_dry_i, 'aer_dep_wet_p': aer_dep_wet_p, 'aer_dep_wet_i': aer_dep_wet_i,
+        'release_fw': release['fw'][i], 'release_fSS': release['fSS'][i], 'fwIn_adv_p': fwIn_adv_p,
+        'fwIn_adv_c': fwIn_adv_c, 'fwIn_adv_i': fwIn_adv_i, 'aer_dep_wet_p_2_fw': aer_dep_wet_p_2_fw,
+        'aer_dep_wet_i_2_fw': aer_dep_wet_i_2_fw, 'aer_dep_dry_p_2_fw': aer_dep_dry_p_2_fw,
+        'aer_dep_dry_i_2_fw': aer_dep_dry_i_2_fw, 'fSedW_diff_c_2_fw': fSedW_diff_c_2_fw,
+        'fSedW_diff_i_2_fw': fSedW_diff_i_2_fw, 'fSedS_resusp_p_2_fw': fSedS_resusp_p_2_fw,
+        'soilW1_runoff_c_2_fw': soilW1_runoff_c_2_fw, 'soilW1_runoff_i_2_fw': soilW1_runoff_i_2_fw,
+        'soilS1_erosion_p_2_fw': soilS1_erosion_p_2_fw, 'deepS1_leach_c_2_fw': deepS1_leach_c_2_fw,
+        'deepS1_leach_i_2_fw': deepS1_leach_i_2_fw, 'soilW2_runoff_c_2_fw': soilW2_runoff_c_2_fw,
+        'soilW2_runoff_i_2_fw': soilW2_runoff_i_2_fw, 'soilS2_erosion_p_2_fw': soilS2_erosion_p_2_fw,
+        'deepS2_leach_c_2_fw': deepS2_leach_c_2_fw, 'deepS2_leach_i_2_fw': deepS2_leach_i_2_fw,
+        'soilW3_runoff_c_2_fw': soilW3_runoff_c_2_fw, 'soilW3_runoff_i_2_fw': soilW3_runoff_i_2_fw,
+        'soilS3_erosion_p_2_fw': soilS3_erosion_p_2_fw, 'deepS3_leach_c_2_fw': deepS3_leach_c_2_fw,
+        'deepS3_leach_i_2_fw': deepS3_leach_i_2_fw, 'soilW4_runoff_c_2_fw': soilW4_runoff_c_2_fw,
+        'soilW4_runoff_i_2_fw': soilW4_runoff_i_2_fw, 'soilS4_erosion_p_2_fw': soilS4_erosion_p_2_fw,
+        'deepS4_leach_c_2_fw': deepS4_leach_c_2_fw, 'deepS4_leach_i_2_fw': deepS4_leach_i_2_fw,
+        'fwOut_adv_c': fwOut_adv_c, 'fwOut_adv_i': fwOut_adv_i, 'fSSOut_adv_p': fSSOut_adv_p, 'fSS_dep_p': fSS_dep_p,
+        'fw_diff_c_to_fSedW': fw_diff_c_to_fSedW, 'fw_diff_i_to_fSedW': fw_diff_i_to_fSedW,
+        'release_fwSed': release['fwSed'][i], 'fSed_adv_inflow_p': fSed_adv_inflow_p,
+        'fSed_adv_inflow_c': fSed_adv_inflow_c, 'fSed_adv_inflow_i': fSed_adv_inflow_i,
+        'fw_diff_c_2_fSedW': fw_diff_c_2_fSedW, 'fw_diff_i_2_fSedW': fw_diff_i_2_fSedW,
+        'fSS_dep_p_2_fSed': fSS_dep_p_2_fSed, 'fSedS_burial_p': fSedS_burial_p, 'fSedS_resusp_p': fSedS_resusp_p,
+        'fSedW_diff_c_to_fw': fSedW_diff_c_to_fw, 'fSedW_diff_i_to_fw': fSedW_diff_i_to_fw,
+        'fSed_adv_outflow_p': fSed_adv_outflow_p, 'fSed_adv_outflow_c': fSed_adv_outflow_c,
+        'fSed_adv_outflow_i': fSed_adv_outflow_i, 'release_sw': release['sw'][i], 'release_sSS': release['sSS'][i],
+        'swIn_adv_c_2_sw': swIn_adv_c_2_sw, 'swIn_adv_i_2_sw': swIn_adv_i_2_sw, 'sSSIn_adv_p_2_sw': sSSIn_adv_p_2_sw,
+        'aer_dep_dry_p_2_sw': aer_dep_dry_p_2_sw, 'aer_dep_dry_i_2_sw': aer_dep_dry_i_2_sw,
+        'aer_dep_wet_p_2_sw': aer_dep_wet_p_2_sw, 'aer_dep_wet_i_2_sw': aer_dep_wet_i_2_sw,
+        'sSedW_diff_c_2_sw': sSedW_diff_c_2_sw, 'sSedW_diff_i_2_sw': sSedW_diff_i_2_sw,
+        'sSedS_resusp_p_2_sw': sSedS_resusp_p_2_sw, 'soilW1_runoff_c_2_sw': soilW1_runoff_c_2_sw,
+        'soilW1_runoff_i_2_sw': soilW1_runoff_i_2_sw, 'soilS1_erosion_p_2_sw': soilS1_erosion_p_2_sw,
+        'deepS1_leach_c_2_sw': deepS1_leach_c_2_sw, 'deepS1_leach_i_2_sw': deepS1_leach_i_2_sw,
+        'soilW2_runoff_c_2_sw': soilW2_runoff_c_2_sw, 'soilW2_runoff_i_2_sw': soilW2_runoff_i_2_sw,
+        'soilS2_erosion_p_2_sw': soilS2_erosion_p_2_sw, 'deepS2_leach_c_2_sw': deepS2_leach_c_2_sw,
+        'deepS2_leach_i_2_sw': deepS2_leach_i_2_sw, 'soilW3_runoff_c_2_sw': soilW3_runoff_c_2_sw,
+        'soilW3_runoff_i_2_sw': soilW3_runoff_i_2_sw, 'soilS3_erosion_p_2_sw': soilS3_erosion_p_2_sw,
+        'deepS3_leach_c_2_sw': deepS3_leach_c_2_sw, 'deepS3_leach_i_2_sw': deepS3_leach_i_2_sw,
+        'soilW4_runoff_c_2_sw': soilW4_runoff_c_2_sw, 'soilW4_runoff_i_2_sw': soilW4_runoff_i_2_sw,
+        'soilS4_erosion_p_2_sw': soilS4_erosion_p_2_sw, 'deepS4_leach_c_2_sw': deepS4_leach_c_2_sw,
+        'deepS4_leach_i_2_sw': deepS4_leach_i_2_sw, 'swOut_adv_c': swOut_adv_c, 'swOut_adv_i': swOut_adv_i,
+        'sSSOut_adv_p': sSSOut_adv_p, 'sSS_dep_p': sSS_dep_p, 'sw_diff_c_to_sSedW': sw_diff_c_to_sSedW,
+        'sw_diff_i_to_sSedW': sw_diff_i_to_sSedW, 'sSS_resusp_p': sSS_resusp_p, 'release_swSed': release['swSed'][i],
+        'sw_diff_c_2_sSedW': sw_diff_c_2_sSedW, 'sw_diff_i_2_sSedW': sw_diff_i_2_sSedW,
+        'sSS_dep_p_2_sSedW': sSS_dep_p_2_sSedW, 'fSed_adv_outflow_p_2_sSedW': fSed_adv_outflow_p_2_sSedW,
+        'fSed_adv_outflow_c_2_sSedW': fSed_adv_outflow_c_2_sSedW,
+        'fSed_adv_outflow_i_2_sSedW': fSed_adv_outflow_i_2_sSedW, 'sSedS_burial_p': sSedS_burial_p,
+        'sSedS_resusp_p': sSedS_resusp_p, 'sSedW_diff_c_to_sw': sSedW_diff_c_to_sw,
+        'sSedW_diff_i_to_sw': sSedW_diff_i_to_sw, 'sSed_adv_outflow_p': sSed_adv_outflow_p,
+        'sSed_adv_outflow_c': sSed_adv_outflow_c, 'sSed_adv_outflow_i': sSed_adv_outflow_i,
+        'release_soil1': release['soil1'][i], 'aer_dep_dry_p_2_soil1': aer_dep_dry_p_2_soil1,
+        'aer_dep_dry_i_2_soil1': aer_dep_dry_i_2_soil1, 'aer_dep_wet_p_2_soil1': aer_dep_wet_p_2_soil1,
+        'aer_dep_wet_i_2_soil1': aer_dep_wet_i_2_soil1, 'soilW1_runoff_c': soilW1_runoff_c,
+        'soilW1_runoff_i': soilW1_runoff_i, 'soilW1_infil_c': soilW1_infil_c, 'soilW1_infil_i': soilW1_infil_i,
+        'soilS1_erosion_p': soilS1_erosion_p, 'soilS1_windErosion_p': soilS1_windErosion_p,
+        'release_dsoil1': release['dsoil1'][i], 'deepS1_leach_c': deepS1_leach_c, 'deepS1_leach_i': deepS1_leach_i,
+        'release_soil2': release['soil2'][i], 'aer_dep_dry_p_2_soil2': aer_dep_dry_p_2_soil2,
+        'aer_dep_dry_i_2_soil2': aer_dep_dry_i_2_soil2, 'aer_dep_wet_p_2_soil2': aer_dep_wet_p_2_soil2,
+        'aer_dep_wet_i_2_soil2': aer_dep_wet_i_2_soil2, 'soilW2_runoff_c': soilW2_runoff_c,
+        'soilW2_runoff_i': soilW2_runoff_i, 'soilW2_infil_c': soilW2_infil_c, 'soilW2_infil_i': soilW2_infil_i,
+        'soilS2_erosion_p': soilS2_erosion_p, 'soilS2_windErosion_p': soilS2_windErosion_p,
+        'release_dsoil2': release['dsoil2'][i], 'deepS2_leach_c': deepS2_leach_c, 'deepS2_leach_i': deepS2_leach_i,
+        'release_soil3': release['soil3'][i], 'aer_dep_dry_p_2_soil3': aer_dep_dry_p_2_soil3,
+        'aer_dep_dry_i_2_soil3': aer_dep_dry_i_2_soil3, 'aer_dep_wet_p_2_soil3': aer_dep_wet_p_2_soil3,
+        'aer_dep_wet_i_2_soil3': aer_dep_wet_i_2_soil3, 'soilW3_runoff_c': soilW3_runoff_c,
+        'soilW3_runoff_i': soilW3_runoff_i, 'soilW3_infil_c': soilW3_infil_c, 'soilW3_infil_i': soilW3_infil_i,
+        'soilS3_erosion_p': soilS3_erosion_p, 'soilS3_windErosion_p': soilS3_windErosion_p,
+        'release_dsoil3': release['dsoil3'][i], 'deepS3_leach_c': deepS3_leach_c, 'deepS3_leach_i': deepS3_leach_i,
+        'release_soil4': release['soil4'][i], 'aer_dep_dry_p_2_soil4': aer_dep_dry_p_2_soil4,
+        'aer_dep_dry_i_2_soil4': aer_dep_dry_i_2_soil4, 'aer_dep_wet_p_2_soil4': aer_dep_wet_p_2_soil4,
+        'aer_dep_wet_i_2_soil4': aer_dep_wet_i_2_soil4, 'soilW4_runoff_c': soilW4_runoff_c,
+        'soilW4_runoff_i': soilW4_runoff_i, 'soilW4_infil_c': soilW4_infil_c, 'soilW4_infil_i': soilW4_infil_i,
+        'soilS4_erosion_p': soilS4_erosion_p, 'soilS4_windErosion_p': soilS4_windErosion_p,
+        'release_dsoil4': release['dsoil4'][i], 'deepS4_leach_c': deepS4_leach_c, 'deepS4_leach_i': deepS4_leach_i,
+    }
+
+    capacity = [env['airV'] * Z_i['air'], env['fwV'] * Z_i['fw'], env['sedFWV'] * Z_i['fwSed'], env['swV'] * Z_i['sw'],
+                env['sedSWV'] * Z_i['swSed'], env['soilV1'] * Z_i['soil1'], env['deepSV1'] * Z_i['deepS1'],
+                env['soilV2'] * Z_i['soil2'], env['deepSV2'] * Z_i['deepS2'], env['soilV3'] * Z_i['soil3'],
+                env['deepSV3'] * Z_i['deepS3'], env['soilV4'] * Z_i['soil4'], env['deepSV4'] * Z_i['deepS4']]
+
+    return fluxes, capacity
+
+
+# (entering, leaving) fluxes of each compartment, in the order of dYdt
+metal_balance = [
+    # air
+    (['release_air', 'airIn_adv_p', 'airIn_adv_i', 'sSS_resusp_p_2_air', 'soilS1_windErosion_p_2_air',
+      'soilS2_windErosion_p_2_air', 'soilS3_windErosion_p_2_air', 'soilS4_windErosion_p_2_air'],
+     ['aerOut_adv_p', 'aerOut_adv_c', 'aerOut_adv_i', 'aer_dep_dry_p', 'aer_dep_dry_i', 'aer_dep_wet_p',
+      'aer_dep_wet_i']),
+    # fw
+    (['release_fw', 'release_fSS', 'fwIn_adv_p', 'fwIn_adv_c', 'fwIn_adv_i', 'aer_dep_wet_p_2_fw',
+      'aer_dep_wet_i_2_fw', 'aer_dep_dry_p_2_fw', 'aer_dep_dry_i_2_fw', 'fSedW_diff_c_2_fw', 'fSedW_diff_i_2_fw',
+      'fSedS_resusp_p_2_fw', 'soilW1_runoff_c_2_fw', 'soilW1_runoff_i_2_fw', 'soilS1_erosion_p_2_fw',
+      'deepS1_leach_c_2_fw', 'deepS1_leach_i_2_fw', 'soilW2_runoff_c_2_fw', 'soilW2_runoff_i_2_fw',
+      'soilS2_erosion_p_2_fw', 'deepS2_leach_c_2_fw', 'deepS2_leach_i_2_fw', 'soilW3_runoff_c_2_fw',
+      'soilW3_runoff_i_2_fw', 'soilS3_erosion_p_2_fw', 'deepS3_leach_c_2_fw', 'deepS3_leach_i_2_fw',
+      'soilW4_runoff_c_2_fw', 'soilW4_runoff_i_2_fw', 'soilS4_erosion_p_2_fw', 'deepS4_leach_c_2_fw',
+      'deepS4_leach_i_2_fw'],
+     ['fwOut_adv_c', 'fwOut_adv_i', 'fSSOut_adv_p', 'fSS_dep_p', 'fw_diff_c_to_fSedW', 'fw_diff_i_to_fSedW']),
+    # fwSed
+    (['release_fwSed', 'fSed_adv_inflow_p', 'fSed_adv_inflow_c', 'fSed_adv_inflow_i', 'fw_diff_c_2_fSedW',
+      'fw_diff_i_2_fSedW', 'fSS_dep_p_2_fSed'],
+     ['fSedS_burial_p', 'fSedS_resusp_p', 'fSedW_diff_c_to_fw', 'fSedW_diff_i_to_fw', 'fSed_adv_outflow_p',
+      'fSed_adv_outflow_c', 'fSed_adv_outflow_i']),
+    # sw
+    (['release_sw', 'release_sSS', 'swIn_adv_c_2_sw', 'swIn_adv_i_2_sw', 'sSSIn_adv_p_2_sw', 'aer_dep_dry_p_2_sw',
+      'aer_dep_dry_i_2_sw', 'aer_dep_wet_p_2_sw', 'aer_dep_wet_i_2_sw', 'sSedW_diff_c_2_sw', 'sSedW_diff_i_2_sw',
+      'sSedS_resusp_p_2_sw', 'soilW1_runoff_c_2_sw', 'soilW1_runoff_i_2_sw', 'soilS1_erosion_p_2_sw',
+      'deepS1_leach_c_2_sw', 'deepS1_leach_i_2_sw', 'soilW2_runoff_c_2_sw', 'soilW2_runoff_i_2_sw',
+      'soilS2_erosion_p_2_sw', 'deepS2_leach_c_2_sw', 'deepS2_leach_i_2_sw', 'soilW3_runoff_c_2_sw',
+      'soilW3_runoff_i_2_sw', 'soilS3_erosion_p_2_sw', 'deepS3_leach_c_2_sw', 'deepS3_leach_i_2_sw',
+      'soilW4_runoff_c_2_sw', 'soilW4_runoff_i_2_sw', 'soilS4_erosion_p_2_sw', 'deepS4_leach_c_2_sw',
+      'deepS4_leach_i_2_sw'],
+     ['swOut_adv_c', 'swOut_adv_i', 'sSSOut_adv_p', 'sSS_dep_p', 'sw_diff_c_to_sSedW', 'sw_diff_i_to_sSedW',
+      'sSS_resusp_p']),
+    # swSed
+    (['release_swSed', 'sw_diff_c_2_sSedW', 'sw_diff_i_2_sSedW', 'sSS_dep_p_2_sSedW', 'fSed_adv_outflow_p_2_sSedW',
+      'fSed_adv_outflow_c_2_sSedW', 'fSed_adv_outflow_i_2_sSedW'],
+     ['sSedS_burial_p', 'sSedS_resusp_p', 'sSedW_diff_c_to_sw', 'sSedW_diff_i_to_sw', 'sSed_adv_outflow_p',
+      'sSed_adv_outflow_c', 'sSed_adv_outflow_i']),
+    # soil1
+    (['release_soil1', 'aer_dep_dry_p_2_soil1', 'aer_dep_dry_i_2_soil1', 'aer_dep_wet_p_2_soil1',
+      'aer_dep_wet_i_2_soil1'],
+     ['soilW1_runoff_c', 'soilW1_runoff_i', 'soilW1_infil_c', 'soilW1_infil_i', 'soilS1_erosion_p',
+      'soilS1_windErosion_p']),
+    # deepS1
+    (['release_dsoil1', 'soilW1_infil_c', 'soilW1_infil_i'],
+     ['deepS1_leach_c', 'deepS1_leach_i']),
+    # soil2
+    (['release_soil2', 'aer_dep_dry_p_2_soil2', 'aer_dep_dry_i_2_soil2', 'aer_dep_wet_p_2_soil2',
+      'aer_dep_wet_i_2_soil2'],
+     ['soilW2_runoff_c', 'soilW2_runoff_i', 'soilW2_infil_c', 'soilW2_infil_i', 'soilS2_erosion_p',
+      'soilS2_windErosion_p']),
+    # deepS2
+    (['release_dsoil2', 'soilW2_infil_c', 'soilW2_infil_i'],
+     ['deepS2_leach_c', 'deepS2_leach_i']),
+    # soil3
+    (['release_soil3', 'aer_dep_dry_p_2_soil3', 'aer_dep_dry_i_2_soil3', 'aer_dep_wet_p_2_soil3',
+      'aer_dep_wet_i_2_soil3'],
+     ['soilW3_runoff_c', 'soilW3_runoff_i', 'soilW3_infil_c', 'soilW3_infil_i', 'soilS3_erosion_p',
+      'soilS3_windErosion_p']),
+    # deepS3
+    (['release_dsoil3', 'soilW3_infil_c', 'soilW3_infil_i'],
+     ['deepS3_leach_c', 'deepS3_leach_i']),
+    # soil4
+    (['release_soil4', 'aer_dep_dry_p_2_soil4', 'aer_dep_dry_i_2_soil4', 'aer_dep_wet_p_2_soil4',
+      'aer_dep_wet_i_2_soil4'],
+     ['soilW4_runoff_c', 'soilW4_runoff_i', 'soilW4_infil_c', 'soilW4_infil_i', 'soilS4_erosion_p',
+      'soilS4_windErosion_p']),
+    # deepS4
+    (['release_dsoil4', 'soilW4_infil_c', 'soilW4_infil_i'],
+     ['deepS4_leach_c', 'deepS4_leach_i']),
+]
+
+metal_flux_names, metal_incidence = incidence_matrix(metal_balance)
 
-    if (env['sedFWV'] * Z_i['fwSed']) != 0:
-        fwSed = (fwSed_enter + fwSed_loss + fwSed_transfer) / (env['sedFWV'] * Z_i['fwSed'])
-    else:
-        fwSed = 0
 
-    if (env['swV'] * Z_i['sw']) != 0:
-        sw = (sw_enter + sw_loss + sw_transfer) / (env['swV'] * Z_i['sw'])
-    else:
-        sw = 0
-
-    if (env['sedSWV'] * Z_i['swSed']) != 0:
-        swSed = (swSed_enter + swSed_loss + swSed_transfer) / (env['sedSWV'] * Z_i['swSed'])
-    else:
-        swSed = 0
-
-    if (env['soilV1'] * Z_i['soil1']) != 0:
-        soil1 = (soil1_enter + soil1_loss + soil1_transfer) / (env['soilV1'] * Z_i['soil1'])
-    else:
-        soil1 = 0
-
-    if (env['deepSV1'] * Z_i['deepS1']) != 0:
-        deepS1 = (deepS1_enter + deepS1_loss + deepS1_transfer) / (env['deepSV1'] * Z_i['deepS1'])
-    else:
-        deepS1 = 0
-
-    if (env['soilV2'] * Z_i['soil2']) != 0:
-        soil2 = (soil2_enter + soil2_loss + soil2_transfer) / (env['soilV2'] * Z_i['soil2'])
-    else:
-        soil2 = 0
-
-    if (env['deepSV2'] * Z_i['deepS2']) != 0:
-        deepS2 = (deepS2_enter + deepS2_loss + deepS2_transfer) / (env['deepSV2'] * Z_i['deepS2'])
-    else:
-        deepS2 = 0
-
-    if (env['soilV3'] * Z_i['soil3']) != 0:
-        soil3 = (soil3_enter + soil3_loss + soil3_transfer) / (env['soilV3'] * Z_i['soil3'])
-    else:
-        soil3 = 0
-
-    if (env['deepSV3'] * Z_i['deepS3']) != 0:
-        deepS3 = (deepS3_enter + deepS3_loss + deepS3_transfer) / (env['deepSV3'] * Z_i['deepS3'])
-    else:
-        deepS3 = 0
-
-    if (env['soilV4'] * Z_i['soil4']) != 0:
-        soil4 = (soil4_enter + soil4_loss + soil4_transfer) / (env['soilV4'] * Z_i['soil4'])
-    else:
-        soil4 = 0
-
-    if (env['deepSV4'] * Z_i['deepS4']) != 0:
-        deepS4 = (deepS4_enter + deepS4_loss + deepS4_transfer) / (env['deepSV4'] * Z_i['deepS4'])
-    else:
-        deepS4 = 0
-
-    dYdt = [air, fw, fwSed, sw, swSed, soil1, deepS1, soil2, deepS2, soil3, deepS3, soil4, deepS4]
-
-    return dYdt
+def metal_ode(t, Q, i, presence, env, chemParams, climate, release, bgConc,
+              Z_ij, Y_ij, Z_i):
+    # changes in the total aquivalence of each compartment, the balance of the fluxes of metal_fluxes divided by V*Z
+    # unit: mol/day / (m3 * mol/m3) = 1/day * mol/m3
+    # np.all in flux_derivative keeps the check valid when the Z-values are daily series
+    # (linear_solver.assemble_horizon)
+    fluxes, capacity = metal_fluxes(Q, i, presence, env, chemParams, climate, release, bgConc, Z_ij, Y_ij, Z_i)
+    return flux_derivative(metal_incidence, metal_flux_names, fluxes, capacity)
@@ -8,6 +8,7 @@ from advective_processes_nano import dryDepAer
 from advective_processes_nano import wetDep
 from advective_processes_nano import waterAdv
 from advective_processes_nano import odeDissolution
+from advective_processes_nano import odeDissolutionJac
 from advective_processes_nano import sedDeposition
 from advective_processes_nano import resuspensionSed
 from advective_processes_nano import burial
@@ -15,9 +16,11 @@ from advective_processes_nano import aerosolResuspension
 from advective_processes_nano import windErosion
 from advective_processes_nano import erosion
 from advective_processes_nano import soilwaterPartition
+from advective_processes_nano import soilwaterPartitionJac
 from advective_processes_nano import runoff
 from advective_processes_nano import vertFlow
 from advective_processes_nano import horiFlow
+from flux_balance import incidence_matrix, flux_derivative
 
 #################################################################
 #
@@ -28,353 +31,357 @@ from advective_processes_nano import horiFlow
 #
 #################################################################
 
-def ode_nano(t,f,i,V,presence,env,climate,ENM,release,bgConc,DIS,time):
-	# %   Differential equation solver for ENM mass in all compartments
-	# %   t is time, f is the mass by compartment and day, i is the iteration in
+def nano_coefficients(i,V,presence,env,climate,ENM,release,bgConc):
+	# %   Daily coefficients of ode_nano: every first order rate constant (1/day) and the
+	# %   inflows to air and aerosols only depend on the day i, so they are computed once per
+	# %   day here and passed to ode_nano and ode_nano_jac instead of being recomputed on each call
+	# %   Processes of absent compartments have a rate of 0
+	# %   i can also be an array of day indices with climate and release series as numpy arrays,
+	# %   the coefficients are then daily series (see nano_coefficients_day)
+	# %   advectionAir is quadratic in f(0), its coefficient multiplies f(0)*f(0)
+	# %   waterAdv does not depend on the concentration, which is passed as 0
+	k = {}
+
+	# % Air
+	k['dryDepositionAir'] = k['wetDepositionAir'] = k['heteroaggregationAirAer'] = k['advectionAir'] = 0
+	if presence['air']==1:
+		k['dryDepositionAir'] = dryDepAir(ENM['density'],env['airP'],env['dynViscAir'],(ENM['radiusENMagg']*(10**-9)),env['airH'])
+		k['wetDepositionAir'] = wetDepAir(climate['precip'][i],env['scavengingENM'],env['area'],V[0])
+		k['heteroaggregationAirAer'] = odeHetagg(ENM['khetA'],env['aerC'])
+		k['advectionAir'] = airAdvection(climate['windspeed'][i],env['area'],env['airH'],V[0],np.true_divide(1.0,V[0]),ENM['density'])
+
+	# % Aerosols
+	k['dryDepositionAer'] = k['wetDepositionAer'] = k['advectionAer'] = 0
+	if presence['aer']==1:
+		k['dryDepositionAer'] = dryDepAer(env['aerP'],env['airP'],env['dynViscAir'],env['radiusParticlesAer'],env['airH'])
+		k['wetDepositionAer'] = wetDep(climate['precip'][i],V[0],env['scavenging'],env['area'])
+		k['advectionAer'] = airAdvection(climate['windspeed'][i],env['area'],env['airH'],V[0],env['aerC'],env['aerP'])
+
+	# % Freshwater
+	k['sedimentationFW'] = k['heteroaggregationFW'] = k['advectionFW'] = 0
+	if presence['fw']==1:
+		k['sedimentationFW'] = np.true_divide(ENM['ksedFW'],env['freshwD'])
+		k['heteroaggregationFW'] = odeHetagg(ENM['khetFW'],env['freshssC'])
+		k['advectionFW'] = waterAdv(climate['flow'][i],V[2],0,ENM['density'])
+
+	# % Freshwater Suspended Sediment
+	k['sedimentationFWSS'] = k['advectionFWSS'] = 0
+	if presence['fSS']==1:
+		k['sedimentationFWSS'] = sedDeposition(env['freshssP'],env['freshwP'],env['dynViscFW'],env['radiusParticlesFW'],env['freshwD'])
+		k['advectionFWSS'] = waterAdv(climate['flow'][i],V[2],env['freshssC'],env['freshssP'])
+
+	# % Freshwater Sediment
+	k['resuspensionFWSed'] = k['burialFWSed'] = k['advectionFWSed'] = 0
+	if presence['fSed']==1:
+		k['resuspensionFWSed'] = resuspensionSed(env['sedFWA'],env['resuspensionRateFW'],V[4])
+		k['burialFWSed'] = burial(env['sedFWA'],env['burialRateFW'],V[4])
+		k['advectionFWSed'] = waterAdv(climate['flow'][i],V[4],0,env['sedFWP'])*env['fwadvfrac']
+
+	# % Seawater
+	k['sedimentationSW'] = k['heteroaggregationSW'] = k['aerosolizationSW'] = k['advectionSW'] = 0
+	if presence['sw']==1:
+		k['sedimentationSW'] = np.true_divide(ENM['ksedSW'],env['seawD'])
+		k['heteroaggregationSW'] = odeHetagg(ENM['khetSW'],env['seassC'])
+		k['aerosolizationSW'] = aerosolResuspension(climate['windspeed'][i],env['coastalA'],ENM['enrichFactor'],env['seawD'],env['seawV'])
+		k['advectionSW'] = waterAdv(climate['flow'][i],V[5],0,ENM['density'])
+
+	# % Seawater suspended sediment
+	k['sedimentationSWSS'] = k['advectionSWSS'] = 0
+	if presence['sSS']==1:
+		k['sedimentationSWSS'] = sedDeposition(env['seassP'],env['seawP'],env['dynViscSW'],env['radiusParticlesSW'],env['seawD'])
+		k['advectionSWSS'] = waterAdv(climate['flow'][i],V[5],env['seassC'],env['seassP'])
+
+	# % Seawater sediment
+	k['resuspensionSWSed'] = k['burialSWSed'] = k['advectionSWSed'] = 0
+	if presence['sSed']==1:
+		k['resuspensionSWSed'] = resuspensionSed(env['sedSWA'],env['resuspensionRateSW'],V[7])
+		k['burialSWSed'] = burial(env['sedSWA'],env['burialRateSW'],V[7])
+		k['advectionSWSed'] = waterAdv(climate['flow'][i],V[7],0,env['sedSWP'])*env['swadvfrac']
+
+	# % Soils 1 to 4, soil solids in f(6+2n), soil water in f(7+2n) and deep soil in f(23+n)
+	for n in range(1, 5):
+		s = 6 + 2*n
+		deep = 23 + n
+		# % infiltration rate of soil water, 0 without a soil water compartment
+		k_infil = 0
+		k['windErosionSoil%d' % n] = k['solidErosionSoil%d' % n] = k['runoffSoilDis%d' % n] = k['leachSoil%d' % n] = 0
+		k['runoffSoil%d' % n] = k['infiltraSoil%d' % n] = 0
+		if presence['soilW%d' % n]==1:
+			# % runoff
+			k['runoffSoil%d' % n] = runoff(climate['precip'][i],env['CN%d' % n],env['soilA%d' % n],V[s])
+			# % infiltration
+			k_infil, k['infiltraSoil%d' % n] = vertFlow(climate['precip'][i],env['CN%d' % n],climate['evap'][i],env['FC%d' % n],
+													   env['soilWC%d' % n],env['soilV%d' % n],env['soilA%d' % n])
+		if presence['soil%d' % n]==1:
+			# % wind erosion
+			k['windErosionSoil%d' % n] = windErosion(climate['windspeed'][i],climate['precip'][i],env['roughness%d' % n],
+													 env['Kconstant%d' % n],env['airP'],env['soilA%d' % n],env['A%d' % n],
+													 env['TSV%d' % n],env['TSVmin%d' % n],env['z_wind%d' % n],
+													 env['percWind%d' % n],env['windConstant%d' % n],env['percUncovered%d' % n],
+													 env['percSuspended%d' % n],env['soilP%d' % n],V[s])
+			# % solid soil erosion
+			k['solidErosionSoil%d' % n] = np.true_divide(erosion(climate['precip'][i],env['Kfact%d' % n],env['lenslope%d' % n],
+																 env['cropManageFactor%d' % n],env['supportFactor%d' % n],
+																 env['soilA%d' % n],env['soilP%d' % n]),V[s])
+			# % dissolved runoff
+			k['runoffSoilDis%d' % n] = runoff(climate['precip'][i],env['CN%d' % n],env['soilA%d' % n],V[s])
+			# % leaching from deep soil
+			k['leachSoil%d' % n] = horiFlow(k_infil, V[deep])
+
+	# % Dissolved mass transport
+	k['advectionFWDis'] = k['advectionFWSedDis'] = k['advectionSWDis'] = k['advectionSWSedDis'] = 0
+	if presence['fw'] == 1:
+		k['advectionFWDis'] = waterAdv(climate['flow'][i],V[2],0,env['freshwP'])
+		k['advectionFWSedDis'] = waterAdv(climate['flow'][i],V[4],0,env['sedFWP'])*env['fwadvfrac']
+	if presence['sw'] == 1:
+		k['advectionSWDis'] = waterAdv(climate['flow'][i],V[5],0,env['seawP'])
+		k['advectionSWSedDis'] = waterAdv(climate['flow'][i],V[7],0,env['sedSWP'])*env['fwadvfrac']
+
+	# % entering air =  release vector data with independent values + advective transfer in from global environment
+	k['AirR'] = release['air'][i]+airAdvection(climate['windspeed'][i],env['area'],env['airH'],env['airV'],bgConc['gairc'],ENM['density'])
+	# % entering aerosols = advective transfer in, bgConc['gaerc_n'] is assumed to be zero
+	k['AerR'] = airAdvection(climate['windspeed'][i],env['area'],env['airH'],env['airV'],0,ENM['density'])
+
+	return k
+
+
+def nano_coefficients_day(coef,i):
+	# %   Coefficients of day i from nano_coefficients evaluated for all days at once
+	# %   (i passed as an array of day indices), constant coefficients are scalars
+	return dict((key, value[i] if np.ndim(value) else value) for key, value in coef.items())
+
+
+def nano_fluxes(f,i,V,presence,env,climate,ENM,release,bgConc,DIS,time,coef=None):
+	# %   Process fluxes (ng/day) of all compartments from the ENM masses
+	# %   f is the mass by compartment and day, i is the iteration in
 	# %   the for loop - so the time step, V is the volume vector
+	# %   coef are the daily coefficients from nano_coefficients, computed here when not given
+	# %   Returns the fluxes by name and the capacity of each compartment (1, the states are masses)
 	# Note: i in Python should be one less than i in Matlab, since Python is zero indexed
+	if coef is None:
+		coef = nano_coefficients(i,V,presence,env,climate,ENM,release,bgConc)
 
 	# %% Process calculations
 
 	# % Air
-	if presence['air']==1:
-		# % dry deposition from air
-		dryDepositionAir = dryDepAir(ENM['density'],env['airP'],env['dynViscAir'],(ENM['radiusENMagg']*(10**-9)),env['airH'])*f[0]
-		# % wet deposition from air
-		wetDepositionAir = wetDepAir(climate['precip'][i],env['scavengingENM'],env['area'],V[0])*f[0]
-		# % heteroaggregation in air (pseudofirst order rate constant)
-		heteroaggregationAirAer = odeHetagg(ENM['khetA'],env['aerC'])*f[0]
-		# % advection in air
-		advectionAir = airAdvection(climate['windspeed'][i],env['area'],env['airH'],V[0],np.true_divide(f[0],V[0]),ENM['density'])*f[0]
-	else:
-		dryDepositionAir = 0
-		wetDepositionAir = 0
-		heteroaggregationAirAer = 0
-		advectionAir = 0
+	# % dry deposition from air
+	dryDepositionAir = coef['dryDepositionAir']*f[0]
+	# % wet deposition from air
+	wetDepositionAir = coef['wetDepositionAir']*f[0]
+	# % heteroaggregation in air (pseudofirst order rate constant)
+	heteroaggregationAirAer = coef['heteroaggregationAirAer']*f[0]
+	# % advection in air
+	advectionAir = coef['advectionAir']*f[0]*f[0]
 
 	# % Aerosols
-	if presence['aer']==1:
-		# % dry deposition of aerosols
-		dryDepositionAer = dryDepAer(env['aerP'],env['airP'],env['dynViscAir'],env['radiusParticlesAer'],env['airH'])*f[1]
-		# % wet deposition of aerosols
-		wetDepositionAer = wetDep(climate['precip'][i],V[0],env['scavenging'],env['area'])*f[1]
-		# % advection of aerosols
-		advectionAer = airAdvection(climate['windspeed'][i],env['area'],env['airH'],V[0],env['aerC'],env['aerP'])*f[1]
-	else:
-		dryDepositionAer = 0
-		wetDepositionAer = 0
-		advectionAer = 0
+	# % dry deposition of aerosols
+	dryDepositionAer = coef['dryDepositionAer']*f[1]
+	# % wet deposition of aerosols
+	wetDepositionAer = coef['wetDepositionAer']*f[1]
+	# % advection of aerosols
+	advectionAer = coef['advectionAer']*f[1]
 
 	# % Freshwater
+	# % sedimentation of free ENMs
+	sedimentationFW = coef['sedimentationFW']*f[2]
+	# % heteroaggregation in freshwater with suspended sediment
+	heteroaggregationFW = coef['heteroaggregationFW']*f[2]
+	# % advective flow
+	advectionFW = coef['advectionFW']*f[2]
+	# % Dissolution in freshwater
 	if presence['fw']==1:
-		# % sedimentation of free ENMs
-		sedimentationFW = np.true_divide(ENM['ksedFW'],env['freshwD'])*f[2]
-		# % heteroaggregation in freshwater with suspended sediment
-		heteroaggregationFW = odeHetagg(ENM['khetFW'],env['freshssC'])*f[2]
-		# % advective flow
-		advectionFW = waterAdv(climate['flow'][i],V[2],np.true_divide(f[2],V[2]),ENM['density'])*f[2]
-		# % Dissolution in freshwater
 		dissolutionFW = odeDissolution(DIS['percfitaFW'],DIS['percfitbFW'],f[2],f[16],ENM['kdisFW'],V[2])
 	else:
-		sedimentationFW = 0
-		heteroaggregationFW = 0
-		advectionFW = 0
 		dissolutionFW = 0
 
 	# % Freshwater Suspended Sediment
-	if presence['fSS']==1:
-		# % deposition of freshwater suspended sediment
-		sedimentationFWSS = sedDeposition(env['freshssP'],env['freshwP'],env['dynViscFW'],env['radiusParticlesFW'],env['freshwD'])*f[3]
-		# % advection of freshwater suspended sediment
-		advectionFWSS = waterAdv(climate['flow'][i],V[2],env['freshssC'],env['freshssP'])*f[3]
-	else:
-		sedimentationFWSS = 0
-		advectionFWSS = 0
+	# % deposition of freshwater suspended sediment
+	sedimentationFWSS = coef['sedimentationFWSS']*f[3]
+	# % advection of freshwater suspended sediment
+	advectionFWSS = coef['advectionFWSS']*f[3]
 
 	# % Freshwater Sediment
+	# % resuspension from freshwater sediment
+	resuspensionFWSed = coef['resuspensionFWSed']*f[4]
+	# % burial in freshwater sediment
+	burialFWSed = coef['burialFWSed']*f[4]
+	# % advection of sediment
+	advectionFWSed = coef['advectionFWSed']*f[4]
+	# % dissolution in sediment
 	if presence['fSed']==1:
-		# % resuspension from freshwater sediment
-		resuspensionFWSed = resuspensionSed(env['sedFWA'],env['resuspensionRateFW'],V[4])*f[4]
-		# % burial in freshwater sediment
-		burialFWSed = burial(env['sedFWA'],env['burialRateFW'],V[4])*f[4]
-		# % advection of sediment
-		advectionFWSed = waterAdv(climate['flow'][i],V[4],f[4]/V[4],env['sedFWP'])*env['fwadvfrac']*f[4]
-		# % dissolution in sediment
 		dissolutionFWSed = odeDissolution(DIS['percfitaFW'],DIS['percfitbFW'],f[4],f[17],ENM['kdisFWsed'],V[4])
 	else:
-		resuspensionFWSed = 0
-		burialFWSed = 0
-		advectionFWSed = 0
 		dissolutionFWSed = 0
 
 	# % Seawater
+	# % sedimentation of free ENMs in seawater
+	sedimentationSW = coef['sedimentationSW']*f[5]
+	# % heteroaggregation with suspended sediment in seawater
+	heteroaggregationSW = coef['heteroaggregationSW']*f[5]
+	# % aerosolization of particles from seawater to aerosols or air
+	aerosolizationSW = coef['aerosolizationSW']*f[5]
+	# % advection out of the coastal marine to larger system
+	advectionSW = coef['advectionSW']*f[5]
+	# % dissolution in marine
 	if presence['sw']==1:
-		# % sedimentation of free ENMs in seawater
-		sedimentationSW = (np.true_divide(ENM['ksedSW'],env['seawD']))*f[5]
-		# % heteroaggregation with suspended sediment in seawater
-		heteroaggregationSW = odeHetagg(ENM['khetSW'],env['seassC'])*f[5]
-		# % aerosolization of particles from seawater to aerosols or air
-		aerosolizationSW = aerosolResuspension(climate['windspeed'][i],env['coastalA'],ENM['enrichFactor'],env['seawD'],env['seawV'])*f[5]
-		# % advection out of the coastal marine to larger system
-		advectionSW = waterAdv(climate['flow'][i],V[5],np.true_divide(f[5],V[5]),ENM['density'])*f[5]
-		# % dissolution in marine
 		dissolutionSW = odeDissolution(DIS['percfitaSW'],DIS['percfitbSW'],f[5],f[18],ENM['kdisSW'],V[5])
 	else:
-		sedimentationSW = 0
-		heteroaggregationSW = 0
-		aerosolizationSW = 0
-		advectionSW = 0
 		dissolutionSW = 0
 
 	# % Seawater suspended sediment
-	if presence['sSS']==1:
-		# % deposition of suspended sediment
-		sedimentationSWSS = sedDeposition(env['seassP'],env['seawP'],env['dynViscSW'],env['radiusParticlesSW'],env['seawD'])*f[6]
-		# % advective flow
-		advectionSWSS = waterAdv(climate['flow'][i],V[5],env['seassC'],env['seassP'])*f[6]
-	else:
-		sedimentationSWSS = 0
-		advectionSWSS = 0
+	# % deposition of suspended sediment
+	sedimentationSWSS = coef['sedimentationSWSS']*f[6]
+	# % advective flow
+	advectionSWSS = coef['advectionSWSS']*f[6]
 
 	# % Seawater sediment
+	# % resuspension from marine sediment
+	resuspensionSWSed = coef['resuspensionSWSed']*f[7]
+	# % burial in marine sediment
+	burialSWSed = coef['burialSWSed']*f[7]
+	# % advection of sediment
+	advectionSWSed = coef['advectionSWSed']*f[7]
+	# % dissolution in sediment
 	if presence['sSed']==1:
-		# % resuspension from marine sediment
-		resuspensionSWSed = resuspensionSed(env['sedSWA'],env['resuspensionRateSW'],V[7])*f[7]
-		# % burial in marine sediment
-		burialSWSed = burial(env['sedSWA'],env['burialRateSW'],V[7])*f[7]
-		# % advection of sediment
-		advectionSWSed = waterAdv(climate['flow'][i],V[7],f[7]/V[7],env['sedSWP'])*env['swadvfrac']*f[7]
-		# % dissolution in sediment
 		dissolutionSWSed = odeDissolution(DIS['percfitaSW'],DIS['percfitbSW'],f[7],f[19],ENM['kdisSWsed'],V[7])
 	else:
-		resuspensionSWSed = 0
-		burialSWSed = 0
-		advectionSWSed = 0
 		dissolutionSWSed = 0
 
 	# % Soil 1
+	# % wind erosion
+	windErosionSoil1 = coef['windErosionSoil1']*f[8]
+	# % solid soil erosion
+	solidErosionSoil1 = coef['solidErosionSoil1']*f[8]
+	# % loss by partitioning to soil water
 	if presence['soil1']==1:
-		# % wind erosion
-		windErosionSoil1 = windErosion(climate['windspeed'][i],climate['precip'][i], \
-									   env['roughness1'],env['Kconstant1'],env['airP'],env['soilA1'],\
-									   env['A1'],env['TSV1'],env['TSVmin1'],env['z_wind1'],env['percWind1'],\
-									   env['windConstant1'],env['percUncovered1'],env['percSuspended1'],env['soilP1'],V[8])*f[8]
-		# % solid soil erosion
-		solidErosionSoil1 = erosion(climate['precip'][i],env['Kfact1'],env['lenslope1'],\
-									env['cropManageFactor1'],env['supportFactor1'],env['soilA1'],env['soilP1'])*np.true_divide(f[8],V[8])
-		# % loss by partitioning to soil water
-		# [0] calls first value in function
 		soil2soilwater1 = soilwaterPartition(f[8],f[9],ENM['elutionS1'],1)[0]
 	else:
-		windErosionSoil1 = 0
-		solidErosionSoil1 = 0
 		soil2soilwater1 = 0
 
 	# % Soil Water 1
+	# % runoff
+	runoffSoil1 = coef['runoffSoil1']*f[9]
+	# % infiltration
+	infiltraSoil1 = coef['infiltraSoil1']*f[9]
 	if presence['soilW1']==1:
-		# % runoff
-		runoffSoil1 = runoff(climate['precip'][i],env['CN1'],env['soilA1'], V[8])*f[9]
-		# % infiltration
-		k_infil1, infiltraSoil1 = vertFlow(climate['precip'][i], env['CN1'], climate['evap'][i], env['FC1'], env['soilWC1'],
-										   env['soilV1'], env['soilA1'])
-		infiltraSoil1 = infiltraSoil1*f[9]
 		# % loss to partitioning to soil solids
-		# [1] calls second value in function
 		soilwater2soil1 = soilwaterPartition(f[8],f[9],ENM['elutionS1'],2)[1]
 		# % dissolution
 		dissolutionSoil1 = odeDissolution(DIS['percfitaGW1'],DIS['percfitbGW1'],f[9],f[20],ENM['kdisS1'],V[9])
 	else:
-		runoffSoil1 = 0
-		infiltraSoil1 = 0
 		soilwater2soil1 = 0
 		dissolutionSoil1 = 0
 
 	# % Soil 2
+	# % wind erosion
+	windErosionSoil2 = coef['windErosionSoil2']*f[10]
+	# % solid soil erosion
+	solidErosionSoil2 = coef['solidErosionSoil2']*f[10]
+	# % loss by partitioning to soil water
 	if presence['soil2']==1:
-		# % wind erosion
-		windErosionSoil2 = windErosion(climate['windspeed'][i],climate['precip'][i], env['roughness2'],\
-									   env['Kconstant2'],env['airP'],env['soilA2'],env['A2'],env['TSV2'],\
-									   env['TSVmin2'],env['z_wind2'],env['percWind2'],env['windConstant2'],\
-									   env['percUncovered2'],env['percSuspended2'],env['soilP2'],V[10])*f[10]
-		# % solid soil erosion
-		solidErosionSoil2 = erosion(climate['precip'][i],env['Kfact2'],env['lenslope2'],\
-									env['cropManageFactor2'],env['supportFactor2'],env['soilA2'],env['soilP2'])*np.true_divide(f[10],V[10])
-		# % loss by partitioning to soil water
 		soil2soilwater2 = soilwaterPartition(f[10],f[11],ENM['elutionS2'],1)[0]
 	else:
-		windErosionSoil2 = 0
-		solidErosionSoil2 = 0
 		soil2soilwater2 = 0
 
 	# % Soil Water 2
+	# % runoff
+	runoffSoil2 = coef['runoffSoil2']*f[11]
+	# % infiltration
+	infiltraSoil2 = coef['infiltraSoil2']*f[11]
 	if presence['soilW2']==1:
-		# % runoff
-		runoffSoil2 = runoff(climate['precip'][i],env['CN2'],env['soilA2'],V[10])*f[11]
-		# % infiltration
-		k_infil2, infiltraSoil2 = vertFlow(climate['precip'][i], env['CN2'], climate['evap'][i], env['FC2'], env['soilWC2'],
-										   env['soilV2'], env['soilA2'])
-		infiltraSoil2 = infiltraSoil2*f[11]
 		# % loss to partitioning to soil solids
 		soilwater2soil2 = soilwaterPartition(f[10],f[11],ENM['elutionS2'],2)[1]
 		# % dissolution
 		dissolutionSoil2 = odeDissolution(DIS['percfitaGW2'],DIS['percfitbGW2'],f[11],f[21],ENM['kdisS2'],V[11])
 	else:
-		runoffSoil2 = 0
-		infiltraSoil2 = 0
 		soilwater2soil2 = 0
 		dissolutionSoil2 = 0
 
 	# % Soil 3
+	# % wind erosion
+	windErosionSoil3 = coef['windErosionSoil3']*f[12]
+	# % solid soil erosion
+	solidErosionSoil3 = coef['solidErosionSoil3']*f[12]
+	# % loss by partitioning to soil water
 	if presence['soil3']==1:
-		# % wind erosion
-		windErosionSoil3 = windErosion(climate['windspeed'][i],climate['precip'][i], env['roughness3'],\
-									   env['Kconstant3'],env['airP'],env['soilA3'],env['A3'],env['TSV3'],\
-									   env['TSVmin3'],env['z_wind3'],env['percWind3'],env['windConstant3'],\
-									   env['percUncovered3'],env['percSuspended3'],env['soilP3'],V[12])*f[12]
-		# % solid soil erosion
-		solidErosionSoil3 = erosion(climate['precip'][i],env['Kfact3'],env['lenslope3'],\
-									env['cropManageFactor3'],env['supportFactor3'],env['soilA3'],env['soilP3'])*np.true_divide(f[12],V[12])
-		# % loss by partitioning to soil water
 		soil2soilwater3 = soilwaterPartition(f[12],f[13],ENM['elutionS3'],1)[0]
 	else:
-		windErosionSoil3 = 0
-		solidErosionSoil3 = 0
 		soil2soilwater3 = 0
 
 	# % Soil Water 3
+	# % runoff
+	runoffSoil3 = coef['runoffSoil3']*f[13]
+	# % infiltration
+	infiltraSoil3 = coef['infiltraSoil3']*f[13]
 	if presence['soilW3']==1:
-		# % runoff
-		runoffSoil3 = runoff(climate['precip'][i],env['CN3'],env['soilA3'],V[12])*f[13]
-		# % infiltration
-		k_infil3, infiltraSoil3 = vertFlow(climate['precip'][i], env['CN3'], climate['evap'][i], env['FC3'], env['soilWC3'],
-										   env['soilV3'], env['soilA3'])
-		infiltraSoil3 = infiltraSoil3*f[13]
 		# % loss to partitioning to soil solids
 		soilwater2soil3 = soilwaterPartition(f[12],f[13],ENM['elutionS3'],2)[1]
 		# % dissolution
 		dissolutionSoil3 = odeDissolution(DIS['percfitaGW3'],DIS['percfitbGW3'],f[13],f[22],ENM['kdisS3'],V[13])
 	else:
-		runoffSoil3 = 0
-		infiltraSoil3 = 0
 		soilwater2soil3 = 0
 		dissolutionSoil3 = 0
 
 	# % Soil 4
+	# % wind erosion
+	windErosionSoil4 = coef['windErosionSoil4']*f[14]
+	# % solid soil erosion
+	solidErosionSoil4 = coef['solidErosionSoil4']*f[14]
+	# % loss by partitioning to soil water
 	if presence['soil4']==1:
-		# % wind erosion
-		windErosionSoil4 = windErosion(climate['windspeed'][i],climate['precip'][i], env['roughness4'],env['Kconstant4'],\
-									   env['airP'],env['soilA4'],env['A4'],env['TSV4'],env['TSVmin4'],env['z_wind4'],\
-									   env['percWind4'],env['windConstant4'],env['percUncovered4'],env['percSuspended4'],\
-									   env['soilP4'],V[14])*f[14]
-		# % solid soil erosion
-		solidErosionSoil4 = erosion(climate['precip'][i],env['Kfact4'],env['lenslope4'],\
-									env['cropManageFactor4'],env['supportFactor4'],env['soilA4'],env['soilP4'])*np.true_divide(f[14],V[14])
-		# % loss by partitioning to soil water
 		soil2soilwater4 = soilwaterPartition(f[14],f[15],ENM['elutionS4'],1)[0]
 	else:
-		windErosionSoil4 = 0
-		solidErosionSoil4 = 0
 		soil2soilwater4 = 0
 
 	# % Soil Water 4
+	# % runoff
+	runoffSoil4 = coef['runoffSoil4']*f[15]
+	# % infiltration
+	infiltraSoil4 = coef['infiltraSoil4']*f[15]
 	if presence['soilW4']==1:
-		# % runoff
-		runoffSoil4 = runoff(climate['precip'][i],env['CN4'],env['soilA4'],V[14])*f[15]
-		# % infiltration
-		k_infil4, infiltraSoil4 = vertFlow(climate['precip'][i], env['CN4'], climate['evap'][i], env['FC4'], env['soilWC4'],
-										   env['soilV4'], env['soilA4'])
-		infiltraSoil4 = infiltraSoil4*f[15]
 		# % loss to partitioning to soil solids
 		soilwater2soil4 = soilwaterPartition(f[14],f[15],ENM['elutionS4'],2)[1]
 		# % dissolution
 		dissolutionSoil4 = odeDissolution(DIS['percfitaGW4'],DIS['percfitbGW4'],f[15],f[23],ENM['kdisS4'],V[15])
 	else:
-		runoffSoil4 = 0
-		infiltraSoil4 = 0
 		soilwater2soil4 = 0
 		dissolutionSoil4 = 0
-	
+
 	# % Dissolved FW mass transport
-	if presence['fw'] == 1:
-		advectionFWDis = waterAdv(climate['flow'][i],V[2],f[16]/V[2],env['freshwP'])*f[16]
-	else:
-		advectionFWDis = 0
-	
+	advectionFWDis = coef['advectionFWDis']*f[16]
 	# % Dissolved FW sediment mass transport
-	if presence['fw'] == 1:
-		advectionFWSedDis = waterAdv(climate['flow'][i],V[4],f[17]/V[4],env['sedFWP'])*env['fwadvfrac']*f[17]
-	else:
-		advectionFWSedDis = 0
-		
+	advectionFWSedDis = coef['advectionFWSedDis']*f[17]
 	# % Dissolved SW mass transport
-	if presence['sw'] == 1:
-		advectionSWDis = waterAdv(climate['flow'][i],V[5],f[18]/V[5],env['seawP'])*f[18]
-	else:
-		advectionSWDis = 0
-	
+	advectionSWDis = coef['advectionSWDis']*f[18]
 	# % Dissolved SW sediment mass transport
-	if presence['sw'] == 1:
-		advectionSWSedDis = waterAdv(climate['flow'][i],V[7],f[19]/V[7],env['sedSWP'])*env['fwadvfrac']*f[19]
-	else:
-		advectionSWSedDis = 0
-	
+	advectionSWSedDis = coef['advectionSWSedDis']*f[19]
+
 	# % Dissolved Soil Water 1 runoff
-	if presence['soil1'] == 1:
-		runoffSoilDis1 = runoff(climate['precip'][i],env['CN1'],env['soilA1'], V[8])*f[20]
-	else:
-		runoffSoilDis1 = 0
-	
+	runoffSoilDis1 = coef['runoffSoilDis1']*f[20]
 	# % Dissolved Soil Water 2 runoff
-	if presence['soil2'] == 1:
-		runoffSoilDis2 = runoff(climate['precip'][i],env['CN2'],env['soilA2'],V[10])*f[21]
-	else:
-		runoffSoilDis2 = 0
-	
+	runoffSoilDis2 = coef['runoffSoilDis2']*f[21]
 	# % Dissolved Soil Water 3 runoff
-	if presence['soil3'] == 1:
-		runoffSoilDis3 = runoff(climate['precip'][i],env['CN3'],env['soilA3'],V[12])*f[22]
-	else:
-		runoffSoilDis3 = 0
-	
+	runoffSoilDis3 = coef['runoffSoilDis3']*f[22]
 	# % Dissolved Soil Water 4 runoff
-	if presence['soil4'] == 1:
-		runoffSoilDis4 = runoff(climate['precip'][i],env['CN4'],env['soilA4'],V[14])*f[23]
-	else:
-		runoffSoilDis4 = 0
+	runoffSoilDis4 = coef['runoffSoilDis4']*f[23]
 
 	# deep soil 1
-	if presence['soil1'] == 1:
-		leachSoil1 = horiFlow(k_infil1, V[24]) * f[24]
-	else:
-		leachSoil1 = 0
-
+	leachSoil1 = coef['leachSoil1']*f[24]
 	# deep soil 2
-	if presence['soil2'] == 1:
-		leachSoil2 = horiFlow(k_infil2, V[25]) * f[25]
-	else:
-		leachSoil2 = 0
-
+	leachSoil2 = coef['leachSoil2']*f[25]
 	# deep soil 3
-	if presence['soil3'] == 1:
-		leachSoil3 = horiFlow(k_infil3, V[26]) * f[26]
-	else:
-		leachSoil3 = 0
-
+	leachSoil3 = coef['leachSoil3']*f[26]
 	# deep soil 4
-	if presence['soil4'] == 1:
-		leachSoil4 = horiFlow(k_infil4, V[27]) * f[27]
-	else:
-		leachSoil4 = 0
+	leachSoil4 = coef['leachSoil4']*f[27]
 
 
 	# %% Air compartment
 	# % entering air =  release vector data with independent values + advective transfer in from global environment
-	AirR=release['air'][i]+airAdvection(climate['windspeed'][i],env['area'],env['airH'],env['airV'],bgConc['gairc'],ENM['density'])
+	AirR=coef['AirR']
 	
 	# %  Air f(0)
 	# % loss from air is dry deposition, wet deposition,  attachment to aerosols,
-	# % and air advection
-	AirLoss = -(dryDepositionAir + wetDepositionAir + heteroaggregationAirAer + advectionAir)
+	# % and air advection (see nano_balance)
 	# % transfers into air
 	SW2Air = 0 #% seawater to air is zero unless no aerosols compartment
 	S2Air1 = 0 #% soil to air transfers are 0 unless there is no aerosols compartment
@@ -402,13 +409,12 @@ def ode_nano(t,f,i,V,presence,env,climate,ENM,release,bgConc,DIS,time):
 	# %% Aerosols compartment
 	# % entering aerosols = direct release + advective transfer in
 	# bgConc['gaerc_n'] is assumed to be zero
-	AerR=airAdvection(climate['windspeed'][i],env['area'],env['airH'],env['airV'],0,ENM['density'])
+	AerR=coef['AerR']
 	# % Aerosols f(1)
 	# % attachment to aerosols
 	A2Aer = heteroaggregationAirAer
 	
-	# % loss from aerosols includes wet and dry deposition and advection
-	AerLoss = -(dryDepositionAer + wetDepositionAer + advectionAer)
+	# % loss from aerosols includes wet and dry deposition and advection (see nano_balance)
 	
 	# % transfer from seawater to aerosols by wind resuspension
 	SW2Aer = aerosolizationSW #% if no aerosols this goes straight into air
@@ -436,9 +442,9 @@ def ode_nano(t,f,i,V,presence,env,climate,ENM,release,bgConc,DIS,time):
 	# % loss from freshwater includes sedimentation, dissolution,
 	# % heteroaggregation, and advective flow
 	if presence['fw'] == 1:
-		FWLoss = -(sedimentationFW + heteroaggregationFW + advectionFW + dissolutionFW[1])
+		dissolutionFWLoss = dissolutionFW[1]
 	else:
-		FWLoss = -(sedimentationFW + heteroaggregationFW + advectionFW)
+		dissolutionFWLoss = 0
 	# % runoff from soil water to freshwater
 	Sw2FW1 = runoffSoil1 #% if no freshwater rerouted to marine, if no marine just a loss
 	Sw2FW2 = runoffSoil2
@@ -489,8 +495,7 @@ def ode_nano(t,f,i,V,presence,env,climate,ENM,release,bgConc,DIS,time):
 	Aer2FW = dryDepositionAer*np.true_divide(env['freshwA'],env['area']) + wetDepositionAer*np.true_divide(env['freshwA'],env['area'])
 	# % transfer to suspended sediment via heteroaggregation
 	FW2SS = heteroaggregationFW
-	# % loss from freshwater suspended sediment via deposition and advective flow
-	FWSSLoss = -(sedimentationFWSS + advectionFWSS)
+	# % loss from freshwater suspended sediment via deposition and advective flow (see nano_balance)
 	
 	# % if no freshwater suspended sediment, these are rerouted to freshwater
 	# % resuspension from sediment
@@ -519,15 +524,21 @@ def ode_nano(t,f,i,V,presence,env,climate,ENM,release,bgConc,DIS,time):
 	FWSS2Sed = sedimentationFWSS
 	# % loss from sediment by resuspension, burial, dissolution, and advective
 	# % transfer
-	if presence['fw'] == 1:
-		FWSedLoss = -(resuspensionFWSed + burialFWSed + advectionFWSed + dissolutionFWSed[1])
+	resuspensionFWSedLoss = resuspensionFWSed
+	burialFWSedLoss = burialFWSed
+	advectionFWSedLoss = advectionFWSed
+	if presence['fw'] == 1 and presence['fSed'] == 1:
+		dissolutionFWSedLoss = dissolutionFWSed[1]
 	else:
-		FWSedLoss = -(resuspensionFWSed + burialFWSed + advectionFWSed)
+		dissolutionFWSedLoss = 0
 	# % If there is no sediment compartment, no transfers
 	if presence['fSed']==0:
 		FW2Sed=0
 		FWSS2Sed=0
-		FWSedLoss=0
+		resuspensionFWSedLoss=0
+		burialFWSedLoss=0
+		advectionFWSedLoss=0
+		dissolutionFWSedLoss=0
 
 
 	# %% Seawater
@@ -542,9 +553,9 @@ def ode_nano(t,f,i,V,presence,env,climate,ENM,release,bgConc,DIS,time):
 	# % loss processes from seawater include sedimentation, dissolution,
 	# % heteroaggregation, aerosolization, and advective flow out
 	if presence['sw'] == 1:
-		SWLoss = -(sedimentationSW + heteroaggregationSW + aerosolizationSW + advectionSW + dissolutionSW[1])
+		dissolutionSWLoss = dissolutionSW[1]
 	else: 
-		SWLoss = -(sedimentationSW + heteroaggregationSW + aerosolizationSW + advectionSW)
+		dissolutionSWLoss = 0
 	# % resuspension to seawater from sediment
 	Sed2SW = 0 #% sed to seawater is 0 unless there is no seawater suspended sediment compartment
 	if presence['sSS']==0:
@@ -593,9 +604,7 @@ def ode_nano(t,f,i,V,presence,env,climate,ENM,release,bgConc,DIS,time):
 	# % heteroaggregation with suspended sediment
 	SW2SS = heteroaggregationSW
 	# % losses from sw suspended sediment include sedimentation and advective
-	# % flow
-	SWSSLoss = -(sedimentationSWSS + advectionSWSS)
-	# print SWSSLoss
+	# % flow (see nano_balance)
 	# % resuspension of sediment
 	Sed2SWSS = resuspensionSWSed # % sed to seawater suspended sediment rerouted to seawater if no suspended sediment compartment
 	# % soil to seawater suspended sediment is 0 unless there is no freshwater suspended sediment and no freshwater compartments
@@ -633,15 +642,20 @@ def ode_nano(t,f,i,V,presence,env,climate,ENM,release,bgConc,DIS,time):
 	FWSed2SWsed = advectionFWSed
 	# % loss from sediment include resuspension, burial, advection and
 	# % dissolution
-	if presence['sw'] == 1:
-		SWSedLoss = -(resuspensionSWSed + burialSWSed + advectionSWSed + dissolutionSWSed[1])
+	resuspensionSWSedLoss = resuspensionSWSed
+	burialSWSedLoss = burialSWSed
+	advectionSWSedLoss = advectionSWSed
+	if presence['sw'] == 1 and presence['sSed'] == 1:
+		dissolutionSWSedLoss = dissolutionSWSed[1]
 	else: 
-		SWSedLoss = -(resuspensionSWSed + burialSWSed + advectionSWSed)
+		dissolutionSWSedLoss = 0
 	# % if there is no sediment, no transfers occur
 	if presence['sSed']==0:
 		SW2Sed=0
 		SWSS2Sed=0
-		SWSedLoss=0
+		resuspensionSWSedLoss=0
+		burialSWSedLoss=0
+		advectionSWSedLoss=0
 		FWSed2SWsed=0
 
 
@@ -655,8 +669,7 @@ def ode_nano(t,f,i,V,presence,env,climate,ENM,release,bgConc,DIS,time):
 	# % dry deposition from aerosols
 	Aer2Soil1 = dryDepositionAer*np.true_divide(env['soilA1'],env['area'])
 	# % loss from soil includes wind erosion, soil erosion, and partitioning to
-	# % soil water
-	SLoss1 = -(windErosionSoil1 + solidErosionSoil1 + soil2soilwater1)
+	# % soil water (see nano_balance)
 	# % gain by paritioning from soil water
 	SW2S1 = soilwater2soil1
 	# % if there is no soil, there are no transfers
@@ -675,10 +688,10 @@ def ode_nano(t,f,i,V,presence,env,climate,ENM,release,bgConc,DIS,time):
 	S2SW1 = soil2soilwater1
 	# % losses from runoff, dissolution, transfer to deep soil, partitoning to
 	# % soil solids
-	if presence['soil1'] == 1:
-		SWLoss1 = -(runoffSoil1 + infiltraSoil1 + dissolutionSoil1[1] + soilwater2soil1)
+	if presence['soil1'] == 1 and presence['soilW1'] == 1:
+		dissolutionSoil1Loss = dissolutionSoil1[1]
 	else:
-		SWLoss1 = -(runoffSoil1 + infiltraSoil1 + soilwater2soil1)
+		dissolutionSoil1Loss = 0
 	# % if no soil water, no transfers
 	if presence['soilW1']==0:
 		A2SW1=0
@@ -696,8 +709,7 @@ def ode_nano(t,f,i,V,presence,env,climate,ENM,release,bgConc,DIS,time):
 	# % dry deposition from aerosols
 	Aer2Soil2 = dryDepositionAer*np.true_divide(env['soilA2'],env['area'])
 	# % loss from soil includes wind erosion, soil erosion, and partitioning to
-	# % soil water
-	SLoss2 = -(windErosionSoil2 + solidErosionSoil2 + soil2soilwater2)
+	# % soil water (see nano_balance)
 	# % gain by paritioning from soil water
 	SW2S2 = soilwater2soil2
 	# % if there is no soil, there are no transfers
@@ -716,10 +728,10 @@ def ode_nano(t,f,i,V,presence,env,climate,ENM,release,bgConc,DIS,time):
 	S2SW2 = soil2soilwater2
 	# % losses from runoff, dissolution, transfer to deep soil, partitoning to
 	# % soil solids
-	if presence['soil2'] == 1:
-		SWLoss2 = -(runoffSoil2 + infiltraSoil2 + dissolutionSoil2[1] + soilwater2soil2)
+	if presence['soil2'] == 1 and presence['soilW2'] == 1:
+		dissolutionSoil2Loss = dissolutionSoil2[1]
 	else:
-		SWLoss2 = -(runoffSoil2 + infiltraSoil2 + soilwater2soil2)
+		dissolutionSoil2Loss = 0
 	# % if no soil water, no transfers
 	if presence['soilW2']==0:
 		A2SW2=0
@@ -737,8 +749,7 @@ def ode_nano(t,f,i,V,presence,env,climate,ENM,release,bgConc,DIS,time):
 	# % dry deposition from aerosols
 	Aer2Soil3 = dryDepositionAer*np.true_divide(env['soilA3'],env['area'])
 	# % loss from soil includes wind erosion, soil erosion, and partitioning to
-	# % soil water
-	SLoss3 = -(windErosionSoil3 + solidErosionSoil3 + soil2soilwater3)
+	# % soil water (see nano_balance)
 	# % gain by paritioning from soil water
 	SW2S3 = soilwater2soil3
 	# % if there is no soil, there are no transfers
@@ -757,10 +768,10 @@ def ode_nano(t,f,i,V,presence,env,climate,ENM,release,bgConc,DIS,time):
 	S2SW3 = soil2soilwater3
 	# % losses from runoff, dissolution, transfer to deep soil, partitoning to
 	# % soil solids
-	if presence['soil3'] == 1:
-		SWLoss3 = -(runoffSoil3 + infiltraSoil3 + dissolutionSoil3[1] + soilwater2soil3)
+	if presence['soil3'] == 1 and presence['soilW3'] == 1:
+		dissolutionSoil3Loss = dissolutionSoil3[1]
 	else:
-		SWLoss3 = -(runoffSoil3 + infiltraSoil3 + soilwater2soil3)
+		dissolutionSoil3Loss = 0
 	# % if no soil water, no transfers
 	if presence['soilW3']==0:
 		A2SW3=0
@@ -778,8 +789,7 @@ def ode_nano(t,f,i,V,presence,env,climate,ENM,release,bgConc,DIS,time):
 	# % dry deposition from aerosols
 	Aer2Soil4 = dryDepositionAer*np.true_divide(env['soilA4'],env['area'])
 	# % loss from soil includes wind erosion, soil erosion, and partitioning to
-	# % soil water
-	SLoss4 = -(windErosionSoil4 + solidErosionSoil4 + soil2soilwater4)
+	# % soil water (see nano_balance)
 	# % gain by paritioning from soil water
 	SW2S4 = soilwater2soil4
 	# % if there is no soil, there are no transfers
@@ -798,39 +808,35 @@ def ode_nano(t,f,i,V,presence,env,climate,ENM,release,bgConc,DIS,time):
 	S2SW4 = soil2soilwater4
 	# % losses from runoff, dissolution, transfer to deep soil, partitoning to
 	# % soil solids
-	if presence['soil4'] == 1:
-		SWLoss4 = -(runoffSoil4 + infiltraSoil4 + dissolutionSoil4[1] + soilwater2soil4)
+	if presence['soil4'] == 1 and presence['soilW4'] == 1:
+		dissolutionSoil4Loss = dissolutionSoil4[1]
 	else:
-		SWLoss4 = -(runoffSoil4 + infiltraSoil4 + soilwater2soil4)	# % if no soil water, no transfers
+		dissolutionSoil4Loss = 0
+	# % if no soil water, no transfers
 	if presence['soilW4']==0:
 		A2SW4=0
 		Aer2SW4=0
 		S2SW4=0
 	
 	# %% Freshwater Dissolved f16
-	# % Loss from dissolved advection
-	FWDisLoss = -(advectionFWDis)
+	# % Loss from dissolved advection (see nano_balance)
 	# % Freshwater dissolved
 	if presence['fw'] == 1:
 		FW2Dis = dissolutionFW[0]
 	else:
 		FW2Dis = 0
-	# % runoff to freshwater
-	Soil2FWDis = runoffSoilDis1 + runoffSoilDis2 + runoffSoilDis3 + runoffSoilDis4
-
+	# % runoff to freshwater from the dissolved soil water 1-4 (see nano_balance)
 	
 	# %% Freshwater Sediment Dissolved f17
-	# % Loss from dissolved advection
-	FWSedDisLoss = -(advectionFWSedDis)
+	# % Loss from dissolved advection (see nano_balance)
 	# % Freshwater sediment dissolved 
-	if presence['fw'] == 1:
+	if presence['fw'] == 1 and presence['fSed'] == 1:
 		FWSed2Dis = dissolutionFWSed[0]
 	else:
 		FWSed2Dis = 0
 		
 	# %% Marine Dissolved f18
-	# % loss from dissolved advection
-	SWDisLoss = -(advectionSWDis)
+	# % loss from dissolved advection (see nano_balance)
 	# % marine dissolved
 	if presence['sw'] == 1:
 		sw2Dis = dissolutionSW[0]
@@ -842,11 +848,10 @@ def ode_nano(t,f,i,V,presence,env,climate,ENM,release,bgConc,DIS,time):
 
 	
 	# %% Marine Sediment Dissolved f19
-	# % loss from dissolved advection
-	SWSedDisLoss = -(advectionSWSedDis)
+	# % loss from dissolved advection (see nano_balance)
 	# % marine dissolved
 	if presence['sw'] == 1:
-		SWSed2Dis = dissolutionSWSed[0]
+		SWSed2Dis = dissolutionSWSed[0] if presence['sSed'] == 1 else 0
 		# % freshwater sediment to marine sediment
 		FWSed2SWSedDis = advectionFWSedDis
 	else:
@@ -855,92 +860,381 @@ def ode_nano(t,f,i,V,presence,env,climate,ENM,release,bgConc,DIS,time):
 
 
 	# %% Soil Water 1 Dissolved f20
-	# % loss from runoff
-	SW1DisLoss = -(runoffSoilDis1)
+	# % loss from runoff (see nano_balance)
 	# % dissolution
-	if presence['soil1'] ==1:
+	if presence['soil1'] == 1 and presence['soilW1'] == 1:
 		SW1Dis = dissolutionSoil1[0]
 	else:
 		SW1Dis = 0
 	
 	# %% Soil Water 2 Dissolved f21
-	# % loss from runoff
-	SW2DisLoss = -(runoffSoilDis2)
+	# % loss from runoff (see nano_balance)
 	# % dissolution
-	if presence['soil2'] == 1:
+	if presence['soil2'] == 1 and presence['soilW2'] == 1:
 		SW2Dis = dissolutionSoil2[0]
 	else:
 		SW2Dis = 0
 	
 	# %% Soil Water 3 Dissolved f22
-	# % loss from runoff
-	SW3DisLoss = -(runoffSoilDis3)
+	# % loss from runoff (see nano_balance)
 	# % dissolution
-	if presence['soil3'] == 1:
+	if presence['soil3'] == 1 and presence['soilW3'] == 1:
 		SW3Dis = dissolutionSoil3[0]
 	else:
 		SW3Dis = 0
 	
 	# %% Soil Water 4 Dissolved f23
-	# % loss from runoff
-	SW4DisLoss = -(runoffSoilDis4)
+	# % loss from runoff (see nano_balance)
 	# % dissolution
-	if presence['soil4'] == 1:
+	if presence['soil4'] == 1 and presence['soilW4'] == 1:
 		SW4Dis = dissolutionSoil4[0]
 	else:
 		SW4Dis = 0
 
 		
-	#transferValues=np.array([dryDepositionAir,wetDepositionAir,heteroaggregationAirAer,advectionAir,dryDepositionAer,
-	#	wetDepositionAer,advectionAer,sedimentationFW,heteroaggregationFW,advectionFW,dissolutionFW,sedimentationFWSS,
-	#	advectionFWSS,resuspensionFWSed,burialFWSed,advectionFWSed,dissolutionFWSed,sedimentationSW,heteroaggregationSW,
-	#	aerosolizationSW,advectionSW,dissolutionSW,sedimentationSWSS,advectionSWSS,resuspensionSWSed,burialSWSed,
-	#	advectionSWSed,dissolutionSWSed,windErosionSoil1,solidErosionSoil1,soil2soilwater1,runoffSoil1,infiltraSoil1,
-	#	soilwater2soil1,dissolutionSoil1,windErosionSoil2,solidErosionSoil2,soil2soilwater2,runoffSoil2,infiltraSoil2,
-	#	soilwater2soil2,dissolutionSoil2,windErosionSoil3,solidErosionSoil3,soil2soilwater3,runoffSoil3,infiltraSoil3,
-	#	soilwater2soil3,dissolutionSoil3,windErosionSoil4,solidErosionSoil4,soil2soilwater4,runoffSoil4,infiltraSoil4,
-	#	soilwater2soil4,dissolutionSoil4])
-	
-	#with open('/Users/kgarner/Documents/Python/Python/Nano_Model/Solve_py/transferValues.csv','ab') as f:
-	#	writer=csv.writer(f)
-	#	writer.writerow(transferValues)
-
-
-	# %% total results
-	results=[
-		AirR + AirLoss + SW2Air + S2Air1 + S2Air2 + S2Air3 + S2Air4,
-		AerR + A2Aer + AerLoss + SW2Aer + S2Aer1 + S2Aer2 + S2Aer3 + S2Aer4,
-		FwR + A2FW + FWLoss + Sw2FW1 + Sw2FW2 + Sw2FW3 + Sw2FW4 + Sed2FW + S2FW1_noSS + S2FW2_noSS + S2FW3_noSS +
-		S2FW4_noSS + deepS2FW1 + deepS2FW2 + deepS2FW3 + deepS2FW4,
-		FwSSR + Aer2FW + FW2SS + FWSSLoss + Sed2FWSS + S2FW1 + S2FW2 + S2FW3 + S2FW4,
-		FwSedR + FW2Sed + FWSS2Sed + FWSedLoss,
-		SwR + A2SW + FW2SW + SWLoss + Sed2SW + Sw2SW1 + Sw2SW2 + Sw2SW3 + Sw2SW4 + S2SW1_noSS + S2SW2_noSS + S2SW3_noSS + S2SW4_noSS,
-		SwSSR + Aer2SW + FWSS2SWSS + SW2SS + SWSSLoss + Sed2SWSS + S2SWSS1 + S2SWSS2 + S2SWSS3 + S2SWSS4,
-		SwSedR + FWSed2SWsed + SW2Sed + SWSS2Sed + SWSedLoss,
-		S1R + A2Soil1 + Aer2Soil1 + SLoss1 + SW2S1,
-		A2SW1 + Aer2SW1 + S2SW1 + SWLoss1,
-		S2R + A2Soil2 + Aer2Soil2 + SLoss2 + SW2S2,
-		A2SW2 + Aer2SW2 + S2SW2 + SWLoss2,
-		S3R + A2Soil3 + Aer2Soil3 + SLoss3 + SW2S3,
-		A2SW3 + Aer2SW3 + S2SW3 + SWLoss3,
-		S4R + A2Soil4 + Aer2Soil4 + SLoss4 + SW2S4,
-		A2SW4 + Aer2SW4 + S2SW4 + SWLoss4,
-		FW2Dis + FWDisLoss + Soil2FWDis,
-		FWSed2Dis + FWSedDisLoss,
-		sw2Dis + SWDisLoss + FW2SWDis,
-		SWSed2Dis + SWSedDisLoss + FWSed2SWSedDis,
-		SW1Dis + SW1DisLoss,
-		SW2Dis + SW2DisLoss,
-		SW3Dis + SW3DisLoss,
-		SW4Dis + SW4DisLoss,
-		infiltraSoil1 - leachSoil1,
-		infiltraSoil2 - leachSoil2,
-		infiltraSoil3 - leachSoil3,
-		infiltraSoil4 - leachSoil4
-	]
+	# %% fluxes by name (ng/day), combined to the change of each compartment by nano_balance
+	fluxes = {
+		'AirR': AirR, 'SW2Air': SW2Air, 'S2Air1': S2Air1, 'S2Air2': S2Air2, 'S2Air3': S2Air3, 'S2Air4': S2Air4,
+		'dryDepositionAir': dryDepositionAir, 'wetDepositionAir': wetDepositionAir,
+		'heteroaggregationAirAer': heteroaggregationAirAer, 'advectionAir': advectionAir, 'AerR': AerR, 'A2Aer': A2Aer,
+		'SW2Aer': SW2Aer, 'S2Aer1': S2Aer1, 'S2Aer2': S2Aer2, 'S2Aer3': S2Aer3, 'S2Aer4': S2Aer4,
+		'dryDepositionAer': dryDepositionAer, 'wetDepositionAer': wetDepositionAer, 'advectionAer': advectionAer,
+		'FwR': FwR, 'A2FW': A2FW, 'Sw2FW1': Sw2FW1, 'Sw2FW2': Sw2FW2, 'Sw2FW3': Sw2FW3, 'Sw2FW4': Sw2FW4,
+		'Sed2FW': Sed2FW, 'S2FW1_noSS': S2FW1_noSS, 'S2FW2_noSS': S2FW2_noSS, 'S2FW3_noSS': S2FW3_noSS,
+		'S2FW4_noSS': S2FW4_noSS, 'deepS2FW1': deepS2FW1, 'deepS2FW2': deepS2FW2, 'deepS2FW3': deepS2FW3,
+		'deepS2FW4': deepS2FW4, 'sedimentationFW': sedimentationFW, 'heteroaggregationFW': heteroaggregationFW,
+		'advectionFW': advectionFW, 'dissolutionFWLoss': dissolutionFWLoss, 'FwSSR': FwSSR, 'Aer2FW': Aer2FW,
+		'FW2SS': FW2SS, 'Sed2FWSS': Sed2FWSS, 'S2FW1': S2FW1, 'S2FW2': S2FW2, 'S2FW3': S2FW3, 'S2FW4': S2FW4,
+		'sedimentationFWSS': sedimentationFWSS, 'advectionFWSS': advectionFWSS, 'FwSedR': FwSedR, 'FW2Sed': FW2Sed,
+		'FWSS2Sed': FWSS2Sed, 'resuspensionFWSedLoss': resuspensionFWSedLoss, 'burialFWSedLoss': burialFWSedLoss,
+		'advectionFWSedLoss': advectionFWSedLoss, 'dissolutionFWSedLoss': dissolutionFWSedLoss, 'SwR': SwR, 'A2SW': A2SW,
+		'FW2SW': FW2SW, 'Sed2SW': Sed2SW, 'Sw2SW1': Sw2SW1, 'Sw2SW2': Sw2SW2, 'Sw2SW3': Sw2SW3, 'Sw2SW4': Sw2SW4,
+		'S2SW1_noSS': S2SW1_noSS, 'S2SW2_noSS': S2SW2_noSS, 'S2SW3_noSS': S2SW3_noSS, 'S2SW4_noSS': S2SW4_noSS,
+		'sedimentationSW': sedimentationSW, 'heteroaggregationSW': heteroaggregationSW,
+		'aerosolizationSW': aerosolizationSW, 'advectionSW': advectionSW, 'dissolutionSWLoss': dissolutionSWLoss,
+		'SwSSR': SwSSR, 'Aer2SW': Aer2SW, 'FWSS2SWSS': FWSS2SWSS, 'SW2SS': SW2SS, 'Sed2SWSS': Sed2SWSS,
+		'S2SWSS1': S2SWSS1, 'S2SWSS2': S2SWSS2, 'S2SWSS3': S2SWSS3, 'S2SWSS4': S2SWSS4,
+		'sedimentationSWSS': sedimentationSWSS, 'advectionSWSS': advectionSWSS, 'SwSedR': SwSedR,
+		'FWSed2SWsed': FWSed2SWsed, 'SW2Sed': SW2Sed, 'SWSS2Sed': SWSS2Sed,
+		'resuspensionSWSedLoss': resuspensionSWSedLoss, 'burialSWSedLoss': burialSWSedLoss,
+		'advectionSWSedLoss': advectionSWSedLoss, 'dissolutionSWSedLoss': dissolutionSWSedLoss, 'S1R': S1R,
+		'A2Soil1': A2Soil1, 'Aer2Soil1': Aer2Soil1, 'SW2S1': SW2S1, 'windErosionSoil1': windErosionSoil1,
+		'solidErosionSoil1': solidErosionSoil1, 'soil2soilwater1': soil2soilwater1, 'A2SW1': A2SW1, 'Aer2SW1': Aer2SW1,
+		'S2SW1': S2SW1, 'runoffSoil1': runoffSoil1, 'infiltraSoil1': infiltraSoil1,
+		'dissolutionSoil1Loss': dissolutionSoil1Loss, 'soilwater2soil1': soilwater2soil1, 'S2R': S2R, 'A2Soil2': A2Soil2,
+		'Aer2Soil2': Aer2Soil2, 'SW2S2': SW2S2, 'windErosionSoil2': windErosionSoil2,
+		'solidErosionSoil2': solidErosionSoil2, 'soil2soilwater2': soil2soilwater2, 'A2SW2': A2SW2, 'Aer2SW2': Aer2SW2,
+		'S2SW2': S2SW2, 'runoffSoil2': runoffSoil2, 'infiltraSoil2': infiltraSoil2,
+		'dissolutionSoil2Loss': dissolutionSoil2Loss, 'soilwater2soil2': soilwater2soil2, 'S3R': S3R, 'A2Soil3': A2Soil3,
+		'Aer2Soil3': Aer2Soil3, 'SW2S3': SW2S3, 'windErosionSoil3': windErosionSoil3,
+		'solidErosionSoil3': solidErosionSoil3, 'soil2soilwater3': soil2soilwater3, 'A2SW3': A2SW3, 'Aer2SW3': Aer2SW3,
+		'S2SW3': S2SW3, 'runoffSoil3': runoffSoil3, 'infiltraSoil3': infiltraSoil3,
+		'dissolutionSoil3Loss': dissolutionSoil3Loss, 'soilwater2soil3': soilwater2soil3, 'S4R': S4R, 'A2Soil4': A2Soil4,
+		'Aer2Soil4': Aer2Soil4, 'SW2S4': SW2S4, 'windErosionSoil4': windErosionSoil4,
+		'solidErosionSoil4': solidErosionSoil4, 'soil2soilwater4': soil2soilwater4, 'A2SW4': A2SW4, 'Aer2SW4': Aer2SW4,
+		'S2SW4': S2SW4, 'runoffSoil4': runoffSoil4, 'infiltraSoil4': infiltraSoil4,
+		'dissolutionSoil4Loss': dissolutionSoil4Loss, 'soilwater2soil4': soilwater2soil4, 'FW2Dis': FW2Dis,
+		'runoffSoilDis1': runoffSoilDis1, 'runoffSoilDis2': runoffSoilDis2, 'runoffSoilDis3': runoffSoilDis3,
+		'runoffSoilDis4': runoffSoilDis4, 'advectionFWDis': advectionFWDis, 'FWSed2Dis': FWSed2Dis,
+		'advectionFWSedDis': advectionFWSedDis, 'sw2Dis': sw2Dis, 'FW2SWDis': FW2SWDis, 'advectionSWDis': advectionSWDis,
+		'SWSed2Dis': SWSed2Dis, 'FWSed2SWSedDis': FWSed2SWSedDis, 'advectionSWSedDis': advectionSWSedDis,
+		'SW1Dis': SW1Dis, 'SW2Dis': SW2Dis, 'SW3Dis': SW3Dis, 'SW4Dis': SW4Dis, 'leachSoil1': leachSoil1,
+		'leachSoil2': leachSoil2, 'leachSoil3': leachSoil3, 'leachSoil4': leachSoil4
+	}
+	capacity = [1]*len(nano_balance)
+
+	return fluxes, capacity
+
+
+# %% mass balance of the compartments: fluxes entering and leaving each compartment
+nano_balance = [
+	# % air f(0)
+	(['AirR', 'SW2Air', 'S2Air1', 'S2Air2', 'S2Air3', 'S2Air4'],
+		['dryDepositionAir', 'wetDepositionAir', 'heteroaggregationAirAer', 'advectionAir']),
+	# % aerosols f(1)
+	(['AerR', 'A2Aer', 'SW2Aer', 'S2Aer1', 'S2Aer2', 'S2Aer3', 'S2Aer4'],
+		['dryDepositionAer', 'wetDepositionAer', 'advectionAer']),
+	# % freshwater f(2)
+	(['FwR', 'A2FW', 'Sw2FW1', 'Sw2FW2', 'Sw2FW3', 'Sw2FW4', 'Sed2FW', 'S2FW1_noSS', 'S2FW2_noSS', 'S2FW3_noSS',
+		'S2FW4_noSS', 'deepS2FW1', 'deepS2FW2', 'deepS2FW3', 'deepS2FW4'],
+		['sedimentationFW', 'heteroaggregationFW', 'advectionFW', 'dissolutionFWLoss']),
+	# % freshwater suspended sediment f(3)
+	(['FwSSR', 'Aer2FW', 'FW2SS', 'Sed2FWSS', 'S2FW1', 'S2FW2', 'S2FW3', 'S2FW4'],
+		['sedimentationFWSS', 'advectionFWSS']),
+	# % freshwater sediment f(4)
+	(['FwSedR', 'FW2Sed', 'FWSS2Sed'],
+		['resuspensionFWSedLoss', 'burialFWSedLoss', 'advectionFWSedLoss', 'dissolutionFWSedLoss']),
+	# % seawater f(5)
+	(['SwR', 'A2SW', 'FW2SW', 'Sed2SW', 'Sw2SW1', 'Sw2SW2', 'Sw2SW3', 'Sw2SW4', 'S2SW1_noSS', 'S2SW2_noSS',
+		'S2SW3_noSS', 'S2SW4_noSS'],
+		['sedimentationSW', 'heteroaggregationSW', 'aerosolizationSW', 'advectionSW', 'dissolutionSWLoss']),
+	# % seawater suspended sediment f(6)
+	(['SwSSR', 'Aer2SW', 'FWSS2SWSS', 'SW2SS', 'Sed2SWSS', 'S2SWSS1', 'S2SWSS2', 'S2SWSS3', 'S2SWSS4'],
+		['sedimentationSWSS', 'advectionSWSS']),
+	# % seawater sediment f(7)
+	(['SwSedR', 'FWSed2SWsed', 'SW2Sed', 'SWSS2Sed'],
+		['resuspensionSWSedLoss', 'burialSWSedLoss', 'advectionSWSedLoss', 'dissolutionSWSedLoss']),
+]
+# % soil solids and soil water 1-4 f(8)-f(15)
+for n in ['1', '2', '3', '4']:
+	nano_balance.append((['S' + n + 'R', 'A2Soil' + n, 'Aer2Soil' + n, 'SW2S' + n],
+		['windErosionSoil' + n, 'solidErosionSoil' + n, 'soil2soilwater' + n]))
+	nano_balance.append((['A2SW' + n, 'Aer2SW' + n, 'S2SW' + n],
+		['runoffSoil' + n, 'infiltraSoil' + n, 'dissolutionSoil' + n + 'Loss', 'soilwater2soil' + n]))
+nano_balance += [
+	# % dissolved freshwater, freshwater sediment, seawater and seawater sediment f(16)-f(19)
+	(['FW2Dis', 'runoffSoilDis1', 'runoffSoilDis2', 'runoffSoilDis3', 'runoffSoilDis4'], ['advectionFWDis']),
+	(['FWSed2Dis'], ['advectionFWSedDis']),
+	(['sw2Dis', 'FW2SWDis'], ['advectionSWDis']),
+	(['SWSed2Dis', 'FWSed2SWSedDis'], ['advectionSWSedDis']),
+]
+# % dissolved soil water 1-4 f(20)-f(23)
+for n in ['1', '2', '3', '4']:
+	nano_balance.append((['SW' + n + 'Dis'], ['runoffSoilDis' + n]))
+# % deep soil 1-4 f(24)-f(27)
+for n in ['1', '2', '3', '4']:
+	nano_balance.append((['infiltraSoil' + n], ['leachSoil' + n]))
+
+nano_flux_names, nano_incidence = incidence_matrix(nano_balance)
+
+
+def ode_nano(t,f,i,V,presence,env,climate,ENM,release,bgConc,DIS,time,coef=None):
+	# %   Differential equation solver for ENM mass in all compartments
+	# %   t is time, f is the mass by compartment and day, i is the iteration in
+	# %   the for loop - so the time step, V is the volume vector
+	# %   coef are the daily coefficients from nano_coefficients, computed here when not given
+	fluxes, capacity = nano_fluxes(f,i,V,presence,env,climate,ENM,release,bgConc,DIS,time,coef)
+	return flux_derivative(nano_incidence,nano_flux_names,fluxes,capacity)
+
+
+def ode_nano_jac(t,f,i,V,presence,env,climate,ENM,release,bgConc,DIS,time,coef=None):
+	# %   Jacobian of ode_nano with respect to the mass vector f, J[row, col] = d results[row] / d f[col]
+	# %   Every process is first order in the mass of its source compartment except advection
+	# %   in air (quadratic in f(0)), dissolution and soil/soil water partitioning, which are
+	# %   piecewise and use the derivatives from odeDissolutionJac and soilwaterPartitionJac
+	# %   Takes the same arguments as ode_nano so it can be passed to the solver as jac
+	# %   and reuses the daily coefficients from nano_coefficients
+	J = np.zeros((len(f), len(f)))
+	noDis = [[0, 0], [0, 0]]
+
+	# %% Rate constants (1/day) of each process, 0 when the compartment is absent
+	if coef is None:
+		coef = nano_coefficients(i,V,presence,env,climate,ENM,release,bgConc)
+	# % Air, advectionAir = coef*f(0)*f(0), so the derivative is twice the rate
+	kDryDepAir = coef['dryDepositionAir']
+	kWetDepAir = coef['wetDepositionAir']
+	kHetAggAir = coef['heteroaggregationAirAer']
+	kAdvAir = 2*coef['advectionAir']*f[0]
 
-	
-	return results
+	# % Aerosols
+	kDryDepAer = coef['dryDepositionAer']
+	kWetDepAer = coef['wetDepositionAer']
+	kAdvAer = coef['advectionAer']
+
+	# % Freshwater
+	kSedFW = coef['sedimentationFW']
+	kHetAggFW = coef['heteroaggregationFW']
+	kAdvFW = coef['advectionFW']
+	jDisFW = noDis
+	if presence['fw']==1:
+		jDisFW = odeDissolutionJac(DIS['percfitaFW'],DIS['percfitbFW'],f[2],f[16],ENM['kdisFW'],V[2])
+
+	# % Freshwater Suspended Sediment
+	kSedFWSS = coef['sedimentationFWSS']
+	kAdvFWSS = coef['advectionFWSS']
+
+	# % Freshwater Sediment
+	kResuspFWSed = coef['resuspensionFWSed']
+	kBurialFWSed = coef['burialFWSed']
+	kAdvFWSed = coef['advectionFWSed']
+	jDisFWSed = noDis
+	# % dissolution in sediment only enters the balance when there is freshwater
+	if presence['fSed']==1 and presence['fw']==1:
+		jDisFWSed = odeDissolutionJac(DIS['percfitaFW'],DIS['percfitbFW'],f[4],f[17],ENM['kdisFWsed'],V[4])
+
+	# % Seawater
+	kSedSW = coef['sedimentationSW']
+	kHetAggSW = coef['heteroaggregationSW']
+	kAerosolSW = coef['aerosolizationSW']
+	kAdvSW = coef['advectionSW']
+	jDisSW = noDis
+	if presence['sw']==1:
+		jDisSW = odeDissolutionJac(DIS['percfitaSW'],DIS['percfitbSW'],f[5],f[18],ENM['kdisSW'],V[5])
+
+	# % Seawater suspended sediment
+	kSedSWSS = coef['sedimentationSWSS']
+	kAdvSWSS = coef['advectionSWSS']
+
+	# % Seawater sediment
+	kResuspSWSed = coef['resuspensionSWSed']
+	kBurialSWSed = coef['burialSWSed']
+	kAdvSWSed = coef['advectionSWSed']
+	jDisSWSed = noDis
+	if presence['sSed']==1 and presence['sw']==1:
+		jDisSWSed = odeDissolutionJac(DIS['percfitaSW'],DIS['percfitbSW'],f[7],f[19],ENM['kdisSWsed'],V[7])
+
+	# % Dissolved advection
+	kAdvFWDis = coef['advectionFWDis']
+	kAdvFWSedDis = coef['advectionFWSedDis']
+	kAdvSWDis = coef['advectionSWDis']
+	kAdvSWSedDis = coef['advectionSWSedDis']
+
+	# % Soils, soil water, dissolved in soil water and deep soil for the four soil types
+	# % kSoil[n] = [soil solid index, soil water index, dissolved index, deep soil index,
+	# %	wind erosion, solid erosion, runoff, infiltration, dissolved runoff, leaching,
+	# %	d soil2soilwater, d soilwater2soil, d dissolution]
+	kSoil = []
+	for n in range(1, 5):
+		s = 6 + 2*n
+		w = s + 1
+		dis = 19 + n
+		deep = 23 + n
+		jS2SW = jSW2S = [0, 0]
+		jDisSoil = noDis
+		if presence['soil%d' % n]==1:
+			jS2SW = soilwaterPartitionJac(f[s],f[w],ENM['elutionS%d' % n],1)[0]
+		if presence['soilW%d' % n]==1:
+			jSW2S = soilwaterPartitionJac(f[s],f[w],ENM['elutionS%d' % n],2)[1]
+			if presence['soil%d' % n]==1:
+				jDisSoil = odeDissolutionJac(DIS['percfitaGW%d' % n],DIS['percfitbGW%d' % n],f[w],f[dis],
+											 ENM['kdisS%d' % n],V[w])
+		kSoil.append([s, w, dis, deep, coef['windErosionSoil%d' % n], coef['solidErosionSoil%d' % n],
+					  coef['runoffSoil%d' % n], coef['infiltraSoil%d' % n], coef['runoffSoilDis%d' % n],
+					  coef['leachSoil%d' % n], jS2SW, jSW2S, jDisSoil])
+
+	# %% Air f(0)
+	J[0, 0] -= kDryDepAir + kWetDepAir + kHetAggAir + kAdvAir
+	# % without aerosols, aerosolization and wind erosion go to air
+	if presence['aer']==0 and presence['air']==1:
+		J[0, 5] += kAerosolSW
+		for soil in kSoil:
+			J[0, soil[0]] += soil[4]
+
+	# %% Aerosols f(1)
+	J[1, 1] -= kDryDepAer + kWetDepAer + kAdvAer
+	if presence['aer']==1:
+		J[1, 0] += kHetAggAir
+		J[1, 5] += kAerosolSW
+		for soil in kSoil:
+			J[1, soil[0]] += soil[4]
+
+	# %% Freshwater f(2)
+	J[2, 2] -= kSedFW + kHetAggFW + kAdvFW
+	J[2, 2] -= jDisFW[1][0]
+	J[2, 16] -= jDisFW[1][1]
+	if presence['fw']==1:
+		J[2, 0] += (kDryDepAir + kWetDepAir)*np.true_divide(env['freshwA'],env['area'])
+		for soil in kSoil:
+			J[2, soil[1]] += soil[6]
+			J[2, soil[3]] += soil[9]
+		if presence['fSS']==0:
+			J[2, 4] += kResuspFWSed
+			for soil in kSoil:
+				J[2, soil[0]] += soil[5]
+
+	# %% Freshwater Suspended Sediment f(3)
+	J[3, 3] -= kSedFWSS + kAdvFWSS
+	if presence['fSS']==1:
+		J[3, 1] += (kDryDepAer + kWetDepAer)*np.true_divide(env['freshwA'],env['area'])
+		J[3, 2] += kHetAggFW
+		J[3, 4] += kResuspFWSed
+		for soil in kSoil:
+			J[3, soil[0]] += soil[5]
+
+	# %% Freshwater Sediment f(4)
+	if presence['fSed']==1:
+		J[4, 2] += kSedFW
+		J[4, 3] += kSedFWSS
+		J[4, 4] -= kResuspFWSed + kBurialFWSed + kAdvFWSed
+		J[4, 4] -= jDisFWSed[1][0]
+		J[4, 17] -= jDisFWSed[1][1]
+
+	# %% Seawater f(5)
+	J[5, 5] -= kSedSW + kHetAggSW + kAerosolSW + kAdvSW
+	J[5, 5] -= jDisSW[1][0]
+	J[5, 18] -= jDisSW[1][1]
+	if presence['sw']==1:
+		J[5, 0] += (kDryDepAir + kWetDepAir)*np.true_divide(env['seawA'],env['area'])
+		J[5, 2] += kAdvFW
+		if presence['sSS']==0:
+			J[5, 7] += kResuspSWSed
+		for soil in kSoil:
+			if presence['fw']==0:
+				J[5, soil[1]] += soil[6]
+			if presence['fSS']==0 and presence['fw']==0 and presence['sSS']==0:
+				J[5, soil[0]] += soil[5]
+
+	# %% Seawater Suspended Sediment f(6)
+	J[6, 6] -= kSedSWSS + kAdvSWSS
+	if presence['sSS']==1:
+		J[6, 1] += (kDryDepAer + kWetDepAer)*np.true_divide(env['seawA'],env['area'])
+		J[6, 3] += kAdvFWSS
+		J[6, 5] += kHetAggSW
+		J[6, 7] += kResuspSWSed
+		if presence['fSS']==0 and presence['fw']==0:
+			for soil in kSoil:
+				J[6, soil[0]] += soil[5]
+
+	# %% Seawater Sediment f(7)
+	if presence['sSed']==1:
+		J[7, 5] += kSedSW
+		J[7, 6] += kSedSWSS
+		J[7, 4] += kAdvFWSed
+		J[7, 7] -= kResuspSWSed + kBurialSWSed + kAdvSWSed
+		J[7, 7] -= jDisSWSed[1][0]
+		J[7, 19] -= jDisSWSed[1][1]
+
+	# %% Soil solids, soil water, dissolved in soil water and deep soil
+	for n in range(1, 5):
+		s, w, dis, deep, kWind, kErosion, kRunoff, kInfil, kRunoffDis, kLeach, jS2SW, jSW2S, jDisSoil = kSoil[n-1]
+		soilA = np.true_divide(env['soilA%d' % n],env['area'])
+		# % soil solids
+		J[s, s] -= kWind + kErosion + jS2SW[0]
+		J[s, w] -= jS2SW[1]
+		if presence['soil%d' % n]==1:
+			J[s, 0] += kDryDepAir*soilA
+			J[s, 1] += kDryDepAer*soilA
+			J[s, s] += jSW2S[0]
+			J[s, w] += jSW2S[1]
+		# % soil water
+		J[w, w] -= kRunoff + kInfil + jDisSoil[1][0] + jSW2S[1]
+		J[w, s] -= jSW2S[0]
+		J[w, dis] -= jDisSoil[1][1]
+		if presence['soilW%d' % n]==1:
+			J[w, 0] += kWetDepAir*soilA
+			J[w, 1] += kWetDepAer*soilA
+			J[w, s] += jS2SW[0]
+			J[w, w] += jS2SW[1]
+		# % dissolved in soil water
+		J[dis, w] += jDisSoil[0][0]
+		J[dis, dis] += jDisSoil[0][1] - kRunoffDis
+		# % dissolved runoff to freshwater
+		J[16, dis] += kRunoffDis
+		# % deep soil
+		J[deep, w] += kInfil
+		J[deep, deep] -= kLeach
+
+	# %% Freshwater Dissolved f16
+	J[16, 2] += jDisFW[0][0]
+	J[16, 16] += jDisFW[0][1] - kAdvFWDis
+
+	# %% Freshwater Sediment Dissolved f17
+	J[17, 4] += jDisFWSed[0][0]
+	J[17, 17] += jDisFWSed[0][1] - kAdvFWSedDis
+
+	# %% Marine Dissolved f18
+	J[18, 5] += jDisSW[0][0]
+	J[18, 18] += jDisSW[0][1] - kAdvSWDis
+	if presence['sw'] == 1:
+		J[18, 16] += kAdvFWDis
+
+	# %% Marine Sediment Dissolved f19
+	J[19, 7] += jDisSWSed[0][0]
+	J[19, 19] += jDisSWSed[0][1] - kAdvSWSedDis
+	if presence['sw'] == 1:
+		J[19, 17] += kAdvFWSedDis
+
+	return J
 	
 
 
@@ -3,14 +3,14 @@ from degradation_process import Degradation
 from advective_processes import AdvectiveProcess
 from diffusion_process_non_ion import Diffusion, MTC
 from Z_non_ion import zValue
+from flux_balance import incidence_matrix, flux_derivative
 
 
-def org_ode(t, f, i, presence, env, climate, chemParams, release, bgConc):
-    # differential equation solver for organic chemical fugacity in all compartments
-    # t is time, f is the fugacity by compartment and day (y for equations), i is the iteration in
-    # the for loop - so the time step, V is the volume vector
+def org_fluxes(f, i, presence, env, climate, chemParams, release, bgConc):
+    # processes of organic chemicals in all compartments as named fluxes, the flux kernel shared by org_ode
+    # and org_process
+    # f is the fugacity by compartment (y for equations), i is the day index, a scalar or an array of days
     # flux N = D*f, unit: mol/day = mol/(Pa-day) * Pa
-    # changes in fugacity in each compartment as a function of time
     zV = zValue(climate['temp_K'][i], chemParams['Kaw_n'], chemParams['Kp_n'], env['aerP'], chemParams['Koc_n'])
     zAirSub = zV.zAirSub()
     zAerSub = zV.zAerSub(zAirSub)
@@ -314,15 +314,14 @@ def org_ode(t, f, i, presence, env, climate, chemParams, release, bgConc):
     leachingS4deep = adv.D_leach(k_infil_4, zWaterSub) * f[12]
     degradationSoil4deep = deg.D_deg(env['deepSV4'], chemParams['kDeg_deepS4_n'], zS4DeepSSub) * f[12]
 
+
     ###################################################################################################################
-    # the code below will combine the processes together 1) entering the compartment, 2) loss from the
-    # compartment, and 3) transfer between compartments
-    # if one compartment doesn't exist, re-route scenarios are considered
+    # the code below re-routes the processes if one compartment doesn't exist and collects them as named fluxes;
+    # org_balance lists the fluxes 1) entering the compartment, 2) lost from the compartment and 3) transferred
+    # between compartments, the aliases keep the value seen by the receiving compartment
     ###################################################################################################################
 
     # air f[0]
-    AirEnter = release['air'][i] + advectionAirInflow  # mol/day
-
     diffFW2Air = diffusionFW2Air
     diffSW2Air = diffusionSW2Air
     diffS1surf2Air = diffusionS1surf2Air
@@ -333,22 +332,18 @@ def org_ode(t, f, i, presence, env, climate, chemParams, release, bgConc):
     # without air compartment, all of the air related processes would be 0
     # the transfer process from other compartments still exist, but the transfer to this compartment is 0
     if presence['air'] == 0:
-        advectionAirInflow, degradationAir, advectionAirBulkOutflow, rainDissolutionAer, \
+        degradationAir, advectionAirBulkOutflow, rainDissolutionAer, \
         dryDepositionAer, wetDepositionAer, diffusionAir2FW, diffusionAir2SW, diffusionAir2S1surf, diffusionAir2S2surf, \
         diffusionAir2S3surf, diffusionAir2S4surf, diffFW2Air, diffSW2Air, diffS1surf2Air, diffS2surf2Air, \
         diffS3surf2Air, diffS4surf2Air, windErosionS1Solid, windErosionS2Solid, windErosionS3Solid, windErosionS4Solid \
-            = [0] * 22
-
-    AirLoss = -(degradationAir + advectionAirBulkOutflow + rainDissolutionAer + dryDepositionAer +
-                wetDepositionAer + diffusionAir2FW + diffusionAir2SW + diffusionAir2S1surf + diffusionAir2S2surf +
-                diffusionAir2S3surf + diffusionAir2S4surf)
+            = [0] * 21
 
-    AirTransfer = diffFW2Air + diffSW2Air + diffS1surf2Air + diffS2surf2Air + diffS3surf2Air + diffS4surf2Air + \
-                  windErosionS1Solid + windErosionS2Solid + windErosionS3Solid + windErosionS4Solid
+    windErosionS1Air = windErosionS1Solid
+    windErosionS2Air = windErosionS2Solid
+    windErosionS3Air = windErosionS3Solid
+    windErosionS4Air = windErosionS4Solid
 
     # freshwater f[1]
-    FWEnter = release['fw'][i] + release['fSS'][i] + advectionFWBulkInflow
-
     rainDisAir2FW = rainDissolutionAer2FW
     dryDepAer2FW = dryDepositionAer2FW
     wetDepAer2FW = wetDepositionAer2FW
@@ -364,31 +359,16 @@ def org_ode(t, f, i, presence, env, climate, chemParams, release, bgConc):
 
     # without freshwater compartment, freshwater related processes would be 0
     if presence['fw'] == 0:
-        advectionFWBulkInflow, diffusionFW2Air, diffusionFW2FWSed, degradationFW, sedDepFWSusSed, advectionFWBulkOutflow, \
+        diffusionFW2Air, diffusionFW2FWSed, degradationFW, sedDepFWSusSed, advectionFWBulkOutflow, \
         rainDisAir2FW, dryDepAer2FW, wetDepAer2FW, runoffS1, runoffS2, runoffS3, runoffS4, erosionS1, erosionS2, erosionS3, \
-        erosionS4, diffAir2FW, diffusionFWSed2FW, resuspFWSed = [0] * 20
-
-    FWLoss = - (diffusionFW2Air + diffusionFW2FWSed + degradationFW + sedDepFWSusSed + advectionFWBulkOutflow)
-    FWTransfer = rainDisAir2FW + dryDepAer2FW + wetDepAer2FW \
-                 + runoffS1 + runoffS2 + runoffS3 + runoffS4 \
-                 + erosionS1 + erosionS2 + erosionS3 + erosionS4 \
-                 + diffAir2FW + diffusionFWSed2FW + resuspFWSed
-
+        erosionS4, diffAir2FW, diffusionFWSed2FW, resuspFWSed = [0] * 19
 
     # freshwater sediment f[2]
-    FSedEnter = release['fwSed'][i] + advectionFWSedInflow
-    diffFW2FWSed = diffusionFW2FWSed
-    sedDepFWSusSed2FSed = sedDepFWSusSed
     # no freshwater, no freshwater sediment, freshwater sediment related processes would be 0
     if presence['fw'] == 0:
-        advectionFWSedInflow, resuspFWSed, degradationFSed, diffusionFWSed2FW, advectionFSedOutflow, sedBurialFSed, \
-        diffFW2FWSed, sedDepFWSusSed2FSed = [0] * 8
-
-    FSedLoss = - (resuspFWSed + degradationFSed + diffusionFWSed2FW + advectionFSedOutflow + sedBurialFSed)
-    FSedTransfer = diffFW2FWSed + sedDepFWSusSed2FSed
+        resuspFWSed, degradationFSed, diffusionFWSed2FW, advectionFSedOutflow, sedBurialFSed = [0] * 5
 
     # seawater f[3]
-    SWEnter = release['sw'][i] + release['sSS'][i]
     rainDisAir2SW = rainDissolutionAer2SW
     dryDepAer2SW = dryDepositionAer2SW
     wetDepAer2SW = wetDepositionAer2SW
@@ -411,21 +391,11 @@ def org_ode(t, f, i, presence, env, climate, chemParams, release, bgConc):
         diffusionSW2Air, diffusionSW2SWSed, degradationSW, sedDepSWSusSed, advectionSWBulkOutflow, rainDisAir2SW, \
         dryDepAer2SW, wetDepAer2SW, advectFWOutflow, diffAir2SW, diffusionSWSed2SW, resuspSWSed = [0] * 12
 
-    SWLoss = - (diffusionSW2Air + diffusionSW2SWSed + degradationSW + sedDepSWSusSed + advectionSWBulkOutflow)
-    SWTransfer = runoffS1SW + runoffS2SW + runoffS3SW + runoffS4SW + erosionS1SW + erosionS2SW + erosionS3SW + \
-                 erosionS4SW + rainDisAir2SW + dryDepAer2SW + wetDepAer2SW + advectFWOutflow \
-                 + diffAir2SW + diffusionSWSed2SW + resuspSWSed
-
     # seawater sediment f[4]
-    SSedEnter = release['swSed'][i]
     if presence['sw'] == 0:
         resuspSWSed, degradationSSed, diffusionSWSed2SW, advectionSSedOutflow, diffusionSW2SWSed, sedDepSWSusSed = [0] * 6
 
-    SSedLoss = - (resuspSWSed + degradationSSed + diffusionSWSed2SW + advectionSSedOutflow + sedBurialSSed)
-    SSedTransfer = diffusionSW2SWSed + sedDepSWSusSed
-
     # soil 1 surface soil f[5]
-    S1surfEnter = release['soil1'][i]
     diffAir2S1surf = diffusionAir2S1surf
     rainDisAir2Soil1 = rainDissolutionAer2Soil1
     dryDepAer2Soil1 = dryDepositionAer2Soil1
@@ -435,19 +405,11 @@ def org_ode(t, f, i, presence, env, climate, chemParams, release, bgConc):
         diffusionS1surf2Air, degradationSoil1surf, runoffS1Water, erosionS1Solid, infiltrationSoil1surf, \
         diffAir2S1surf, rainDisAir2Soil1, dryDepAer2Soil1, wetDepAer2Soil1, windErosionS1Solid = [0] * 10
 
-    S1surfLoss = - (diffusionS1surf2Air + degradationSoil1surf + runoffS1Water + erosionS1Solid +
-                    infiltrationSoil1surf + windErosionS1Solid)
-    S1surfTransfer = diffAir2S1surf + rainDisAir2Soil1 + dryDepAer2Soil1 + wetDepAer2Soil1
-
     # soil 1 deep soil f[6]
-    S1DeepSEnter = release['dsoil1'][i]
     if presence['soil1'] == 0:
-        degradationSoil1deep, leachingS1deep, infiltrationSoil1surf = 0
-    S1DeepSLoss = - degradationSoil1deep - leachingS1deep
-    S1DeepSTransfer = infiltrationSoil1surf
+        degradationSoil1deep, leachingS1deep, infiltrationSoil1surf = [0] * 3
 
     # soil 2 surface soil f[7]
-    S2surfEnter = release['soil2'][i]
     diffAir2S2surf = diffusionAir2S2surf
     rainDisAir2Soil2 = rainDissolutionAer2Soil2
     dryDepAer2Soil2 = dryDepositionAer2Soil2
@@ -455,19 +417,12 @@ def org_ode(t, f, i, presence, env, climate, chemParams, release, bgConc):
     if presence['soil2'] == 0:
         diffusionS2surf2Air, degradationSoil2surf, runoffS2Water, erosionS2Solid, infiltrationSoil2surf, \
         diffAir2S2surf, rainDisAir2Soil2, dryDepAer2Soil2, wetDepAer2Soil2, windErosionS2Solid = [0] * 10
-    S2surfLoss = - (diffusionS2surf2Air + degradationSoil2surf + runoffS2Water + erosionS2Solid +
-                    infiltrationSoil2surf + windErosionS2Solid)
-    S2surfTransfer = diffAir2S2surf + rainDisAir2Soil2 + dryDepAer2Soil2 + wetDepAer2Soil2
 
     # soil 2 deep soil f[8]
-    S2DeepSEnter = release['dsoil2'][i]
     if presence['soil2'] == 0:
         degradationSoil2deep, leachingS2deep, infiltrationSoil2surf = [0] * 3
-    S2DeepSLoss = - degradationSoil2deep - leachingS2deep
-    S2DeepSTransfer = infiltrationSoil2surf
 
     # soil 3 surface soil f[9]
-    S3surfEnter = release['soil3'][i]
     diffAir2S3surf = diffusionAir2S3surf
     rainDisAir2Soil3 = rainDissolutionAer2Soil3
     dryDepAer2Soil3 = dryDepositionAer2Soil3
@@ -475,20 +430,12 @@ def org_ode(t, f, i, presence, env, climate, chemParams, release, bgConc):
     if presence['soil3'] == 0:
         diffusionS3surf2Air, degradationSoil3surf, runoffS3Water, erosionS3Solid, infiltrationSoil3surf, \
         diffAir2S3surf, rainDisAir2Soil3, dryDepAer2Soil3, wetDepAer2Soil3, windErosionS3Solid = [0] * 10
-    S3surfLoss = - (diffusionS3surf2Air + degradationSoil3surf + runoffS3Water + erosionS3Solid +
-                    infiltrationSoil3surf + windErosionS3Solid)
-    S3surfTransfer = diffAir2S3surf + rainDisAir2Soil3 + dryDepAer2Soil3 + wetDepAer2Soil3
 
     # soil 3 deep soil f[10]
-    S3DeepSEnter = release['dsoil3'][i]
     if presence['soil3'] == 0:
-        degradationSoil3deep, leachingS3deep, infiltrationSoil3surf = [0]*3
-
-    S3DeepSLoss = - degradationSoil3deep - leachingS3deep
-    S3DeepSTransfer = infiltrationSoil3surf
+        degradationSoil3deep, leachingS3deep, infiltrationSoil3surf = [0] * 3
 
     # soil 4 surface soil f[11]
-    S4surfEnter = release['soil4'][i]
     diffAir2S4surf = diffusionAir2S4surf
     rainDisAir2Soil4 = rainDissolutionAer2Soil4
     dryDepAer2Soil4 = dryDepositionAer2Soil4
@@ -496,83 +443,132 @@ def org_ode(t, f, i, presence, env, climate, chemParams, release, bgConc):
     if presence['soil4'] == 0:
         diffusionS4surf2Air, degradationSoil4surf, runoffS4Water, erosionS4Solid, infiltrationSoil4surf, \
         diffAir2S4surf, rainDisAir2Soil4, dryDepAer2Soil4, wetDepAer2Soil4, windErosionS4Solid = [0] * 10
-    S4surfLoss = - (diffusionS4surf2Air + degradationSoil4surf + runoffS4Water + erosionS4Solid +
-                    infiltrationSoil4surf + windErosionS4Solid)
-    S4surfTransfer = diffAir2S4surf + rainDisAir2Soil4 + dryDepAer2Soil4 + wetDepAer2Soil4
 
     # soil 4 deep soil f[12]
-    S4DeepSEnter = release['dsoil4'][i]
     if presence['soil4'] == 0:
         degradationSoil4deep, leachingS4deep, infiltrationSoil4surf = [0] * 3
-    S4DeepSLoss = - degradationSoil4deep - leachingS4deep
-    S4DeepSTransfer = infiltrationSoil4surf
 
+    # unit: mol/day
+    fluxes = {
+        # releases and inflows from outside of the system
+        'release_air': release['air'][i], 'release_fw': release['fw'][i], 'release_fSS': release['fSS'][i],
+        'release_fwSed': release['fwSed'][i], 'release_sw': release['sw'][i], 'release_sSS': release['sSS'][i],
+        'release_swSed': release['swSed'][i],
+        'release_soil1': release['soil1'][i], 'release_dsoil1': release['dsoil1'][i],
+        'release_soil2': release['soil2'][i], 'release_dsoil2': release['dsoil2'][i],
+        'release_soil3': release['soil3'][i], 'release_dsoil3': release['dsoil3'][i],
+        'release_soil4': release['soil4'][i], 'release_dsoil4': release['dsoil4'][i],
+        'advectionAirInflow': advectionAirInflow, 'advectionFWBulkInflow': advectionFWBulkInflow,
+        'advectionFWSedInflow': advectionFWSedInflow,
+        # air
+        'degradationAir': degradationAir, 'advectionAirBulkOutflow': advectionAirBulkOutflow,
+        'rainDissolutionAer': rainDissolutionAer, 'dryDepositionAer': dryDepositionAer,
+        'wetDepositionAer': wetDepositionAer, 'diffusionAir2FW': diffusionAir2FW, 'diffusionAir2SW': diffusionAir2SW,
+        'diffusionAir2S1surf': diffusionAir2S1surf, 'diffusionAir2S2surf': diffusionAir2S2surf,
+        'diffusionAir2S3surf': diffusionAir2S3surf, 'diffusionAir2S4surf': diffusionAir2S4surf,
+        'diffFW2Air': diffFW2Air, 'diffSW2Air': diffSW2Air, 'diffS1surf2Air': diffS1surf2Air,
+        'diffS2surf2Air': diffS2surf2Air, 'diffS3surf2Air': diffS3surf2Air, 'diffS4surf2Air': diffS4surf2Air,
+        'windErosionS1Air': windErosionS1Air, 'windErosionS2Air': windErosionS2Air,
+        'windErosionS3Air': windErosionS3Air, 'windErosionS4Air': windErosionS4Air,
+        # freshwater and freshwater sediment
+        'diffusionFW2Air': diffusionFW2Air, 'diffusionFW2FWSed': diffusionFW2FWSed, 'degradationFW': degradationFW,
+        'sedDepFWSusSed': sedDepFWSusSed, 'advectionFWBulkOutflow': advectionFWBulkOutflow,
+        'rainDisAir2FW': rainDisAir2FW, 'dryDepAer2FW': dryDepAer2FW, 'wetDepAer2FW': wetDepAer2FW,
+        'runoffS1': runoffS1, 'runoffS2': runoffS2, 'runoffS3': runoffS3, 'runoffS4': runoffS4,
+        'erosionS1': erosionS1, 'erosionS2': erosionS2, 'erosionS3': erosionS3, 'erosionS4': erosionS4,
+        'diffAir2FW': diffAir2FW, 'diffusionFWSed2FW': diffusionFWSed2FW, 'resuspFWSed': resuspFWSed,
+        'degradationFSed': degradationFSed, 'advectionFSedOutflow': advectionFSedOutflow,
+        'sedBurialFSed': sedBurialFSed,
+        # seawater and seawater sediment
+        'diffusionSW2Air': diffusionSW2Air, 'diffusionSW2SWSed': diffusionSW2SWSed, 'degradationSW': degradationSW,
+        'sedDepSWSusSed': sedDepSWSusSed, 'advectionSWBulkOutflow': advectionSWBulkOutflow,
+        'runoffS1SW': runoffS1SW, 'runoffS2SW': runoffS2SW, 'runoffS3SW': runoffS3SW, 'runoffS4SW': runoffS4SW,
+        'erosionS1SW': erosionS1SW, 'erosionS2SW': erosionS2SW, 'erosionS3SW': erosionS3SW,
+        'erosionS4SW': erosionS4SW, 'rainDisAir2SW': rainDisAir2SW, 'dryDepAer2SW': dryDepAer2SW,
+        'wetDepAer2SW': wetDepAer2SW, 'advectFWOutflow': advectFWOutflow, 'diffAir2SW': diffAir2SW,
+        'diffusionSWSed2SW': diffusionSWSed2SW, 'resuspSWSed': resuspSWSed, 'degradationSSed': degradationSSed,
+        'advectionSSedOutflow': advectionSSedOutflow, 'sedBurialSSed': sedBurialSSed,
+        # soils
+        'diffusionS1surf2Air': diffusionS1surf2Air, 'degradationSoil1surf': degradationSoil1surf,
+        'runoffS1Water': runoffS1Water, 'erosionS1Solid': erosionS1Solid,
+        'infiltrationSoil1surf': infiltrationSoil1surf, 'windErosionS1Solid': windErosionS1Solid,
+        'diffAir2S1surf': diffAir2S1surf, 'rainDisAir2Soil1': rainDisAir2Soil1, 'dryDepAer2Soil1': dryDepAer2Soil1,
+        'wetDepAer2Soil1': wetDepAer2Soil1, 'degradationSoil1deep': degradationSoil1deep,
+        'leachingS1deep': leachingS1deep,
+        'diffusionS2surf2Air': diffusionS2surf2Air, 'degradationSoil2surf': degradationSoil2surf,
+        'runoffS2Water': runoffS2Water, 'erosionS2Solid': erosionS2Solid,
+        'infiltrationSoil2surf': infiltrationSoil2surf, 'windErosionS2Solid': windErosionS2Solid,
+        'diffAir2S2surf': diffAir2S2surf, 'rainDisAir2Soil2': rainDisAir2Soil2, 'dryDepAer2Soil2': dryDepAer2Soil2,
+        'wetDepAer2Soil2': wetDepAer2Soil2, 'degradationSoil2deep': degradationSoil2deep,
+        'leachingS2deep': leachingS2deep,
+        'diffusionS3surf2Air': diffusionS3surf2Air, 'degradationSoil3surf': degradationSoil3surf,
+        'runoffS3Water': runoffS3Water, 'erosionS3Solid': erosionS3Solid,
+        'infiltrationSoil3surf': infiltrationSoil3surf, 'windErosionS3Solid': windErosionS3Solid,
+        'diffAir2S3surf': diffAir2S3surf, 'rainDisAir2Soil3': rainDisAir2Soil3, 'dryDepAer2Soil3': dryDepAer2Soil3,
+        'wetDepAer2Soil3': wetDepAer2Soil3, 'degradationSoil3deep': degradationSoil3deep,
+        'leachingS3deep': leachingS3deep,
+        'diffusionS4surf2Air': diffusionS4surf2Air, 'degradationSoil4surf': degradationSoil4surf,
+        'runoffS4Water': runoffS4Water, 'erosionS4Solid': erosionS4Solid,
+        'infiltrationSoil4surf': infiltrationSoil4surf, 'windErosionS4Solid': windErosionS4Solid,
+        'diffAir2S4surf': diffAir2S4surf, 'rainDisAir2Soil4': rainDisAir2Soil4, 'dryDepAer2Soil4': dryDepAer2Soil4,
+        'wetDepAer2Soil4': wetDepAer2Soil4, 'degradationSoil4deep': degradationSoil4deep,
+        'leachingS4deep': leachingS4deep,
+    }
+
+    # fugacity capacity of each compartment, unit: m3 * mol/m3-Pa = mol/Pa
+    capacity = [env['areaV'] * zAirBulk, env['fwV'] * zFWBulk, env['sedFWV'] * zFWSedimentBulk, env['swV'] * zSWBulk,
+                env['sedSWV'] * zSWSedimentBulk, env['soilV1'] * zSoil1Bulk, env['deepSV1'] * zS1DeepSSub,
+                env['soilV2'] * zSoil2Bulk, env['deepSV2'] * zS2DeepSSub, env['soilV3'] * zSoil3Bulk,
+                env['deepSV3'] * zS3DeepSSub, env['soilV4'] * zSoil4Bulk, env['deepSV4'] * zS4DeepSSub]
+
+    return fluxes, capacity
+
+
+# (entering, leaving) fluxes of each compartment, in the order of f
+org_balance = [
+    # air f[0]
+    (['release_air', 'advectionAirInflow', 'diffFW2Air', 'diffSW2Air', 'diffS1surf2Air', 'diffS2surf2Air',
+      'diffS3surf2Air', 'diffS4surf2Air', 'windErosionS1Air', 'windErosionS2Air', 'windErosionS3Air',
+      'windErosionS4Air'],
+     ['degradationAir', 'advectionAirBulkOutflow', 'rainDissolutionAer', 'dryDepositionAer', 'wetDepositionAer',
+      'diffusionAir2FW', 'diffusionAir2SW', 'diffusionAir2S1surf', 'diffusionAir2S2surf', 'diffusionAir2S3surf',
+      'diffusionAir2S4surf']),
+    # freshwater f[1]
+    (['release_fw', 'release_fSS', 'advectionFWBulkInflow', 'rainDisAir2FW', 'dryDepAer2FW', 'wetDepAer2FW',
+      'runoffS1', 'runoffS2', 'runoffS3', 'runoffS4', 'erosionS1', 'erosionS2', 'erosionS3', 'erosionS4',
+      'diffAir2FW', 'diffusionFWSed2FW', 'resuspFWSed'],
+     ['diffusionFW2Air', 'diffusionFW2FWSed', 'degradationFW', 'sedDepFWSusSed', 'advectionFWBulkOutflow']),
+    # freshwater sediment f[2]
+    (['release_fwSed', 'advectionFWSedInflow', 'diffusionFW2FWSed', 'sedDepFWSusSed'],
+     ['resuspFWSed', 'degradationFSed', 'diffusionFWSed2FW', 'advectionFSedOutflow', 'sedBurialFSed']),
+    # seawater f[3]
+    (['release_sw', 'release_sSS', 'runoffS1SW', 'runoffS2SW', 'runoffS3SW', 'runoffS4SW', 'erosionS1SW',
+      'erosionS2SW', 'erosionS3SW', 'erosionS4SW', 'rainDisAir2SW', 'dryDepAer2SW', 'wetDepAer2SW',
+      'advectFWOutflow', 'diffAir2SW', 'diffusionSWSed2SW', 'resuspSWSed'],
+     ['diffusionSW2Air', 'diffusionSW2SWSed', 'degradationSW', 'sedDepSWSusSed', 'advectionSWBulkOutflow']),
+    # seawater sediment f[4]
+    (['release_swSed', 'diffusionSW2SWSed', 'sedDepSWSusSed'],
+     ['resuspSWSed', 'degradationSSed', 'diffusionSWSed2SW', 'advectionSSedOutflow', 'sedBurialSSed']),
+]
+for n in ['1', '2', '3', '4']:
+    # surface soil f[5], f[7], f[9], f[11] and deep soil f[6], f[8], f[10], f[12]
+    org_balance.append((['release_soil' + n, 'diffAir2S' + n + 'surf', 'rainDisAir2Soil' + n,
+                         'dryDepAer2Soil' + n, 'wetDepAer2Soil' + n],
+                        ['diffusionS' + n + 'surf2Air', 'degradationSoil' + n + 'surf', 'runoffS' + n + 'Water',
+                         'erosionS' + n + 'Solid', 'infiltrationSoil' + n + 'surf', 'windErosionS' + n + 'Solid']))
+    org_balance.append((['release_dsoil' + n, 'infiltrationSoil' + n + 'surf'],
+                        ['degradationSoil' + n + 'deep', 'leachingS' + n + 'deep']))
+
+org_flux_names, org_incidence = incidence_matrix(org_balance)
+
+
+def org_ode(t, f, i, presence, env, climate, chemParams, release, bgConc):
+    # differential equation solver for organic chemical fugacity in all compartments
+    # t is time, f is the fugacity by compartment and day (y for equations), i is the iteration in
+    # the for loop - so the time step
+    # changes in fugacity in each compartment as a function of time
     # unit: mol/day / (m3 * mol/m3-Pa) = Pa/day
-    if (env['areaV'] * zAirBulk) != 0:
-        air = (AirEnter + AirLoss + AirTransfer) / (env['areaV'] * zAirBulk)
-    else:
-        air = 0
-
-    if (env['fwV'] * zFWBulk) != 0:
-        fw = (FWEnter + FWLoss + FWTransfer) / (env['fwV'] * zFWBulk)
-    else:
-        fw = 0
-
-    if (env['sedFWV'] * zFWSedimentBulk) != 0:
-        fwSed = (FSedEnter + FSedLoss + FSedTransfer) / (env['sedFWV'] * zFWSedimentBulk)
-    else:
-        fwSed = 0
-
-    if (env['swV'] * zSWBulk) != 0:
-        sw = (SWEnter + SWLoss + SWTransfer) / (env['swV'] * zSWBulk)
-    else:
-        sw = 0
-
-    if (env['sedSWV'] * zSWSedimentBulk) != 0:
-        swSed = (SSedEnter + SSedLoss + SSedTransfer) / (env['sedSWV'] * zSWSedimentBulk)
-    else:
-        swSed = 0
-
-    if (env['soilV1'] * zSoil1Bulk) != 0:
-        s1surf = (S1surfEnter + S1surfLoss + S1surfTransfer) / (env['soilV1'] * zSoil1Bulk)
-    else:
-        s1surf = 0
-
-    if (env['deepSV1'] * zS1DeepSSub) != 0:
-        s1deep = (S1DeepSEnter + S1DeepSLoss + S1DeepSTransfer) / (env['deepSV1'] * zS1DeepSSub)
-    else:
-        s1deep = 0
-
-    if (env['soilV2'] * zSoil2Bulk) != 0:
-        s2surf = (S2surfEnter + S2surfLoss + S2surfTransfer) / (env['soilV2'] * zSoil2Bulk)
-    else:
-        s2surf = 0
-
-    if (env['deepSV2'] * zS2DeepSSub) != 0:
-        s2deep = (S2DeepSEnter + S2DeepSLoss + S2DeepSTransfer) / (env['deepSV2'] * zS2DeepSSub)
-    else:
-        s2deep = 0
-
-    if (env['soilV3'] * zSoil3Bulk) != 0:
-        s3surf = (S3surfEnter + S3surfLoss + S3surfTransfer) / (env['soilV3'] * zSoil3Bulk)
-    else:
-        s3surf = 0
-
-    if (env['deepSV3'] * zS3DeepSSub) != 0:
-        s3deep = (S3DeepSEnter + S3DeepSLoss + S3DeepSTransfer) / (env['deepSV3'] * zS3DeepSSub)
-    else:
-        s3deep = 0
-
-    if (env['soilV4'] * zSoil4Bulk) != 0:
-        s4surf = (S4surfEnter + S4surfLoss + S4surfTransfer) / (env['soilV4'] * zSoil4Bulk)
-    else:
-        s4surf = 0
-
-    if (env['deepSV4'] * zS4DeepSSub) != 0:
-        s4deep = (S4DeepSEnter + S4DeepSLoss + S4DeepSTransfer) / (env['deepSV4'] * zS4DeepSSub)
-    else:
-        s4deep = 0
-
-    dYdt = [air, fw, fwSed, sw, swSed, s1surf, s2deep, s2surf, s2deep, s3surf, s3deep, s4surf, s4deep]
-
-    return dYdt
+    # np.all in flux_derivative keeps the check valid when the Z-values are daily series
+    # (linear_solver.assemble_horizon)
+    fluxes, capacity = org_fluxes(f, i, presence, env, climate, chemParams, release, bgConc)
+    return flux_derivative(org_incidence, org_flux_names, fluxes, capacity)
@@ -1,7 +1,7 @@
 
 import numpy as np
-from rdkit import Chem
-from mordred import Calculator, descriptors
+
+from descriptor_cache import get_descriptors
 
 
 class PartitionCoefficient:
@@ -150,29 +150,9 @@ class PartitionCoefficient:
 
     # Load RDKit data to the exposure table in JSON
     def cal_descriptor(self, smiles):
-        # call rdkit mordred
         # McGowan's Volume and number of hydrogens bound by the charged nitrogen
-        RDKIT_KEYS = ["VMcGowan"]
-        mols = [Chem.MolFromSmiles(smi) for smi in [smiles]]
-        calc = Calculator(descriptors, ignore_3D=True)
-        df = calc.pandas(mols, nproc=1)
-        mol = Chem.MolFromSmiles(smiles)
-        NH0 = Chem.Fragments.fr_NH0(mol)  # number of Tertiary amines
-        NH1 = Chem.Fragments.fr_NH1(mol)  # number of Secondary amines
-        NH2 = Chem.Fragments.fr_NH2(mol)  # number of Primary amines
-
-        NAi = 0
-        if NH2 != 0:
-            NAi = 3
-        elif NH1 != 0:
-            NAi = 2
-        elif NH0 != 0:
-            NAi = 1
-        RDKit_dic = {}
-        RDKit_dic['NAi'] = NAi
-        for key in RDKIT_KEYS:
-            RDKit_dic[key] = float(df[key][0])
-        return RDKit_dic
+        # computed once per canonical SMILES and kept in the descriptor_cache
+        return get_descriptors(smiles)
 
 
     def Koc_j(self, Kow_n, pKa, Fr_n, Fr_i):
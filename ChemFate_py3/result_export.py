@@ -0,0 +1,150 @@
+import os
+import json
+from collections import OrderedDict
+
+
+# writers of the result tables (concentrations, masses and process rates) of GenerateResult
+# a result is an OrderedDict of tables, each an OrderedDict of sheet name -> DataFrame (dates x compartments),
+# written to one file per table in the selected output_format:
+# 'xlsx' - one workbook per table with a sheet per species, the unit in cell A1, written in a single pass
+# 'parquet', 'feather' - one file per sheet, the unit in the schema metadata (needs pyarrow)
+# 'hdf5' - one file per table with a key per sheet, the unit as an attribute of each key (needs PyTables)
+# 'netcdf' - one file per table with a variable per sheet, the unit as the variable's units attribute (needs xarray)
+# the columnar formats are read back much faster than the workbooks and keep the full float precision
+
+output_formats = ('xlsx', 'parquet', 'feather', 'hdf5', 'netcdf')
+
+file_extensions = {'xlsx': '.xlsx', 'parquet': '.parquet', 'feather': '.feather', 'hdf5': '.h5', 'netcdf': '.nc'}
+
+
+def check_output_format(output_format):
+    if output_format not in output_formats:
+        raise ValueError("output_format needs to be one of %s" % ', '.join(output_formats))
+
+
+# figures drawn next to the tables by GenerateResult.store_output
+# 'none' - only the tables, for batch runs
+# 'summary' - the releases, the heatmap of the bulk compartments and the bulk concentrations of the whole chemical
+# 'all' - every figure of the species, bulk compartments and subcompartments
+plot_policies = ('none', 'summary', 'all')
+
+
+def check_plot_policy(plots):
+    if plots not in plot_policies:
+        raise ValueError("plots needs to be one of %s" % ', '.join(plot_policies))
+
+
+def optional_module(name, output_format):
+    # the libraries of the columnar formats are optional dependencies, imported when a file is written
+    import importlib
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        raise ImportError("output_format '%s' needs the %s package" % (output_format, name.split('.')[0]))
+
+
+def sheet_key(sheet):
+    # sheet names such as 'free nano' as file, key and variable names
+    return sheet.replace(' ', '_')
+
+
+def summary_table(table):
+    # the summary tables of result_stream are named '<table>_summary'
+    return table.endswith('_summary')
+
+
+def row_dimension(table):
+    # name of the row dimension of a table in the NetCDF files, the days of the results or the statistics of the
+    # summary tables
+    if summary_table(table):
+        return 'statistic'
+    return 'date'
+
+
+def column_dimension(table, sheet):
+    # name of the column dimension of a sheet in the NetCDF files, not the name of a sheet (the process table has
+    # a single sheet 'process'); a summary table takes the dimension of its table
+    if summary_table(table):
+        table = table[:-len('_summary')]
+    if table == 'process':
+        return 'process_name'
+    if sheet.endswith('_sub'):
+        return 'subcompartment'
+    return 'compartment'
+
+
+def write_tables(tables, units, output_file_path, file_name, output_format='xlsx'):
+    # write every table of tables (e.g. 'chem_conc', 'chem_mass', 'process') with its unit from units
+    # returns the paths of the written files
+    check_output_format(output_format)
+    writer = {'xlsx': write_xlsx, 'parquet': write_arrow, 'feather': write_arrow, 'hdf5': write_hdf5,
+              'netcdf': write_netcdf}[output_format]
+    paths = []
+    for table, sheets in tables.items():
+        base = os.path.join(output_file_path, table + '_' + file_name)
+        paths.extend(writer(base, table, sheets, units[table], output_format))
+    return paths
+
+
+def write_xlsx(base, table, sheets, unit, output_format='xlsx'):
+    # all sheets and the unit in cell A1 in a single save of the workbook
+    import pandas as pd
+    path = base + file_extensions['xlsx']
+    writer = pd.ExcelWriter(path, engine='openpyxl')
+    try:
+        for sheet, df in sheets.items():
+            df.to_excel(writer, sheet_name=sheet)
+            writer.sheets[sheet]['A1'] = unit
+    finally:
+        writer.close()
+    return [path]
+
+
+def write_arrow(base, table, sheets, unit, output_format):
+    pa = optional_module('pyarrow', output_format)
+    if output_format == 'parquet':
+        arrow_io = optional_module('pyarrow.parquet', output_format)
+        write = arrow_io.write_table
+    else:
+        arrow_io = optional_module('pyarrow.feather', output_format)
+        write = arrow_io.write_feather
+    paths = []
+    for sheet, df in sheets.items():
+        path = base + '_' + sheet_key(sheet) + file_extensions[output_format]
+        arrow_table = pa.Table.from_pandas(df.rename_axis('date').reset_index(), preserve_index=False)
+        metadata = dict(arrow_table.schema.metadata or {})
+        metadata[b'units'] = unit.encode('utf-8')
+        metadata[b'chemfate'] = json.dumps({'table': table, 'sheet': sheet, 'units': unit}).encode('utf-8')
+        write(arrow_table.replace_schema_metadata(metadata), path)
+        paths.append(path)
+    return paths
+
+
+def write_hdf5(base, table, sheets, unit, output_format='hdf5'):
+    import pandas as pd
+    optional_module('tables', output_format)
+    path = base + file_extensions['hdf5']
+    with pd.HDFStore(path, mode='w') as store:
+        for sheet, df in sheets.items():
+            key = sheet_key(sheet)
+            store.put(key, df.rename_axis('date'), format='fixed')
+            attrs = store.get_storer(key).attrs
+            attrs.units = unit
+            attrs.sheet = sheet
+    return [path]
+
+
+def write_netcdf(base, table, sheets, unit, output_format='netcdf'):
+    xr = optional_module('xarray', output_format)
+    path = base + file_extensions['netcdf']
+    data_vars = OrderedDict()
+    coords = OrderedDict()
+    row_dim = row_dimension(table)
+    for sheet, df in sheets.items():
+        dim = column_dimension(table, sheet)
+        coords[row_dim] = list(df.index)
+        coords[dim] = list(df.columns)
+        data_vars[sheet_key(sheet)] = ((row_dim, dim), df.values, {'units': unit, 'long_name': sheet})
+    dataset = xr.Dataset(data_vars, coords=coords, attrs={'table': table})
+    dataset.to_netcdf(path)
+    return [path]
@@ -0,0 +1,141 @@
+import os
+import numpy as np
+from collections import OrderedDict
+
+from result_export import optional_module, sheet_key, write_tables
+
+
+# on-disk store of the daily result tables of a run that is advanced block by block (see model_solver.day_blocks)
+# every block of days is appended to the store as soon as it is solved, and the mean, minimum, maximum and final
+# value of every column are accumulated on the way, so the memory of a run does not grow with its horizon
+# 'csv' - one file per sheet, the unit in the header of the date column as in cell A1 of the workbooks
+# 'hdf5' - one file per table with an appendable table per sheet, the unit as an attribute (needs PyTables)
+# 'parquet' - one file per sheet written as one row group per block, the unit in the schema metadata (needs pyarrow)
+
+stream_formats = ('csv', 'hdf5', 'parquet')
+
+stream_extensions = {'csv': '.csv', 'hdf5': '.h5', 'parquet': '.parquet'}
+
+summary_statistics = ['mean', 'min', 'max', 'final']
+
+
+def check_stream_format(stream_format):
+    if stream_format not in stream_formats:
+        raise ValueError("stream_format needs to be one of %s" % ', '.join(stream_formats))
+
+
+class RunningSummary:
+    # mean, minimum, maximum and final value of every column over the days appended so far
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.days = 0
+        self.total = np.zeros(len(self.columns))
+        self.minimum = np.full(len(self.columns), np.inf)
+        self.maximum = np.full(len(self.columns), -np.inf)
+        self.final = np.zeros(len(self.columns))
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        if len(values) == 0:
+            return
+        self.days += len(values)
+        self.total += values.sum(axis=0)
+        self.minimum = np.minimum(self.minimum, values.min(axis=0))
+        self.maximum = np.maximum(self.maximum, values.max(axis=0))
+        self.final = values[-1].copy()
+
+    def table(self):
+        import pandas as pd
+        return pd.DataFrame([self.total / max(self.days, 1), self.minimum, self.maximum, self.final],
+                            index=summary_statistics, columns=self.columns)
+
+
+class ResultStream:
+    # tables are named as in result_export.write_tables ('chem_conc', 'chem_mass', 'process'), units maps each
+    # table to its unit; append() takes a block of a sheet as a DataFrame of dates x columns
+
+    def __init__(self, output_file_path, file_name, units, stream_format='csv'):
+        check_stream_format(stream_format)
+        self.output_file_path = output_file_path
+        self.file_name = file_name
+        self.units = units
+        self.stream_format = stream_format
+        self.summaries = OrderedDict()
+        self.paths = []
+        # open writers: HDF stores per table, Parquet writers per sheet
+        self.writers = OrderedDict()
+
+    def path(self, table, sheet=None):
+        base = os.path.join(self.output_file_path, table + '_' + self.file_name)
+        if sheet is not None:
+            base = base + '_' + sheet_key(sheet)
+        return base + stream_extensions[self.stream_format]
+
+    def append(self, table, sheet, df):
+        summaries = self.summaries.setdefault(table, OrderedDict())
+        first = sheet not in summaries
+        if first:
+            summaries[sheet] = RunningSummary(df.columns)
+        summaries[sheet].update(df.values)
+
+        unit = self.units[table]
+        if self.stream_format == 'csv':
+            path = self.path(table, sheet)
+            if first:
+                df.to_csv(path, index_label=unit)
+                self.paths.append(path)
+            else:
+                df.to_csv(path, mode='a', header=False)
+        elif self.stream_format == 'hdf5':
+            self.append_hdf5(table, sheet, df, unit, first)
+        else:
+            self.append_parquet(table, sheet, df, unit, first)
+
+    def append_hdf5(self, table, sheet, df, unit, first):
+        import pandas as pd
+        if table not in self.writers:
+            optional_module('tables', self.stream_format)
+            path = self.path(table)
+            self.writers[table] = pd.HDFStore(path, mode='w')
+            self.paths.append(path)
+        store = self.writers[table]
+        key = sheet_key(sheet)
+        store.append(key, df.rename_axis('date'), format='table')
+        if first:
+            attrs = store.get_storer(key).attrs
+            attrs.units = unit
+            attrs.sheet = sheet
+
+    def append_parquet(self, table, sheet, df, unit, first):
+        import json
+        pa = optional_module('pyarrow', self.stream_format)
+        pq = optional_module('pyarrow.parquet', self.stream_format)
+        arrow_table = pa.Table.from_pandas(df.rename_axis('date').reset_index(), preserve_index=False)
+        if first:
+            metadata = dict(arrow_table.schema.metadata or {})
+            metadata[b'units'] = unit.encode('utf-8')
+            metadata[b'chemfate'] = json.dumps({'table': table, 'sheet': sheet, 'units': unit}).encode('utf-8')
+            path = self.path(table, sheet)
+            self.writers[(table, sheet)] = pq.ParquetWriter(path, arrow_table.schema.with_metadata(metadata))
+            self.paths.append(path)
+        writer = self.writers[(table, sheet)]
+        writer.write_table(arrow_table.replace_schema_metadata(writer.schema.metadata))
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = OrderedDict()
+
+    def summary_tables(self):
+        # summary statistics of every sheet, as tables named '<table>_summary' for result_export.write_tables
+        tables = OrderedDict()
+        for table, summaries in self.summaries.items():
+            tables[table + '_summary'] = OrderedDict((sheet, summary.table()) for sheet, summary in summaries.items())
+        return tables
+
+    def write_summaries(self, output_format='xlsx'):
+        # the summary tables in one of the result_export output formats, returns the written paths
+        tables = self.summary_tables()
+        units = dict((table + '_summary', unit) for table, unit in self.units.items())
+        return write_tables(tables, units, self.output_file_path, self.file_name, output_format)
@@ -19,6 +19,14 @@ region_file = CUR_PATH + './Input/Region.xlsx'
 release_file = CUR_PATH + './Input/ChemRelease.xlsx'
 run_option = 1 # can be 1 or 2:
 bgPercOption2 = 10 # can be anywhere between 0-100
+solver_mode = 'vode' # 'vode', 'lsoda', 'radau', 'bdf', 'continuous' (single integration over all days), 'exact' (matrix exponential per day), 'steady' (Level III steady state) or 'propagator' (cached daily matrices of 'exact', for release scenarios), the last three not used for nanoFate
+solver_preset = 'default' # 'fast', 'default' or 'accurate' integrator tolerances
+process_output = 'snapshot' # 'snapshot' (process rates at the end of each day) or 'integrated' (mass moved during each day)
+output_format = 'xlsx' # 'xlsx', 'parquet', 'feather', 'hdf5' or 'netcdf' files of the result tables
+stream_days = None # None keeps all days in memory, or days per block appended to the stream files (long simulations)
+stream_format = 'csv' # 'csv', 'hdf5' or 'parquet' stream files when stream_days is set
+plots = 'all' # 'none', 'summary' (releases, heatmap and total bulk concentrations) or 'all' figures
+plot_workers = None # processes drawing the figures, None for one per CPU or 1 to draw them in this process
 file_name = 'test_run' # pyrimethanil, cyprodinil, copper, nanoCopper
 output_file_path = CUR_PATH + './Output/' + file_name + '/'
 
@@ -30,7 +38,11 @@ start_date = '2005 1 1'
 end_date = '2014 12 31'
 
 
-model = Model_SetUp(start_date, end_date, run_option, bgPercOption2,
-                    chem_type, chem_file, region_file, release_file, output_file_path, file_name)
-model.run_model()
+# the figures are drawn in worker processes, which import this script again on platforms that spawn them
+if __name__ == '__main__':
+    model = Model_SetUp(start_date, end_date, run_option, bgPercOption2,
+                        chem_type, chem_file, region_file, release_file, output_file_path, file_name, solver_mode,
+                        solver_preset, process_output, output_format, stream_days, stream_format, plots,
+                        plot_workers)
+    model.run_model()
 
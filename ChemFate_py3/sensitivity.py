@@ -0,0 +1,318 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+from collections import OrderedDict
+import numpy as np
+
+from result_export import write_tables
+from input_cache import input_key, load_inputs, save_inputs, source_digest, model_modules
+from monte_carlo import check_run_options, model_inputs, parameter_list, parameter_values, pool_results, \
+    read_config, realization
+
+
+# global sensitivity of the concentrations of every compartment to the chemical properties and environmental
+# parameters listed with a distribution (as in monte_carlo), for the organic, ionizable and metal models
+# usage, from the ChemFate_py3 folder like run_ChemFate.py:
+#     python sensitivity.py sensitivity.yaml [--workers 4]
+# the configuration holds the inputs and distributions as for monte_carlo, and the options of Sensitivity
+# method 'morris' - elementary effects of Morris (1991) trajectories on a grid of levels, reported as mu, mu_star
+#   (the mean of the absolute effects) and sigma for every parameter; trajectories * (parameters + 1) runs
+# method 'sobol' - first order (S1) and total order (ST) indices from the Saltelli (2010) design of a scrambled
+#   Sobol sequence of samples points, with the Jansen estimator of ST and bootstrap 95% intervals (S1_conf,
+#   ST_conf); samples * (parameters + 2) runs
+# the designs are drawn on the unit hypercube and mapped to the parameters through the inverse of their
+# distributions (see monte_carlo.parameter_values), the elementary effects are per unit of that hypercube
+# every run gives one value per compartment of each sheet of the concentration table: the statistic ('mean',
+# 'final' or 'max' over the days) of its daily concentrations; solver_mode 'exact' (default) follows the daily
+# series with the exact propagators of the linear models, 'steady' solves the Level III steady state of the mean of
+# the daily systems once per run
+# the runs are sent to the workers in batches of batch_size, and the outputs of the finished batches are kept in
+# the input_cache under the inputs, model code, options and design, so an interrupted or repeated analysis only
+# runs what is missing
+# results: table 'sa_morris' or 'sa_sobol' with a sheet per species and index (parameters x compartments), and
+# table 'sa_samples' with the parameters of every run
+
+methods = ('morris', 'sobol')
+
+output_statistics = ('mean', 'final', 'max')
+
+# options of Sensitivity and their defaults
+config_options = OrderedDict([('file_name', 'sensitivity'), ('output_file_path', None), ('method', 'morris'),
+                              ('trajectories', 20), ('levels', 4), ('samples', 256), ('bootstrap', 100),
+                              ('seed', None), ('statistic', 'mean'), ('solver_mode', 'exact'),
+                              ('solver_preset', 'default'), ('output_format', 'xlsx'), ('workers', None),
+                              ('batch_size', 16), ('use_cache', True)])
+
+# modules that turn the parameters of a run into its outputs, besides the models (input_cache.model_modules)
+run_modules = ['model_setup', 'generate_result', 'monte_carlo', 'sensitivity']
+
+# seconds between two saves of the finished batches
+checkpoint_seconds = 30.0
+
+
+def morris_design(k, trajectories, levels, rng):
+    # points of the unit hypercube, (trajectories * (k + 1)) x k; every trajectory starts at a random point of the
+    # grid of levels and moves one parameter at a time, in random order and direction, by
+    # delta = levels / (2 * (levels - 1))
+    delta = levels / (2.0 * (levels - 1))
+    steps = np.tril(np.ones((k + 1, k)), -1)
+    points = []
+    for _ in range(trajectories):
+        start = rng.integers(0, levels // 2, k) / (levels - 1.0)
+        signs = rng.choice([-1.0, 1.0], k)
+        order = rng.permutation(k)
+        trajectory = start + delta / 2.0 * ((2.0 * steps - 1.0) * signs + 1.0)
+        points.append(trajectory[:, order])
+    return np.vstack(points)
+
+
+def morris_effects(design, outputs, trajectories, k):
+    # elementary effects, trajectories x k x outputs, from the consecutive points of every trajectory
+    effects = np.zeros((trajectories, k, outputs.shape[1]))
+    for t in range(trajectories):
+        rows = slice(t * (k + 1), (t + 1) * (k + 1))
+        x = design[rows]
+        y = outputs[rows]
+        dx = np.diff(x, axis=0)
+        moved = np.argmax(np.abs(dx), axis=1)
+        step = dx[np.arange(k), moved]
+        effects[t, moved] = np.diff(y, axis=0) / step[:, None]
+    return effects
+
+
+def saltelli_design(k, samples, seed):
+    # points of the unit hypercube, samples * (k + 2) x k: the matrices A and B of a scrambled Sobol sequence, then
+    # A with column i taken from B for every parameter i
+    from scipy.stats import qmc
+    base = qmc.Sobol(d=2 * k, scramble=True, seed=seed).random(samples)
+    A = base[:, :k]
+    B = base[:, k:]
+    blocks = [A, B]
+    for i in range(k):
+        AB = A.copy()
+        AB[:, i] = B[:, i]
+        blocks.append(AB)
+    return np.vstack(blocks)
+
+
+def sobol_indices(outputs, samples, k):
+    # first order and total order indices, k x outputs, of the outputs of a saltelli_design
+    fA = outputs[:samples]
+    fB = outputs[samples:2 * samples]
+    fAB = outputs[2 * samples:].reshape(k, samples, -1)
+    variance = np.var(np.concatenate([fA, fB]), axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        first = np.mean(fB * (fAB - fA), axis=1) / variance
+        total = 0.5 * np.mean((fA - fAB) ** 2, axis=1) / variance
+    return first, total
+
+
+def run_outputs(batch):
+    # statistic of the daily concentrations of every compartment for the runs of a batch, in a worker of
+    # monte_carlo.pool_results; batch is (first row, statistic, list of draws), returns (first row, labels, values)
+    first, statistic, rows = batch
+    labels = []
+    values = []
+    for draws in rows:
+        sheets = realization(draws)
+        row = []
+        labels = []
+        for sheet, df in sheets.items():
+            concentrations = np.asarray(df.values, dtype=float)
+            if statistic == 'mean':
+                row.append(concentrations.mean(axis=0))
+            elif statistic == 'final':
+                row.append(concentrations[-1])
+            else:
+                row.append(concentrations.max(axis=0))
+            labels.extend((sheet, column) for column in df.columns)
+        values.append(np.concatenate(row))
+    return first, labels, np.array(values)
+
+
+class Sensitivity:
+
+    def __init__(self, start_date, end_date, chem_type, chem_file, region_file, release_file, output_file_path,
+                 file_name, chem_distributions=None, env_distributions=None, method='morris', trajectories=20,
+                 levels=4, samples=256, bootstrap=100, seed=None, statistic='mean', solver_mode='exact',
+                 solver_preset='default', output_format='xlsx', workers=None, batch_size=16, use_cache=True):
+        # chem_distributions and env_distributions map parameter names to their distribution, as for MonteCarlo
+        # levels of the Morris grid needs to be even; samples of the Sobol design is best a power of 2
+        # workers None uses one worker per CPU, use_cache keeps the outputs of the finished batches
+        check_run_options(chem_type, solver_mode, output_format)
+        if method not in methods:
+            raise ValueError("method needs to be one of %s" % ', '.join(methods))
+        if statistic not in output_statistics:
+            raise ValueError("statistic needs to be one of %s" % ', '.join(output_statistics))
+        if levels < 2 or levels % 2:
+            raise ValueError('levels needs to be an even number')
+        if trajectories < 2 or samples < 2:
+            raise ValueError('trajectories and samples need to be at least 2')
+        self.start_date = start_date
+        self.end_date = end_date
+        self.chem_type = chem_type
+        self.chem_file = chem_file
+        self.region_file = region_file
+        self.release_file = release_file
+        self.output_file_path = output_file_path
+        self.file_name = file_name
+        self.chem_distributions = chem_distributions or {}
+        self.env_distributions = env_distributions or {}
+        self.method = method
+        self.trajectories = trajectories
+        self.levels = levels
+        self.samples = samples
+        self.bootstrap = bootstrap
+        self.seed = seed
+        self.statistic = statistic
+        self.solver_mode = solver_mode
+        self.solver_preset = solver_preset
+        self.output_format = output_format
+        self.workers = workers
+        self.batch_size = batch_size
+        self.use_cache = use_cache
+
+    def design(self, k):
+        # points of the unit hypercube of the method
+        if self.method == 'morris':
+            return morris_design(k, self.trajectories, self.levels, np.random.default_rng(self.seed))
+        return saltelli_design(k, self.samples, self.seed)
+
+    def cache_key(self, parameters, values):
+        # the outputs depend on the input files, the model code, the run options and the parameter values of every
+        # run
+        file_list = [self.chem_file, self.region_file, self.release_file, './IonizableChem_helper.json']
+        if self.chem_type == 'IonizableOrganic':
+            import ionizable_db
+            file_list.append(ionizable_db.db_file)
+        design = hashlib.sha256(np.ascontiguousarray(values).tobytes()).hexdigest()
+        return input_key(file_list, 'sensitivity', self.chem_type, self.start_date, self.end_date, self.solver_mode,
+                         self.solver_preset, self.statistic, [name for group, name in parameters], design,
+                         source_digest(model_modules + run_modules))
+
+    def evaluate(self, inputs, parameters, values):
+        # outputs of every run (runs x outputs) and their (sheet, compartment) labels
+        runs = len(values)
+        key = self.cache_key(parameters, values) if self.use_cache else None
+        labels, outputs, done = None, None, np.zeros(runs, dtype=bool)
+        cached = load_inputs(key) if key is not None else None
+        if cached is not None:
+            labels = [tuple(label) for label in json.loads(cached[0])]
+            outputs, done = cached[1], cached[2].astype(bool)
+
+        batches = []
+        missing = np.flatnonzero(~done)
+        for start in range(0, len(missing), self.batch_size):
+            rows = missing[start:start + self.batch_size]
+            batches.append((rows, (int(rows[0]), self.statistic,
+                                   [list(zip(parameters, values[row].tolist())) for row in rows])))
+        if not batches:
+            return labels, outputs
+
+        workers = self.workers
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = max(1, min(workers, len(batches)))
+
+        saved = time.time()
+        rows_of = dict((batch[1][0], batch[0]) for batch in batches)
+        results = pool_results(run_outputs, inputs, [batch for rows, batch in batches], workers)
+        for n, (first, batch_labels, batch_outputs) in enumerate(results):
+            if outputs is None:
+                labels = batch_labels
+                outputs = np.zeros((runs, len(labels)))
+            rows = rows_of[first]
+            outputs[rows] = batch_outputs
+            done[rows] = True
+            print('batch %d of %d' % (n + 1, len(batches)))
+            if key is not None and (time.time() - saved > checkpoint_seconds or done.all()):
+                save_inputs(key, (json.dumps(labels), outputs, done))
+                saved = time.time()
+        return labels, outputs
+
+    def indices(self, design, outputs, k):
+        # sensitivity measures of the method, OrderedDict of name -> k x outputs
+        if self.method == 'morris':
+            effects = morris_effects(design, outputs, self.trajectories, k)
+            return OrderedDict([('mu_star', np.abs(effects).mean(axis=0)), ('mu', effects.mean(axis=0)),
+                                ('sigma', effects.std(axis=0, ddof=1))])
+        first, total = sobol_indices(outputs, self.samples, k)
+        measures = OrderedDict([('S1', first), ('S1_conf', None), ('ST', total), ('ST_conf', None)])
+        if self.bootstrap:
+            # 95% intervals from the indices of the designs resampled by rows of A, B and every AB
+            rng = np.random.default_rng(self.seed)
+            n = self.samples
+            blocks = outputs.reshape(k + 2, n, -1)
+            resampled_first = []
+            resampled_total = []
+            for _ in range(self.bootstrap):
+                rows = rng.integers(0, n, n)
+                f, t = sobol_indices(blocks[:, rows].reshape(-1, outputs.shape[1]), n, k)
+                resampled_first.append(f)
+                resampled_total.append(t)
+            measures['S1_conf'] = 1.96 * np.std(resampled_first, axis=0)
+            measures['ST_conf'] = 1.96 * np.std(resampled_total, axis=0)
+        else:
+            del measures['S1_conf'], measures['ST_conf']
+        return measures
+
+    def run(self):
+        # run the design and write the sensitivity measures and the parameters of the runs, returns the tables
+        import pandas as pd
+        inputs = model_inputs(self.start_date, self.end_date, self.chem_type, self.chem_file, self.region_file,
+                              self.release_file, self.solver_mode, self.solver_preset)
+        listed = parameter_list(self.chem_distributions, self.env_distributions, inputs['raw_chem'],
+                                inputs['raw_env'])
+        k = len(listed)
+        design = self.design(k)
+        values = np.column_stack([parameter_values(name, spec, base, design[:, i])
+                                  for i, (group, name, spec, base) in enumerate(listed)])
+        parameters = [(group, name) for group, name, spec, base in listed]
+        names = [name for group, name in parameters]
+
+        labels, outputs = self.evaluate(inputs, parameters, values)
+        measures = self.indices(design, outputs, k)
+
+        # one sheet per species and measure, parameters x compartments
+        sheets = OrderedDict()
+        species = list(OrderedDict.fromkeys(sheet for sheet, column in labels))
+        for sheet in species:
+            columns = [j for j, label in enumerate(labels) if label[0] == sheet]
+            for measure, array in measures.items():
+                sheets['%s %s' % (sheet, measure)] = pd.DataFrame(array[:, columns], index=names,
+                                                                  columns=[labels[j][1] for j in columns])
+        samples_df = pd.DataFrame(values, index=pd.Index(np.arange(1, len(values) + 1), name='run'), columns=names)
+        table = 'sa_' + self.method
+        tables = OrderedDict([(table, sheets), ('sa_samples', OrderedDict([('samples', samples_df)]))])
+        units = {table: 'g/L' if self.method == 'morris' else '-', 'sa_samples': 'input units'}
+        if not os.path.exists(self.output_file_path):
+            os.makedirs(self.output_file_path)
+        write_tables(tables, units, self.output_file_path, self.file_name, self.output_format)
+        return tables
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ChemFate global sensitivity analysis (Morris or Sobol)')
+    parser.add_argument('config', help='YAML or JSON file with the inputs, options and parameter distributions')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes, one per CPU by default')
+    parser.add_argument('--method', choices=methods, default=None, help='overrides method of the config')
+    parser.add_argument('--no-cache', action='store_true', help='run every batch, without the cached outputs')
+    args = parser.parse_args()
+
+    arguments = read_config(args.config, config_options)
+    if args.workers is not None:
+        arguments['workers'] = args.workers
+    if args.method is not None:
+        arguments['method'] = args.method
+    if args.no_cache:
+        arguments['use_cache'] = False
+    arguments['output_file_path'] = os.path.join(arguments['output_file_path'], '')
+    Sensitivity(**arguments).run()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
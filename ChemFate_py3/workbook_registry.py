@@ -0,0 +1,73 @@
+import os
+import xlrd
+import numpy as np
+
+
+# input workbooks shared by the loaders of one run: every file is opened (and decoded) once and every column
+# that is read is converted once to a numpy array, the loaders then only slice the cached columns
+# numeric columns (all cells numbers, dates or booleans) are float arrays, columns with text or empty cells
+# are object arrays holding the same Python values as xlrd's col_values
+
+
+class SheetColumns(object):
+    def __init__(self, sheet):
+        self.sheet = sheet
+        self.name = sheet.name
+        self.nrows = sheet.nrows
+        self.ncols = sheet.ncols
+        self.columns = {}
+
+    def column(self, colx, start_rowx=0, end_rowx=None):
+        # cells start_rowx:end_rowx of column colx, same range convention as xlrd's col_values
+        key = (colx, start_rowx, end_rowx)
+        if key not in self.columns:
+            values = self.sheet.col_values(colx, start_rowx=start_rowx, end_rowx=end_rowx)
+            types = self.sheet.col_types(colx, start_rowx=start_rowx, end_rowx=end_rowx)
+            if all(t in (xlrd.XL_CELL_NUMBER, xlrd.XL_CELL_DATE, xlrd.XL_CELL_BOOLEAN) for t in types):
+                array = np.array(values, dtype=float)
+            else:
+                array = np.empty(len(values), dtype=object)
+                array[:] = values
+            array.flags.writeable = False
+            self.columns[key] = array
+        return self.columns[key]
+
+    def columns_block(self, start_colx, end_colx, start_rowx=0, end_rowx=None):
+        # numeric columns start_colx:end_colx as one (rows x columns) float array
+        return np.column_stack([self.column(colx, start_rowx, end_rowx).astype(float)
+                                for colx in range(start_colx, end_colx)])
+
+    def row(self, rowx, start_colx=0, end_colx=None):
+        return self.sheet.row_values(rowx, start_colx=start_colx, end_colx=end_colx)
+
+    def cell(self, rowx, colx):
+        return self.sheet.cell_value(rowx=rowx, colx=colx)
+
+    def table(self, code_colx, value_colx, start_rowx):
+        # (code, value) pairs of a parameter sheet, the values keep their Python types
+        return zip(self.column(code_colx, start_rowx).tolist(), self.column(value_colx, start_rowx).tolist())
+
+
+class WorkbookRegistry(object):
+    def __init__(self):
+        self.workbooks = {}
+        self.sheets = {}
+
+    def workbook(self, filename):
+        key = os.path.abspath(filename)
+        if key not in self.workbooks:
+            self.workbooks[key] = xlrd.open_workbook(filename)
+        return self.workbooks[key]
+
+    def sheet(self, filename, sheetname):
+        key = (os.path.abspath(filename), sheetname)
+        if key not in self.sheets:
+            self.sheets[key] = SheetColumns(self.workbook(filename).sheet_by_name(sheetname))
+        return self.sheets[key]
+
+    def release_resources(self):
+        # drop the decoded workbooks once every loader is done
+        for workbook in self.workbooks.values():
+            workbook.release_resources()
+        self.workbooks = {}
+        self.sheets = {}